@@ -0,0 +1,37 @@
+"""
+Benchmark danh sách ứng viên kNN: so sánh total_distance theo time_limit khi
+không giới hạn cung và khi chỉ giữ cung tới k láng giềng gần nhất.
+Chạy từ thư mục backend:
+    python -m benchmarks.bench_candidate_lists --time-limits 5 10 20 --k 10 20
+"""
+import argparse
+
+from mdvrp_app.mdvrp_solver import MDVRPSolver
+from benchmarks.bench_decomposition import load_dataset
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--time-limits", type=int, nargs="+", default=[5, 10, 20])
+    parser.add_argument("--k", type=int, nargs="+", default=[10, 20])
+    parser.add_argument("--modes", nargs="+", default=["forbid", "penalize"])
+    parser.add_argument("--num-vehicles-per-depot", type=int, default=2)
+    args = parser.parse_args()
+
+    depots, customers = load_dataset()
+    configs = [(None, "-")] + [(k, mode) for k in args.k for mode in args.modes]
+
+    print(f"{'k':>4} {'mode':<9} " + " ".join(f"{f't={t}s':>10}" for t in args.time_limits))
+    for k, mode in configs:
+        solver = MDVRPSolver(depots, customers, args.num_vehicles_per_depot,
+                             neighbors_k=k, candidate_mode=mode)
+        distances = []
+        for time_limit in args.time_limits:
+            result = solver.strategy_1_cheapest_arc_gls(time_limit)
+            distances.append(f"{result['total_distance']:>10.2f}" if result['status'] == 'success'
+                             else f"{'failed':>10}")
+        print(f"{k or 'all':>4} {mode:<9} " + " ".join(distances))
+
+
+if __name__ == "__main__":
+    main()
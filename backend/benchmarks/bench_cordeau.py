@@ -0,0 +1,342 @@
+"""
+Bộ benchmark MDVRP chuẩn (định dạng Cordeau p01-p23) so với lời giải tốt nhất đã biết (BKS)
+- Đọc file instance từ thư mục cục bộ (không kèm theo repo): --instances-dir hoặc MDVRP_CORDEAU_DIR,
+  tên file p01 .. p23 (có hoặc không có đuôi .txt / .dat)
+- Chạy các chiến lược x hậu tối ưu x seed với cùng time_limit; mỗi lần chạy trong 1 process mới
+  (spawn) để đo bộ nhớ đỉnh (ru_maxrss) riêng từng lần
+- Ghi tổng quãng đường, gap so với BKS, thời gian đạt mục tiêu (BKS * (1 + target_gap%)),
+  bộ nhớ đỉnh, tính khả thi (tải / giới hạn độ dài route) ra file JSON
+- --baseline: so với file kết quả lần trước, báo hồi quy (gap / thời gian đạt mục tiêu / bộ nhớ),
+  thoát với mã 1 nếu có hồi quy
+Chạy từ thư mục backend:
+    python -m benchmarks.bench_cordeau --instances p01 p02 --strategies strategy1 strategy4 \\
+        --post none 2opt --time-limit 10 --seeds 0 1 --baseline benchmarks/results/cordeau_base.json
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+DEFAULT_INSTANCES_DIR = os.environ.get(
+    "MDVRP_CORDEAU_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "instances", "cordeau")
+)
+DEFAULT_RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+# Lời giải tốt nhất đã biết (khoảng cách Euclid thực, không làm tròn)
+BEST_KNOWN = {
+    "p01": 576.87, "p02": 473.53, "p03": 641.19, "p04": 1001.04, "p05": 750.03, "p06": 876.50,
+    "p07": 881.97, "p08": 4372.78, "p09": 3858.66, "p10": 3631.11, "p11": 3546.06, "p12": 1318.95,
+    "p13": 1318.95, "p14": 1360.12, "p15": 2505.42, "p16": 2572.23, "p17": 2709.09, "p18": 3702.85,
+    "p19": 3827.06, "p20": 4058.07, "p21": 5474.84, "p22": 5702.16, "p23": 6078.75,
+}
+
+STRATEGY_METHODS = {
+    "strategy1": "strategy_1_cheapest_arc_gls",
+    "strategy2": "strategy_2_constrained_sa",
+    "strategy3": "strategy_3_nearest_neighbor_tabu",
+    "strategy4": "strategy_4_depot_decomposition",
+    "strategy5": "strategy_5_ruin_recreate_lns",
+}
+
+# Sai số khi kiểm tra tải / độ dài route (toạ độ Cordeau có 2-3 chữ số)
+FEASIBILITY_TOLERANCE = 1e-6
+
+
+# ----------------------------------------------------------------------
+# Đọc instance
+# ----------------------------------------------------------------------
+def find_instance(instances_dir, name):
+    for candidate in (name, f"{name}.txt", f"{name}.dat", name.upper(), f"{name.upper()}.txt"):
+        path = os.path.join(instances_dir, candidate)
+        if os.path.isfile(path):
+            return path
+    raise FileNotFoundError(f"Instance {name} not found in {instances_dir}")
+
+
+def load_cordeau(path):
+    """
+    File Cordeau MDVRP (type 2):
+      dòng 1: type m n t  (m xe / depot, n khách hàng, t depot)
+      t dòng: D Q         (độ dài route tối đa, 0 = không giới hạn; tải trọng xe)
+      n dòng: i x y d q ... (khách hàng: toạ độ, thời gian phục vụ d, nhu cầu q)
+      t dòng: i x y ...    (depot)
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        lines = [line.split() for line in f if line.strip()]
+    problem_type, m, n, t = (int(value) for value in lines[0][:4])
+    if problem_type != 2:
+        raise ValueError(f"{path}: not an MDVRP instance (type {problem_type})")
+    limits = [(float(row[0]), int(float(row[1]))) for row in lines[1:1 + t]]
+    customer_rows = lines[1 + t:1 + t + n]
+    depot_rows = lines[1 + t + n:1 + t + n + t]
+    if len(customer_rows) != n or len(depot_rows) != t:
+        raise ValueError(f"{path}: truncated instance")
+
+    max_durations = {duration for duration, _ in limits}
+    return {
+        "name": os.path.splitext(os.path.basename(path))[0].lower(),
+        "vehicles_per_depot": m,
+        "depots": [(float(row[1]), float(row[2])) for row in depot_rows],
+        "customers": [(float(row[1]), float(row[2])) for row in customer_rows],
+        "service_times": [float(row[3]) for row in customer_rows],
+        "demands": [int(float(row[4])) for row in customer_rows],
+        "capacities": [capacity for _, capacity in limits],
+        # Các depot trong bộ Cordeau dùng chung 1 giới hạn độ dài route
+        "max_route_duration": max(max_durations) if max(max_durations) > 0 else None,
+    }
+
+
+def check_feasibility(instance, routes, distance_matrix):
+    """Kiểm tra lại tải trọng và độ dài route trên quãng đường thật (hậu tối ưu không biết giới hạn độ dài)"""
+    num_depots = len(instance["depots"])
+    m = instance["vehicles_per_depot"]
+    demands = [0] * num_depots + instance["demands"]
+    service = [0.0] * num_depots + instance["service_times"]
+    visited = []
+    violations = []
+    for route in routes:
+        nodes = route["nodes"]
+        customers = [node for node in nodes if node >= num_depots]
+        visited.extend(customers)
+        capacity = instance["capacities"][route["vehicle_id"] // m]
+        load = sum(demands[node] for node in customers)
+        if load > capacity:
+            violations.append(f"vehicle {route['vehicle_id']}: load {load} > {capacity}")
+        if instance["max_route_duration"]:
+            duration = distance_matrix.route_distance(nodes) + sum(service[node] for node in customers)
+            if duration > instance["max_route_duration"] + FEASIBILITY_TOLERANCE:
+                violations.append(f"vehicle {route['vehicle_id']}: duration {duration:.2f} "
+                                  f"> {instance['max_route_duration']}")
+    expected = set(range(num_depots, num_depots + len(instance["customers"])))
+    if sorted(visited) != sorted(expected):
+        violations.append(f"visited {len(set(visited))}/{len(expected)} customers, "
+                          f"{len(visited) - len(set(visited))} duplicates")
+    return violations
+
+
+# ----------------------------------------------------------------------
+# 1 lần chạy (trong process riêng)
+# ----------------------------------------------------------------------
+def _peak_rss_mb():
+    # Linux: ru_maxrss tính bằng KB, macOS: byte
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 ** 2 if sys.platform == "darwin" else 1024)
+
+
+def run_once(path, strategy, post, time_limit, seed, target_gap, termination=None):
+    from mdvrp_app import mdvrp_solver
+    from mdvrp_app.mdvrp_solver import MDVRPSolver
+
+    random.seed(seed)
+    np.random.seed(seed)
+    # Ghi nhận mọi lời giải cải thiện (không giãn cách) để đo thời gian đạt mục tiêu
+    mdvrp_solver.PROGRESS_INTERVAL = 0
+
+    instance = load_cordeau(path)
+    num_depots = len(instance["depots"])
+    m = instance["vehicles_per_depot"]
+    bks = BEST_KNOWN.get(instance["name"])
+    target = bks * (1 + target_gap / 100) if bks else None
+    baseline_rss = _peak_rss_mb()
+
+    solver = MDVRPSolver(
+        instance["depots"], instance["customers"], m,
+        vehicle_capacities=[capacity for capacity in instance["capacities"] for _ in range(m)],
+        demands=[0] * num_depots + instance["demands"],
+        service_times=[0.0] * num_depots + instance["service_times"],
+        max_route_duration=instance["max_route_duration"],
+    )
+    solver.termination = termination
+    trace = []
+    solver.on_solution = lambda update: trace.append((update["elapsed_time"], update["total_distance"]))
+
+    start_time = time.time()
+    result = getattr(solver, STRATEGY_METHODS[strategy])(time_limit)
+    if post != "none":
+        solver.post_optimize(result, post)
+    elapsed = time.time() - start_time
+
+    run = {
+        "instance": instance["name"], "strategy": strategy, "post": post, "seed": seed,
+        "time_limit": time_limit, "status": result.get("status"), "elapsed_time": round(elapsed, 3),
+        "best_known": bks, "peak_rss_mb": round(_peak_rss_mb(), 1),
+        "solve_rss_mb": round(_peak_rss_mb() - baseline_rss, 1),
+        "customers": len(instance["customers"]), "depots": num_depots,
+    }
+    if result.get("status") != "success":
+        run["message"] = result.get("message")
+        return run
+
+    distance = result["total_distance"]
+    time_to_target = None
+    if target is not None:
+        time_to_target = next((t for t, value in trace if value <= target), None)
+        # Chiến lược không báo lời giải trung gian (decomposition) hoặc đạt mục tiêu nhờ hậu tối ưu
+        if time_to_target is None and distance <= target:
+            time_to_target = elapsed
+    violations = check_feasibility(instance, result["routes"], solver.distance_matrix)
+    run.update({
+        "total_distance": round(distance, 2),
+        "gap": round((distance - bks) / bks * 100, 3) if bks else None,
+        "target": round(target, 2) if target else None,
+        "time_to_target": round(time_to_target, 3) if time_to_target is not None else None,
+        "num_routes": result["num_routes"],
+        "feasible": not violations,
+        "violations": violations[:5],
+        "improvements": len(trace),
+        "stop_reason": result.get("termination", {}).get("reason"),
+    })
+    return run
+
+
+# ----------------------------------------------------------------------
+# So sánh với lần chạy trước
+# ----------------------------------------------------------------------
+def run_key(run):
+    return run["instance"], run["strategy"], run["post"], run["seed"], run["time_limit"]
+
+
+def compare(runs, baseline_runs, gap_tolerance, time_tolerance, memory_tolerance):
+    """Danh sách hồi quy (chuỗi mô tả) của runs so với baseline_runs cùng khoá"""
+    baseline = {run_key(run): run for run in baseline_runs}
+    regressions = []
+    for run in runs:
+        old = baseline.get(run_key(run))
+        if old is None:
+            continue
+        label = "/".join(str(part) for part in run_key(run))
+        if old.get("status") == "success" and run.get("status") != "success":
+            regressions.append(f"{label}: no solution (was {old['total_distance']})")
+            continue
+        if run.get("status") != "success":
+            continue
+        if old.get("feasible") and not run.get("feasible"):
+            regressions.append(f"{label}: infeasible ({'; '.join(run['violations'])})")
+        if old.get("gap") is not None and run.get("gap") is not None \
+                and run["gap"] > old["gap"] + gap_tolerance:
+            regressions.append(f"{label}: gap {old['gap']:.2f}% -> {run['gap']:.2f}%")
+        old_ttt, new_ttt = old.get("time_to_target"), run.get("time_to_target")
+        if old_ttt is not None and new_ttt is None:
+            regressions.append(f"{label}: target no longer reached (was {old_ttt:.2f}s)")
+        elif old_ttt is not None and new_ttt > old_ttt * (1 + time_tolerance / 100) + 0.5:
+            regressions.append(f"{label}: time to target {old_ttt:.2f}s -> {new_ttt:.2f}s")
+        if old.get("solve_rss_mb") and run["solve_rss_mb"] > old["solve_rss_mb"] * (1 + memory_tolerance / 100) + 5:
+            regressions.append(f"{label}: solve memory {old['solve_rss_mb']:.0f}MB -> {run['solve_rss_mb']:.0f}MB")
+    return regressions
+
+
+def _metadata(args):
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    try:
+        import ortools
+        ortools_version = ortools.__version__
+    except (ImportError, AttributeError):
+        ortools_version = None
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "ortools": ortools_version,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "time_limit": args.time_limit,
+        "target_gap": args.target_gap,
+        "termination": args.termination,
+    }
+
+
+def _format(value, spec):
+    return format(value, spec) if value is not None else "-"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark MDVRP trên bộ instance Cordeau")
+    parser.add_argument("--instances-dir", default=DEFAULT_INSTANCES_DIR)
+    parser.add_argument("--instances", nargs="+", default=sorted(BEST_KNOWN))
+    parser.add_argument("--strategies", nargs="+", choices=sorted(STRATEGY_METHODS), default=["strategy1"])
+    parser.add_argument("--post", nargs="+", choices=["none", "2opt", "inter_route", "full"], default=["none"])
+    parser.add_argument("--time-limit", type=int, default=30)
+    parser.add_argument("--seeds", type=int, nargs="+", default=[0])
+    parser.add_argument("--target-gap", type=float, default=5.0, help="mục tiêu: BKS * (1 + gap%%)")
+    parser.add_argument("--termination", type=json.loads,
+                        help='tiêu chí dừng sớm dạng JSON, vd. \'{"stall_time": 5, "min_improvement": 0.001}\'')
+    parser.add_argument("--output", help="file JSON kết quả (mặc định benchmarks/results/cordeau_<thời gian>.json)")
+    parser.add_argument("--baseline", help="file kết quả lần trước để so sánh")
+    parser.add_argument("--gap-tolerance", type=float, default=0.5, help="gap tăng quá bao nhiêu điểm %% là hồi quy")
+    parser.add_argument("--time-tolerance", type=float, default=25.0,
+                        help="thời gian đạt mục tiêu tăng quá bao nhiêu %% là hồi quy")
+    parser.add_argument("--memory-tolerance", type=float, default=20.0,
+                        help="bộ nhớ khi giải tăng quá bao nhiêu %% là hồi quy")
+    args = parser.parse_args()
+
+    paths = {name: find_instance(args.instances_dir, name) for name in args.instances}
+    output = args.output or os.path.join(DEFAULT_RESULTS_DIR, f"cordeau_{time.strftime('%Y%m%d-%H%M%S')}.json")
+
+    runs = []
+    print(f"{'inst':<5} {'strategy':<10} {'post':<12} {'seed':>4} {'distance':>10} {'bks':>9} "
+          f"{'gap %':>7} {'ttt (s)':>8} {'time':>6} {'rss MB':>7} feasible")
+    context = multiprocessing.get_context("spawn")
+    for name, path in paths.items():
+        for strategy in args.strategies:
+            for post in args.post:
+                for seed in args.seeds:
+                    # 1 process / lần chạy: ru_maxrss chỉ phản ánh đúng lần chạy đó
+                    with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                        run = executor.submit(run_once, path, strategy, post, args.time_limit,
+                                              seed, args.target_gap, args.termination).result()
+                    runs.append(run)
+                    print(f"{name:<5} {strategy:<10} {post:<12} {seed:>4} {_format(run.get('total_distance'), '>10.2f')} "
+                          f"{_format(run['best_known'], '>9.2f')} {_format(run.get('gap'), '>7.2f')} "
+                          f"{_format(run.get('time_to_target'), '>8.2f')} {run['elapsed_time']:>6.1f} "
+                          f"{run['peak_rss_mb']:>7.0f} {run.get('feasible', run['status'])}")
+
+    successful = [run for run in runs if run.get("gap") is not None]
+    summary = {
+        "runs": len(runs),
+        "solved": len(successful),
+        "feasible": sum(1 for run in successful if run["feasible"]),
+        "mean_gap": round(sum(run["gap"] for run in successful) / len(successful), 3) if successful else None,
+        "reached_target": sum(1 for run in successful if run["time_to_target"] is not None),
+    }
+    report = {"meta": _metadata(args), "summary": summary, "runs": runs}
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(runs, baseline["runs"], args.gap_tolerance, args.time_tolerance,
+                              args.memory_tolerance)
+        report["baseline"] = {"path": args.baseline, "meta": baseline.get("meta"), "regressions": regressions}
+
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    print(f"\nSolved {summary['solved']}/{summary['runs']}, feasible {summary['feasible']}, "
+          f"mean gap {_format(summary['mean_gap'], '.2f')}%, "
+          f"reached target {summary['reached_target']}/{summary['solved']}")
+    print(f"Results: {output}")
+    if args.baseline:
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) vs {args.baseline}:")
+            for line in regressions:
+                print(f"  - {line}")
+            sys.exit(1)
+        print(f"No regressions vs {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
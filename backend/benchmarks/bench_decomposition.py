@@ -0,0 +1,74 @@
+"""
+Benchmark Strategy 4 (Depot Decomposition) so với Strategy 1-3
+- Bộ dữ liệu thật trong data/*.json
+- Các instance tổng hợp lớn hơn (toạ độ ngẫu nhiên trong khung bao của dữ liệu thật)
+Chạy từ thư mục backend:
+    python -m benchmarks.bench_decomposition --time-limit 30 --synthetic 50x2000 100x5000
+"""
+import argparse
+import json
+import os
+
+import numpy as np
+
+from mdvrp_app.mdvrp_solver import MDVRPSolver, BENCHMARK_STRATEGIES
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "data")
+
+STRATEGIES = BENCHMARK_STRATEGIES + [('strategy4', 'strategy_4_depot_decomposition')]
+
+
+def load_dataset():
+    with open(os.path.join(DATA_DIR, "depots.json"), encoding="utf-8") as f:
+        depots = [(d["latitude"], d["longitude"]) for d in json.load(f)]
+    with open(os.path.join(DATA_DIR, "customers.json"), encoding="utf-8") as f:
+        customers = [(c["latitude"], c["longitude"]) for c in json.load(f)]
+    return depots, customers
+
+
+def synthetic_instance(num_depots, num_customers, bounds, seed=42):
+    """Depot và khách hàng phân bố đều trong khung bao (lat_min, lat_max, lng_min, lng_max)"""
+    rng = np.random.default_rng(seed)
+    lat_min, lat_max, lng_min, lng_max = bounds
+
+    def points(n):
+        return list(zip(rng.uniform(lat_min, lat_max, n).tolist(),
+                        rng.uniform(lng_min, lng_max, n).tolist()))
+
+    return points(num_depots), points(num_customers)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--time-limit", type=int, default=30)
+    parser.add_argument("--num-vehicles-per-depot", type=int, default=2)
+    parser.add_argument("--synthetic", nargs="*", default=["50x2000"],
+                        help="Danh sách DEPOTSxCUSTOMERS cho instance tổng hợp")
+    parser.add_argument("--strategies", nargs="+", default=[sid for sid, _ in STRATEGIES])
+    args = parser.parse_args()
+
+    depots, customers = load_dataset()
+    coords = np.asarray(depots + customers)
+    bounds = (coords[:, 0].min(), coords[:, 0].max(), coords[:, 1].min(), coords[:, 1].max())
+
+    instances = [("dataset", depots, customers)]
+    for spec in args.synthetic:
+        num_depots, num_customers = (int(x) for x in spec.split("x"))
+        instances.append((f"synthetic {spec}", *synthetic_instance(num_depots, num_customers, bounds)))
+
+    print(f"{'instance':<22} {'strategy':<10} {'distance':>10} {'routes':>7} {'time (s)':>9}")
+    for name, inst_depots, inst_customers in instances:
+        solver = MDVRPSolver(inst_depots, inst_customers, args.num_vehicles_per_depot)
+        for strategy_id, method_name in STRATEGIES:
+            if strategy_id not in args.strategies:
+                continue
+            result = getattr(solver, method_name)(args.time_limit)
+            if result['status'] == 'success':
+                print(f"{name:<22} {strategy_id:<10} {result['total_distance']:>10.2f} "
+                      f"{result['num_routes']:>7} {result['elapsed_time']:>9.2f}")
+            else:
+                print(f"{name:<22} {strategy_id:<10} {'failed':>10} {'':>7} {result['elapsed_time']:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
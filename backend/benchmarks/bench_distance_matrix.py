@@ -0,0 +1,89 @@
+"""
+Benchmark xây dựng ma trận khoảng cách: dict-of-dicts cũ vs DistanceMatrix (NumPy)
+Chạy từ thư mục backend:  python -m benchmarks.bench_distance_matrix --sizes 1000 5000 10000
+Mỗi trường hợp chạy trong một process riêng để đo RSS chính xác.
+"""
+import argparse
+import math
+import multiprocessing as mp
+import resource
+import time
+
+import numpy as np
+
+from mdvrp_app.distance_matrix import DistanceMatrix
+
+
+def _current_rss_mb():
+    with open("/proc/self/statm") as f:
+        pages = int(f.read().split()[1])
+    return pages * resource.getpagesize() / 1024 / 1024
+
+
+def _dict_matrix(locations):
+    """Cách tính cũ của MDVRPSolver._compute_distance_matrix"""
+    distances = {}
+    for from_counter, from_node in enumerate(locations):
+        distances[from_counter] = {}
+        for to_counter, to_node in enumerate(locations):
+            if from_counter == to_counter:
+                distances[from_counter][to_counter] = 0
+            else:
+                distances[from_counter][to_counter] = math.hypot(
+                    from_node[0] - to_node[0],
+                    from_node[1] - to_node[1]
+                )
+    return distances
+
+
+def _run_case(kind, n, queue):
+    rng = np.random.default_rng(42)
+    locations = np.column_stack([
+        rng.uniform(10.3, 10.8, n),
+        rng.uniform(107.0, 107.6, n)
+    ])
+    if kind == "dict":
+        locations = [tuple(p) for p in locations.tolist()]
+
+    rss_before = _current_rss_mb()
+    start = time.perf_counter()
+    if kind == "dict":
+        matrix = _dict_matrix(locations)
+    elif kind == "float32":
+        matrix = DistanceMatrix(locations)
+    elif kind == "int32":
+        matrix = DistanceMatrix(locations, dtype=np.int32)
+    elif kind == "condensed":
+        matrix = DistanceMatrix(locations, condensed=True)
+    else:
+        raise ValueError(kind)
+    elapsed = time.perf_counter() - start
+    rss_after = _current_rss_mb()
+    queue.put((kind, n, elapsed, rss_after - rss_before))
+    del matrix
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 10000])
+    parser.add_argument("--kinds", nargs="+", default=["dict", "float32", "int32", "condensed"])
+    parser.add_argument("--dict-max", type=int, default=5000,
+                        help="Bỏ qua bản dict khi n lớn hơn giá trị này (tốn quá nhiều RAM)")
+    args = parser.parse_args()
+
+    print(f"{'kind':<10} {'nodes':>7} {'time (s)':>10} {'RSS (MB)':>10}")
+    for n in args.sizes:
+        for kind in args.kinds:
+            if kind == "dict" and n > args.dict_max:
+                print(f"{kind:<10} {n:>7} {'skipped':>10} {'':>10}")
+                continue
+            queue = mp.Queue()
+            proc = mp.Process(target=_run_case, args=(kind, n, queue))
+            proc.start()
+            kind, n, elapsed, rss = queue.get()
+            proc.join()
+            print(f"{kind:<10} {n:>7} {elapsed:>10.3f} {rss:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Benchmark geocoding: cách cũ (requests.get mới cho từng địa chỉ, tuần tự, không cache)
+so với mdvrp_app.geocoding.Geocoder (session dùng lại kết nối, song song có giới hạn, cache SQLite).
+Upstream là server giả lập cục bộ (độ trễ cố định mỗi request), không gọi Nominatim thật.
+Chạy từ thư mục backend:
+    python -m benchmarks.bench_geocoding --addresses 400 --unique 200 --latency 0.05
+"""
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import requests
+
+from mdvrp_app.geocoding import GeocodeCache, Geocoder
+
+
+def start_stub_server(latency):
+    """Server giả lập API search của Nominatim; trả về (url, bộ đếm request, server)"""
+    counter = {"requests": 0}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            with lock:
+                counter["requests"] += 1
+            time.sleep(latency)
+            query = parse_qs(urlparse(self.path).query).get("q", [""])[0]
+            seed = zlib.crc32(query.encode("utf-8"))
+            body = json.dumps([{"lat": str(10.3 + (seed % 5000) / 10000),
+                                "lon": str(107.0 + (seed // 5000 % 6000) / 10000)}]).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}/search", counter, server
+
+
+def legacy_geocode(url, address):
+    # Cách cũ của utils.get_coordinates: requests.get mới (không pool) cho mỗi địa chỉ
+    response = requests.get(url, params={"q": address, "format": "json", "limit": 1},
+                            headers={"User-Agent": "RoutePlannerBot"})
+    data = response.json()
+    if data:
+        return float(data[0]["lat"]), float(data[0]["lon"])
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--addresses", type=int, default=400)
+    parser.add_argument("--unique", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.05, help="độ trễ giả lập mỗi request (giây)")
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    url, counter, server = start_stub_server(args.latency)
+    # Mỗi địa chỉ lặp lại (địa chỉ trùng trong file nhập), khác nhau về khoảng trắng / chữ hoa
+    addresses = [f"{i % args.unique} Đường số {i % args.unique % 7}, " + ("Bà Rịa" if i < args.unique else "bà  rịa")
+                 for i in range(args.addresses)]
+
+    start = time.perf_counter()
+    legacy = [legacy_geocode(url, address) for address in addresses]
+    legacy_time = time.perf_counter() - start
+    legacy_requests = counter["requests"]
+
+    counter["requests"] = 0
+    cache_path = os.path.join(tempfile.mkdtemp(prefix="mdvrp_bench_geocode_"), "geocode.sqlite3")
+    geocoder = Geocoder(url=url, cache=GeocodeCache(cache_path), rate=0, max_workers=args.workers)
+    start = time.perf_counter()
+    results = geocoder.geocode_many(addresses)
+    cold_time = time.perf_counter() - start
+    cold_requests = counter["requests"]
+
+    counter["requests"] = 0
+    start = time.perf_counter()
+    geocoder.geocode_many(addresses)
+    warm_time = time.perf_counter() - start
+
+    assert [results[a] for a in addresses[:args.unique]] == legacy[:args.unique]
+    server.shutdown()
+    print(f"{args.addresses} addresses ({args.unique} unique), {args.latency * 1000:.0f} ms upstream latency")
+    print(f"{'method':<22} {'requests':>9} {'time (s)':>9} {'addr/s':>9}")
+    for name, requests_made, elapsed in (("legacy (serial)", legacy_requests, legacy_time),
+                                         (f"geocoder cold ({args.workers}w)", cold_requests, cold_time),
+                                         ("geocoder warm cache", counter["requests"], warm_time)):
+        print(f"{name:<22} {requests_made:>9} {elapsed:>9.3f} {args.addresses / elapsed:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
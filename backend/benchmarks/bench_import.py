@@ -0,0 +1,120 @@
+"""
+Benchmark nhập khách hàng từ file: cách cũ (pd.read_excel + iterrows + ghi lại toàn bộ JSON)
+so với mdvrp_app.importer (đọc theo khối, kiểm tra vectorized, mỗi khối 1 transaction).
+Dùng database tạm và thư mục dữ liệu tạm, không đụng tới data/ hay db.sqlite3.
+Chạy từ thư mục backend:
+    python -m benchmarks.bench_import --rows 100000
+"""
+import argparse
+import csv
+import os
+import tempfile
+import time
+
+WORK_DIR = tempfile.mkdtemp(prefix="mdvrp_bench_import_")
+os.environ["MDVRP_DB_PATH"] = os.path.join(WORK_DIR, "db.sqlite3")
+os.environ["MDVRP_JSON_EXPORT"] = "0"
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+
+from mdvrp_app import importer, store  # noqa: E402
+from mdvrp_app.models import Customer, Depot, Driver  # noqa: E402
+
+from .bench_store import write_dataset  # noqa: E402
+
+COLUMNS = ["name", "address", "phone", "email", "latitude", "longitude"]
+
+
+def write_upload(path, num_rows, seed=0):
+    """File upload num_rows dòng (~1% dòng lỗi: thiếu tên / toạ độ sai)"""
+    rng = np.random.default_rng(seed)
+    lat = rng.uniform(10.3, 10.8, num_rows)
+    lng = rng.uniform(107.0, 107.6, num_rows)
+    bad = rng.random(num_rows) < 0.01
+    rows = [[("" if bad[i] and i % 2 else f"Khách {i}"), f"{i} Đường số 1", f"09{i:08d}", "",
+             (f"{lat[i]:.6f}" if not (bad[i] and i % 2 == 0) else "abc"), f"{lng[i]:.6f}"]
+            for i in range(num_rows)]
+    if path.endswith(".csv"):
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(COLUMNS)
+            writer.writerows(rows)
+    else:
+        from openpyxl import Workbook
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet()
+        sheet.append(COLUMNS)
+        for row in rows:
+            sheet.append(row)
+        workbook.save(path)
+
+
+# ----------------------------------------------------------------------
+# Cách cũ: đọc cả file, iterrows, float() từng dòng (lỗi 1 dòng là hỏng cả file),
+# 1 transaction lớn rồi ghi lại toàn bộ customers.json
+# ----------------------------------------------------------------------
+def legacy_import(path, data_dir):
+    df = pd.read_csv(path) if path.endswith(".csv") else pd.read_excel(path)
+    records = []
+    for _, row in df.iterrows():
+        try:
+            records.append({
+                "name": str(row["name"]), "address": str(row["address"]), "phone": str(row["phone"]),
+                "email": str(row.get("email", "")),
+                "latitude": float(row.get("latitude", 0)), "longitude": float(row.get("longitude", 0))
+            })
+        except ValueError:
+            # Cách cũ dừng cả file ở đây; bỏ qua để so sánh cùng khối lượng công việc
+            continue
+    added = store.add_customers(records)
+    store.export_json_files(["customers"], data_dir=data_dir)
+    return len(added)
+
+
+def new_import(path, data_dir):
+    with open(path, "rb") as f:
+        result = importer.import_customers(f, os.path.basename(path))
+    store.export_json_files(["customers"], data_dir=data_dir)
+    return len(result["added"])
+
+
+def reset(data_dir, base_customers):
+    Depot.objects.all().delete()
+    Customer.objects.all().delete()
+    Driver.objects.all().delete()
+    write_dataset(data_dir, base_customers)
+    store.import_json(data_dir)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--base", type=int, default=1000, help="số khách hàng có sẵn trước khi nhập")
+    parser.add_argument("--formats", nargs="+", default=["csv", "xlsx"])
+    args = parser.parse_args()
+
+    call_command("migrate", verbosity=0)
+    data_dir = os.path.join(WORK_DIR, "data")
+    os.makedirs(data_dir, exist_ok=True)
+
+    print(f"{'format':>6} {'rows':>8} {'method':<10} {'added':>8} {'time (s)':>9} {'rows/s':>10}")
+    for fmt in args.formats:
+        path = os.path.join(WORK_DIR, f"upload.{fmt}")
+        write_upload(path, args.rows)
+        for name, fn in (("legacy", legacy_import), ("importer", new_import)):
+            reset(data_dir, args.base)
+            start = time.perf_counter()
+            added = fn(path, data_dir)
+            elapsed = time.perf_counter() - start
+            print(f"{fmt:>6} {args.rows:>8} {name:<10} {added:>8} {elapsed:>9.2f} {args.rows / elapsed:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Benchmark Strategy 5 (ruin-and-recreate LNS, lns.py) so với các chiến lược OR-Tools với cùng time_limit
+trên instance ngẫu nhiên: quãng đường, gap so với kết quả tốt nhất, thời gian (gồm cả dựng model).
+Chạy từ thư mục backend:
+    python -m benchmarks.bench_lns --sizes 100 400 1000 2000 --time-limit 10
+"""
+import argparse
+import time
+
+import numpy as np
+
+from mdvrp_app.mdvrp_solver import BENCHMARK_STRATEGIES, MDVRPSolver
+
+STRATEGIES = BENCHMARK_STRATEGIES + [('strategy5', 'strategy_5_ruin_recreate_lns')]
+
+
+def make_instance(num_customers, num_depots, seed=0):
+    rng = np.random.default_rng(seed)
+    depots = [tuple(p) for p in rng.uniform(0, 100, (num_depots, 2)).tolist()]
+    customers = [tuple(p) for p in rng.uniform(0, 100, (num_customers, 2)).tolist()]
+    demands = [0] * num_depots + rng.integers(1, 10, num_customers).tolist()
+    return depots, customers, demands
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 400, 1000, 2000])
+    parser.add_argument("--depots", type=int, default=4)
+    parser.add_argument("--time-limit", type=int, default=10)
+    parser.add_argument("--strategies", nargs="+", default=[strategy for strategy, _ in STRATEGIES])
+    args = parser.parse_args()
+
+    methods = dict(STRATEGIES)
+    print(f"{'customers':>9} {'vehicles':>8} {'strategy':<10} {'distance':>10} {'gap %':>7} {'time (s)':>9}")
+    for size in args.sizes:
+        depots, customers, demands = make_instance(size, args.depots)
+        vehicles = max(2, int(np.ceil(sum(demands) / 100 / args.depots * 1.3)))
+        solver = MDVRPSolver(depots, customers, vehicles, demands=demands)
+        rows = []
+        for strategy in args.strategies:
+            start = time.time()
+            result = getattr(solver, methods[strategy])(args.time_limit)
+            rows.append((strategy, result, time.time() - start))
+        distances = [result["total_distance"] for _, result, _ in rows if result["status"] == "success"]
+        best = min(distances) if distances else None
+        for strategy, result, elapsed in rows:
+            if result["status"] != "success":
+                print(f"{size:>9} {vehicles * args.depots:>8} {strategy:<10} failed: {result.get('message')}")
+                continue
+            gap = (result["total_distance"] / best - 1) * 100
+            print(f"{size:>9} {vehicles * args.depots:>8} {strategy:<10} {result['total_distance']:>10.1f} "
+                  f"{gap:>7.2f} {elapsed:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Benchmark tối ưu trong route: 2-opt cũ (cắt/nối list, tính lại cả route) vs
+RouteOptimizer (2-opt + Or-opt, delta O(1), neighbor lists, don't-look bits).
+Chạy từ thư mục backend:  python -m benchmarks.bench_local_search --sizes 20 50 100 200
+"""
+import argparse
+import time
+
+import numpy as np
+
+from mdvrp_app.local_search import optimize_route
+
+
+def _route_distance(route, dense):
+    return sum(dense[route[i]][route[i + 1]] for i in range(len(route) - 1))
+
+
+def _legacy_two_opt(route, dense, max_iterations=1000):
+    """Cách cũ của MDVRPSolver._two_opt_optimization"""
+    improved = True
+    best_distance = _route_distance(route, dense)
+    iteration = 0
+    while improved and iteration < max_iterations:
+        improved = False
+        iteration += 1
+        for i in range(1, len(route) - 2):
+            for j in range(i + 1, len(route) - 1):
+                if j - i == 1:
+                    continue
+                new_route = route[:i] + route[i:j][::-1] + route[j:]
+                new_distance = _route_distance(new_route, dense)
+                if new_distance < best_distance:
+                    route = new_route
+                    best_distance = new_distance
+                    improved = True
+                    break
+            if improved:
+                break
+    return route, best_distance
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[20, 50, 100, 200])
+    parser.add_argument("--legacy-max", type=int, default=200,
+                        help="Bỏ qua 2-opt cũ khi route dài hơn giá trị này")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(7)
+    print(f"{'stops':>6} {'initial':>9} {'legacy':>9} {'time (s)':>9} {'new':>9} {'time (s)':>9}")
+    for size in args.sizes:
+        points = rng.random((size + 1, 2))
+        dense = np.hypot(points[:, None, 0] - points[None, :, 0], points[:, None, 1] - points[None, :, 1])
+        dense_list = dense.tolist()
+        route = [0] + list(range(1, size + 1)) + [0]
+        initial = _route_distance(route, dense_list)
+
+        if size <= args.legacy_max:
+            start = time.perf_counter()
+            _, legacy_distance = _legacy_two_opt(route, dense_list)
+            legacy = f"{legacy_distance:>9.3f} {time.perf_counter() - start:>9.3f}"
+        else:
+            legacy = f"{'skipped':>9} {'':>9}"
+
+        start = time.perf_counter()
+        _, new_distance, _ = optimize_route(route, dense_list)
+        print(f"{size:>6} {initial:>9.3f} {legacy} {new_distance:>9.3f} {time.perf_counter() - start:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
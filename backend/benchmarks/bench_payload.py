@@ -0,0 +1,113 @@
+"""
+Benchmark payload kết quả: định dạng cũ (mỗi điểm dừng lặp 2 lần, dict {"id","lat","lng"}, json chuẩn)
+so với mdvrp_app.payload ("full" đã bỏ điểm lặp, "compact", "polyline"; orjson; gzip).
+Kết quả giả lập dạng benchmark_with_2opt (3 chiến lược, mỗi chiến lược kèm bản 2-opt), không cần chạy solver.
+Chạy từ thư mục backend:
+    python -m benchmarks.bench_payload --customers 1000 5000
+"""
+import argparse
+import gzip
+import json
+import time
+
+import numpy as np
+
+from mdvrp_app import payload
+
+NUM_STRATEGIES = 3
+
+
+def make_result(num_customers, num_depots=5, stops_per_route=20, seed=0):
+    """(kết quả dạng 'nodes', toạ độ) giả lập: khách hàng chia ngẫu nhiên thành các route ~stops_per_route điểm"""
+    rng = np.random.default_rng(seed)
+    locations = [tuple(point) for point in np.round(np.column_stack([
+        rng.uniform(10.3, 10.8, num_depots + num_customers),
+        rng.uniform(107.0, 107.6, num_depots + num_customers)]), 6).tolist()]
+
+    def plan():
+        order = rng.permutation(np.arange(num_depots, num_depots + num_customers)).tolist()
+        routes = []
+        for vehicle_id, start in enumerate(range(0, num_customers, stops_per_route)):
+            depot = vehicle_id % num_depots
+            routes.append({'vehicle_id': vehicle_id, 'depot': depot,
+                           'nodes': [depot] + order[start:start + stops_per_route] + [depot],
+                           'distance': float(rng.uniform(1, 5))})
+        return routes
+
+    results = []
+    for i in range(NUM_STRATEGIES):
+        routes = plan()
+        two_opt = [dict(route, original_distance=route['distance'], improvement=0.0, iterations=3)
+                   for route in plan()]
+        results.append({'status': 'success', 'strategy': f'STRATEGY_{i + 1}',
+                        'total_distance': sum(r['distance'] for r in routes), 'routes': routes,
+                        'elapsed_time': 1.0, 'num_routes': len(routes), '2opt_optimized': True,
+                        '2opt_routes': two_opt, '2opt_total_distance': sum(r['distance'] for r in two_opt),
+                        '2opt_improvement': 0.0})
+    return {'timestamp': time.time(), 'all_results': results, 'best_result': results[0]}, locations
+
+
+def legacy_format(result, locations):
+    """Định dạng trước đây: route [depot, c1, c1, c2, c2, ..., ck, ck, depot], mỗi điểm là 1 dict"""
+    def route_dicts(nodes):
+        stops = []
+        for a, b in zip(nodes, nodes[1:]):
+            for node in (a, b):
+                stops.append({"id": node, "lat": locations[node][0], "lng": locations[node][1]})
+        return stops
+
+    def convert(item):
+        converted = dict(item)
+        for key in ('routes', '2opt_routes'):
+            converted[key] = [{**{k: v for k, v in route.items() if k != 'nodes'}, 'route': route_dicts(route['nodes'])}
+                              for route in item[key]]
+        return converted
+
+    results = [convert(item) for item in result['all_results']]
+    return dict(result, all_results=results, best_result=results[0])
+
+
+def timed(func, repeat):
+    best = float('inf')
+    value = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        value = func()
+        best = min(best, time.perf_counter() - start)
+    return best, value
+
+
+def measure(label, build, encode, repeat):
+    format_time, data = timed(build, repeat)
+    encode_time, body = timed(lambda: encode(data), repeat)
+    gzip_time, compressed = timed(lambda: gzip.compress(body, compresslevel=payload.GZIP_LEVEL), repeat)
+    print(f"{label:<26} {len(body) / 1024:>10.1f} {len(compressed) / 1024:>9.1f} "
+          f"{format_time * 1000:>10.1f} {encode_time * 1000:>10.1f} {gzip_time * 1000:>9.1f}")
+    return len(body), encode_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--customers", type=int, nargs="+", default=[1000, 5000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    stdlib = lambda data: json.dumps(data).encode("utf-8")  # noqa: E731 - như JsonResponse của Django
+    fast = payload.dumps
+    encoder = "orjson" if payload.orjson is not None else "json (orjson chưa cài)"
+    for num_customers in args.customers:
+        result, locations = make_result(num_customers)
+        print(f"\n{num_customers} customers, {NUM_STRATEGIES} strategies + 2-opt copies, fast encoder: {encoder}")
+        print(f"{'format':<26} {'size KB':>10} {'gzip KB':>9} {'format ms':>10} {'encode ms':>10} {'gzip ms':>9}")
+        legacy_size, legacy_time = measure("legacy (dup stops) + json", lambda: legacy_format(result, locations),
+                                           stdlib, args.repeat)
+        for output_format in payload.OUTPUT_FORMATS:
+            build = lambda: payload.format_result(result, locations, output_format)  # noqa: E731
+            measure(f"{output_format} + json", build, stdlib, args.repeat)
+            size, encode_time = measure(f"{output_format} + {'orjson' if payload.orjson else 'json'}",
+                                        build, fast, args.repeat)
+            print(f"{'':<26} size x{legacy_size / size:.1f} smaller, encode x{legacy_time / encode_time:.1f} faster")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Benchmark ma trận theo đường bộ (road_network.py) trên lưới đường giả lập (side x side giao lộ, bỏ ngẫu nhiên
+một số đoạn, một số đoạn 1 chiều, độ dài cong hơn đường thẳng 0-30%), ghi ra CSV rồi đọc lại như file thật:
+- thời gian đọc CSV, tiền xử lý contraction hierarchy, ma trận nhiều-nhiều (lần đầu / từ cache)
+- so với Dijkstra từ từng điểm (Python, chạy trên 1 mẫu nguồn rồi ngoại suy) và kiểm tra kết quả khớp
+Chạy từ thư mục backend:
+    python -m benchmarks.bench_road_network --side 100 --points 1050
+"""
+import argparse
+import heapq
+import math
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from mdvrp_app.matrix_cache import MatrixCache
+from mdvrp_app.road_network import RoadNetwork, _project
+
+STEP_DEGREES = 0.002
+
+
+def write_grid_csv(path, side, seed=0, drop=0.1, oneway=0.1):
+    rng = np.random.default_rng(seed)
+    i, j = np.divmod(np.arange(side * side), side)
+    coords = np.column_stack([10.7 + i * STEP_DEGREES, 106.6 + j * STEP_DEGREES])
+    coords += rng.normal(0, STEP_DEGREES * 0.15, coords.shape)
+    nodes = np.arange(side * side).reshape(side, side)
+    edges = np.concatenate([np.column_stack([nodes[:, :-1].ravel(), nodes[:, 1:].ravel()]),
+                            np.column_stack([nodes[:-1, :].ravel(), nodes[1:, :].ravel()])])
+    edges = edges[rng.random(len(edges)) > drop]
+    points = _project(coords, float(coords[:, 0].mean()))
+    lengths = np.hypot(*(points[edges[:, 0]] - points[edges[:, 1]]).T) * rng.uniform(1.0, 1.3, len(edges))
+    table = np.column_stack([coords[edges[:, 0]], coords[edges[:, 1]], lengths,
+                             rng.random(len(edges)) < oneway])
+    np.savetxt(path, table, delimiter=",", fmt=["%.7f"] * 4 + ["%.2f", "%d"],
+               header="from_lat,from_lng,to_lat,to_lng,length,oneway", comments="")
+    return coords
+
+
+def dijkstra(adjacency, source):
+    dist = {source: 0.0}
+    heap = [(0.0, source)]
+    while heap:
+        d, x = heapq.heappop(heap)
+        if d > dist[x]:
+            continue
+        for y, w in adjacency[x]:
+            if d + w < dist.get(y, math.inf):
+                dist[y] = d + w
+                heapq.heappush(heap, (d + w, y))
+    return dist
+
+
+def timed(label, func):
+    start = time.time()
+    value = func()
+    elapsed = time.time() - start
+    print(f"{label:<42} {elapsed:>9.2f}s")
+    return value, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--side", type=int, default=100)
+    parser.add_argument("--points", type=int, default=1050)
+    parser.add_argument("--sample", type=int, default=10, help="số nguồn chạy Dijkstra để ngoại suy / kiểm tra")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    path = os.path.join(workdir, "roads.csv")
+    coords = write_grid_csv(path, args.side)
+    rng = np.random.default_rng(1)
+    low, high = coords.min(axis=0), coords.max(axis=0)
+    locations = [tuple(p) for p in rng.uniform(low, high, (args.points, 2)).tolist()]
+
+    network, _ = timed("load CSV", lambda: RoadNetwork.from_csv(path, cache_dir=os.path.join(workdir, "ch")))
+    print(f"{network.num_nodes} nodes, {len(network.edges)} directed edges, {args.points} locations")
+    timed("contraction hierarchy (once per network)", lambda: network.hierarchy)
+    reloaded = RoadNetwork.from_csv(path, cache_dir=os.path.join(workdir, "ch"))
+    timed("hierarchy from disk cache", lambda: reloaded.hierarchy)
+
+    cache = MatrixCache(os.path.join(workdir, "matrix"))
+    matrix, ch_time = timed("matrix, CH many-to-many", lambda: network.distance_matrix(locations, matrix_cache=cache))
+    timed("matrix, from matrix cache", lambda: network.distance_matrix(locations, matrix_cache=cache))
+
+    # Dijkstra từ từng node đã snap (thuật toán đơn giản nhất), chạy trên mẫu rồi ngoại suy
+    nodes, offsets = network.snap(locations)
+    adjacency = [[] for _ in range(network.num_nodes)]
+    for (u, v), w in zip(network.edges.tolist(), network.lengths.tolist()):
+        adjacency[u].append((v, w))
+    sample = rng.choice(args.points, min(args.sample, args.points), replace=False)
+    start = time.time()
+    max_error = 0.0
+    for i in sample:
+        dist = dijkstra(adjacency, int(nodes[i]))
+        row = np.array([offsets[i] + dist.get(int(node), math.inf) + offset for node, offset in zip(nodes, offsets)])
+        row[i] = 0
+        max_error = max(max_error, float(np.abs(row / 1000 - matrix.data[i]).max()))
+    per_source = (time.time() - start) / len(sample)
+    unique_sources = len(np.unique(nodes))
+    print(f"{'matrix, Dijkstra per source (extrapolated)':<42} {per_source * unique_sources:>9.2f}s "
+          f"(x{per_source * unique_sources / ch_time:.0f} slower)")
+    print(f"max |CH - Dijkstra| on sampled rows: {max_error * 1000:.3f} m")
+
+    straight = np.hypot(*(_project(locations, network.lat0)[:, None, :]
+                          - _project(locations, network.lat0)[None, :, :]).transpose(2, 0, 1)) / 1000
+    mask = straight > 0
+    ratio = matrix.data[mask] / straight[mask]
+    print(f"road / straight-line distance: median {np.median(ratio):.2f}, p90 {np.percentile(ratio, 90):.2f}")
+
+
+if __name__ == "__main__":
+    main()
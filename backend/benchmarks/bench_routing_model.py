@@ -0,0 +1,98 @@
+"""
+Benchmark model OR-Tools: callback Python (cách cũ) vs ma trận/vector đăng ký sẵn
+Đếm số lời giải, số branch và số lần local search chấp nhận nước đi trong cùng time_limit.
+Chạy từ thư mục backend:  python -m benchmarks.bench_routing_model --time-limit 10
+"""
+import argparse
+import json
+import os
+
+from ortools.constraint_solver import pywrapcp, routing_enums_pb2
+
+from mdvrp_app.mdvrp_solver import MDVRPSolver
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "data")
+
+
+def _legacy_routing_model(solver):
+    """Model cũ: distance_callback / demand_callback viết bằng Python"""
+    manager = pywrapcp.RoutingIndexManager(
+        len(solver.all_locations), solver.num_vehicles, solver.starts, solver.ends
+    )
+    routing = pywrapcp.RoutingModel(manager)
+    dense = solver.distance_matrix.to_dense()
+
+    def distance_callback(from_index, to_index):
+        from_node = manager.IndexToNode(from_index)
+        to_node = manager.IndexToNode(to_index)
+        return int(dense[from_node][to_node] * 100)
+
+    transit_callback_index = routing.RegisterTransitCallback(distance_callback)
+    routing.SetArcCostEvaluatorOfAllVehicles(transit_callback_index)
+
+    def demand_callback(from_index):
+        from_node = manager.IndexToNode(from_index)
+        return solver.demands[from_node]
+
+    demand_callback_index = routing.RegisterUnaryTransitCallback(demand_callback)
+    routing.AddDimensionWithVehicleCapacity(
+        demand_callback_index, 0, solver.vehicle_capacities, True, 'Capacity'
+    )
+    return routing, manager
+
+
+def _run(routing, time_limit):
+    counters = {"solutions": 0}
+
+    def on_solution():
+        counters["solutions"] += 1
+
+    routing.AddAtSolutionCallback(on_solution)
+    search_parameters = pywrapcp.DefaultRoutingSearchParameters()
+    search_parameters.first_solution_strategy = (
+        routing_enums_pb2.FirstSolutionStrategy.PATH_CHEAPEST_ARC
+    )
+    search_parameters.local_search_metaheuristic = (
+        routing_enums_pb2.LocalSearchMetaheuristic.GUIDED_LOCAL_SEARCH
+    )
+    search_parameters.time_limit.seconds = time_limit
+    solution = routing.SolveWithParameters(search_parameters)
+    return {
+        "objective": solution.ObjectiveValue() if solution else None,
+        "solutions": counters["solutions"],
+        "branches": routing.solver().Branches(),
+        "failures": routing.solver().Failures(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--time-limit", type=int, default=10)
+    parser.add_argument("--num-depots", type=int, default=None)
+    parser.add_argument("--num-customers", type=int, default=None)
+    parser.add_argument("--num-vehicles-per-depot", type=int, default=2)
+    args = parser.parse_args()
+
+    with open(os.path.join(DATA_DIR, "depots.json"), encoding="utf-8") as f:
+        depots = [(d["latitude"], d["longitude"]) for d in json.load(f)][:args.num_depots]
+    with open(os.path.join(DATA_DIR, "customers.json"), encoding="utf-8") as f:
+        customers = [(c["latitude"], c["longitude"]) for c in json.load(f)][:args.num_customers]
+
+    solver = MDVRPSolver(depots, customers, args.num_vehicles_per_depot)
+    print(f"{len(depots)} depots, {len(customers)} customers, "
+          f"{solver.num_vehicles} vehicles, time_limit={args.time_limit}s")
+
+    results = {
+        "callback": _run(_legacy_routing_model(solver)[0], args.time_limit),
+        "matrix": _run(solver._get_routing_model()[0], args.time_limit),
+    }
+    print(f"{'model':<10} {'objective':>12} {'solutions':>10} {'branches':>12} {'failures':>12}")
+    for name, r in results.items():
+        print(f"{name:<10} {r['objective']!s:>12} {r['solutions']:>10} {r['branches']:>12} {r['failures']:>12}")
+
+    base = results["callback"]["solutions"] or 1
+    print(f"\nSolutions found per time_limit: x{results['matrix']['solutions'] / base:.2f}")
+
+
+if __name__ == "__main__":
+    main()
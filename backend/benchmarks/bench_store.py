@@ -0,0 +1,144 @@
+"""
+Benchmark độ trễ thao tác ghi: đọc / ghi lại toàn bộ file JSON (cách cũ của ops.py)
+so với mdvrp_app.store (SQLite, transaction, tra cứu theo khoá chính), với xuất JSON nền đang bật.
+"add + read": ghi rồi đọc lại danh sách toạ độ khách hàng như /api/calculate/ (phải thấy ngay khách hàng mới).
+Dùng database tạm và thư mục dữ liệu / xuất JSON tạm, không đụng tới data/ hay db.sqlite3.
+Chạy từ thư mục backend:
+    python -m benchmarks.bench_store --sizes 10000 100000 --repeat 20
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+WORK_DIR = tempfile.mkdtemp(prefix="mdvrp_bench_store_")
+os.environ["MDVRP_DB_PATH"] = os.path.join(WORK_DIR, "db.sqlite3")
+os.environ["MDVRP_JSON_EXPORT_DIR"] = os.path.join(WORK_DIR, "export")
+os.makedirs(os.environ["MDVRP_JSON_EXPORT_DIR"], exist_ok=True)
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+import numpy as np  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+
+from mdvrp_app import store  # noqa: E402
+from mdvrp_app.dataset import get_dataset  # noqa: E402
+from mdvrp_app.models import Customer, Depot, Driver  # noqa: E402
+
+
+def write_dataset(data_dir, num_customers, num_depots=250, seed=0):
+    rng = np.random.default_rng(seed)
+    depots = [{"id": f"{i + 1:03d}", "name": f"Kho {i + 1:03d}", "address": "",
+               "latitude": float(rng.uniform(10.3, 10.8)), "longitude": float(rng.uniform(107.0, 107.6))}
+              for i in range(num_depots)]
+    customers = [{"id": f"C{i + 1:04d}", "name": f"Khách {i + 1}", "address": "", "phone": "0900000000",
+                  "latitude": float(rng.uniform(10.3, 10.8)), "longitude": float(rng.uniform(107.0, 107.6))}
+                 for i in range(num_customers)]
+    drivers = [{"id": f"{i + 1:04d}", "name": f"Tài xế {i + 1}", "phone": "0900000000",
+                "depot_id": depots[i % num_depots]["id"]}
+               for i in range(max(num_customers // 2, 2))]
+    for name, records in (("depots", depots), ("customers", customers), ("drivers", drivers)):
+        with open(os.path.join(data_dir, f"{name}.json"), "w", encoding="utf-8") as f:
+            json.dump(records, f, ensure_ascii=False, indent=2)
+    return len(drivers)
+
+
+# ----------------------------------------------------------------------
+# Cách cũ: đọc cả file, quét tuyến tính, ghi lại cả file với indent=2
+# ----------------------------------------------------------------------
+def legacy_next_id(data_dir):
+    with open(os.path.join(data_dir, "customers.json"), encoding="utf-8") as f:
+        customers = json.load(f)
+    last = max(customers, key=lambda x: int(x["id"][1:]))
+    return f"C{int(last['id'][1:]) + 1:04d}"
+
+
+def legacy_add_customer(data_dir):
+    path = os.path.join(data_dir, "customers.json")
+    with open(path, encoding="utf-8") as f:
+        customers = json.load(f)
+    last = max(customers, key=lambda x: int(x["id"][1:]))
+    customers.append({"id": f"C{int(last['id'][1:]) + 1:04d}", "name": "Mới", "address": "", "phone": "",
+                      "email": "", "latitude": 10.5, "longitude": 107.2})
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(customers, f, ensure_ascii=False, indent=2)
+
+
+def legacy_swap(data_dir, id1, id2):
+    path = os.path.join(data_dir, "drivers.json")
+    with open(path, encoding="utf-8") as f:
+        drivers = json.load(f)
+    i1 = next(i for i, d in enumerate(drivers) if d["id"] == id1)
+    i2 = next(i for i, d in enumerate(drivers) if d["id"] == id2)
+    drivers[i1]["depot_id"], drivers[i2]["depot_id"] = drivers[i2]["depot_id"], drivers[i1]["depot_id"]
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(drivers, f, ensure_ascii=False, indent=2)
+
+
+def legacy_add_and_read(data_dir):
+    legacy_add_customer(data_dir)
+    with open(os.path.join(data_dir, "customers.json"), encoding="utf-8") as f:
+        return [(c["latitude"], c["longitude"]) for c in json.load(f)]
+
+
+def store_add_and_read(record):
+    before = len(get_dataset().locations("customers"))
+    store.add_customers([record])
+    assert len(get_dataset().locations("customers")) == before + 1, "stale read after write"
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return float(np.median(samples))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    call_command("migrate", verbosity=0)
+    print(f"{'customers':>10} {'operation':<16} {'json (ms)':>10} {'store (ms)':>11} {'speedup':>8}")
+    for size in args.sizes:
+        data_dir = os.path.join(WORK_DIR, str(size))
+        os.makedirs(data_dir, exist_ok=True)
+        num_drivers = write_dataset(data_dir, size)
+        Depot.objects.all().delete()
+        Customer.objects.all().delete()
+        Driver.objects.all().delete()
+        store.import_json(data_dir)
+
+        # Tài xế ở cuối danh sách: trường hợp xấu của tìm kiếm tuyến tính
+        id1, id2 = f"{num_drivers - 1:04d}", f"{num_drivers:04d}"
+        record = {"name": "Mới", "address": "", "phone": "", "email": "", "latitude": 10.5, "longitude": 107.2}
+        rows = [
+            ("next id", lambda: legacy_next_id(data_dir), store.peek_next_customer_id),
+            ("add customer", lambda: legacy_add_customer(data_dir), lambda: store.add_customers([record])),
+            ("swap drivers", lambda: legacy_swap(data_dir, id1, id2), lambda: store.swap_driver_depots(id1, id2)),
+            ("add + read", lambda: legacy_add_and_read(data_dir), lambda: store_add_and_read(record)),
+        ]
+        for name, legacy, new in rows:
+            legacy_ms = timed(legacy, args.repeat)
+            store_ms = timed(new, args.repeat)
+            print(f"{size:>10} {name:<16} {legacy_ms:>10.2f} {store_ms:>11.2f} {legacy_ms / store_ms:>7.0f}x")
+
+        # Các lần ghi ở trên chỉ hẹn xuất JSON; xuất nền gom lại thành 1 lần
+        start = time.perf_counter()
+        store.flush_exports()
+        with open(os.path.join(os.environ["MDVRP_JSON_EXPORT_DIR"], "customers.json"), encoding="utf-8") as f:
+            exported = len(json.load(f))
+        print(f"{size:>10} {'export (1x)':<16} {'':>10} {(time.perf_counter() - start) * 1000:>11.2f} "
+              f"{'ok' if exported == Customer.objects.count() else 'MISMATCH':>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Benchmark chọn chiến lược tự động (strategy_selector.py): benchmark cả 3 chiến lược so với 'auto'.
+Các instance huấn luyện được benchmark để ghi lịch sử (file tạm), sau đó trên các instance kiểm tra
+so sánh thời gian giải và gap của 'auto' so với lời giải tốt nhất của benchmark.
+Chạy từ thư mục backend:
+    python -m benchmarks.bench_strategy_selector --train 6 --test 4 --time-limit 10
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from mdvrp_app.mdvrp_solver import MDVRPSolver
+from mdvrp_app.strategy_selector import StrategyHistory
+
+
+def make_instance(seed):
+    """Instance ngẫu nhiên: kích thước, số depot và mức phân cụm khác nhau theo seed"""
+    rng = np.random.default_rng(seed)
+    num_customers = int(rng.integers(60, 250))
+    num_depots = int(rng.integers(2, 6))
+    if rng.random() < 0.5:
+        customers = rng.uniform(0, 100, (num_customers, 2))
+    else:
+        centers = rng.uniform(10, 90, (int(rng.integers(3, 8)), 2))
+        customers = centers[rng.integers(0, len(centers), num_customers)] + rng.normal(0, 4, (num_customers, 2))
+    depots = rng.uniform(0, 100, (num_depots, 2))
+    demands = [0] * num_depots + rng.integers(1, 10, num_customers).tolist()
+    vehicles = max(2, int(np.ceil(sum(demands) / 100 / num_depots * 1.3)))
+    return [tuple(p) for p in depots.tolist()], [tuple(p) for p in customers.tolist()], demands, vehicles
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--train", type=int, default=6)
+    parser.add_argument("--test", type=int, default=4)
+    parser.add_argument("--time-limit", type=int, default=10)
+    parser.add_argument("--stall-time", type=float, default=None,
+                        help="dừng sớm khi benchmark (termination.stall_time) để ghi best_found_at sát hơn")
+    args = parser.parse_args()
+
+    termination = {"stall_time": args.stall_time} if args.stall_time else None
+    history = StrategyHistory(os.path.join(tempfile.mkdtemp(), "strategy_history.jsonl"))
+
+    def benchmark(solver):
+        solver.termination = termination
+        start = time.time()
+        results = solver.benchmark_all_strategies(args.time_limit)
+        history.record(solver.features(), solver.benchmark_record(results), args.time_limit)
+        return results, time.time() - start
+
+    for seed in range(args.train):
+        depots, customers, demands, vehicles = make_instance(seed)
+        _, elapsed = benchmark(MDVRPSolver(depots, customers, vehicles, demands=demands))
+        print(f"train seed {seed}: {len(customers)} customers, {len(depots)} depots, benchmark {elapsed:.1f}s")
+
+    print(f"\n{'seed':>5} {'customers':>9} {'bench (s)':>10} {'auto (s)':>9} {'chosen':<10} {'raced':<6} "
+          f"{'conf':>5} {'gap %':>7}")
+    bench_total = auto_total = 0.0
+    gaps = []
+    for seed in range(1000, 1000 + args.test):
+        depots, customers, demands, vehicles = make_instance(seed)
+        solver = MDVRPSolver(depots, customers, vehicles, demands=demands)
+        # Auto chạy trước để không dùng kết quả benchmark của chính instance này
+        start = time.time()
+        auto = solver.strategy_auto(args.time_limit, history=history)
+        auto_time = time.time() - start
+        results, bench_time = benchmark(solver)
+        distances = [r["total_distance"] for r in results if r["status"] == "success"]
+        if auto["status"] != "success" or not distances:
+            print(f"{seed:>5} failed")
+            continue
+        gap = (auto["total_distance"] / min(distances) - 1) * 100
+        selection = auto["selection"]
+        bench_total += bench_time
+        auto_total += auto_time
+        gaps.append(gap)
+        print(f"{seed:>5} {len(customers):>9} {bench_time:>10.1f} {auto_time:>9.1f} {selection['strategy']:<10} "
+              f"{str(selection['raced']):<6} {selection['confidence']:>5.2f} {gap:>7.2f}")
+
+    if gaps:
+        print(f"\nTotal solve time {bench_total:.1f}s -> {auto_total:.1f}s "
+              f"({(1 - auto_total / bench_total) * 100:.0f}% less), mean gap to best of 3 {np.mean(gaps):+.2f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Benchmark dừng sớm: chạy hết time_limit so với tiêu chí dừng thích nghi (termination.py)
+trên instance ngẫu nhiên, so sánh thời gian giải và quãng đường.
+Chạy từ thư mục backend:
+    python -m benchmarks.bench_termination --sizes 100 400 --time-limit 20 --stall-time 3
+"""
+import argparse
+import time
+
+import numpy as np
+
+from mdvrp_app.mdvrp_solver import BENCHMARK_STRATEGIES, MDVRPSolver
+
+
+def make_instance(num_customers, num_depots, seed=0):
+    rng = np.random.default_rng(seed)
+    depots = [tuple(p) for p in rng.uniform(0, 100, (num_depots, 2)).tolist()]
+    customers = [tuple(p) for p in rng.uniform(0, 100, (num_customers, 2)).tolist()]
+    demands = [0] * num_depots + rng.integers(1, 10, num_customers).tolist()
+    return depots, customers, demands
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 400])
+    parser.add_argument("--depots", type=int, default=4)
+    parser.add_argument("--time-limit", type=int, default=20)
+    parser.add_argument("--stall-time", type=float, default=3.0)
+    parser.add_argument("--min-improvement", type=float, default=0.001)
+    args = parser.parse_args()
+
+    policies = [("fixed", None),
+                ("adaptive", {"stall_time": args.stall_time, "min_improvement": args.min_improvement})]
+    print(f"{'customers':>9} {'strategy':<10} {'policy':<9} {'distance':>10} {'time (s)':>9} "
+          f"{'best at':>8} {'reason':<12}")
+    totals = {name: [0.0, 0.0] for name, _ in policies}
+    for size in args.sizes:
+        depots, customers, demands = make_instance(size, args.depots)
+        vehicles = max(2, int(np.ceil(sum(demands) / 100 / args.depots * 1.3)))
+        solver = MDVRPSolver(depots, customers, vehicles, demands=demands)
+        for strategy, method_name in BENCHMARK_STRATEGIES:
+            for name, termination in policies:
+                solver.termination = termination
+                start = time.time()
+                result = getattr(solver, method_name)(args.time_limit)
+                elapsed = time.time() - start
+                if result["status"] != "success":
+                    print(f"{size:>9} {strategy:<10} {name:<9} failed: {result.get('message')}")
+                    continue
+                info = result["termination"]
+                totals[name][0] += elapsed
+                totals[name][1] += result["total_distance"]
+                print(f"{size:>9} {strategy:<10} {name:<9} {result['total_distance']:>10.1f} {elapsed:>9.2f} "
+                      f"{info['best_found_at'] or 0:>8.2f} {info['reason']:<12}")
+
+    fixed_time, fixed_distance = totals["fixed"]
+    adaptive_time, adaptive_distance = totals["adaptive"]
+    if fixed_time and fixed_distance:
+        print(f"\nTotal solve time {fixed_time:.1f}s -> {adaptive_time:.1f}s "
+              f"({(1 - adaptive_time / fixed_time) * 100:.0f}% less), "
+              f"total distance {(adaptive_distance / fixed_distance - 1) * 100:+.2f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Benchmark truy vấn viewport (viewport.py) trên dataset khách hàng giả lập lớn và 1 kế hoạch route:
+- thời gian dựng chỉ mục, thời gian / kích thước phản hồi theo zoom so với tải cả customers.json như frontend hiện tại
+- route: số điểm trước / sau khi đơn giản hoá theo zoom
+Chạy từ thư mục backend:
+    python -m benchmarks.bench_viewport --customers 200000
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from mdvrp_app.dataset import Dataset
+from mdvrp_app.payload import dumps
+from mdvrp_app.viewport import ViewportIndex, degrees_per_pixel
+from mdvrp_app.warm_start import PlanStore
+
+CENTER = (10.8231, 106.6297)
+# (zoom, kích thước viewport pixel) như màn hình 1600 x 900
+VIEWPORT_PX = (1600, 900)
+
+
+def write_dataset(data_dir, num_customers, num_depots, seed=0):
+    rng = np.random.default_rng(seed)
+    # Khách hàng tập trung quanh vài khu dân cư, trải trên ~1.5 độ
+    centers = rng.normal(CENTER, 0.4, (40, 2))
+    coords = centers[rng.integers(0, len(centers), num_customers)] + rng.normal(0, 0.05, (num_customers, 2))
+    customers = [{"id": f"C{i + 1:04d}", "name": f"Customer {i + 1}", "address": f"{i + 1} Street",
+                  "phone": "0900000000", "latitude": round(lat, 6), "longitude": round(lng, 6)}
+                 for i, (lat, lng) in enumerate(coords.tolist())]
+    depots = [{"id": f"D{i + 1}", "name": f"Depot {i + 1}", "address": "", "latitude": lat, "longitude": lng}
+              for i, (lat, lng) in enumerate(rng.normal(CENTER, 0.3, (num_depots, 2)).tolist())]
+    for kind, records in (("customers", customers), ("depots", depots)):
+        with open(os.path.join(data_dir, f"{kind}.json"), "w", encoding="utf-8") as f:
+            json.dump(records, f, ensure_ascii=False, indent=2)
+    return coords, np.array([(d["latitude"], d["longitude"]) for d in depots])
+
+
+def make_plan(coords, depots, stops_per_route, seed=0):
+    """Route giả lập: khách hàng xếp theo dải vĩ độ rồi kinh độ, mỗi route là 1 đoạn liên tiếp (gần nhau)"""
+    rng = np.random.default_rng(seed)
+    order = np.lexsort((coords[:, 1], np.floor(coords[:, 0] / 0.02)))
+    routes = []
+    for start in range(0, len(order), stops_per_route):
+        stops = coords[order[start:start + stops_per_route]]
+        depot = depots[rng.integers(len(depots))]
+        stops = stops[np.argsort(np.arctan2(*(stops - stops.mean(axis=0)).T))]
+        routes.append({"depot": depot.tolist(), "stops": stops.tolist()})
+    return {"timestamp": time.time(), "strategy": "bench", "total_distance": 0, "routes": routes}
+
+
+def viewport_bbox(zoom):
+    half_lng = VIEWPORT_PX[0] / 2 * degrees_per_pixel(zoom)
+    half_lat = VIEWPORT_PX[1] / 2 * degrees_per_pixel(zoom)
+    return CENTER[1] - half_lng, CENTER[0] - half_lat, CENTER[1] + half_lng, CENTER[0] + half_lat
+
+
+def timed(func, repeat=5):
+    start = time.time()
+    for _ in range(repeat):
+        value = func()
+    return value, (time.time() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--customers", type=int, default=200000)
+    parser.add_argument("--depots", type=int, default=250)
+    parser.add_argument("--stops-per-route", type=int, default=200)
+    parser.add_argument("--zooms", type=int, nargs="+", default=[8, 10, 12, 14, 16])
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    coords, depots = write_dataset(workdir, args.customers, args.depots)
+    plan_store = PlanStore(os.path.join(workdir, "plan.json"))
+    plan_store.save(make_plan(coords, depots, args.stops_per_route))
+    viewport = ViewportIndex(Dataset(workdir), plan_store)
+
+    size = os.path.getsize(os.path.join(workdir, "customers.json"))
+    start = time.time()
+    with open(os.path.join(workdir, "customers.json"), encoding="utf-8") as f:
+        json.load(f)
+    print(f"full customers.json: {size / 1e6:.1f} MB, parse {time.time() - start:.2f}s, {args.customers} markers")
+    _, elapsed = timed(lambda: viewport.points("customers"), repeat=1)
+    print(f"first query (load dataset + build index): {elapsed:.2f}s")
+
+    print(f"{'zoom':>4} {'visible':>8} {'markers':>8} {'clusters':>8} {'KB':>8} {'query ms':>9} | "
+          f"{'routes':>6} {'points':>8} {'simplified':>10} {'KB':>7} {'query ms':>9}")
+    for zoom in args.zooms:
+        bbox = viewport_bbox(zoom)
+        points, points_time = timed(lambda: viewport.points("customers", bbox, zoom))
+        routes, routes_time = timed(lambda: viewport.routes(bbox, zoom))
+        raw_points = sum(route["num_stops"] + 2 for route in routes["routes"])
+        simplified = sum(route["points"] for route in routes["routes"])
+        print(f"{zoom:>4} {points['visible']:>8} {len(points['markers']):>8} {len(points['clusters']):>8} "
+              f"{len(dumps(points)) / 1e3:>8.1f} {points_time * 1e3:>9.1f} | "
+              f"{routes['visible']:>6} {raw_points:>8} {simplified:>10} "
+              f"{len(dumps(routes)) / 1e3:>7.1f} {routes_time * 1e3:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Benchmark warm start: sau khi thêm / xoá vài khách hàng, giải lại từ đầu (Strategy 1)
+so với warm start từ kế hoạch cũ với time_limit ngắn hơn.
+Chạy từ thư mục backend:
+    python -m benchmarks.bench_warm_start --time-limit 20 --warm-limits 2 5 10 --added 1 --removed 1
+"""
+import argparse
+
+import numpy as np
+
+from mdvrp_app.mdvrp_solver import MDVRPSolver
+from mdvrp_app.warm_start import plan_from_result
+from benchmarks.bench_decomposition import load_dataset
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--time-limit", type=int, default=20)
+    parser.add_argument("--warm-limits", type=int, nargs="+", default=[2, 5, 10])
+    parser.add_argument("--num-vehicles-per-depot", type=int, default=2)
+    parser.add_argument("--added", type=int, default=1, help="Số khách hàng mới")
+    parser.add_argument("--removed", type=int, default=1, help="Số khách hàng bị xoá")
+    parser.add_argument("--seed", type=int, default=3)
+    args = parser.parse_args()
+
+    depots, customers = load_dataset()
+    rng = np.random.default_rng(args.seed)
+
+    base = MDVRPSolver(depots, customers, args.num_vehicles_per_depot)
+    previous = base.strategy_1_cheapest_arc_gls(args.time_limit)
+    plan = plan_from_result(base.all_locations, previous)
+    print(f"previous plan: {previous['total_distance']:.2f} ({args.time_limit}s)")
+
+    # Instance mới: xoá vài khách hàng, thêm vài khách hàng trong khung bao của dữ liệu
+    coords = np.asarray(customers)
+    removed = set(rng.choice(len(customers), args.removed, replace=False).tolist())
+    new_customers = [c for i, c in enumerate(customers) if i not in removed]
+    new_customers += list(zip(rng.uniform(coords[:, 0].min(), coords[:, 0].max(), args.added).tolist(),
+                              rng.uniform(coords[:, 1].min(), coords[:, 1].max(), args.added).tolist()))
+    solver = MDVRPSolver(depots, new_customers, args.num_vehicles_per_depot)
+
+    print(f"{'time limit':>10} {'cold':>10} {'warm':>10}  warm start mapping")
+    for limit in sorted(set(args.warm_limits + [args.time_limit])):
+        cold = solver.strategy_1_cheapest_arc_gls(limit)
+        warm = solver.strategy_warm_start(plan, limit)
+        print(f"{limit:>10} {cold['total_distance']:>10.2f} {warm['total_distance']:>10.2f}  {warm['warm_start']}")
+
+if __name__ == "__main__":
+    main()
@@ -542,20 +542,9 @@ async function getCoordinatesFromAddress(address) {
  * Refresh danh sách khách hàng sau khi thêm
  */
 async function refreshCustomersList() {
-    try {
-        const response = await fetch('../data/customers.json');
-        const customers = await response.json();
-
-        // Cập nhật biến allCustomers trong frontend
-        if (typeof window !== 'undefined' && window.allCustomers) {
-            window.allCustomers = customers;
-        }
-
-        return customers;
-    } catch (error) {
-        console.error('Lỗi khi refresh danh sách khách hàng:', error);
-        throw error;
-    }
+    // Bảng khách hàng tải theo trang từ /api/data/customers/: bỏ các trang đã tải,
+    // populateOrdersTable() sau đó tải lại từ trang đầu
+    resetCustomers();
 }
 
 // ========================================
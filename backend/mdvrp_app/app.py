@@ -1,11 +1,22 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
 from mdvrp_solver import solve_mdvrp_enhanced
-import json
+from matrix_cache import get_default_cache
+from jobs import get_job_manager, JobQueueFull
+from streaming import open_stream, get_stream, StreamLimitReached
+from warm_start import get_default_plan_store
+from result_cache import get_default_result_cache
+from strategy_selector import get_default_strategy_history
+from dataset import get_dataset
+from instrumentation import Trace, tracing, phase, get_metrics
+from payload import encode_body
 
 app = Flask(__name__)
 CORS(app)
 
+# Client nên đợi bao lâu (giây) trước khi gửi lại khi hàng đợi job đầy
+BUSY_RETRY_AFTER = 10
+
 
 @app.route('/api/calculate/', methods=['POST'])
 def calculate_routes():
@@ -13,45 +24,157 @@ def calculate_routes():
     POST request từ frontend
     Body: {
         "num_vehicles_per_depot": 2,
-        "strategy": "benchmark",  # hoặc "strategy1", "strategy2", "strategy3"
-        "time_limit": 45
+        "strategy": "benchmark",  # hoặc "strategy1", "strategy2", "strategy3", "strategy4", "strategy5", "auto"
+        "time_limit": 45,
+        "parallel": true,  # chạy benchmark song song (mỗi chiến lược 1 process)
+        "max_workers": 3,
+        "neighbors_k": 20,  # tuỳ chọn: chỉ giữ cung tới 20 láng giềng gần nhất
+        "post_optimization": "full",  # tuỳ chọn: "2opt", "inter_route" hoặc "full"
+        "async": false,  # true: trả job_id ngay, hỏi kết quả qua /api/jobs/<job_id>/
+        "warm_start": false,  # true: giải tiếp từ kế hoạch đã chấp nhận lần trước
+        "instrument": false,  # true: kèm thời gian từng giai đoạn / bộ đếm trong data.instrumentation
+        "format": "full",  # hoặc "compact" (mảng chỉ số node + bảng toạ độ), "polyline"
+        "termination": {"stall_time": 5, "min_improvement": 0.001},  # tuỳ chọn: dừng sớm khi không còn cải thiện
+        "race": null,  # strategy "auto": true/false ép đua / không đua 2 chiến lược đầu
+        "distance_metric": "euclidean"  # hoặc "road": khoảng cách theo đồ thị đường MDVRP_ROAD_NETWORK (km)
     }
     """
+    # Mọi request đều được đo (gom vào /api/metrics/); chỉ kèm vào kết quả khi "instrument": true
+    trace = Trace()
+    status = 'ok'
     try:
-        data = request.json
-        num_vehicles = data.get('num_vehicles_per_depot', 2)
-        strategy = data.get('strategy', 'benchmark')
-        time_limit = data.get('time_limit', 45)
-
-        # Load dữ liệu
-        with open('data/depots.json') as f:
-            depots_data = json.load(f)
-        with open('data/customers.json') as f:
-            customers_data = json.load(f)
-
-        # Chuyển đổi dữ liệu sang tọa độ (x, y)
-        depots = [(d['longitude'], d['latitude']) for d in depots_data]
-        customers = [(c['longitude'], c['latitude']) for c in customers_data]
-
-        # Gọi solver
-        result = solve_mdvrp_enhanced(
-            depots=depots,
-            customers=customers,
-            num_vehicles_per_depot=num_vehicles,
-            strategy=strategy,
-            time_limit=time_limit
-        )
+        with tracing(trace):
+            with phase('parse'):
+                data = request.json
+                num_vehicles = data.get('num_vehicles_per_depot', 2)
+                strategy = data.get('strategy', 'benchmark')
+                time_limit = data.get('time_limit', 45)
+                parallel = data.get('parallel', True)
+                max_workers = data.get('max_workers')
+                neighbors_k = data.get('neighbors_k')
+                post_optimization = data.get('post_optimization')
 
-        return jsonify({
-            'status': 'success',
-            'data': result
-        })
+            # Tọa độ (x, y) từ dataset dùng chung (chỉ parse lại khi file dữ liệu thay đổi)
+            with phase('data_load'):
+                dataset = get_dataset()
+                depots = dataset.locations('depots', order='lnglat')
+                customers = dataset.locations('customers', order='lnglat')
+
+            solver_kwargs = {
+                'depots': depots,
+                'customers': customers,
+                'num_vehicles_per_depot': num_vehicles,
+                'strategy': strategy,
+                'time_limit': time_limit,
+                'parallel': parallel,
+                'max_workers': max_workers,
+                'neighbors_k': neighbors_k,
+                'post_optimization': post_optimization,
+                'warm_start': bool(data.get('warm_start', False)),
+                'instrument': bool(data.get('instrument', False)),
+                'output_format': data.get('format', 'full'),
+                'termination': data.get('termination'),
+                'race': data.get('race'),
+                'distance_metric': data.get('distance_metric', 'euclidean'),
+                # Toạ độ của Flask theo thứ tự (lng, lat)
+                'coord_order': 'lnglat'
+            }
+            if data.get('async'):
+                status = 'queued'
+                return submit_job(solver_kwargs, data.get('job_timeout'))
+
+            # Gọi solver
+            result = solve_mdvrp_enhanced(matrix_cache=get_default_cache(),
+                                          plan_store=get_default_plan_store(),
+                                          result_cache=get_default_result_cache(),
+                                          strategy_history=get_default_strategy_history(), **solver_kwargs)
+
+            with phase('serialize'):
+                return json_response({
+                    'status': 'success',
+                    'data': result
+                })
 
     except Exception as e:
+        status = 'error'
         return jsonify({
             'status': 'error',
             'message': str(e)
         }), 400
+    finally:
+        get_metrics().observe('calculate', trace, status)
+
+
+@app.route('/api/metrics/', methods=['GET', 'DELETE'])
+def metrics():
+    """GET: thống kê thời gian từng giai đoạn (p50 / p90 / p99) và bộ đếm theo endpoint; DELETE: xoá thống kê"""
+    if request.method == 'DELETE':
+        get_metrics().reset()
+    return jsonify(get_metrics().snapshot())
+
+
+def json_response(data, status=200):
+    """JSON (orjson nếu có) của kết quả lớn, nén gzip khi client gửi Accept-Encoding: gzip"""
+    body, encoding = encode_body(data, request.headers.get('Accept-Encoding'))
+    headers = {'Vary': 'Accept-Encoding'}
+    if encoding:
+        headers['Content-Encoding'] = encoding
+    return Response(body, status=status, mimetype='application/json', headers=headers)
+
+
+def submit_job(solver_kwargs, timeout=None):
+    """Đưa việc giải vào hàng đợi: 202 + job_id, hoặc 503 khi hàng đợi đầy"""
+    try:
+        job = get_job_manager().submit(solver_kwargs, timeout=timeout)
+    except JobQueueFull as e:
+        return jsonify({'status': 'busy', 'message': str(e)}), 503, {'Retry-After': str(BUSY_RETRY_AFTER)}
+    poll_url = f'/api/jobs/{job.id}/'
+    return jsonify({'status': job.status, 'job_id': job.id, 'poll_url': poll_url}), 202, {'Location': poll_url}
+
+
+@app.route('/api/jobs/<job_id>/', methods=['GET', 'DELETE'])
+def job_status(job_id):
+    """Trạng thái / kết quả của job (GET) hoặc huỷ job (DELETE)"""
+    manager = get_job_manager()
+    job = manager.get(job_id) if request.method == 'GET' else manager.cancel(job_id)
+    if job is None:
+        return jsonify({'status': 'error', 'message': f'Job {job_id} not found'}), 404
+    return json_response(job.to_dict())
+
+
+@app.route('/api/calculate/stream/', methods=['POST'])
+def calculate_stream():
+    """Giải và stream lời giải trung gian (Server-Sent Events), body như /api/calculate/"""
+    data = request.json or {}
+    dataset = get_dataset()
+    depots = dataset.locations('depots', order='lnglat')
+    customers = dataset.locations('customers', order='lnglat')
+
+    solver_kwargs = {'depots': depots, 'customers': customers}
+    for key in ('num_vehicles_per_depot', 'strategy', 'time_limit', 'max_workers',
+                'neighbors_k', 'post_optimization', 'warm_start', 'termination', 'race', 'distance_metric'):
+        if data.get(key) is not None:
+            solver_kwargs[key] = data[key]
+    solver_kwargs.setdefault('num_vehicles_per_depot', 2)
+    solver_kwargs['coord_order'] = 'lnglat'
+    solver_kwargs['output_format'] = data.get('format', 'full')
+
+    try:
+        stream = open_stream(solver_kwargs)
+    except StreamLimitReached as e:
+        return jsonify({'status': 'busy', 'message': str(e)}), 503, {'Retry-After': str(BUSY_RETRY_AFTER)}
+    return Response(stream.events(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+@app.route('/api/calculate/stream/<stream_id>/stop/', methods=['POST'])
+def stop_stream(stream_id):
+    """Dừng solve đang stream, kết quả tốt nhất hiện có được gửi qua sự kiện result"""
+    stream = get_stream(stream_id)
+    if stream is None:
+        return jsonify({'status': 'error', 'message': f'Stream {stream_id} not found'}), 404
+    stream.stop()
+    return jsonify({'status': 'success', 'message': 'Stop requested'})
 
 
 @app.route('/api/strategies/', methods=['GET'])
@@ -62,6 +185,9 @@ def get_strategies():
             {'id': 'strategy1', 'name': 'PATH_CHEAPEST_ARC + GUIDED_LOCAL_SEARCH'},
             {'id': 'strategy2', 'name': 'PATH_MOST_CONSTRAINED_ARC + SIMULATED_ANNEALING'},
             {'id': 'strategy3', 'name': 'NEAREST_NEIGHBOR + TABU_SEARCH'},
+            {'id': 'strategy4', 'name': 'DEPOT_DECOMPOSITION + GUIDED_LOCAL_SEARCH'},
+            {'id': 'strategy5', 'name': 'RUIN_RECREATE + SIMULATED_ANNEALING'},
+            {'id': 'auto', 'name': 'Auto (strategy selected from instance features)'},
             {'id': 'benchmark', 'name': 'Benchmark All Strategies'},
             {'id': 'benchmark_with_2opt', 'name': 'Benchmark + 2-opt Optimization'}
         ]
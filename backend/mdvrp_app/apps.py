@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class MdvrpAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'mdvrp_app'
+
+    def ready(self):
+        # Dữ liệu depots / customers / drivers đọc từ database (store), không từ data/*.json
+        from .dataset import set_default_source
+        from .store import StoreSource
+        set_default_source(StoreSource())
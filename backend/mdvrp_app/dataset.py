@@ -0,0 +1,136 @@
+"""
+Bộ nhớ đệm dữ liệu depots / customers / drivers dùng chung cho các endpoint
+- Nguồn dữ liệu: database qua store.StoreSource (Django, đặt trong AppConfig.ready)
+  hoặc file data/<kind>.json (FileSource, mặc định - Flask app)
+- Chỉ đọc lại khi phiên bản của nguồn thay đổi (bộ đếm trong database / mtime, size của file),
+  hoặc khi endpoint ghi dữ liệu gọi bump(kind) (tăng version)
+- Toạ độ giữ dạng mảng numpy gọn (n, 2) và danh sách tuple cho solver, tính 1 lần mỗi phiên bản
+- Chỉ nạp lại đúng loại dữ liệu đã thay đổi
+"""
+import json
+import os
+import threading
+
+import numpy as np
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "data")
+
+KINDS = ("depots", "customers", "drivers")
+# Thứ tự cột toạ độ: Django dùng (lat, lng), Flask dùng (lng, lat)
+ORDERS = {"latlng": ("latitude", "longitude"), "lnglat": ("longitude", "latitude")}
+
+
+class _Entry:
+    def __init__(self, signature, records):
+        self.signature = signature
+        self.records = records
+        self.coords = {}
+        self.locations = {}
+
+
+class FileSource:
+    """Đọc data_dir/<kind>.json; phiên bản theo mtime / size của file"""
+
+    def __init__(self, data_dir=None):
+        self.data_dir = data_dir or DATA_DIR
+
+    def _path(self, kind):
+        return os.path.join(self.data_dir, f"{kind}.json")
+
+    def signature(self, kind):
+        try:
+            stat = os.stat(self._path(kind))
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def records(self, kind, previous=None):
+        """Toàn bộ bản ghi (file luôn được đọc lại cả file)"""
+        try:
+            with open(self._path(kind), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return []
+
+
+class Dataset:
+    def __init__(self, data_dir=None, source=None):
+        """source: đối tượng có signature(kind) / records(kind, previous), mặc định FileSource(data_dir)"""
+        self.source = source or FileSource(data_dir)
+        self.version = 0
+        self._entries = {}
+        self._stale = set()
+        self._lock = threading.Lock()
+
+    def _entry(self, kind):
+        """Entry hiện tại của kind, nạp lại nếu nguồn đã đổi hoặc đã bị bump"""
+        if kind not in KINDS:
+            raise ValueError(f"Unknown dataset: {kind}")
+        # Đọc phiên bản trước dữ liệu: có ghi xen giữa thì dữ liệu chỉ mới hơn, lần sau nạp lại
+        signature = self.source.signature(kind)
+        with self._lock:
+            entry = self._entries.get(kind)
+            if entry is not None and entry.signature == signature and kind not in self._stale:
+                return entry
+
+        # Nguồn có thể chỉ đọc phần mới so với lần trước (StoreSource với khách hàng thêm mới)
+        previous = (entry.signature, entry.records) if entry is not None and kind not in self._stale else None
+        entry = _Entry(signature, self.source.records(kind, previous))
+        with self._lock:
+            self._entries[kind] = entry
+            self._stale.discard(kind)
+            self.version += 1
+        return entry
+
+    def bump(self, *kinds):
+        """Đánh dấu dữ liệu đã thay đổi (gọi từ endpoint ghi), lần đọc sau sẽ nạp lại"""
+        with self._lock:
+            self._stale.update(kinds or KINDS)
+            self.version += 1
+
+    def records(self, kind):
+        """Danh sách bản ghi (dict) của kind; dùng chung giữa các request, không được sửa"""
+        return self._entry(kind).records
+
+    def coords(self, kind, order="latlng"):
+        """Mảng toạ độ (n, 2) float64 chỉ đọc"""
+        return self._coords(self._entry(kind), order)
+
+    def _coords(self, entry, order):
+        array = entry.coords.get(order)
+        if array is None:
+            first, second = ORDERS[order]
+            array = np.array([(r[first], r[second]) for r in entry.records], dtype=np.float64).reshape(-1, 2)
+            array.setflags(write=False)
+            entry.coords[order] = array
+        return array
+
+    def locations(self, kind, order="latlng"):
+        """Danh sách tuple toạ độ (định dạng đầu vào của solver); dùng chung, không được sửa"""
+        entry = self._entry(kind)
+        locations = entry.locations.get(order)
+        if locations is None:
+            locations = entry.locations[order] = [tuple(point) for point in self._coords(entry, order).tolist()]
+        return locations
+
+
+_default_dataset = None
+_default_source = None
+_default_dataset_lock = threading.Lock()
+
+
+def set_default_source(source):
+    """Đổi nguồn của Dataset dùng chung (Django: database qua store.StoreSource)"""
+    global _default_dataset, _default_source
+    with _default_dataset_lock:
+        _default_source = source
+        _default_dataset = None
+
+
+def get_dataset():
+    """Dataset dùng chung trong process (mặc định thư mục data/ của project)"""
+    global _default_dataset
+    with _default_dataset_lock:
+        if _default_dataset is None:
+            _default_dataset = Dataset(source=_default_source)
+        return _default_dataset
@@ -0,0 +1,309 @@
+"""
+Chia bài toán MDVRP theo depot
+1. Gán khách hàng cho depot (ưu tiên depot gần nhất, có tính sức chứa)
+2. Giải từng bài toán 1 depot (VRP) độc lập, song song trên nhiều process
+3. Sửa chữa ngắn giữa các depot: chuyển khách hàng sang route của depot khác nếu rẻ hơn
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from ortools.constraint_solver import pywrapcp, routing_enums_pb2
+
+try:
+    from .termination import SearchTermination, normalize_termination
+except ImportError:
+    from termination import SearchTermination, normalize_termination
+
+MIN_SUBPROBLEM_MS = 20
+
+
+def assign_customers_to_depots(depot_customer_dist, customer_demands, depot_capacities):
+    """
+    Gán mỗi khách hàng cho 1 depot.
+    Khách hàng có "regret" lớn (depot gần thứ 2 xa hơn nhiều so với depot gần nhất)
+    được gán trước; depot đã hết sức chứa thì chuyển sang depot gần kế tiếp.
+    Trả về mảng depot (chỉ số 0..num_depots-1) cho từng khách hàng.
+    """
+    num_depots, num_customers = depot_customer_dist.shape
+    order_by_customer = np.argsort(depot_customer_dist, axis=0).T  # (customers, depots)
+    sorted_dist = np.take_along_axis(depot_customer_dist.T, order_by_customer, axis=1)
+    if num_depots > 1:
+        regret = sorted_dist[:, 1] - sorted_dist[:, 0]
+    else:
+        regret = np.zeros(num_customers)
+
+    remaining = np.asarray(depot_capacities, dtype=np.int64).copy()
+    assignment = np.empty(num_customers, dtype=np.int64)
+    for customer in np.argsort(-regret, kind="stable"):
+        demand = customer_demands[customer]
+        for depot in order_by_customer[customer]:
+            if remaining[depot] >= demand:
+                break
+        else:
+            # Không depot nào còn đủ sức chứa: gán cho depot gần nhất
+            depot = order_by_customer[customer][0]
+        assignment[customer] = depot
+        remaining[depot] -= demand
+    return assignment
+
+
+def solve_single_depot(task):
+    """
+    Giải VRP 1 depot bằng OR-Tools (PATH_CHEAPEST_ARC + GUIDED_LOCAL_SEARCH).
+    task = (depot_index, nodes, scaled_matrix, demands, capacities, time_limit_ms, deadline, termination)
+    nodes[0] là depot; thời gian tìm kiếm không vượt quá deadline (time.time(), chung cho mọi bài toán con); trả về (depot_index, list route theo chỉ số node toàn cục hoặc None, lý do dừng).
+    termination: tiêu chí dừng sớm (termination.py), trừ target_objective (chỉ có nghĩa với toàn bài toán).
+    """
+    depot_index, nodes, scaled_matrix, demands, capacities, time_limit_ms, deadline, termination = task
+    # Bài toán con chạy sau (khi số depot nhiều hơn số worker) chỉ còn phần thời gian tới deadline
+    time_limit_ms = max(MIN_SUBPROBLEM_MS, min(time_limit_ms, (deadline - time.time()) * 1000))
+
+    manager = pywrapcp.RoutingIndexManager(len(nodes), len(capacities), 0)
+    routing = pywrapcp.RoutingModel(manager)
+    transit_callback_index = routing.RegisterTransitMatrix(scaled_matrix)
+    routing.SetArcCostEvaluatorOfAllVehicles(transit_callback_index)
+    demand_callback_index = routing.RegisterUnaryTransitVector(demands)
+    routing.AddDimensionWithVehicleCapacity(
+        demand_callback_index, 0, capacities, True, 'Capacity'
+    )
+
+    search_parameters = pywrapcp.DefaultRoutingSearchParameters()
+    search_parameters.first_solution_strategy = (
+        routing_enums_pb2.FirstSolutionStrategy.PATH_CHEAPEST_ARC
+    )
+    search_parameters.local_search_metaheuristic = (
+        routing_enums_pb2.LocalSearchMetaheuristic.GUIDED_LOCAL_SEARCH
+    )
+    search_parameters.time_limit.FromMilliseconds(int(time_limit_ms))
+
+    # Ma trận đã nhân scale nên objective so sánh trực tiếp (scale=1)
+    monitor = SearchTermination(termination)
+
+    def on_solution():
+        if monitor.observe(routing.CostVar().Value()):
+            routing.solver().FinishCurrentSearch()
+
+    routing.AddAtSolutionCallback(on_solution)
+    solution = routing.SolveWithParameters(search_parameters)
+    reason = monitor.summary(time_limit_ms / 1000)['reason']
+    if not solution:
+        return depot_index, None, reason
+
+    routes = []
+    for vehicle_id in range(len(capacities)):
+        index = routing.Start(vehicle_id)
+        route = []
+        while not routing.IsEnd(index):
+            route.append(nodes[manager.IndexToNode(index)])
+            index = solution.Value(routing.NextVar(index))
+        route.append(nodes[manager.IndexToNode(index)])
+        routes.append(route)
+    return depot_index, routes, reason
+
+
+def repair_cross_depot(routes, dense, demands, capacities, time_limit=2.0, neighbors=None):
+    """
+    Sửa chữa ngắn sau khi giải từng depot: với mỗi khách hàng, thử chuyển sang vị trí
+    chèn rẻ nhất trong route khác, kể cả route của depot khác (còn đủ sức chứa);
+    nhận nếu tổng chi phí giảm, lặp lại tới khi không cải thiện hoặc hết time_limit.
+    neighbors (mảng kNN, tuỳ chọn): chỉ thử các route đang chứa láng giềng của khách hàng.
+    routes: list[list[int]] (mỗi route bắt đầu và kết thúc ở depot), sửa trực tiếp.
+    Trả về số lần di chuyển đã thực hiện.
+    """
+    start_time = time.time()
+    loads = [sum(demands[node] for node in route[1:-1]) for route in routes]
+    position = {}
+    for r, route in enumerate(routes):
+        for p, node in enumerate(route[1:-1], 1):
+            position[node] = (r, p)
+
+    moves = 0
+    improved = True
+    while improved and time.time() - start_time <= time_limit:
+        improved = False
+        # Giải tán route ngắn: chèn toàn bộ khách hàng của route sang các route khác
+        for r in sorted(range(len(routes)), key=lambda i: len(routes[i])):
+            if time.time() - start_time > time_limit:
+                break
+            if len(routes[r]) > 2 and _eliminate_route(r, routes, loads, position, dense, demands,
+                                                       capacities, neighbors):
+                moves += 1
+                improved = True
+
+        for customer in list(position):
+            if time.time() - start_time > time_limit:
+                break
+            if _relocate_customer(customer, routes, loads, position, dense, demands, capacities, neighbors):
+                moves += 1
+                improved = True
+    return moves
+
+
+def _candidate_routes(customer, routes, position, neighbors):
+    """Các route cần thử khi chèn customer: mọi route, hoặc chỉ route chứa láng giềng kNN"""
+    if neighbors is None:
+        return range(len(routes))
+    return {position[node][0] for node in neighbors[customer] if node in position}
+
+
+def _best_insertion(customer, routes, loads, position, dense, demands, capacities, skip, neighbors=None):
+    """Vị trí chèn rẻ nhất (delta, route, vị trí) của customer, bỏ qua route skip"""
+    best = (np.inf, None, None)
+    for r2 in _candidate_routes(customer, routes, position, neighbors):
+        other = routes[r2]
+        if r2 == skip or loads[r2] + demands[customer] > capacities[r2]:
+            continue
+        nodes = np.asarray(other)
+        insert_cost = (dense[nodes[:-1], customer] + dense[customer, nodes[1:]]
+                       - dense[nodes[:-1], nodes[1:]])
+        q = int(np.argmin(insert_cost))
+        if insert_cost[q] < best[0]:
+            best = (float(insert_cost[q]), r2, q + 1)
+    return best
+
+
+def _eliminate_route(r, routes, loads, position, dense, demands, capacities, neighbors=None):
+    """Chèn mọi khách hàng của route r sang route khác; giữ lại nếu tổng chi phí giảm"""
+    route = routes[r]
+    nodes = np.asarray(route)
+    saving = float(dense[nodes[:-1], nodes[1:]].sum())
+    inserted = []
+    added_cost = 0.0
+    for customer in route[1:-1]:
+        delta, r2, q = _best_insertion(customer, routes, loads, position, dense, demands, capacities,
+                                       skip=r, neighbors=neighbors)
+        if r2 is None or added_cost + delta >= saving:
+            break
+        routes[r2].insert(q, customer)
+        loads[r2] += demands[customer]
+        inserted.append((customer, r2))
+        added_cost += delta
+    else:
+        if added_cost < saving - 1e-9:
+            routes[r] = [route[0], route[-1]]
+            loads[r] = 0
+            for rr in {r2 for _, r2 in inserted}:
+                for pp, node in enumerate(routes[rr][1:-1], 1):
+                    position[node] = (rr, pp)
+            return True
+
+    # Không có lợi: hoàn tác
+    for customer, r2 in reversed(inserted):
+        routes[r2].remove(customer)
+        loads[r2] -= demands[customer]
+    return False
+
+
+def _relocate_customer(customer, routes, loads, position, dense, demands, capacities, neighbors=None):
+    """Chuyển customer sang vị trí chèn rẻ nhất trong route khác nếu tổng chi phí giảm"""
+    r, p = position[customer]
+    route = routes[r]
+    prev_node, next_node = route[p - 1], route[p + 1]
+    removal_gain = (dense[prev_node, customer] + dense[customer, next_node]
+                    - dense[prev_node, next_node])
+
+    delta, r2, q = _best_insertion(customer, routes, loads, position, dense, demands, capacities,
+                                   skip=r, neighbors=neighbors)
+    if r2 is None or delta - removal_gain >= -1e-9:
+        return False
+
+    del route[p]
+    routes[r2].insert(q, customer)
+    loads[r] -= demands[customer]
+    loads[r2] += demands[customer]
+    for rr in (r, r2):
+        for pp, node in enumerate(routes[rr][1:-1], 1):
+            position[node] = (rr, pp)
+    return True
+
+
+def solve_by_depot_decomposition(solver, time_limit=45, max_workers=None, repair_time=None,
+                                 neighbors=None, termination=None):
+    """
+    Giải MDVRP bằng cách chia theo depot.
+    ~85% time_limit dành cho các bài toán con, repair_time (mặc định 10%) cho bước sửa chữa.
+    max_workers (mặc định số CPU) bị giới hạn bởi số CPU và số bài toán con.
+    Trả về (routes, moves, stop_reasons): routes là list (vehicle_id, list node) cho mọi xe có khách,
+    None nếu có bài toán con không giải được; stop_reasons đếm số bài toán con theo lý do dừng.
+    """
+    start_time = time.time()
+    termination = normalize_termination(termination)
+    if termination:
+        termination.pop('target_objective', None)
+    num_depots = solver.num_depots
+    npd = solver.num_vehicles_per_depot
+    dense = solver.distance_matrix.to_dense()
+    demands = np.asarray(solver.demands, dtype=np.int64)
+    capacities = np.asarray(solver.vehicle_capacities, dtype=np.int64)
+    depot_capacities = capacities.reshape(num_depots, npd).sum(axis=1)
+
+    # 1. Gán khách hàng cho depot
+    customer_nodes = np.arange(num_depots, len(solver.all_locations))
+    assignment = assign_customers_to_depots(
+        dense[:num_depots, num_depots:], demands[num_depots:], depot_capacities
+    )
+
+    # 2. Tạo các bài toán con: tổng thời gian tìm kiếm (85% time_limit x số worker thực sự chạy song song)
+    # chia theo tỉ lệ số khách hàng của từng depot, mỗi bài toán con không quá 85% time_limit
+    groups = [(depot, customer_nodes[assignment == depot]) for depot in range(num_depots)]
+    groups = [(depot, members) for depot, members in groups if len(members)]
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_workers = max(1, min(int(max_workers), len(groups), os.cpu_count() or 1))
+    if repair_time is None:
+        repair_time = 0.1 * time_limit
+    subproblem_ms = time_limit * 1000 * 0.85
+    search_budget_ms = subproblem_ms * max_workers
+    deadline = start_time + time_limit * 0.85
+    scaled = solver.distance_matrix.to_scaled()
+    tasks = []
+    for depot, members in groups:
+        nodes = np.concatenate([[depot], members])
+        vehicle_ids = range(depot * npd, (depot + 1) * npd)
+        tasks.append((
+            depot,
+            nodes.tolist(),
+            scaled[np.ix_(nodes, nodes)].tolist(),
+            demands[nodes].tolist(),
+            capacities[list(vehicle_ids)].tolist(),
+            max(MIN_SUBPROBLEM_MS, min(subproblem_ms, search_budget_ms * len(members) / len(customer_nodes))),
+            deadline,
+            termination
+        ))
+
+    if max_workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            chunksize = max(1, len(tasks) // (max_workers * 4))
+            sub_results = list(executor.map(solve_single_depot, tasks, chunksize=chunksize))
+    else:
+        sub_results = [solve_single_depot(task) for task in tasks]
+
+    routes = []
+    vehicle_ids = []
+    stop_reasons = {}
+    for depot, depot_routes, reason in sub_results:
+        stop_reasons[reason] = stop_reasons.get(reason, 0) + 1
+        if depot_routes is None:
+            return None, 0, stop_reasons
+        for k, route in enumerate(depot_routes):
+            routes.append(route)
+            vehicle_ids.append(depot * npd + k)
+
+    # Các xe của depot không có khách hàng vẫn có thể nhận khách khi sửa chữa
+    used = set(vehicle_ids)
+    for vehicle_id in range(solver.num_vehicles):
+        if vehicle_id not in used:
+            depot = solver.starts[vehicle_id]
+            routes.append([depot, depot])
+            vehicle_ids.append(vehicle_id)
+
+    # 3. Sửa chữa giữa các depot
+    moves = repair_cross_depot(
+        routes, dense, demands.tolist(), capacities[vehicle_ids].tolist(),
+        time_limit=repair_time, neighbors=neighbors
+    )
+
+    return [(vehicle_id, route) for vehicle_id, route in zip(vehicle_ids, routes)
+            if len(route) > 2], moves, stop_reasons
@@ -0,0 +1,184 @@
+"""
+Ma trận khoảng cách đối xứng dùng NumPy
+- Tính toàn bộ ma trận bằng broadcast theo từng khối hàng (không còn vòng lặp đôi)
+- Lưu dạng float32 liên tục, hoặc int32 đã nhân sẵn hệ số scale cho OR-Tools
+- Tuỳ chọn lưu dạng condensed (chỉ tam giác trên) vì ma trận đối xứng
+"""
+import numpy as np
+
+DEFAULT_SCALE = 100
+DEFAULT_BLOCK_SIZE = 1024
+
+
+class DistanceMatrix:
+    def __init__(self, locations, scale=DEFAULT_SCALE, dtype=np.float32,
+                 condensed=False, block_size=DEFAULT_BLOCK_SIZE):
+        self.coords = np.ascontiguousarray(np.asarray(locations, dtype=np.float64).reshape(-1, 2))
+        self.n = len(self.coords)
+        self.scale = scale
+        self.dtype = np.dtype(dtype)
+        self.condensed = condensed
+        self.block_size = block_size
+
+        if self.dtype not in (np.dtype(np.float32), np.dtype(np.int32)):
+            raise ValueError(f"Unsupported dtype: {self.dtype}")
+
+        self.data = self._build()
+
+    @classmethod
+    def from_array(cls, locations, data, scale=DEFAULT_SCALE, condensed=False):
+        """Tạo DistanceMatrix từ mảng đã tính sẵn (cache, memmap...)"""
+        obj = cls.__new__(cls)
+        obj.coords = np.ascontiguousarray(np.asarray(locations, dtype=np.float64).reshape(-1, 2))
+        obj.n = len(obj.coords)
+        obj.scale = scale
+        obj.dtype = np.dtype(data.dtype)
+        obj.condensed = condensed
+        obj.block_size = DEFAULT_BLOCK_SIZE
+        obj.data = data
+        return obj
+
+    # ------------------------------------------------------------------
+    # Xây dựng ma trận
+    # ------------------------------------------------------------------
+    def _block(self, start, stop, cols=None):
+        """Khoảng cách từ các hàng [start, stop) tới các cột cols (float64)"""
+        cols = self.coords if cols is None else cols
+        rows = self.coords[start:stop]
+        return np.hypot(rows[:, 0, None] - cols[None, :, 0],
+                        rows[:, 1, None] - cols[None, :, 1])
+
+    def _cast(self, values):
+        """Chuyển float64 sang kiểu lưu trữ (int32 giữ nguyên cách làm tròn int(d * scale))"""
+        if self.dtype == np.int32:
+            return (values * self.scale).astype(np.int32)
+        return values.astype(np.float32)
+
+    def _build(self):
+        n = self.n
+        if self.condensed:
+            data = np.empty(n * (n - 1) // 2, dtype=self.dtype)
+            offset = 0
+            for i in range(n - 1):
+                row = np.hypot(self.coords[i + 1:, 0] - self.coords[i, 0],
+                               self.coords[i + 1:, 1] - self.coords[i, 1])
+                data[offset:offset + len(row)] = self._cast(row)
+                offset += len(row)
+            return data
+
+        data = np.empty((n, n), dtype=self.dtype)
+        for start in range(0, n, self.block_size):
+            stop = min(start + self.block_size, n)
+            data[start:stop] = self._cast(self._block(start, stop))
+        # Đường chéo luôn bằng 0
+        np.fill_diagonal(data, 0)
+        return data
+
+    # ------------------------------------------------------------------
+    # Truy xuất
+    # ------------------------------------------------------------------
+    def _condensed_index(self, i, j):
+        """Vị trí của cặp (i, j), i < j, trong mảng condensed"""
+        return self.n * i - i * (i + 1) // 2 + (j - i - 1)
+
+    def raw(self, i, j):
+        """Giá trị lưu trữ (chưa chia scale) cho các cặp (i, j), hỗ trợ mảng chỉ số"""
+        if not self.condensed:
+            return self.data[i, j]
+
+        lo = np.minimum(i, j)
+        hi = np.maximum(i, j)
+        same = lo == hi
+        if not len(self.data):
+            return np.zeros(np.shape(same), dtype=self.dtype)
+
+        # Cặp (i, i) không có trong condensed, trỏ tạm về ô 0 rồi gán lại 0
+        index = np.where(same, 0, self._condensed_index(lo, np.where(same, lo + 1, hi)))
+        return np.where(same, 0, self.data[index]).astype(self.dtype)
+
+    def distance(self, i, j):
+        """Khoảng cách thực (float) giữa các cặp (i, j)"""
+        values = self.raw(i, j)
+        if self.dtype == np.int32:
+            return values / self.scale
+        return values
+
+    def __getitem__(self, key):
+        i, j = key
+        value = self.distance(i, j)
+        if np.ndim(value) == 0:
+            return float(value)
+        return value
+
+    def __len__(self):
+        return self.n
+
+    @property
+    def nbytes(self):
+        return self.data.nbytes
+
+    def row(self, i):
+        """Một hàng khoảng cách (float) từ node i tới tất cả các node"""
+        if not self.condensed:
+            return self.distance(i, slice(None))
+        return self.distance(np.full(self.n, i), np.arange(self.n))
+
+    def route_distance(self, nodes):
+        """Tổng khoảng cách theo thứ tự các node của route"""
+        nodes = np.asarray(nodes, dtype=np.intp)
+        if len(nodes) < 2:
+            return 0.0
+        return float(np.sum(self.distance(nodes[:-1], nodes[1:]), dtype=np.float64))
+
+    def _expand(self):
+        """Dựng lại ma trận đầy đủ từ dạng condensed (giữ nguyên kiểu lưu trữ)"""
+        dense = np.zeros((self.n, self.n), dtype=self.dtype)
+        offset = 0
+        for i in range(self.n - 1):
+            length = self.n - i - 1
+            row = self.data[offset:offset + length]
+            dense[i, i + 1:] = row
+            dense[i + 1:, i] = row
+            offset += length
+        return dense
+
+    def to_dense(self):
+        """Ma trận đầy đủ n x n dạng float32"""
+        dense = self._expand() if self.condensed else self.data
+        if self.dtype == np.int32:
+            return (dense / self.scale).astype(np.float32)
+        return dense
+
+    def to_scaled(self):
+        """Ma trận đầy đủ n x n dạng int32 đã nhân scale, dùng trực tiếp cho OR-Tools"""
+        dense = self._expand() if self.condensed else self.data
+        if self.dtype == np.int32:
+            return dense
+
+        scaled = np.empty((self.n, self.n), dtype=np.int32)
+        for start in range(0, self.n, self.block_size):
+            stop = min(start + self.block_size, self.n)
+            scaled[start:stop] = (dense[start:stop].astype(np.float64) * self.scale).astype(np.int32)
+        return scaled
+
+    def extended(self, new_locations):
+        """
+        Ma trận mới sau khi nối thêm new_locations vào cuối danh sách node.
+        Chỉ tính các hàng/cột mới, phần cũ được sao chép nguyên.
+        """
+        if self.condensed:
+            raise ValueError("extended() only supports dense matrices")
+
+        new_coords = np.asarray(new_locations, dtype=np.float64).reshape(-1, 2)
+        coords = np.concatenate([self.coords, new_coords])
+        n_old, n = self.n, len(coords)
+
+        data = np.empty((n, n), dtype=self.dtype)
+        data[:n_old, :n_old] = self.data
+
+        result = DistanceMatrix.from_array(coords, data, scale=self.scale)
+        new_rows = result._cast(result._block(n_old, n))
+        data[n_old:, :] = new_rows
+        data[:n_old, n_old:] = new_rows[:, :n_old].T
+        data[np.arange(n_old, n), np.arange(n_old, n)] = 0
+        return result
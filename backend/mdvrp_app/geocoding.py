@@ -0,0 +1,212 @@
+"""
+Dịch vụ geocoding (địa chỉ -> toạ độ) dùng chung
+- Cache địa chỉ -> toạ độ lưu bền trên SQLite (chia sẻ giữa các process), cả kết quả "không tìm thấy"
+- requests.Session dùng lại kết nối (connection pool), tự thử lại khi gặp 429 / 5xx
+- Giới hạn tốc độ gọi upstream (Nominatim: tối đa 1 request/giây) dùng chung cho mọi luồng
+- geocode_many: bỏ trùng, tra cache 1 lần, gọi song song có giới hạn các địa chỉ chưa có
+- Endpoint cấu hình qua MDVRP_GEOCODER_URL (trỏ tới server giả lập khi test)
+"""
+import os
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_URL = os.environ.get("MDVRP_GEOCODER_URL", "https://nominatim.openstreetmap.org/search")
+DEFAULT_USER_AGENT = os.environ.get("MDVRP_GEOCODER_USER_AGENT", "RoutePlannerBot")
+# Số request / giây tới upstream (0 = không giới hạn)
+DEFAULT_RATE = float(os.environ.get("MDVRP_GEOCODER_RATE", 1.0))
+DEFAULT_WORKERS = int(os.environ.get("MDVRP_GEOCODER_WORKERS", 4))
+DEFAULT_TIMEOUT = float(os.environ.get("MDVRP_GEOCODER_TIMEOUT", 10))
+# Kết quả "không tìm thấy" được nhớ trong bao lâu (giây) trước khi hỏi lại upstream
+NEGATIVE_TTL = int(os.environ.get("MDVRP_GEOCODER_NEGATIVE_TTL", 24 * 3600))
+# Đặt MDVRP_GEOCODER_CACHE="" để chỉ cache trong bộ nhớ
+DEFAULT_CACHE_PATH = os.environ.get(
+    "MDVRP_GEOCODER_CACHE",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "geocode.sqlite3")
+)
+
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_address(address):
+    """Khoá cache: bỏ khoảng trắng thừa, chữ thường"""
+    return _SPACES.sub(" ", str(address)).strip().lower()
+
+
+class RateLimiter:
+    """Giãn cách đều các lần gọi (rate lần / giây), an toàn giữa các luồng"""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class GeocodeCache:
+    """Bảng address -> (lat, lng) trên SQLite; lat/lng NULL nghĩa là upstream không tìm thấy"""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, negative_ttl=NEGATIVE_TTL):
+        self.path = path or ":memory:"
+        self.negative_ttl = negative_ttl
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(self.path, timeout=20, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS geocode ("
+                "address TEXT PRIMARY KEY, latitude REAL, longitude REAL, updated_at REAL NOT NULL)"
+            )
+
+    def get_many(self, addresses):
+        """{address: (lat, lng) hoặc None} cho các địa chỉ có trong cache (còn hạn)"""
+        found = {}
+        expired_before = time.time() - self.negative_ttl
+        addresses = list(addresses)
+        with self._lock:
+            # SQLite giới hạn số tham số mỗi câu lệnh
+            for start in range(0, len(addresses), 500):
+                batch = addresses[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT address, latitude, longitude, updated_at FROM geocode "
+                    f"WHERE address IN ({', '.join('?' * len(batch))})", batch
+                ).fetchall()
+                for address, lat, lng, updated_at in rows:
+                    if lat is not None:
+                        found[address] = (lat, lng)
+                    elif updated_at >= expired_before:
+                        found[address] = None
+        return found
+
+    def put_many(self, results):
+        now = time.time()
+        rows = [(address, *(point or (None, None)), now) for address, point in results.items()]
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO geocode VALUES (?, ?, ?, ?)", rows)
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM geocode").fetchone()[0]
+
+
+class GeocodeError(Exception):
+    """Upstream lỗi (mạng / HTTP) sau khi đã thử lại; không cache"""
+
+
+class Geocoder:
+    def __init__(self, url=DEFAULT_URL, cache=None, rate=DEFAULT_RATE, max_workers=DEFAULT_WORKERS,
+                 timeout=DEFAULT_TIMEOUT, user_agent=DEFAULT_USER_AGENT, session=None):
+        self.url = url
+        self.cache = cache if cache is not None else GeocodeCache()
+        self.rate_limiter = RateLimiter(rate)
+        self.max_workers = max(1, max_workers)
+        self.timeout = timeout
+        self.session = session or self._make_session(user_agent)
+        self.hits = 0
+        self.misses = 0
+        self.failures = 0
+        self._stats_lock = threading.Lock()
+
+    def _make_session(self, user_agent):
+        session = requests.Session()
+        retry = Retry(total=3, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504),
+                      allowed_methods=("GET",), respect_retry_after_header=True)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers, max_retries=retry)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        session.headers["User-Agent"] = user_agent
+        return session
+
+    def _fetch(self, address):
+        """Gọi upstream cho 1 địa chỉ: (lat, lng) hoặc None nếu không tìm thấy"""
+        self.rate_limiter.wait()
+        try:
+            response = self.session.get(self.url, params={"q": address, "format": "json", "limit": 1},
+                                        timeout=self.timeout)
+            response.raise_for_status()
+            data = response.json()
+        except (requests.RequestException, ValueError) as e:
+            raise GeocodeError(f"Geocoding failed for {address!r}: {e}") from e
+        if data:
+            return float(data[0]["lat"]), float(data[0]["lon"])
+        return None
+
+    def geocode(self, address):
+        """Toạ độ (lat, lng) của 1 địa chỉ, None nếu không tìm thấy hoặc upstream lỗi"""
+        return self.geocode_many([address]).get(address)
+
+    def geocode_many(self, addresses, limit=None):
+        """
+        {address: (lat, lng) hoặc None} cho các địa chỉ (giữ nguyên chuỗi đầu vào làm khoá).
+        limit: số lần gọi upstream tối đa (địa chỉ chưa có trong cache); phần vượt quá trả về None.
+        """
+        keys = {}
+        for address in addresses:
+            if address and str(address).strip():
+                keys.setdefault(normalize_address(address), []).append(address)
+
+        cached = self.cache.get_many(keys)
+        pending = [key for key in keys if key not in cached]
+        if limit is not None:
+            pending = pending[:max(limit, 0)]
+        with self._stats_lock:
+            self.hits += len(cached)
+            self.misses += len(pending)
+
+        fetched = {}
+        if pending:
+            def fetch(key):
+                try:
+                    return key, self._fetch(keys[key][0])
+                except GeocodeError:
+                    with self._stats_lock:
+                        self.failures += 1
+                    return key, GeocodeError
+
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(pending))) as executor:
+                for key, point in executor.map(fetch, pending):
+                    if point is not GeocodeError:
+                        fetched[key] = point
+            if fetched:
+                self.cache.put_many(fetched)
+
+        results = {}
+        for key, originals in keys.items():
+            point = cached.get(key, fetched.get(key))
+            for address in originals:
+                results[address] = point
+        return results
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "failures": self.failures,
+                "cached_addresses": len(self.cache), "url": self.url}
+
+
+_default_geocoder = None
+_default_geocoder_lock = threading.Lock()
+
+
+def get_default_geocoder():
+    """Geocoder dùng chung trong process (cấu hình qua biến môi trường MDVRP_GEOCODER_*)"""
+    global _default_geocoder
+    with _default_geocoder_lock:
+        if _default_geocoder is None:
+            _default_geocoder = Geocoder()
+        return _default_geocoder
@@ -0,0 +1,215 @@
+"""
+Nhập hàng loạt khách hàng từ file CSV / Excel
+- Đọc theo từng khối (chunk) thay vì nạp cả file vào bộ nhớ
+- Kiểm tra / chuẩn hoá cột theo kiểu vectorized (pandas), không duyệt từng dòng bằng iterrows
+- Mỗi khối được thêm trong 1 transaction, mã khách hàng cấp theo khối liên tiếp
+- Dòng lỗi được trả về kèm số dòng trong file, không làm hỏng các dòng hợp lệ
+- File data/customers.json chỉ được xuất lại 1 lần sau khi nhập xong
+- Dòng không có toạ độ được geocode theo lô từ địa chỉ (nếu truyền geocoder); trong request chỉ tra cache
+  (geocode_limit=0), phần còn lại geocode nền bằng schedule_geocoding (gọi upstream chậm, ~1 request/giây)
+"""
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connection
+
+import numpy as np
+import pandas as pd
+
+from . import store
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 5000
+REQUIRED_COLUMNS = ["name", "address", "phone"]
+SUPPORTED_EXTENSIONS = (".csv", ".xlsx", ".xlsm", ".xls")
+# Dòng dữ liệu đầu tiên trong file là dòng 2 (dòng 1 là tiêu đề)
+FIRST_DATA_ROW = 2
+
+
+class ImportFormatError(ValueError):
+    """File không đọc được hoặc thiếu cột bắt buộc"""
+
+
+def _csv_chunks(file_obj, chunk_size):
+    for chunk in pd.read_csv(file_obj, chunksize=chunk_size, dtype=str, keep_default_na=False,
+                             skipinitialspace=True):
+        yield chunk
+
+
+def _xlsx_chunks(file_obj, chunk_size):
+    """Đọc .xlsx ở chế độ read-only của openpyxl (theo dòng, không nạp cả sheet)"""
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(file_obj, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [str(value).strip() if value is not None else "" for value in header]
+        buffer = []
+        for row in rows:
+            buffer.append(row)
+            if len(buffer) >= chunk_size:
+                yield pd.DataFrame(buffer, columns=columns)
+                buffer = []
+        if buffer:
+            yield pd.DataFrame(buffer, columns=columns)
+    finally:
+        workbook.close()
+
+
+def _xls_chunks(file_obj, chunk_size):
+    # Định dạng .xls cũ không đọc theo dòng được: đọc cả sheet rồi chia khối
+    df = pd.read_excel(file_obj)
+    for start in range(0, len(df), chunk_size):
+        yield df.iloc[start:start + chunk_size]
+
+
+def read_chunks(file_obj, filename, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Các khối DataFrame của file theo định dạng (đuôi file)"""
+    name = filename.lower()
+    if name.endswith(".csv"):
+        return _csv_chunks(file_obj, chunk_size)
+    if name.endswith((".xlsx", ".xlsm")):
+        return _xlsx_chunks(file_obj, chunk_size)
+    if name.endswith(".xls"):
+        return _xls_chunks(file_obj, chunk_size)
+    raise ImportFormatError(f"Định dạng file không được hỗ trợ: {filename}")
+
+
+def _text(column):
+    """Chuẩn hoá cột về chuỗi (số nguyên lưu dạng float trong Excel bỏ phần .0)"""
+    if column.dtype.kind == "f":
+        column = column.map(lambda v: "" if pd.isna(v) else (str(int(v)) if float(v).is_integer() else str(v)))
+    return column.fillna("").astype(str).str.strip()
+
+
+def validate_chunk(chunk, first_row):
+    """
+    Kiểm tra và chuẩn hoá 1 khối. Trả về (các dòng hợp lệ theo cột, danh sách lỗi {'row', 'message'}).
+    Toạ độ trống được coi là 0 (chưa có toạ độ), toạ độ không phải số hoặc ngoài phạm vi là lỗi.
+    """
+    chunk = chunk.rename(columns=lambda c: str(c).strip().lower())
+    missing = [col for col in REQUIRED_COLUMNS if col not in chunk.columns]
+    if missing:
+        raise ImportFormatError(f"Thiếu các cột bắt buộc: {', '.join(missing)}")
+
+    n = len(chunk)
+    rows = np.arange(first_row, first_row + n)
+    data = {col: _text(chunk[col]) if col in chunk.columns else pd.Series([""] * n, index=chunk.index)
+            for col in REQUIRED_COLUMNS + ["email"]}
+
+    messages = pd.Series([""] * n, index=chunk.index, dtype=object)
+    for col in REQUIRED_COLUMNS:
+        empty = data[col] == ""
+        messages[empty] += f"missing {col}; "
+
+    for col, limit in (("latitude", 90), ("longitude", 180)):
+        if col in chunk.columns:
+            raw = _text(chunk[col])
+            values = pd.to_numeric(raw, errors="coerce")
+            invalid = (raw != "") & values.isna()
+            messages[invalid] += f"invalid {col}; "
+            out_of_range = values.abs() > limit
+            messages[out_of_range] += f"{col} out of range; "
+            data[col] = values.fillna(0.0)
+        else:
+            data[col] = pd.Series(np.zeros(n), index=chunk.index)
+
+    bad = (messages != "").to_numpy()
+    errors = [{"row": int(row), "message": message.rstrip("; ")}
+              for row, message in zip(rows[bad], messages[bad])]
+    columns = {field: data[field].to_numpy()[~bad].tolist() for field in store.CUSTOMER_COLUMNS}
+    return columns, errors
+
+
+def geocode_missing(columns, geocoder, limit=None):
+    """
+    Điền toạ độ cho các dòng (lat, lng) = (0, 0) từ địa chỉ, 1 lần gọi geocode_many cho cả khối.
+    Trả về (số dòng đã điền, số dòng vẫn chưa có toạ độ).
+    """
+    missing = [i for i, (lat, lng) in enumerate(zip(columns["latitude"], columns["longitude"]))
+               if lat == 0 and lng == 0]
+    if not missing:
+        return 0, 0
+    points = geocoder.geocode_many([columns["address"][i] for i in missing], limit=limit)
+    filled = 0
+    for i in missing:
+        point = points.get(columns["address"][i])
+        if point is not None:
+            columns["latitude"][i], columns["longitude"][i] = point
+            filled += 1
+    return filled, len(missing) - filled
+
+
+def import_customers(file_obj, filename, chunk_size=DEFAULT_CHUNK_SIZE, geocoder=None, geocode_limit=None):
+    """
+    Nhập khách hàng từ file CSV / Excel theo từng khối.
+    geocoder: Geocoder dùng để điền toạ độ còn thiếu (None = giữ (0, 0));
+    geocode_limit: số lần gọi upstream tối đa cho cả file (địa chỉ đã cache không tính).
+    Trả về dict: added (các khách hàng đã thêm), errors, rows, geocoded, ungeocoded,
+    elapsed_time, rows_per_second.
+    """
+    start_time = time.time()
+    added = []
+    errors = []
+    rows = 0
+    geocoded = ungeocoded = 0
+    for chunk in read_chunks(file_obj, filename, chunk_size):
+        columns, chunk_errors = validate_chunk(chunk, FIRST_DATA_ROW + rows)
+        rows += len(chunk)
+        errors.extend(chunk_errors)
+        if geocoder is not None:
+            misses_before = geocoder.misses
+            filled, unfilled = geocode_missing(columns, geocoder, geocode_limit)
+            geocoded += filled
+            ungeocoded += unfilled
+            if geocode_limit is not None:
+                geocode_limit = max(geocode_limit - (geocoder.misses - misses_before), 0)
+        # Mỗi khối 1 transaction; các lần hẹn xuất JSON của các khối gom thành 1 lần xuất nền
+        added.extend(store.add_customer_columns(columns))
+
+    elapsed = time.time() - start_time
+    return {
+        "added": added,
+        "errors": errors,
+        "rows": rows,
+        "geocoded": geocoded,
+        "ungeocoded": ungeocoded,
+        "elapsed_time": elapsed,
+        "rows_per_second": rows / elapsed if elapsed > 0 else 0.0
+    }
+
+
+def geocode_customers(customer_ids, geocoder, limit=None):
+    """
+    Điền toạ độ cho các khách hàng trong customer_ids còn (0, 0) từ địa chỉ, ghi vào database.
+    Trả về (số khách hàng đã điền, số khách hàng vẫn chưa có toạ độ).
+    """
+    rows = store.customers_without_coordinates(customer_ids)
+    points = geocoder.geocode_many([address for _, address in rows], limit=limit)
+    found = {customer_id: points[address] for customer_id, address in rows if points.get(address) is not None}
+    store.set_customer_coordinates(found)
+    return len(found), len(rows) - len(found)
+
+
+# 1 luồng nền: các lần upload xếp hàng, upstream bị giới hạn tốc độ nên chạy song song cũng không nhanh hơn
+_geocode_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="geocode")
+
+
+def _geocode_task(customer_ids, geocoder, limit):
+    try:
+        filled, unfilled = geocode_customers(customer_ids, geocoder, limit)
+        logger.info("Geocoded %d customers in the background, %d still without coordinates", filled, unfilled)
+    except Exception:
+        logger.exception("Background geocoding failed")
+    finally:
+        connection.close()
+
+
+def schedule_geocoding(customer_ids, geocoder, limit=None):
+    """Geocode nền các khách hàng chưa có toạ độ (không chặn request), trả về Future"""
+    return _geocode_executor.submit(_geocode_task, list(customer_ids), geocoder, limit)
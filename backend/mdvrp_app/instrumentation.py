@@ -0,0 +1,211 @@
+"""
+Đo thời gian theo từng giai đoạn và bộ đếm của solver / endpoint
+- Trace: thời gian các giai đoạn (parse, data_load, matrix_build, model_build, search, extract,
+  2opt, inter_route, serialize...), bộ đếm (số lời giải...) và quỹ đạo objective theo thời gian
+- Trace hiện tại gắn theo context (contextvars): solver gọi phase("search") mà không cần truyền tham số,
+  không có trace thì phase() gần như không tốn gì
+- Metrics: gom trace của các request theo endpoint, giữ cửa sổ N mẫu gần nhất để tính p50 / p90 / p99
+- Ghi log qua logging (logger "mdvrp_app.instrumentation") thay vì print
+"""
+import contextvars
+import functools
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Số mẫu gần nhất giữ lại cho mỗi (endpoint, giai đoạn) khi tính percentile
+DEFAULT_WINDOW = int(os.environ.get("MDVRP_METRICS_WINDOW", 1000))
+# Số điểm tối đa của quỹ đạo objective trong 1 trace
+MAX_TRAJECTORY = 500
+PERCENTILES = (50, 90, 99)
+
+_current_trace = contextvars.ContextVar("mdvrp_trace", default=None)
+
+
+class Trace:
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.phases = {}
+        self.counters = {}
+        self.trajectory = []
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def add_time(self, name, seconds):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def count(self, name, value=1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def record_solution(self, strategy, elapsed, objective, improved=True):
+        """1 lời giải từ callback của solver; chỉ lời giải cải thiện được đưa vào quỹ đạo"""
+        self.count("solutions")
+        if improved:
+            self.count("improving_solutions")
+            if len(self.trajectory) < MAX_TRAJECTORY:
+                self.trajectory.append({"strategy": strategy, "elapsed_time": round(elapsed, 4),
+                                        "objective": objective})
+
+    def merge(self, data):
+        """Cộng dồn trace (dạng to_dict) từ process con, ví dụ chiến lược chạy song song"""
+        if not data:
+            return
+        for name, seconds in data.get("phases", {}).items():
+            self.add_time(name, seconds)
+        for name, value in data.get("counters", {}).items():
+            self.count(name, value)
+        room = MAX_TRAJECTORY - len(self.trajectory)
+        self.trajectory.extend(data.get("trajectory", [])[:max(room, 0)])
+
+    def elapsed(self):
+        return time.perf_counter() - self.started_at
+
+    def to_dict(self):
+        return {
+            "total_time": round(self.elapsed(), 6),
+            "phases": {name: round(seconds, 6) for name, seconds in self.phases.items()},
+            "counters": dict(self.counters),
+            "trajectory": list(self.trajectory),
+        }
+
+
+def current_trace():
+    return _current_trace.get()
+
+
+@contextmanager
+def tracing(trace=None):
+    """Đặt trace hiện tại trong khối with (mặc định tạo Trace mới), trả về trace đó"""
+    trace = trace if trace is not None else Trace()
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+
+
+def phase(name):
+    """Đo giai đoạn name vào trace hiện tại (không làm gì nếu không có trace)"""
+    trace = _current_trace.get()
+    return trace.phase(name) if trace is not None else nullcontext()
+
+
+def timed(name):
+    """Decorator: đo mỗi lần gọi hàm như giai đoạn name của trace hiện tại"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            trace = _current_trace.get()
+            if trace is None:
+                return func(*args, **kwargs)
+            with trace.phase(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def count(name, value=1):
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.count(name, value)
+
+
+class Metrics:
+    """Tổng hợp trace theo endpoint: số request, tổng / percentile thời gian từng giai đoạn, tổng bộ đếm"""
+
+    def __init__(self, window=DEFAULT_WINDOW):
+        self.window = window
+        self.started_at = time.time()
+        self._samples = {}
+        self._requests = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def observe(self, endpoint, trace, status="ok"):
+        """Thêm 1 request (Trace hoặc dict của Trace.to_dict) vào thống kê của endpoint"""
+        data = trace.to_dict() if isinstance(trace, Trace) else trace
+        if not data:
+            return
+        with self._lock:
+            requests = self._requests.setdefault(endpoint, {})
+            requests[status] = requests.get(status, 0) + 1
+            samples = self._samples.setdefault(endpoint, {})
+            for name, seconds in [("total", data.get("total_time", 0.0))] + list(data.get("phases", {}).items()):
+                samples.setdefault(name, deque(maxlen=self.window)).append(seconds)
+            counters = self._counters.setdefault(endpoint, {})
+            for name, value in data.get("counters", {}).items():
+                counters[name] = counters.get(name, 0) + value
+        log_trace(endpoint, data, status)
+
+    def snapshot(self):
+        with self._lock:
+            samples = {endpoint: {name: np.fromiter(values, dtype=np.float64) for name, values in phases.items()}
+                       for endpoint, phases in self._samples.items()}
+            requests = {endpoint: dict(counts) for endpoint, counts in self._requests.items()}
+            counters = {endpoint: dict(values) for endpoint, values in self._counters.items()}
+
+        endpoints = {}
+        for endpoint, phases in samples.items():
+            stats = {}
+            for name, values in phases.items():
+                if not len(values):
+                    continue
+                stats[name] = {
+                    "count": int(len(values)),
+                    "mean": round(float(values.mean()), 6),
+                    **{f"p{p}": round(float(v), 6)
+                       for p, v in zip(PERCENTILES, np.percentile(values, PERCENTILES))},
+                    "max": round(float(values.max()), 6),
+                }
+            endpoints[endpoint] = {
+                "requests": requests.get(endpoint, {}),
+                "phases": stats,
+                "counters": counters.get(endpoint, {}),
+            }
+        return {
+            "uptime": round(time.time() - self.started_at, 3),
+            "window": self.window,
+            "endpoints": endpoints,
+        }
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._requests.clear()
+            self._counters.clear()
+            self.started_at = time.time()
+
+
+def log_trace(endpoint, data, status="ok"):
+    """1 dòng log tóm tắt các giai đoạn của request (mức INFO)"""
+    if not logger.isEnabledFor(logging.INFO):
+        return
+    phases = " ".join(f"{name}={seconds * 1000:.1f}ms" for name, seconds in data.get("phases", {}).items())
+    counters = " ".join(f"{name}={value}" for name, value in data.get("counters", {}).items())
+    logger.info("%s %s total=%.1fms %s %s", endpoint, status, data.get("total_time", 0.0) * 1000, phases, counters)
+
+
+_default_metrics = None
+_default_metrics_lock = threading.Lock()
+
+
+def get_metrics():
+    """Metrics dùng chung trong process"""
+    global _default_metrics
+    with _default_metrics_lock:
+        if _default_metrics is None:
+            _default_metrics = Metrics()
+        return _default_metrics
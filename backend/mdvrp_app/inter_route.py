@@ -0,0 +1,209 @@
+"""
+Local search giữa các route (inter-route), kể cả route của các depot khác nhau
+- Relocate / swap / cross-exchange: đổi đoạn 0..2 khách hàng giữa 2 route
+- 2-opt*: đổi phần đuôi của 2 route (mỗi route vẫn kết thúc ở depot của chính nó)
+- Chi phí và tải trọng cập nhật tăng dần, delta O(1) cho mỗi nước đi
+- Chỉ thử nước đi tạo cạnh tới láng giềng kNN (candidate lists), kèm don't-look bits
+"""
+import time
+from collections import deque
+
+EPSILON = 1e-9
+
+# (độ dài đoạn lấy từ route của u, độ dài đoạn lấy từ route của v)
+# (1, 0), (2, 0): relocate; (1, 1): swap; còn lại: cross-exchange
+EXCHANGE_MOVES = [(1, 0), (2, 0), (1, 1), (2, 1), (1, 2), (2, 2)]
+
+
+class _DistanceRows:
+    """Đọc ma trận numpy theo hàng, mỗi hàng chuyển sang list Python 1 lần (tra cứu nhanh)"""
+
+    def __init__(self, dense):
+        self.dense = dense
+        self.rows = {}
+
+    def __getitem__(self, i):
+        row = self.rows.get(i)
+        if row is None:
+            row = self.rows[i] = self.dense[i].tolist()
+        return row
+
+
+class InterRouteOptimizer:
+    def __init__(self, routes, dense, demands, capacities, neighbors, num_depots):
+        """
+        routes: list các list node [depot, c1, ..., ck, depot] (route rỗng [depot, depot] được phép)
+        capacities: sức chứa theo từng route; neighbors: mảng (n, k) kNN
+        """
+        self.routes = [list(route) for route in routes]
+        self.d = _DistanceRows(dense)
+        self.demands = demands
+        self.capacities = list(capacities)
+        self.neighbors = neighbors
+        self.num_depots = num_depots
+
+        self.route_of = {}
+        self.pos = {}
+        self.prefix = []
+        self.depot_routes = {}
+        for r, route in enumerate(self.routes):
+            self.depot_routes.setdefault(route[0], []).append(r)
+            self.prefix.append(None)
+            self._refresh(r)
+
+        self.stats = {'relocate': 0, 'swap': 0, 'cross_exchange': 0, '2opt_star': 0}
+
+    # ------------------------------------------------------------------
+    def _refresh(self, r):
+        """Cập nhật vị trí và tải trọng cộng dồn của route r sau khi thay đổi"""
+        route = self.routes[r]
+        prefix = [0]
+        for p in range(1, len(route) - 1):
+            node = route[p]
+            self.route_of[node] = r
+            self.pos[node] = p
+            prefix.append(prefix[-1] + self.demands[node])
+        prefix.append(prefix[-1])
+        self.prefix[r] = prefix
+
+    def load(self, r):
+        return self.prefix[r][-1]
+
+    def segment_load(self, r, start, length):
+        return self.prefix[r][start + length - 1] - self.prefix[r][start - 1] if length else 0
+
+    def route_cost(self, r):
+        route, d = self.routes[r], self.d
+        return sum(d[route[i]][route[i + 1]] for i in range(len(route) - 1))
+
+    def total_cost(self):
+        return sum(self.route_cost(r) for r in range(len(self.routes)))
+
+    # ------------------------------------------------------------------
+    def _anchors(self, v):
+        """Các vị trí (route, pos) có thể nối sau v: v là khách hàng, hoặc depot đầu các route của depot v"""
+        if v in self.route_of:
+            return [(self.route_of[v], self.pos[v])]
+        return [(r, 0) for r in self.depot_routes.get(v, [])]
+
+    # ------------------------------------------------------------------
+    # Relocate / swap / cross-exchange
+    # ------------------------------------------------------------------
+    def _try_exchange(self, u):
+        """Đưa đoạn bắt đầu tại u sang ngay sau láng giềng v (cạnh mới v -> u), đổi lại đoạn sau v"""
+        d = self.d
+        ra, i = self.route_of[u], self.pos[u]
+        A = self.routes[ra]
+        pa = A[i - 1]
+
+        for v in self.neighbors[u]:
+            for rb, pv in self._anchors(v):
+                if rb == ra:
+                    continue
+                B = self.routes[rb]
+                j = pv + 1
+                for l1, l2 in EXCHANGE_MOVES:
+                    if i + l1 > len(A) - 1 or j + l2 > len(B) - 1:
+                        continue
+                    load_a, load_b = self.segment_load(ra, i, l1), self.segment_load(rb, j, l2)
+                    if self.load(ra) - load_a + load_b > self.capacities[ra]:
+                        continue
+                    if self.load(rb) - load_b + load_a > self.capacities[rb]:
+                        continue
+
+                    a_last, na = A[i + l1 - 1], A[i + l1]
+                    nb = B[j + l2]
+                    if l2:
+                        b_first, b_last = B[j], B[j + l2 - 1]
+                        delta_a = d[pa][b_first] + d[b_last][na] - d[pa][u] - d[a_last][na]
+                        delta_b = d[B[pv]][u] + d[a_last][nb] - d[B[pv]][b_first] - d[b_last][nb]
+                    else:
+                        delta_a = d[pa][na] - d[pa][u] - d[a_last][na]
+                        delta_b = d[B[pv]][u] + d[a_last][nb] - d[B[pv]][nb]
+
+                    if delta_a + delta_b < -EPSILON:
+                        seg_a, seg_b = A[i:i + l1], B[j:j + l2]
+                        A[i:i + l1] = seg_b
+                        B[j:j + l2] = seg_a
+                        self._refresh(ra)
+                        self._refresh(rb)
+                        kind = 'relocate' if l2 == 0 else ('swap' if l1 == l2 == 1 else 'cross_exchange')
+                        self.stats[kind] += 1
+                        return [pa, na, B[pv], nb, u] + seg_a + seg_b
+        return None
+
+    # ------------------------------------------------------------------
+    # 2-opt*: A = headA + tailA, B = headB + tailB  ->  headA + tailB, headB + tailA
+    # ------------------------------------------------------------------
+    def _link(self, head, tail_first, tail_last, depot):
+        d = self.d
+        if tail_first is None:
+            return d[head][depot]
+        return d[head][tail_first] + d[tail_last][depot]
+
+    def _try_two_opt_star(self, u):
+        """Cắt sau u trong route A và trước láng giềng v trong route B, nối u -> v"""
+        ra, i = self.route_of[u], self.pos[u]
+        A = self.routes[ra]
+        depot_a = A[-1]
+        a_tail = (A[i + 1], A[-2]) if i + 1 < len(A) - 1 else (None, None)
+        a_head_load = self.prefix[ra][i]
+        a_tail_load = self.load(ra) - a_head_load
+
+        for v in self.neighbors[u]:
+            if v not in self.route_of:
+                continue
+            rb, j = self.route_of[v], self.pos[v]
+            if rb == ra:
+                continue
+            B = self.routes[rb]
+            depot_b = B[-1]
+            b_head = B[j - 1]
+            b_head_load = self.prefix[rb][j - 1]
+            b_tail_load = self.load(rb) - b_head_load
+            if a_head_load + b_tail_load > self.capacities[ra]:
+                continue
+            if b_head_load + a_tail_load > self.capacities[rb]:
+                continue
+
+            b_tail = (v, B[-2])
+            old = self._link(u, *a_tail, depot_a) + self._link(b_head, *b_tail, depot_b)
+            new = self._link(u, *b_tail, depot_a) + self._link(b_head, *a_tail, depot_b)
+            if new - old < -EPSILON:
+                tail_a, tail_b = A[i + 1:-1], B[j:-1]
+                self.routes[ra] = A[:i + 1] + tail_b + [depot_a]
+                self.routes[rb] = B[:j] + tail_a + [depot_b]
+                self._refresh(ra)
+                self._refresh(rb)
+                self.stats['2opt_star'] += 1
+                touched = [u, b_head, v]
+                if a_tail[0] is not None:
+                    touched.append(a_tail[0])
+                return touched
+        return None
+
+    # ------------------------------------------------------------------
+    def run(self, time_limit=None, max_moves=1000000):
+        start_time = time.time()
+        customers = list(self.route_of)
+        active = deque(customers)
+        queued = set(customers)
+        moves = 0
+
+        while active and moves < max_moves:
+            if time_limit is not None and time.time() - start_time > time_limit:
+                break
+            u = active.popleft()
+            queued.discard(u)
+            touched = self._try_exchange(u)
+            if touched is None:
+                touched = self._try_two_opt_star(u)
+            if touched is None:
+                continue
+
+            moves += 1
+            for node in touched:
+                if node in self.route_of and node not in queued:
+                    queued.add(node)
+                    active.append(node)
+        return self.routes
@@ -0,0 +1,266 @@
+"""
+Hàng đợi job giải MDVRP chạy nền (không cần Redis / broker bên ngoài)
+- submit() trả về job_id ngay, client hỏi trạng thái / kết quả bằng get()
+- Tối đa max_workers process giải cùng lúc, mỗi job chạy trong 1 process riêng
+- Giới hạn độ sâu hàng đợi (max_queue): vượt quá thì báo bận (JobQueueFull)
+- Mỗi job có hạn chót (timeout); quá hạn thì process bị dừng và job chuyển sang 'timeout'
+"""
+import logging
+import multiprocessing as mp
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+try:
+    from .instrumentation import get_metrics
+except ImportError:
+    from instrumentation import get_metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_WORKERS = int(os.environ.get("MDVRP_JOB_WORKERS", 2))
+DEFAULT_MAX_QUEUE = int(os.environ.get("MDVRP_JOB_QUEUE_DEPTH", 8))
+DEFAULT_RETENTION = int(os.environ.get("MDVRP_JOB_RETENTION_SECONDS", 3600))
+# Thời gian cộng thêm vào time_limit của solver trước khi coi job là quá hạn
+TIMEOUT_GRACE = 30
+POLL_INTERVAL = 0.2
+
+STRATEGY_RUNS = {'benchmark': 3, 'benchmark_with_2opt': 3}
+
+
+class JobQueueFull(Exception):
+    """Hàng đợi đã đầy, client nên thử lại sau"""
+
+
+def job_timeout(solver_kwargs):
+    """Hạn chót mặc định của job: time_limit x số chiến lược chạy tuần tự + thời gian dự phòng"""
+    time_limit = solver_kwargs.get('time_limit', 45)
+    runs = 1
+    if not solver_kwargs.get('parallel'):
+        runs = STRATEGY_RUNS.get(solver_kwargs.get('strategy', 'benchmark'), 1)
+    return time_limit * runs + TIMEOUT_GRACE
+
+
+def _run_job(conn, solver_kwargs, use_matrix_cache):
+    """Chạy trong process con: giải rồi gửi ('ok', result) hoặc ('error', message) qua pipe"""
+    try:
+        try:
+            from .mdvrp_solver import solve_mdvrp_enhanced
+            from .matrix_cache import get_default_cache
+            from .warm_start import get_default_plan_store
+            from .result_cache import get_default_result_cache
+            from .strategy_selector import get_default_strategy_history
+        except ImportError:
+            from mdvrp_solver import solve_mdvrp_enhanced
+            from matrix_cache import get_default_cache
+            from warm_start import get_default_plan_store
+            from result_cache import get_default_result_cache
+            from strategy_selector import get_default_strategy_history
+
+        # Cache ma trận, cache kết quả, kế hoạch warm start và lịch sử chọn chiến lược nằm trên đĩa
+        # nên dùng chung được với web process.
+        # Luôn đo để process cha gom vào metrics "job" (bỏ khỏi kết quả nếu client không yêu cầu)
+        solver_kwargs = dict(solver_kwargs, plan_store=get_default_plan_store(),
+                             result_cache=get_default_result_cache(),
+                             strategy_history=get_default_strategy_history(), instrument=True)
+        if use_matrix_cache:
+            solver_kwargs['matrix_cache'] = get_default_cache()
+        conn.send(('ok', solve_mdvrp_enhanced(**solver_kwargs)))
+    except Exception as e:
+        logger.exception("Job failed")
+        conn.send(('error', f'{type(e).__name__}: {str(e)}'))
+    finally:
+        conn.close()
+
+
+class Job:
+    def __init__(self, solver_kwargs, timeout):
+        self.id = uuid.uuid4().hex
+        self.solver_kwargs = solver_kwargs
+        self.timeout = timeout
+        self.status = 'queued'
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.result = None
+        self.error = None
+        self.process = None
+        self.conn = None
+
+    def to_dict(self, include_result=True):
+        data = {
+            'job_id': self.id,
+            'status': self.status,
+            'submitted_at': self.submitted_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'timeout': self.timeout,
+            'strategy': self.solver_kwargs.get('strategy', 'benchmark'),
+            'time_limit': self.solver_kwargs.get('time_limit', 45),
+        }
+        if self.error:
+            data['message'] = self.error
+        if include_result and self.status == 'done':
+            data['result'] = self.result
+        return data
+
+
+class JobManager:
+    def __init__(self, max_workers=DEFAULT_MAX_WORKERS, max_queue=DEFAULT_MAX_QUEUE,
+                 retention=DEFAULT_RETENTION, use_matrix_cache=True, start_method="spawn"):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.retention = retention
+        self.use_matrix_cache = use_matrix_cache
+        self._ctx = mp.get_context(start_method)
+        self._jobs = OrderedDict()
+        self._pending = []
+        self._running = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._dispatcher = None
+
+    # ------------------------------------------------------------------
+    def submit(self, solver_kwargs, timeout=None):
+        """Đưa job vào hàng đợi, trả về Job; raise JobQueueFull nếu hàng đợi đã đầy"""
+        job = Job(solver_kwargs, timeout or job_timeout(solver_kwargs))
+        with self._lock:
+            if len(self._pending) + len(self._running) >= self.max_queue:
+                raise JobQueueFull(
+                    f"Queue full ({self.max_queue} jobs queued or running), retry later"
+                )
+            self._jobs[job.id] = job
+            self._pending.append(job)
+            self._ensure_dispatcher()
+        self._wakeup.set()
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        """Huỷ job đang chờ hoặc dừng job đang chạy"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status not in ('queued', 'running'):
+                return job
+            if job in self._pending:
+                self._pending.remove(job)
+            else:
+                self._stop(job)
+                self._running.remove(job)
+            job.status = 'cancelled'
+            job.finished_at = time.time()
+        self._wakeup.set()
+        return job
+
+    def stats(self):
+        with self._lock:
+            return {
+                'queued': len(self._pending),
+                'running': len(self._running),
+                'max_workers': self.max_workers,
+                'max_queue': self.max_queue,
+                'jobs': len(self._jobs),
+            }
+
+    # ------------------------------------------------------------------
+    def _ensure_dispatcher(self):
+        if self._dispatcher is None or not self._dispatcher.is_alive():
+            self._dispatcher = threading.Thread(target=self._dispatch_loop, name="mdvrp-jobs", daemon=True)
+            self._dispatcher.start()
+
+    def _start(self, job):
+        parent_conn, child_conn = self._ctx.Pipe(duplex=False)
+        job.process = self._ctx.Process(
+            target=_run_job, args=(child_conn, job.solver_kwargs, self.use_matrix_cache)
+        )
+        job.process.start()
+        child_conn.close()
+        job.conn = parent_conn
+        job.status = 'running'
+        job.started_at = time.time()
+
+    def _stop(self, job):
+        if job.process is not None and job.process.is_alive():
+            job.process.terminate()
+            job.process.join(timeout=5)
+        if job.conn is not None:
+            job.conn.close()
+
+    def _finish(self, job, status, result=None, error=None):
+        trace = result.get('instrumentation') if isinstance(result, dict) else None
+        if trace is not None and not job.solver_kwargs.get('instrument'):
+            del result['instrumentation']
+        if trace is None and job.started_at is not None:
+            trace = {'total_time': time.time() - job.started_at}
+        if trace is not None:
+            get_metrics().observe('job', trace, status)
+
+        job.status = status
+        job.result = result
+        job.error = error
+        job.finished_at = time.time()
+        self._stop(job)
+        # Giải phóng tham số (danh sách toạ độ) khi job đã xong
+        job.solver_kwargs = {key: value for key, value in job.solver_kwargs.items()
+                             if key in ('strategy', 'time_limit')}
+
+    def _poll_running(self):
+        now = time.time()
+        for job in list(self._running):
+            if job.conn.poll():
+                try:
+                    kind, payload = job.conn.recv()
+                except (EOFError, OSError):
+                    kind, payload = 'error', 'Worker process exited without result'
+                if kind == 'ok':
+                    self._finish(job, 'done', result=payload)
+                else:
+                    self._finish(job, 'failed', error=payload)
+            elif not job.process.is_alive():
+                self._finish(job, 'failed', error=f'Worker process exited with code {job.process.exitcode}')
+            elif now - job.started_at > job.timeout:
+                self._finish(job, 'timeout', error=f'Job exceeded {job.timeout}s')
+            else:
+                continue
+            self._running.remove(job)
+
+    def _cleanup(self):
+        """Xoá các job đã kết thúc quá retention giây"""
+        now = time.time()
+        for job_id, job in list(self._jobs.items()):
+            if job.finished_at is not None and now - job.finished_at > self.retention:
+                del self._jobs[job_id]
+
+    def _dispatch_loop(self):
+        while True:
+            with self._lock:
+                self._poll_running()
+                while self._pending and len(self._running) < self.max_workers:
+                    job = self._pending.pop(0)
+                    try:
+                        self._start(job)
+                        self._running.append(job)
+                    except Exception as e:
+                        self._finish(job, 'failed', error=f'Cannot start worker: {str(e)}')
+                self._cleanup()
+                idle = not self._pending and not self._running
+            self._wakeup.wait(timeout=None if idle else POLL_INTERVAL)
+            self._wakeup.clear()
+
+
+_default_manager = None
+_default_manager_lock = threading.Lock()
+
+
+def get_job_manager():
+    """JobManager dùng chung trong process web (cấu hình qua biến môi trường MDVRP_JOB_*)"""
+    global _default_manager
+    with _default_manager_lock:
+        if _default_manager is None:
+            _default_manager = JobManager()
+        return _default_manager
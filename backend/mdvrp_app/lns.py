@@ -0,0 +1,373 @@
+"""
+Large neighborhood search dạng ruin-and-recreate, không dựng model OR-Tools
+- Ruin: xoá 1 nhóm khách hàng - ngẫu nhiên, theo không gian (khách hàng hạt giống + láng giềng kNN)
+  hoặc theo route (các đoạn liên tiếp trên những route đi qua vùng quanh khách hàng hạt giống)
+- Recreate: chèn rẻ nhất (greedy) hoặc regret-2, có kiểm tra tải trọng và độ dài route
+- Chấp nhận lời giải mới theo simulated annealing, nhiệt độ giảm theo thời gian đã chạy
+- Chi phí chèn vào mọi vị trí của 1 route tính 1 lần bằng NumPy; mỗi khách hàng chỉ xét các route chứa
+  láng giềng kNN của nó và 1 xe trống ở mỗi depot gần nhất, nên chi phí mỗi vòng gần như không phụ thuộc
+  số khách hàng / số xe (không có model (node x xe) như OR-Tools)
+"""
+import math
+import random
+import time
+
+import numpy as np
+
+EPSILON = 1e-9
+
+# Số láng giềng kNN cần có (>= MAX_RUIN) và số láng giềng dùng để tìm route ứng viên khi chèn
+NUM_NEIGHBORS = 40
+INSERTION_NEIGHBORS = 12
+# Số depot gần nhất (mỗi depot 1 xe trống) được xét khi chèn 1 khách hàng
+NEAREST_DEPOTS = 3
+# Số khách hàng bị xoá mỗi vòng: ngẫu nhiên trong [MIN_RUIN, min(MAX_RUIN, RUIN_FRACTION x số khách hàng)]
+MIN_RUIN = 3
+MAX_RUIN = 40
+RUIN_FRACTION = 0.2
+# Độ dài tối đa của 1 đoạn bị xoá khỏi 1 route (ruin theo route)
+MAX_STRING = 10
+# Nhiệt độ SA theo độ dài cạnh trung bình của lời giải đầu, giảm theo cấp số nhân tới END_TEMPERATURE
+START_TEMPERATURE = 0.1
+END_TEMPERATURE = 0.001
+
+RUIN_OPERATORS = ('random', 'spatial', 'route')
+RECREATE_OPERATORS = ('greedy', 'regret')
+# Thứ tự chèn lại của greedy: ngẫu nhiên, tải lớn trước, xa depot trước
+INSERTION_ORDERS = ('random', 'demand', 'far')
+
+
+class RuinRecreateLNS:
+    def __init__(self, distance, demands, capacities, starts, num_depots, neighbors,
+                 service_times=None, max_route_duration=None, seed=0):
+        """
+        distance(i, j): khoảng cách theo mảng chỉ số (broadcast như NumPy), vd. DistanceMatrix.distance
+        starts: depot của từng xe (xe về lại depot xuất phát); neighbors: mảng (n, k) kNN trên mọi node
+        service_times / max_route_duration: như MDVRPSolver (độ dài route = quãng đường + thời gian phục vụ)
+        """
+        self.distance = distance
+        self.demands = list(demands)
+        self.capacities = list(capacities)
+        self.starts = list(starts)
+        self.num_depots = num_depots
+        self.num_vehicles = len(self.starts)
+        self.n = len(self.demands)
+        self.customers = list(range(num_depots, self.n))
+        self.neighbors = np.asarray(neighbors, dtype=np.int64)
+        self.service = list(service_times) if service_times else None
+        self.max_duration = max_route_duration
+        self.rng = random.Random(seed)
+
+        # Các depot gần nhất và khoảng cách tới depot gần nhất của từng khách hàng (theo chỉ số node)
+        customers = np.arange(num_depots, self.n)
+        to_depots = np.asarray(distance(customers[:, None], np.arange(num_depots)[None, :]), dtype=np.float64)
+        nearest = np.argsort(to_depots, axis=1)[:, :NEAREST_DEPOTS]
+        self.nearest_depots = [[]] * num_depots + nearest.tolist()
+        self.depot_distance = [0.0] * num_depots + to_depots.min(axis=1, initial=np.inf).tolist()
+
+        self.routes = [[] for _ in range(self.num_vehicles)]
+        self.route_of = np.full(self.n, -1, dtype=np.int64)
+        self.load = [0] * self.num_vehicles
+        self.service_sum = [self.service[depot] if self.service else 0 for depot in self.starts]
+        self.length = [0.0] * self.num_vehicles
+        self.cost = 0.0
+        self._paths = [None] * self.num_vehicles
+        self._edges = [None] * self.num_vehicles
+        self.free = {depot: set() for depot in range(num_depots)}
+        for v, depot in enumerate(self.starts):
+            self.free[depot].add(v)
+            self._refresh(v)
+        # Bản sao các route bị sửa trong vòng hiện tại (để khôi phục khi không chấp nhận)
+        self._saved = None
+
+        self.stats = {'iterations': 0, 'accepted': 0, 'improvements': 0, 'infeasible': 0,
+                      'ruin': {name: 0 for name in RUIN_OPERATORS},
+                      'recreate': {name: 0 for name in RECREATE_OPERATORS}}
+
+    # ------------------------------------------------------------------
+    # Trạng thái route
+    # ------------------------------------------------------------------
+    def _refresh(self, v):
+        """Dựng lại mảng node / độ dài cạnh của route v sau khi thay đổi"""
+        depot = self.starts[v]
+        path = np.array([depot] + self.routes[v] + [depot], dtype=np.intp)
+        edges = np.asarray(self.distance(path[:-1], path[1:]), dtype=np.float64)
+        length = float(edges.sum())
+        self.cost += length - self.length[v]
+        self.length[v] = length
+        self._paths[v] = path
+        self._edges[v] = edges
+
+    def _save(self, v):
+        if self._saved is not None and v not in self._saved:
+            self._saved[v] = list(self.routes[v])
+
+    def _set_route(self, v, route):
+        depot = self.starts[v]
+        self.routes[v] = route
+        self.load[v] = sum(self.demands[node] for node in route)
+        if self.service:
+            self.service_sum[v] = self.service[depot] + sum(self.service[node] for node in route)
+        if route:
+            self.free[depot].discard(v)
+            self.route_of[route] = v
+        else:
+            self.free[depot].add(v)
+        self._refresh(v)
+
+    def _restore(self):
+        for v, route in self._saved.items():
+            self._set_route(v, route)
+
+    def _insert(self, u, v, pos):
+        self._save(v)
+        if not self.routes[v]:
+            self.free[self.starts[v]].discard(v)
+        self.routes[v].insert(pos, u)
+        self.route_of[u] = v
+        self.load[v] += self.demands[u]
+        if self.service:
+            self.service_sum[v] += self.service[u]
+        self._refresh(v)
+
+    def _remove(self, nodes):
+        by_route = {}
+        for u in nodes:
+            by_route.setdefault(int(self.route_of[u]), set()).add(u)
+        for v, removed in by_route.items():
+            self._save(v)
+            self.route_of[list(removed)] = -1
+            self._set_route(v, [node for node in self.routes[v] if node not in removed])
+
+    # ------------------------------------------------------------------
+    # Chèn
+    # ------------------------------------------------------------------
+    def _insertion(self, u, v):
+        """(chi phí tăng thêm, vị trí) chèn u rẻ nhất vào route v, None nếu vượt tải / độ dài route"""
+        if self.load[v] + self.demands[u] > self.capacities[v]:
+            return None
+        path = self._paths[v]
+        delta = self.distance(path[:-1], u) + self.distance(u, path[1:]) - self._edges[v]
+        pos = int(delta.argmin())
+        cost = float(delta[pos])
+        if self.max_duration is not None:
+            service = self.service[u] if self.service else 0
+            if self.length[v] + cost + self.service_sum[v] + service > self.max_duration:
+                return None
+        return cost, pos
+
+    def _candidate_routes(self, u):
+        """Các route chứa láng giềng gần của u + 1 xe trống ở mỗi depot gần nhất"""
+        routes = set(self.route_of[self.neighbors[u, :INSERTION_NEIGHBORS]].tolist())
+        routes.discard(-1)
+        for depot in self.nearest_depots[u]:
+            if self.free[depot]:
+                routes.add(min(self.free[depot]))
+        return routes
+
+    def _all_routes(self):
+        """Mọi route đang dùng + 1 xe trống mỗi depot (khi các route ứng viên đều không chèn được)"""
+        routes = [v for v in range(self.num_vehicles) if self.routes[v]]
+        return routes + [min(free) for free in self.free.values() if free]
+
+    def _best_insertion(self, u, routes):
+        best = None
+        for v in routes:
+            option = self._insertion(u, v)
+            if option is not None and (best is None or option[0] < best[0]):
+                best = (option[0], v, option[1])
+        return best
+
+    def _insert_best(self, u, routes):
+        best = self._best_insertion(u, routes) or self._best_insertion(u, self._all_routes())
+        if best is None:
+            return None
+        self._insert(u, best[1], best[2])
+        return best[1]
+
+    # ------------------------------------------------------------------
+    # Ruin
+    # ------------------------------------------------------------------
+    def _ruin_random(self, q):
+        return self.rng.sample(self.customers, q)
+
+    def _ruin_spatial(self, q):
+        seed = self.rng.choice(self.customers)
+        near = [node for node in self.neighbors[seed].tolist() if node >= self.num_depots]
+        return [seed] + near[:q - 1]
+
+    def _ruin_route(self, q):
+        """Xoá 1 đoạn liên tiếp (dài ngẫu nhiên) trên mỗi route đi qua vùng quanh 1 khách hàng hạt giống"""
+        seed = self.rng.choice(self.customers)
+        removed = []
+        ruined = set()
+        for node in [seed] + self.neighbors[seed].tolist():
+            if len(removed) >= q:
+                break
+            v = int(self.route_of[node])
+            if v < 0 or v in ruined:
+                continue
+            ruined.add(v)
+            route = self.routes[v]
+            length = self.rng.randint(1, min(len(route), MAX_STRING, q - len(removed)))
+            pos = route.index(node)
+            start = self.rng.randint(max(0, pos - length + 1), min(pos, len(route) - length))
+            removed.extend(route[start:start + length])
+        return removed
+
+    # ------------------------------------------------------------------
+    # Recreate
+    # ------------------------------------------------------------------
+    def _recreate_greedy(self, nodes):
+        order = self.rng.choice(INSERTION_ORDERS)
+        nodes = list(nodes)
+        if order == 'random':
+            self.rng.shuffle(nodes)
+        elif order == 'demand':
+            nodes.sort(key=lambda node: -self.demands[node])
+        else:
+            nodes.sort(key=lambda node: -self.depot_distance[node])
+        for u in nodes:
+            if self._insert_best(u, self._candidate_routes(u)) is None:
+                return False
+        return True
+
+    def _recreate_regret(self, nodes):
+        """
+        Regret-2: mỗi bước chèn khách hàng có chênh lệch giữa route tốt nhất và tốt nhì lớn nhất.
+        Phương án chèn (chi phí, vị trí) của từng khách hàng được cache theo route; sau mỗi lần chèn,
+        route vừa đổi (tải, các cạnh) bị xoá khỏi cache của mọi khách hàng còn chờ để tính lại.
+        """
+        options = {u: {} for u in nodes}
+        pending = set(nodes)
+
+        def inserted(u, v):
+            pending.discard(u)
+            del options[u]
+            for opts in options.values():
+                opts.pop(v, None)
+
+        while pending:
+            chosen = chosen_key = None
+            for u in sorted(pending):
+                routes = self._candidate_routes(u)
+                opts = options[u]
+                for v in [v for v in opts if v not in routes]:
+                    del opts[v]
+                for v in routes:
+                    if v not in opts:
+                        opts[v] = self._insertion(u, v)
+                feasible = sorted((option[0], v, option[1]) for v, option in opts.items() if option is not None)
+                if not feasible:
+                    # Không route ứng viên nào chèn được: xét mọi route ngay
+                    chosen = None
+                    v = self._insert_best(u, ())
+                    if v is None:
+                        return False
+                    inserted(u, v)
+                    break
+                regret = feasible[1][0] - feasible[0][0] if len(feasible) > 1 else math.inf
+                key = (regret, -feasible[0][0])
+                if chosen_key is None or key > chosen_key:
+                    chosen, chosen_key = (u, feasible[0]), key
+            if chosen is not None:
+                u, (_, v, pos) = chosen
+                self._insert(u, v, pos)
+                inserted(u, v)
+        return True
+
+    def construct(self):
+        """
+        Lời giải đầu: chèn rẻ nhất theo thứ tự "chuỗi láng giềng" (đi tiếp sang láng giềng chưa xếp gần nhất,
+        hết thì nhảy tới khách hàng xa depot nhất còn lại) để các khách hàng liền kề vào cùng route
+        """
+        remaining = sorted(self.customers, key=lambda node: -self.depot_distance[node])
+        placed = set()
+        pointer = 0
+        u = None
+        last_route = None
+        while len(placed) < len(self.customers):
+            nxt = None
+            if u is not None:
+                nxt = next((node for node in self.neighbors[u].tolist()
+                            if node >= self.num_depots and node not in placed), None)
+            if nxt is None:
+                while remaining[pointer] in placed:
+                    pointer += 1
+                nxt = remaining[pointer]
+            u = nxt
+            routes = self._candidate_routes(u)
+            if last_route is not None:
+                routes.add(last_route)
+            last_route = self._insert_best(u, routes)
+            if last_route is None:
+                return False
+            placed.add(u)
+        return True
+
+    # ------------------------------------------------------------------
+    def solution(self, routes=None):
+        """Routes dạng [depot, khách hàng..., depot] theo từng xe (xe không dùng: [depot, depot])"""
+        routes = self.routes if routes is None else routes
+        return [[self.starts[v]] + list(route) + [self.starts[v]] for v, route in enumerate(routes)]
+
+    def run(self, time_limit, callback=None):
+        """
+        Dựng lời giải đầu rồi lặp ruin-and-recreate tới khi hết time_limit (giây, tính cả dựng lời giải đầu)
+        hoặc callback(cost, improved) trả về True; callback được gọi với mỗi lời giải khả thi đã thử.
+        Trả về routes tốt nhất (xem solution) hoặc None nếu không xếp được hết khách hàng
+        """
+        start_time = time.time()
+        if not self.construct():
+            return None
+        best_cost = current = self.cost
+        best_routes = [list(route) for route in self.routes]
+        if callback is not None and callback(self.cost, True):
+            return self.solution(best_routes)
+
+        num_customers = len(self.customers)
+        max_ruin = min(MAX_RUIN, num_customers, max(MIN_RUIN, int(num_customers * RUIN_FRACTION)))
+        min_ruin = min(MIN_RUIN, max_ruin)
+        if min_ruin < 1:
+            return self.solution(best_routes)
+        num_edges = num_customers + sum(1 for route in self.routes if route)
+        start_temperature = START_TEMPERATURE * self.cost / num_edges
+        end_temperature = END_TEMPERATURE * self.cost / num_edges
+        search_start = time.time()
+        search_time = max(time_limit - (search_start - start_time), EPSILON)
+
+        while time.time() - start_time < time_limit:
+            progress = min(1.0, (time.time() - search_start) / search_time)
+            temperature = start_temperature * (end_temperature / start_temperature) ** progress \
+                if start_temperature > 0 else 0.0
+
+            ruin = self.rng.choice(RUIN_OPERATORS)
+            recreate = self.rng.choice(RECREATE_OPERATORS)
+            self._saved = {}
+            removed = getattr(self, f'_ruin_{ruin}')(self.rng.randint(min_ruin, max_ruin))
+            self._remove(removed)
+            feasible = getattr(self, f'_recreate_{recreate}')(removed)
+            self.stats['iterations'] += 1
+
+            candidate = self.cost
+            improved = False
+            # SA: chấp nhận lời giải kém hơn current một lượng < -T ln(U)
+            if feasible and candidate < current - temperature * math.log(1.0 - self.rng.random()):
+                current = candidate
+                self.stats['accepted'] += 1
+                if candidate < best_cost - EPSILON:
+                    best_cost = candidate
+                    best_routes = [list(route) for route in self.routes]
+                    improved = True
+                    self.stats['improvements'] += 1
+                    self.stats['ruin'][ruin] += 1
+                    self.stats['recreate'][recreate] += 1
+            else:
+                self._restore()
+                if not feasible:
+                    self.stats['infeasible'] += 1
+            self._saved = None
+
+            if feasible and callback is not None and callback(candidate, improved):
+                break
+        return self.solution(best_routes)
@@ -0,0 +1,203 @@
+"""
+Local search trong 1 route (intra-route): 2-opt + Or-opt
+- Đánh giá delta O(1) cho mỗi nước đi, không dựng lại route
+- Chỉ thử các node thuộc danh sách láng giềng gần nhất (neighbor lists)
+- Don't-look bits: chỉ xét lại các node vừa bị ảnh hưởng bởi nước đi trước
+- Làm việc trực tiếp trên mảng chỉ số node, route độc lập được tối ưu song song
+- Ma trận bất đối xứng (đường một chiều): đảo đoạn làm đổi chi phí các cạnh bên trong nên bỏ 2-opt
+  và Or-opt đảo chiều, chỉ giữ Or-opt giữ nguyên chiều
+"""
+import math
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+DEFAULT_NEIGHBORS = 8
+MAX_OR_OPT_SEGMENT = 3
+EPSILON = 1e-9
+
+
+class RouteOptimizer:
+    """
+    Tối ưu 1 tour: tour[0] là depot (không bao giờ di chuyển), tour được xem là vòng kín
+    (phần tử cuối nối về depot). dist là ma trận khoảng cách cục bộ theo chỉ số 0..L-1.
+    """
+
+    def __init__(self, dist, num_neighbors=DEFAULT_NEIGHBORS, or_opt=True, symmetric=True):
+        self.d = dist
+        self.size = len(dist)
+        self.tour = list(range(self.size))
+        self.pos = list(range(self.size))
+        self.or_opt = or_opt
+        self.symmetric = symmetric
+        self.moves = 0
+
+        k = min(num_neighbors, self.size - 1)
+        if k > 0:
+            order = np.argsort(np.asarray(dist), axis=1, kind="stable")
+            self.neighbors = [[int(c) for c in row if c != a][:k] for a, row in enumerate(order)]
+        else:
+            self.neighbors = [[] for _ in range(self.size)]
+
+    # ------------------------------------------------------------------
+    def succ(self, node):
+        p = self.pos[node] + 1
+        return self.tour[p if p < self.size else 0]
+
+    def pred(self, node):
+        return self.tour[self.pos[node] - 1]
+
+    def length(self):
+        d, tour = self.d, self.tour
+        return sum(d[tour[i - 1]][tour[i]] for i in range(self.size))
+
+    def _reverse(self, i, j):
+        """Đảo đoạn tour[i..j] (1 <= i <= j), cập nhật pos"""
+        tour, pos = self.tour, self.pos
+        tour[i:j + 1] = tour[i:j + 1][::-1]
+        for p in range(i, j + 1):
+            pos[tour[p]] = p
+
+    # ------------------------------------------------------------------
+    # 2-opt
+    # ------------------------------------------------------------------
+    def _apply_two_opt(self, a, c):
+        """Thay cạnh (a, succ a), (c, succ c) bằng (a, c), (succ a, succ c)"""
+        i, j = self.pos[a], self.pos[c]
+        if i < j:
+            self._reverse(i + 1, j)
+        else:
+            self._reverse(j + 1, i)
+
+    def _try_two_opt(self, a):
+        d = self.d
+        for direction in (0, 1):
+            x = a if direction == 0 else self.pred(a)
+            sx = self.succ(x)
+            d_x_sx = d[x][sx]
+            for c in self.neighbors[a]:
+                # Cạnh mới (a, c) phải ngắn hơn cạnh bị bỏ chứa a, ngược lại không thể có lợi
+                if d[a][c] >= d_x_sx:
+                    break
+                y = c if direction == 0 else self.pred(c)
+                sy = self.succ(y)
+                if y == x or sy == x or y == sx:
+                    continue
+                delta = d[x][y] + d[sx][sy] - d_x_sx - d[y][sy]
+                if delta < -EPSILON:
+                    self._apply_two_opt(x, y)
+                    return (x, sx, y, sy)
+        return None
+
+    # ------------------------------------------------------------------
+    # Or-opt: chuyển đoạn 1..3 node tới cạnh kề một láng giềng (giữ hoặc đảo chiều)
+    # ------------------------------------------------------------------
+    def _try_or_opt(self, a):
+        d, tour = self.d, self.tour
+        start = self.pos[a]
+        if start == 0:
+            return None
+
+        for seg_len in range(1, MAX_OR_OPT_SEGMENT + 1):
+            end = start + seg_len - 1
+            if end >= self.size:
+                break
+            e = tour[end]
+            p = tour[start - 1]
+            n = tour[end + 1] if end + 1 < self.size else tour[0]
+            removal_gain = d[p][a] + d[e][n] - d[p][n]
+            if removal_gain <= EPSILON:
+                continue
+            segment = set(tour[start:end + 1])
+
+            for c in self.neighbors[a]:
+                if c in segment:
+                    continue
+                # Chèn vào cạnh (c, succ c) hoặc (pred c, c)
+                for u, v in ((c, self.succ(c)), (self.pred(c), c)):
+                    if v in segment or u in segment or (u == p and v == n):
+                        continue
+                    forward = d[u][a] + d[e][v] - d[u][v]
+                    backward = d[u][e] + d[a][v] - d[u][v] if self.symmetric else math.inf
+                    insert_cost, reverse = (forward, False) if forward <= backward else (backward, True)
+                    if insert_cost - removal_gain < -EPSILON:
+                        self._apply_or_opt(start, end, u, reverse)
+                        return (p, n, u, v, a, e)
+        return None
+
+    def _apply_or_opt(self, start, end, u, reverse):
+        tour = self.tour
+        segment = tour[start:end + 1]
+        if reverse:
+            segment.reverse()
+        del tour[start:end + 1]
+        insert_at = tour.index(u) + 1
+        tour[insert_at:insert_at] = segment
+        for p, node in enumerate(tour):
+            self.pos[node] = p
+
+    # ------------------------------------------------------------------
+    def run(self, max_moves=100000):
+        if self.size < 4:
+            return self.tour
+        active = deque(range(self.size))
+        queued = [True] * self.size
+
+        while active and self.moves < max_moves:
+            a = active.popleft()
+            queued[a] = False
+            touched = self._try_two_opt(a) if self.symmetric else None
+            if touched is None and self.or_opt:
+                touched = self._try_or_opt(a)
+            if touched is None:
+                continue
+
+            self.moves += 1
+            # Bật lại don't-look bit cho các node ở đầu mút cạnh vừa thay đổi
+            for node in touched + (a,):
+                if not queued[node]:
+                    queued[node] = True
+                    active.append(node)
+        return self.tour
+
+
+def optimize_route(nodes, sub_matrix, num_neighbors=DEFAULT_NEIGHBORS, or_opt=True, symmetric=True):
+    """
+    Tối ưu 1 route [depot, c1, ..., ck, depot] bằng 2-opt + Or-opt.
+    sub_matrix: ma trận khoảng cách (list of lists) theo thứ tự nodes[:-1].
+    Trả về (route mới, khoảng cách mới, số nước đi đã áp dụng).
+    """
+    tour_nodes = list(nodes[:-1])
+    optimizer = RouteOptimizer(sub_matrix, num_neighbors, or_opt, symmetric)
+    tour = optimizer.run()
+    new_route = [tour_nodes[i] for i in tour] + [nodes[-1]]
+    return new_route, optimizer.length(), optimizer.moves
+
+
+def _optimize_task(task):
+    nodes, sub_matrix, num_neighbors, or_opt, symmetric = task
+    return optimize_route(nodes, sub_matrix, num_neighbors, or_opt, symmetric)
+
+
+def optimize_routes(routes, dense, num_neighbors=DEFAULT_NEIGHBORS, or_opt=True, max_workers=None):
+    """
+    Tối ưu nhiều route độc lập. routes: list các list node (bắt đầu/kết thúc ở depot),
+    dense: ma trận khoảng cách đầy đủ (numpy). Mỗi task chỉ mang ma trận con của route.
+    max_workers > 1: chạy song song trên process pool.
+    """
+    tasks = []
+    for nodes in routes:
+        tour = np.asarray(nodes[:-1], dtype=np.intp)
+        sub_matrix = dense[np.ix_(tour, tour)].astype(np.float64)
+        symmetric = bool(np.allclose(sub_matrix, sub_matrix.T, rtol=1e-6, atol=1e-6))
+        tasks.append((list(nodes), sub_matrix.tolist(), num_neighbors, or_opt, symmetric))
+
+    if max_workers is None:
+        max_workers = 1
+    if max_workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=min(max_workers, os.cpu_count() or 1)) as executor:
+            chunksize = max(1, len(tasks) // (max_workers * 4))
+            return list(executor.map(_optimize_task, tasks, chunksize=chunksize))
+    return [_optimize_task(task) for task in tasks]
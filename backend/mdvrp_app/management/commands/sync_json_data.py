@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from mdvrp_app import store
+
+
+class Command(BaseCommand):
+    help = "Nhập data/*.json vào database hoặc xuất database ra data/*.json"
+
+    def add_arguments(self, parser):
+        parser.add_argument("direction", choices=["import", "export"])
+        parser.add_argument("--data-dir", default=store.DATA_DIR)
+        parser.add_argument("--replace", action="store_true",
+                            help="Xoá dữ liệu cũ trong database trước khi nhập")
+
+    def handle(self, *args, **options):
+        if options["direction"] == "import":
+            counts = store.import_json(options["data_dir"], replace=options["replace"])
+            self.stdout.write(self.style.SUCCESS(
+                f"Imported {counts['depots']} depots, {counts['customers']} customers, {counts['drivers']} drivers"
+            ))
+        else:
+            store.export_json_files(data_dir=options["data_dir"])
+            self.stdout.write(self.style.SUCCESS(f"Exported to {options['data_dir']}"))
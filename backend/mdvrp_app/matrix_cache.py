@@ -0,0 +1,153 @@
+"""
+Cache ma trận khoảng cách trên đĩa, khoá theo dấu vân tay của toạ độ
+- Khoá = sha256(metric + danh sách toạ độ theo thứ tự)
+- Mỗi ma trận lưu thành 1 file .npy, đọc lại bằng memory-map nên nhiều
+  request / worker process dùng chung page cache của hệ điều hành
+- Thêm node vào cuối danh sách chỉ tính thêm hàng/cột mới (extend)
+- Giới hạn dung lượng, xoá theo LRU (dựa trên mtime của file)
+"""
+import hashlib
+import os
+import threading
+
+import numpy as np
+
+try:
+    from .distance_matrix import DistanceMatrix
+except ImportError:
+    from distance_matrix import DistanceMatrix
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    "MDVRP_MATRIX_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "distance_matrix")
+)
+DEFAULT_MAX_BYTES = int(os.environ.get("MDVRP_MATRIX_CACHE_MAX_BYTES", 2 * 1024 ** 3))
+
+
+def fingerprint(locations, metric="euclidean"):
+    """Dấu vân tay của danh sách toạ độ (theo thứ tự) và metric"""
+    coords = np.ascontiguousarray(np.asarray(locations, dtype=np.float64).reshape(-1, 2))
+    digest = hashlib.sha256()
+    digest.update(metric.encode("utf-8"))
+    digest.update(coords.tobytes())
+    return digest.hexdigest()
+
+
+class MatrixCache:
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.npy")
+
+    def _load(self, key, locations):
+        path = self._path(key)
+        try:
+            data = np.load(path, mmap_mode="r")
+        except (FileNotFoundError, ValueError, OSError):
+            return None
+        if data.shape != (len(locations), len(locations)):
+            return None
+        # Cập nhật mtime để đánh dấu vừa được dùng (LRU)
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return DistanceMatrix.from_array(locations, data)
+
+    def _store(self, key, matrix):
+        """Ghi file tạm rồi os.replace để các process khác không đọc phải file dở dang"""
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.save(f, np.ascontiguousarray(matrix.data))
+        os.replace(tmp_path, path)
+        self._evict()
+        cached = self._load(key, matrix.coords)
+        return cached if cached is not None else matrix
+
+    def _evict(self):
+        """Xoá các file ít được dùng nhất khi vượt quá max_bytes"""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".npy"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def get(self, locations, metric="euclidean"):
+        """Lấy ma trận đã cache, None nếu chưa có"""
+        matrix = self._load(fingerprint(locations, metric), locations)
+        with self._lock:
+            if matrix is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return matrix
+
+    def get_or_build(self, locations, metric="euclidean", builder=None):
+        """Lấy ma trận từ cache, nếu chưa có thì tính (builder) rồi lưu lại"""
+        matrix = self.get(locations, metric)
+        if matrix is not None:
+            return matrix
+
+        if builder is None:
+            if metric != "euclidean":
+                raise ValueError(f"No builder for metric: {metric}")
+            builder = DistanceMatrix
+        return self._store(fingerprint(locations, metric), builder(locations))
+
+    def extend(self, locations, new_locations, metric="euclidean"):
+        """
+        Nối thêm new_locations vào cuối locations.
+        Nếu ma trận của locations đã có trong cache thì chỉ tính hàng/cột mới,
+        ngược lại trả về None (lần gọi get_or_build sau sẽ tự tính).
+        """
+        base = self.get(locations, metric)
+        if base is None:
+            return None
+        matrix = base.extended(new_locations)
+        return self._store(fingerprint(matrix.coords, metric), matrix)
+
+    def stats(self):
+        files = [os.path.join(self.cache_dir, name)
+                 for name in os.listdir(self.cache_dir) if name.endswith(".npy")]
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(files),
+            "bytes": sum(os.path.getsize(path) for path in files if os.path.exists(path)),
+            "max_bytes": self.max_bytes
+        }
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_cache():
+    """Cache dùng chung trong process (thư mục mặc định hoặc MDVRP_MATRIX_CACHE_DIR)"""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = MatrixCache()
+        return _default_cache
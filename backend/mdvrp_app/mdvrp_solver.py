@@ -1,23 +1,81 @@
 from ortools.constraint_solver import routing_enums_pb2
 from ortools.constraint_solver import pywrapcp
-import math
+import os
 import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
 from typing import List, Dict, Tuple
 import json
+import logging
+import numpy as np
+
+try:
+    from .distance_matrix import DistanceMatrix
+    from .decomposition import solve_by_depot_decomposition
+    from .spatial_index import get_spatial_index
+    from .local_search import optimize_routes
+    from .inter_route import InterRouteOptimizer
+    from .warm_start import map_plan, plan_from_result, warm_start_termination, get_default_plan_store
+    from .result_cache import result_key
+    from .instrumentation import count, current_trace, phase, timed, tracing
+    from .payload import OUTPUT_FORMATS, format_result
+    from .termination import SearchTermination, normalize_termination
+    from .strategy_selector import MIN_CONFIDENCE, instance_features, select_strategy
+    from .lns import NUM_NEIGHBORS as LNS_NEIGHBORS, RuinRecreateLNS
+    from .road_network import get_default_road_network
+except ImportError:
+    from distance_matrix import DistanceMatrix
+    from decomposition import solve_by_depot_decomposition
+    from spatial_index import get_spatial_index
+    from local_search import optimize_routes
+    from inter_route import InterRouteOptimizer
+    from warm_start import map_plan, plan_from_result, warm_start_termination, get_default_plan_store
+    from result_cache import result_key
+    from instrumentation import count, current_trace, phase, timed, tracing
+    from payload import OUTPUT_FORMATS, format_result
+    from termination import SearchTermination, normalize_termination
+    from strategy_selector import MIN_CONFIDENCE, instance_features, select_strategy
+    from lns import NUM_NEIGHBORS as LNS_NEIGHBORS, RuinRecreateLNS
+    from road_network import get_default_road_network
 
 """
 Enhanced MDVRP Solver with 3 Optimization Strategies
 - Strategy 1: PATH_CHEAPEST_ARC + GUIDED_LOCAL_SEARCH
 - Strategy 2: PATH_MOST_CONSTRAINED_ARC + SIMULATED_ANNEALING
 - Strategy 3: NEAREST_NEIGHBOR + TABU_SEARCH
+- Strategy 4: Depot Decomposition (gán khách hàng theo depot, giải song song từng depot)
+- Strategy 5: Ruin-and-recreate LNS + simulated annealing (tự viết, không dùng OR-Tools)
+- Warm start: tiếp tục local search từ kế hoạch lần trước khi dữ liệu thay đổi ít
 + 2-opt Post-Optimization
 + Benchmark & Best-Known Comparison
 """
 
+logger = logging.getLogger(__name__)
+
+# Số láng giềng mặc định cho local search giữa các route khi không đặt neighbors_k
+DEFAULT_POST_NEIGHBORS = 10
+
+# Các chế độ hậu tối ưu cho solve_mdvrp_enhanced
+POST_OPTIMIZATIONS = ('2opt', 'inter_route', 'full')
+
+# Metric khoảng cách: Euclidean trên toạ độ hoặc đường bộ (road_network.py)
+DISTANCE_METRICS = ('euclidean', 'road')
+
+# Khoảng cách tối thiểu (giây) giữa 2 lần báo lời giải trung gian qua on_solution
+PROGRESS_INTERVAL = 0.5
+
+# (strategy id, tên method) của các chiến lược chạy trong benchmark
+BENCHMARK_STRATEGIES = [
+    ('strategy1', 'strategy_1_cheapest_arc_gls'),
+    ('strategy2', 'strategy_2_constrained_sa'),
+    ('strategy3', 'strategy_3_nearest_neighbor_tabu'),
+]
+
 
 class MDVRPSolver:
     def __init__(self, depots, customers, num_vehicles_per_depot,
-                 vehicle_capacities=None, demands=None):
+                 vehicle_capacities=None, demands=None, distance_matrix=None,
+                 neighbors_k=None, candidate_mode='forbid', service_times=None, max_route_duration=None):
         self.depots = depots
         self.customers = customers
         self.num_vehicles_per_depot = num_vehicles_per_depot
@@ -25,12 +83,17 @@ class MDVRPSolver:
         self.num_vehicles = num_vehicles_per_depot * self.num_depots
 
         self.all_locations = depots + customers
-        self.distance_matrix = self._compute_distance_matrix()
+        self.distance_matrix = distance_matrix if distance_matrix is not None \
+            else self._compute_distance_matrix()
 
         # Demands và capacities
         self.demands = demands if demands else [0] * self.num_depots + [1] * len(customers)
         self.vehicle_capacities = vehicle_capacities if vehicle_capacities else [100] * self.num_vehicles
 
+        # Giới hạn độ dài route (quãng đường + thời gian phục vụ tại mỗi node), None = không giới hạn
+        self.service_times = service_times
+        self.max_route_duration = max_route_duration
+
         # Starts và ends
         self.starts = []
         self.ends = []
@@ -39,23 +102,65 @@ class MDVRPSolver:
                 self.starts.append(depot_idx)
                 self.ends.append(depot_idx)
 
+        # Danh sách ứng viên kNN: chỉ giữ cung customer -> customer tới k láng giềng gần nhất
+        # candidate_mode: 'forbid' (xoá cung khỏi model) hoặc 'penalize' (cộng chi phí phạt)
+        self.neighbors_k = neighbors_k
+        self.candidate_mode = candidate_mode
+        self._spatial_index = None
+
+        # Báo lời giải trung gian: on_solution(update) được gọi mỗi khi tìm được lời giải tốt hơn,
+        # stop_event.set() (threading.Event) dừng tìm kiếm và trả về lời giải tốt nhất hiện có
+        self.on_solution = None
+        self.stop_event = None
+        # Tiêu chí dừng sớm (xem termination.py), None = chạy hết time_limit
+        self.termination = None
+
         self.benchmark_results = {}
 
+    @timed('matrix_build')
     def _compute_distance_matrix(self):
-        """Tính ma trận khoảng cách Euclidean"""
-        distances = {}
-        for from_counter, from_node in enumerate(self.all_locations):
-            distances[from_counter] = {}
-            for to_counter, to_node in enumerate(self.all_locations):
-                if from_counter == to_counter:
-                    distances[from_counter][to_counter] = 0
-                else:
-                    distances[from_counter][to_counter] = math.hypot(
-                        from_node[0] - to_node[0],
-                        from_node[1] - to_node[1]
-                    )
-        return distances
-
+        """Tính ma trận khoảng cách Euclidean (NumPy, float32)"""
+        return DistanceMatrix(self.all_locations)
+
+    @property
+    def spatial_index(self):
+        """GridIndex trên all_locations (dùng chung giữa các request có cùng toạ độ)"""
+        if self._spatial_index is None:
+            self._spatial_index = get_spatial_index(self.all_locations)
+        return self._spatial_index
+
+    def get_neighbors(self, k=None):
+        """Mảng (n, k) chỉ số k láng giềng gần nhất của mỗi node, None nếu không dùng kNN"""
+        k = k or self.neighbors_k
+        if not k:
+            return None
+        return self.spatial_index.candidates(k)
+
+    def _arc_cost_matrix(self):
+        """Ma trận chi phí cung (int) cho OR-Tools, có phạt cung ngoài kNN nếu candidate_mode='penalize'"""
+        scaled = self.distance_matrix.to_scaled()
+        if not self.neighbors_k or self.candidate_mode != 'penalize':
+            return scaled
+
+        cost = scaled.astype(np.int64)
+        outside = ~self.spatial_index.candidate_mask(self.neighbors_k)
+        outside[:self.num_depots, :] = False
+        outside[:, :self.num_depots] = False
+        cost[outside] += int(scaled.max()) * 10
+        return cost
+
+    def _restrict_to_candidates(self, routing, manager):
+        """Xoá khỏi model các cung customer -> customer không thuộc danh sách kNN (cung về depot luôn giữ)"""
+        mask = self.spatial_index.candidate_mask(self.neighbors_k)
+        num_nodes = len(self.all_locations)
+        node_index = np.array([manager.NodeToIndex(node) for node in range(num_nodes)])
+        for node in range(self.num_depots, num_nodes):
+            forbidden = np.flatnonzero(~mask[node, self.num_depots:]) + self.num_depots
+            forbidden = forbidden[forbidden != node]
+            if len(forbidden):
+                routing.NextVar(int(node_index[node])).RemoveValues(node_index[forbidden].tolist())
+
+    @timed('model_build')
     def _get_routing_model(self):
         """Tạo routing model cơ bản"""
         manager = pywrapcp.RoutingIndexManager(
@@ -66,21 +171,19 @@ class MDVRPSolver:
         )
         routing = pywrapcp.RoutingModel(manager)
 
-        # Distance callback
-        def distance_callback(from_index, to_index):
-            from_node = manager.IndexToNode(from_index)
-            to_node = manager.IndexToNode(to_index)
-            return int(self.distance_matrix[from_node][to_node] * 100)
-
-        transit_callback_index = routing.RegisterTransitCallback(distance_callback)
+        # Distance: ma trận int đã nhân scale, OR-Tools đọc trực tiếp trong C++
+        # (không còn callback Python trong vòng lặp tìm kiếm)
+        transit_callback_index = routing.RegisterTransitMatrix(
+            self._arc_cost_matrix().tolist()
+        )
         routing.SetArcCostEvaluatorOfAllVehicles(transit_callback_index)
+        if self.neighbors_k and self.candidate_mode == 'forbid':
+            self._restrict_to_candidates(routing, manager)
 
         # Capacity constraint
-        def demand_callback(from_index):
-            from_node = manager.IndexToNode(from_index)
-            return self.demands[from_node]
-
-        demand_callback_index = routing.RegisterUnaryTransitCallback(demand_callback)
+        demand_callback_index = routing.RegisterUnaryTransitVector(
+            [int(demand) for demand in self.demands]
+        )
         routing.AddDimensionWithVehicleCapacity(
             demand_callback_index,
             0,
@@ -89,49 +192,110 @@ class MDVRPSolver:
             'Capacity'
         )
 
+        if self.max_route_duration:
+            self._add_duration_dimension(routing)
+
         return routing, manager
 
+    def _add_duration_dimension(self, routing):
+        """Dimension 'Duration': quãng đường + thời gian phục vụ tại node xuất phát của mỗi cung <= max_route_duration"""
+        scale = self.distance_matrix.scale
+        # to_scaled làm tròn xuống; +1 mỗi cung để tổng trong model không thấp hơn quãng đường thật
+        duration = self.distance_matrix.to_scaled().astype(np.int64) + 1
+        if self.service_times:
+            duration += np.rint(np.asarray(self.service_times, dtype=np.float64) * scale).astype(np.int64)[:, None]
+        duration_callback_index = routing.RegisterTransitMatrix(duration.tolist())
+        routing.AddDimension(
+            duration_callback_index,
+            0,
+            int(self.max_route_duration * scale),
+            True,
+            'Duration'
+        )
+
+    def _attach_progress(self, routing, manager, strategy_name, start_time):
+        """
+        Gắn callback lời giải: báo lời giải cải thiện qua on_solution, dừng khi stop_event được set
+        hoặc khi đạt tiêu chí dừng sớm (self.termination), đếm lời giải và ghi quỹ đạo objective
+        (theo đơn vị khoảng cách) vào trace hiện tại nếu có.
+        Trả về SearchTermination: lý do dừng / thời điểm tìm được lời giải tốt nhất cho kết quả
+        """
+        trace = current_trace()
+        scale = self.distance_matrix.scale
+        termination = SearchTermination(self.termination, scale, start_time)
+        state = {'best': None, 'last_report': 0.0}
+
+        def on_solution():
+            if self.stop_event is not None and self.stop_event.is_set():
+                termination.stop()
+                routing.solver().FinishCurrentSearch()
+                return
+            objective = routing.CostVar().Value()
+            improved = state['best'] is None or objective < state['best']
+            if trace is not None:
+                trace.record_solution(strategy_name, time.time() - start_time, objective / scale, improved)
+            if termination.observe(objective):
+                routing.solver().FinishCurrentSearch()
+            if not improved:
+                return
+            state['best'] = objective
+            if self.on_solution is None:
+                return
+            now = time.time()
+            if now - state['last_report'] < PROGRESS_INTERVAL:
+                return
+            state['last_report'] = now
+
+            routes = self._current_routes(routing, manager)
+            self.on_solution({
+                'strategy': strategy_name,
+                'objective': objective,
+                'total_distance': sum(self.distance_matrix.route_distance(nodes) for nodes in routes),
+                'elapsed_time': now - start_time,
+                'routes': routes
+            })
+
+        routing.AddAtSolutionCallback(on_solution)
+        return termination
+
+    def _current_routes(self, routing, manager):
+        """Routes của lời giải đang xét (trong callback), dạng gọn: list chỉ số node, bỏ route rỗng"""
+        routes = []
+        for vehicle_id in range(self.num_vehicles):
+            index = routing.Start(vehicle_id)
+            nodes = []
+            while not routing.IsEnd(index):
+                nodes.append(manager.IndexToNode(index))
+                index = routing.NextVar(index).Value()
+            nodes.append(manager.IndexToNode(index))
+            if len(nodes) > 2:
+                routes.append(nodes)
+        return routes
+
+    @timed('extract')
     def _extract_routes(self, routing, manager, solution):
-        """Trích xuất routes từ solution"""
+        """
+        Trích xuất routes từ solution: mỗi route giữ danh sách chỉ số node (depot, khách hàng..., depot),
+        toạ độ chỉ được gắn khi định dạng kết quả trả về (payload.format_result)
+        """
         routes = []
         total_distance = 0
 
         for vehicle_id in range(self.num_vehicles):
             index = routing.Start(vehicle_id)
-            route = []
-            route_distance = 0
+            nodes = []
 
             while not routing.IsEnd(index):
-                node = manager.IndexToNode(index)
-                lat, lng = self.all_locations[node]
-                route.append({
-                    "id": node,
-                    "lat": lat,
-                    "lng": lng
-                })
-                previous_index = index
+                nodes.append(manager.IndexToNode(index))
                 index = solution.Value(routing.NextVar(index))
-                route_distance += routing.GetArcCostForVehicle(previous_index, index, vehicle_id)
-
-                # Thêm điểm kết thúc (về lại depot)
-                node = manager.IndexToNode(index)
-                lat, lng = self.all_locations[node]
-                route.append({
-                    "id": node,
-                    "lat": lat,
-                    "lng": lng
-                })
-
-            if len(route) > 2:
-                routes.append({
-                    'vehicle_id': vehicle_id,
-                    'depot': self.starts[vehicle_id],
-                    'route': route,
-                    'distance': route_distance / 100
-                })
-                total_distance += route_distance
-
-        return routes, total_distance / 100
+            # Điểm kết thúc (về lại depot)
+            nodes.append(manager.IndexToNode(index))
+
+            if len(nodes) > 2:
+                routes.append(self._build_route_info(vehicle_id, nodes))
+                total_distance += routes[-1]['distance']
+
+        return routes, total_distance
 
     def strategy_1_cheapest_arc_gls(self, time_limit=45):
         """
@@ -140,6 +304,7 @@ class MDVRPSolver:
         """
         start_time = time.time()
         routing, manager = self._get_routing_model()
+        termination = self._attach_progress(routing, manager, 'PATH_CHEAPEST_ARC + GUIDED_LOCAL_SEARCH', start_time)
 
         search_parameters = pywrapcp.DefaultRoutingSearchParameters()
         search_parameters.first_solution_strategy = (
@@ -150,7 +315,8 @@ class MDVRPSolver:
         )
         search_parameters.time_limit.seconds = time_limit
 
-        solution = routing.SolveWithParameters(search_parameters)
+        with phase('search'):
+            solution = routing.SolveWithParameters(search_parameters)
         elapsed = time.time() - start_time
 
         if solution:
@@ -161,7 +327,8 @@ class MDVRPSolver:
                 'total_distance': total_distance,
                 'routes': routes,
                 'elapsed_time': elapsed,
-                'num_routes': len(routes)
+                'num_routes': len(routes),
+                'termination': termination.summary(time_limit)
             }
         else:
             return {
@@ -178,6 +345,7 @@ class MDVRPSolver:
         """
         start_time = time.time()
         routing, manager = self._get_routing_model()
+        termination = self._attach_progress(routing, manager, 'PATH_MOST_CONSTRAINED_ARC + SIMULATED_ANNEALING', start_time)
 
         search_parameters = pywrapcp.DefaultRoutingSearchParameters()
         search_parameters.first_solution_strategy = (
@@ -188,7 +356,8 @@ class MDVRPSolver:
         )
         search_parameters.time_limit.seconds = time_limit
 
-        solution = routing.SolveWithParameters(search_parameters)
+        with phase('search'):
+            solution = routing.SolveWithParameters(search_parameters)
         elapsed = time.time() - start_time
 
         if solution:
@@ -199,7 +368,8 @@ class MDVRPSolver:
                 'total_distance': total_distance,
                 'routes': routes,
                 'elapsed_time': elapsed,
-                'num_routes': len(routes)
+                'num_routes': len(routes),
+                'termination': termination.summary(time_limit)
             }
         else:
             return {
@@ -215,6 +385,7 @@ class MDVRPSolver:
         start_time = time.time()
         try:
             routing, manager = self._get_routing_model()
+            termination = self._attach_progress(routing, manager, 'AUTOMATIC + TABU_SEARCH', start_time)
 
             search_parameters = pywrapcp.DefaultRoutingSearchParameters()
             # Thay NEAREST_NEIGHBOR bằng AUTOMATIC (tương đương)
@@ -228,13 +399,15 @@ class MDVRPSolver:
 
             # FIX: Thêm error handling cho TABU_SEARCH
             try:
-                solution = routing.SolveWithParameters(search_parameters)
+                with phase('search'):
+                    solution = routing.SolveWithParameters(search_parameters)
             except Exception as tabu_error:
-                print(f"⚠️ TABU_SEARCH lỗi, fallback to GUIDED_LOCAL_SEARCH: {str(tabu_error)}")
+                logger.warning("TABU_SEARCH lỗi, fallback to GUIDED_LOCAL_SEARCH: %s", tabu_error)
                 search_parameters.local_search_metaheuristic = (
                     routing_enums_pb2.LocalSearchMetaheuristic.GUIDED_LOCAL_SEARCH
                 )
-                solution = routing.SolveWithParameters(search_parameters)
+                with phase('search'):
+                    solution = routing.SolveWithParameters(search_parameters)
 
             elapsed = time.time() - start_time
 
@@ -246,7 +419,8 @@ class MDVRPSolver:
                     'total_distance': total_distance,
                     'routes': routes,
                     'elapsed_time': elapsed,
-                    'num_routes': len(routes)
+                    'num_routes': len(routes),
+                    'termination': termination.summary(time_limit)
                 }
             else:
                 return {
@@ -257,9 +431,7 @@ class MDVRPSolver:
                 }
         except Exception as e:
             elapsed = time.time() - start_time
-            print(f"❌ Strategy 3 Error: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Strategy 3 Error: %s", e)
 
             return {
                 'status': 'failed',
@@ -269,58 +441,223 @@ class MDVRPSolver:
                 'error_type': type(e).__name__
             }
 
+    def _build_route_info(self, vehicle_id, nodes):
+        """Tạo route dict (cùng dạng với _extract_routes) từ danh sách node"""
+        nodes = [int(node) for node in nodes]
+        return {
+            'vehicle_id': vehicle_id,
+            'depot': self.starts[vehicle_id],
+            'nodes': nodes,
+            'distance': self.distance_matrix.route_distance(nodes)
+        }
 
-    def _two_opt_optimization(self, route, distance_matrix, max_iterations=1000):
+    def strategy_4_depot_decomposition(self, time_limit=45, max_workers=None):
         """
-        2-opt Local Search Post-Optimization
-        Cải thiện route bằng cách thử đảo ngược các cung
+        Strategy 4: Depot Decomposition
+        Gán khách hàng cho depot (gần nhất, có tính sức chứa), giải từng VRP 1 depot
+        song song trên nhiều process rồi sửa chữa ngắn giữa các depot.
+        Phù hợp với bài toán nhiều depot / nhiều xe khi 1 model OR-Tools chung quá lớn
         """
-        improved = True
-        best_distance = self._calculate_route_distance(route, distance_matrix)
-        iteration = 0
-
-        while improved and iteration < max_iterations:
-            improved = False
-            iteration += 1
-
-            for i in range(1, len(route) - 2):
-                for j in range(i + 1, len(route) - 1):
-                    if j - i == 1:
-                        continue
-
-                    # Tạo route mới bằng cách đảo ngược cung [i:j]
-                    new_route = route[:i] + route[i:j][::-1] + route[j:]
-                    new_distance = self._calculate_route_distance(new_route, distance_matrix)
-
-                    if new_distance < best_distance:
-                        route = new_route
-                        best_distance = new_distance
-                        improved = True
-                        break
-
-                if improved:
-                    break
+        start_time = time.time()
+        try:
+            with phase('search'):
+                vehicle_routes, repair_moves, stop_reasons = solve_by_depot_decomposition(
+                    self, time_limit=time_limit, max_workers=max_workers,
+                    neighbors=self.get_neighbors(), termination=self.termination
+                )
+            elapsed = time.time() - start_time
+
+            if vehicle_routes is None:
+                return {
+                    'status': 'failed',
+                    'strategy': 'DEPOT_DECOMPOSITION + GUIDED_LOCAL_SEARCH',
+                    'message': 'No solution found',
+                    'elapsed_time': elapsed
+                }
 
-        return route, best_distance, iteration
+            routes = [self._build_route_info(vehicle_id, nodes) for vehicle_id, nodes in vehicle_routes]
+            return {
+                'status': 'success',
+                'strategy': 'DEPOT_DECOMPOSITION + GUIDED_LOCAL_SEARCH',
+                'total_distance': sum(r['distance'] for r in routes),
+                'routes': routes,
+                'elapsed_time': elapsed,
+                'num_routes': len(routes),
+                'repair_moves': repair_moves,
+                # Mỗi bài toán con dừng theo lý do riêng: đếm số bài toán con theo lý do
+                'termination': {'reason': 'decomposition', 'elapsed_time': elapsed, 'subproblems': stop_reasons}
+            }
+        except Exception as e:
+            elapsed = time.time() - start_time
+            logger.exception("Strategy 4 Error: %s", e)
+            return {
+                'status': 'failed',
+                'strategy': 'DEPOT_DECOMPOSITION + GUIDED_LOCAL_SEARCH',
+                'message': f'Error: {str(e)}',
+                'elapsed_time': elapsed,
+                'error_type': type(e).__name__
+            }
+
+    def strategy_5_ruin_recreate_lns(self, time_limit=45, seed=0):
+        """
+        Strategy 5: RUIN_RECREATE + SIMULATED_ANNEALING (lns.py)
+        Không dựng model OR-Tools (lớn theo số node x số xe): phù hợp với bài toán hàng chục nghìn khách hàng
+        hoặc rất nhiều xe
+        """
+        start_time = time.time()
+        strategy_name = 'RUIN_RECREATE + SIMULATED_ANNEALING'
+        try:
+            engine = RuinRecreateLNS(
+                self.distance_matrix.distance, self.demands, self.vehicle_capacities, self.starts,
+                self.num_depots, self.get_neighbors(LNS_NEIGHBORS),
+                self.service_times, self.max_route_duration, seed=seed
+            )
+            termination = SearchTermination(self.termination, self.distance_matrix.scale, start_time)
+            with phase('search'):
+                vehicle_routes = engine.run(
+                    time_limit - (time.time() - start_time),
+                    self._lns_progress(engine, strategy_name, termination, start_time)
+                )
+            elapsed = time.time() - start_time
+
+            if vehicle_routes is None:
+                return {
+                    'status': 'failed',
+                    'strategy': strategy_name,
+                    'message': 'No solution found',
+                    'elapsed_time': elapsed
+                }
+
+            routes = [self._build_route_info(vehicle_id, nodes)
+                      for vehicle_id, nodes in enumerate(vehicle_routes) if len(nodes) > 2]
+            return {
+                'status': 'success',
+                'strategy': strategy_name,
+                'total_distance': sum(r['distance'] for r in routes),
+                'routes': routes,
+                'elapsed_time': elapsed,
+                'num_routes': len(routes),
+                'lns': engine.stats,
+                'termination': termination.summary(time_limit)
+            }
+        except Exception as e:
+            elapsed = time.time() - start_time
+            logger.exception("Strategy 5 Error: %s", e)
+            return {
+                'status': 'failed',
+                'strategy': strategy_name,
+                'message': f'Error: {str(e)}',
+                'elapsed_time': elapsed,
+                'error_type': type(e).__name__
+            }
+
+    def _lns_progress(self, engine, strategy_name, termination, start_time):
+        """Callback lời giải của LNS, tương tự _attach_progress: stop_event, tiêu chí dừng sớm, trace, on_solution"""
+        trace = current_trace()
+        scale = self.distance_matrix.scale
+        state = {'last_report': 0.0}
+
+        def on_solution(cost, improved):
+            if self.stop_event is not None and self.stop_event.is_set():
+                termination.stop()
+                return True
+            if trace is not None:
+                trace.record_solution(strategy_name, time.time() - start_time, cost, improved)
+            stop = termination.observe(cost * scale) is not None
+            if not improved or self.on_solution is None:
+                return stop
+            now = time.time()
+            if now - state['last_report'] < PROGRESS_INTERVAL:
+                return stop
+            state['last_report'] = now
+
+            routes = [nodes for nodes in engine.solution() if len(nodes) > 2]
+            self.on_solution({
+                'strategy': strategy_name,
+                'objective': int(cost * scale),
+                'total_distance': cost,
+                'elapsed_time': now - start_time,
+                'routes': routes
+            })
+            return stop
+
+        return on_solution
+
+    def strategy_warm_start(self, plan, time_limit=45, coord_order='latlng'):
+        """
+        Warm start: ánh xạ kế hoạch cũ (theo toạ độ, coord_order là thứ tự cột toạ độ của solver) lên
+        instance hiện tại rồi chạy GUIDED_LOCAL_SEARCH từ đó thay vì dựng lời giải đầu từ đầu.
+        Không đọc được lời giải đầu (vd. dùng cung đã bị loại bởi neighbors_k) thì giải như Strategy 1
+        """
+        start_time = time.time()
+        initial_routes, mapping = map_plan(plan, self, coord_order)
+        routing, manager = self._get_routing_model()
+        termination = self._attach_progress(routing, manager, 'WARM_START + GUIDED_LOCAL_SEARCH', start_time)
+
+        search_parameters = pywrapcp.DefaultRoutingSearchParameters()
+        search_parameters.first_solution_strategy = (
+            routing_enums_pb2.FirstSolutionStrategy.PATH_CHEAPEST_ARC
+        )
+        search_parameters.local_search_metaheuristic = (
+            routing_enums_pb2.LocalSearchMetaheuristic.GUIDED_LOCAL_SEARCH
+        )
+        search_parameters.time_limit.seconds = time_limit
+
+        routing.CloseModelWithParameters(search_parameters)
+        initial_solution = None
+        if not mapping['unplaced']:
+            index_routes = [[manager.NodeToIndex(node) for node in nodes] for nodes in initial_routes]
+            initial_solution = routing.ReadAssignmentFromRoutes(index_routes, True)
+
+        if initial_solution is None:
+            logger.warning("Warm start: không dùng được kế hoạch cũ, giải lại từ đầu")
+            with phase('search'):
+                solution = routing.SolveWithParameters(search_parameters)
+        else:
+            with phase('search'):
+                solution = routing.SolveFromAssignmentWithParameters(initial_solution, search_parameters)
+        elapsed = time.time() - start_time
+
+        if solution:
+            routes, total_distance = self._extract_routes(routing, manager, solution)
+            return {
+                'status': 'success',
+                'strategy': 'WARM_START + GUIDED_LOCAL_SEARCH',
+                'total_distance': total_distance,
+                'routes': routes,
+                'elapsed_time': elapsed,
+                'num_routes': len(routes),
+                'warm_start': dict(mapping, used=initial_solution is not None),
+                'termination': termination.summary(time_limit)
+            }
+        else:
+            return {
+                'status': 'failed',
+                'strategy': 'WARM_START + GUIDED_LOCAL_SEARCH',
+                'message': 'No solution found',
+                'elapsed_time': elapsed
+            }
 
     def _calculate_route_distance(self, route, distance_matrix):
-        """Tính tổng khoảng cách của route"""
-        total = 0
-        for i in range(len(route) - 1):
-            total += distance_matrix[route[i]][route[i + 1]]
-        return total
-
-    def apply_2opt_to_routes(self, routes):
-        """Áp dụng 2-opt optimization cho tất cả routes"""
+        """Tính tổng khoảng cách của route (route là list node id hoặc list {"id","lat","lng"})"""
+        nodes = [stop["id"] if isinstance(stop, dict) else stop for stop in route]
+        return distance_matrix.route_distance(nodes)
+
+    @timed('2opt')
+    def apply_2opt_to_routes(self, routes, max_workers=None):
+        """
+        Áp dụng 2-opt + Or-opt (delta O(1), neighbor lists, don't-look bits) cho tất cả routes
+        max_workers > 1: các route độc lập được tối ưu song song
+        """
+        route_nodes = [list(route_info['nodes']) for route_info in routes]
+        optimized = optimize_routes(route_nodes, self.distance_matrix.to_dense(), max_workers=max_workers)
+
         optimized_routes = []
         total_improvement = 0
-
-        for route_info in routes:
+        for route_info, (nodes, _, moves) in zip(routes, optimized):
             original_distance = route_info['distance']
-            optimized_route, new_distance, iterations = self._two_opt_optimization(
-                route_info['route'],
-                self.distance_matrix
-            )
+            optimized_route = self._build_route_info(route_info['vehicle_id'], nodes)
+            new_distance = optimized_route['distance']
 
             improvement = original_distance - new_distance
             total_improvement += improvement
@@ -328,67 +665,166 @@ class MDVRPSolver:
             optimized_routes.append({
                 'vehicle_id': route_info['vehicle_id'],
                 'depot': route_info['depot'],
-                'route': optimized_route,
+                'nodes': optimized_route['nodes'],
                 'distance': new_distance,
                 'original_distance': original_distance,
                 'improvement': improvement,
-                'iterations': iterations
+                'iterations': moves
             })
 
         return optimized_routes, total_improvement
 
-    def benchmark_all_strategies(self, time_limit=45):
+    @timed('inter_route')
+    def apply_inter_route_optimization(self, routes, time_limit=None):
+        """
+        Local search giữa các route (relocate / swap / cross-exchange / 2-opt*), kể cả giữa các depot.
+        Xe chưa dùng được thêm vào dạng route rỗng để có thể nhận khách hàng.
+        Trả về (routes mới, tổng cải thiện, thống kê số nước đi)
+        """
+        route_nodes = {route_info['vehicle_id']: list(route_info['nodes']) for route_info in routes}
+        vehicle_ids = list(range(self.num_vehicles))
+        initial = [route_nodes.get(v, [self.starts[v], self.ends[v]]) for v in vehicle_ids]
+
+        optimizer = InterRouteOptimizer(
+            initial,
+            self.distance_matrix.to_dense(),
+            self.demands,
+            self.vehicle_capacities,
+            self.get_neighbors(self.neighbors_k or DEFAULT_POST_NEIGHBORS),
+            self.num_depots
+        )
+        optimizer.run(time_limit=time_limit)
+
+        optimized_routes = [self._build_route_info(v, nodes)
+                            for v, nodes in zip(vehicle_ids, optimizer.routes) if len(nodes) > 2]
+        old_total = sum(r['distance'] for r in routes)
+        new_total = sum(r['distance'] for r in optimized_routes)
+        return optimized_routes, old_total - new_total, optimizer.stats
+
+    def post_optimize(self, result, mode, max_workers=None, time_limit=None):
+        """
+        Hậu tối ưu 1 kết quả (sửa trực tiếp result):
+        - '2opt': 2-opt + Or-opt trong từng route
+        - 'inter_route': relocate / swap / cross-exchange / 2-opt* giữa các route
+        - 'full': inter_route rồi 2opt
+        Giữ nguyên route ban đầu nếu kết quả không ngắn hơn (vd. ma trận đường bộ bất đối xứng).
+        """
+        if result.get('status') != 'success' or mode not in POST_OPTIMIZATIONS:
+            return result
+
+        start_time = time.time()
+        routes = result['routes']
+        stats = {}
+        if mode in ('inter_route', 'full'):
+            routes, _, stats = self.apply_inter_route_optimization(routes, time_limit)
+        if mode in ('2opt', 'full'):
+            optimized, _ = self.apply_2opt_to_routes(routes, max_workers)
+            routes = [self._build_route_info(r['vehicle_id'], r['nodes']) for r in optimized]
+
+        result['original_total_distance'] = result['total_distance']
+        total_distance = sum(r['distance'] for r in routes)
+        kept_original = total_distance >= result['total_distance']
+        if not kept_original:
+            result['routes'] = routes
+            result['total_distance'] = total_distance
+            result['num_routes'] = len(routes)
+        result['post_optimization'] = {
+            'mode': mode,
+            'improvement': result['original_total_distance'] - result['total_distance'],
+            'kept_original': kept_original,
+            'moves': stats,
+            'elapsed_time': time.time() - start_time
+        }
+        return result
+
+    def features(self):
+        """Đặc trưng instance cho strategy_selector"""
+        return instance_features(self.depots, self.customers, self.num_vehicles_per_depot,
+                                 self.demands, self.vehicle_capacities)
+
+    def strategy_auto(self, time_limit=45, history=None, race=None, parallel=False, max_workers=None):
+        """
+        Chọn 1 chiến lược (strategy1/2/3) theo đặc trưng instance và lịch sử benchmark (StrategyHistory)
+        rồi chỉ chạy chiến lược đó với thời gian đề xuất (<= time_limit).
+        race: True - luôn đua 2 ứng viên đầu; False - không bao giờ; None - chỉ đua khi độ tin cậy thấp.
+        Đua tuần tự chia đôi thời gian (tổng vẫn <= thời gian đề xuất), song song thì mỗi ứng viên đủ thời gian.
+        """
+        start_time = time.time()
+        selection = select_strategy(self.features(), history, time_limit)
+        methods = dict(BENCHMARK_STRATEGIES)
+        budget = selection['time_budget']
+        raced = race if race is not None else selection['confidence'] < MIN_CONFIDENCE
+
+        if raced:
+            candidates = [(strategy, methods[strategy]) for strategy in selection['ranking'][:2]]
+            logger.info("Auto strategy: racing %s for %ss (confidence %.2f, %s)",
+                        ", ".join(strategy for strategy, _ in candidates), budget,
+                        selection['confidence'], selection['source'])
+            if parallel:
+                results = self._run_strategies_parallel(candidates, budget, max_workers)
+            else:
+                results = [getattr(self, method_name)(max(1, budget // len(candidates)))
+                           for _, method_name in candidates]
+        else:
+            candidates = [(selection['ranking'][0], methods[selection['ranking'][0]])]
+            logger.info("Auto strategy: %s for %ss (confidence %.2f)", candidates[0][0], budget,
+                        selection['confidence'])
+            results = [getattr(self, candidates[0][1])(budget)]
+
+        successful = [(strategy, r) for (strategy, _), r in zip(candidates, results) if r['status'] == 'success']
+        if successful:
+            chosen, result = min(successful, key=lambda item: item[1]['total_distance'])
+        else:
+            chosen, result = candidates[0][0], results[0]
+        result['selection'] = dict(
+            selection, strategy=chosen, raced=raced, elapsed_time=time.time() - start_time,
+            candidates=[{'strategy': strategy, 'status': r['status'], 'total_distance': r.get('total_distance')}
+                        for (strategy, _), r in zip(candidates, results)]
+        )
+        return result
+
+    def benchmark_record(self, results):
+        """{strategy id: quãng đường, thời điểm tìm được lời giải tốt nhất} của 1 lần benchmark (ghi lịch sử)"""
+        record = {}
+        for (strategy, _), result in zip(BENCHMARK_STRATEGIES, results):
+            if result.get('status') == 'success':
+                record[strategy] = {
+                    'distance': result['total_distance'],
+                    'best_found_at': result.get('termination', {}).get('best_found_at'),
+                }
+        return record
+
+    def benchmark_all_strategies(self, time_limit=45, parallel=False, max_workers=None):
         """
         Chạy tất cả 3 chiến lược và so sánh kết quả
+        parallel=True: mỗi chiến lược chạy trong 1 worker process riêng (cùng time_limit),
+        instance (ma trận khoảng cách...) chỉ dựng 1 lần và gửi sang worker khi khởi tạo pool
         """
-        results = []
-
-        print("\n" + "=" * 80)
-        print("RUNNING BENCHMARK - 3 STRATEGIES COMPARISON")
-        print("=" * 80)
-
-        # Strategy 1
-        print("\n[1/3] Strategy 1: PATH_CHEAPEST_ARC + GUIDED_LOCAL_SEARCH...")
-        result1 = self.strategy_1_cheapest_arc_gls(time_limit)
-        results.append(result1)
-        if result1['status'] == 'success':
-            print(
-                f"    ✓ Distance: {result1['total_distance']:.2f} | Routes: {result1['num_routes']} | Time: {result1['elapsed_time']:.2f}s")
-
-        # Strategy 2
-        print("[2/3] Strategy 2: PATH_MOST_CONSTRAINED_ARC + SIMULATED_ANNEALING...")
-        result2 = self.strategy_2_constrained_sa(time_limit)
-        results.append(result2)
-        if result2['status'] == 'success':
-            print(
-                f"    ✓ Distance: {result2['total_distance']:.2f} | Routes: {result2['num_routes']} | Time: {result2['elapsed_time']:.2f}s")
-
-        # Strategy 3
-        print("[3/3] Strategy 3: NEAREST_NEIGHBOR + TABU_SEARCH...")
-        result3 = self.strategy_3_nearest_neighbor_tabu(time_limit)
-        results.append(result3)
-        if result3['status'] == 'success':
-            print(
-                f"    ✓ Distance: {result3['total_distance']:.2f} | Routes: {result3['num_routes']} | Time: {result3['elapsed_time']:.2f}s")
+        logger.info("Running benchmark: %d strategies", len(BENCHMARK_STRATEGIES))
+
+        if parallel:
+            results = self._run_strategies_parallel(BENCHMARK_STRATEGIES, time_limit, max_workers)
+        else:
+            results = []
+            for i, (_, method_name) in enumerate(BENCHMARK_STRATEGIES, 1):
+                # Người dùng đã dừng: không chạy các chiến lược còn lại
+                if results and self.stop_event is not None and self.stop_event.is_set():
+                    break
+                logger.info("[%d/%d] %s...", i, len(BENCHMARK_STRATEGIES), method_name)
+                results.append(getattr(self, method_name)(time_limit))
 
         # So sánh kết quả
         successful_results = [r for r in results if r['status'] == 'success']
         if successful_results:
             best_result = min(successful_results, key=lambda x: x['total_distance'])
 
-            print("\n" + "=" * 80)
-            print("BENCHMARK RESULTS SUMMARY")
-            print("=" * 80)
             for i, result in enumerate(results, 1):
                 if result['status'] == 'success':
                     gap = ((result['total_distance'] - best_result['total_distance']) / best_result[
                         'total_distance'] * 100) if best_result['total_distance'] > 0 else 0
-                    marker = "🏆 BEST" if result == best_result else ""
-                    print(f"\nStrategy {i}: {result['strategy']}")
-                    print(f"  Total Distance: {result['total_distance']:.2f}")
-                    print(f"  Number of Routes: {result['num_routes']}")
-                    print(f"  Time: {result['elapsed_time']:.2f}s")
-                    print(f"  Gap from Best: {gap:.2f}% {marker}")
+                    logger.info("Strategy %d: %s | distance %.2f | routes %d | time %.2fs | gap from best %.2f%%%s",
+                                i, result['strategy'], result['total_distance'], result['num_routes'],
+                                result['elapsed_time'], gap, " (best)" if result is best_result else "")
 
         self.benchmark_results = {
             'timestamp': time.time(),
@@ -398,28 +834,54 @@ class MDVRPSolver:
 
         return results
 
-    def benchmark_with_2opt(self, time_limit=45):
+    def _run_strategies_parallel(self, strategies, time_limit, max_workers=None):
+        """Chạy các chiến lược trong process pool, kết quả giữ đúng thứ tự strategies"""
+        if max_workers is None:
+            max_workers = min(len(strategies), os.cpu_count() or 1)
+        logger.info("Parallel mode: %d strategies on %d worker(s)", len(strategies), max_workers)
+
+        with ProcessPoolExecutor(max_workers=max_workers,
+                                 initializer=_init_strategy_worker,
+                                 initargs=(self,)) as executor:
+            futures = [executor.submit(_run_strategy_in_worker, method_name, time_limit)
+                       for _, method_name in strategies]
+            results = []
+            trace = current_trace()
+            for (_, method_name), future in zip(strategies, futures):
+                try:
+                    result = future.result()
+                    worker_trace = result.pop('instrumentation', None)
+                    if trace is not None:
+                        trace.merge(worker_trace)
+                    results.append(result)
+                except Exception as e:
+                    results.append({
+                        'status': 'failed',
+                        'strategy': method_name,
+                        'message': f'Worker error: {str(e)}',
+                        'elapsed_time': 0,
+                        'error_type': type(e).__name__
+                    })
+        return results
+
+    def benchmark_with_2opt(self, time_limit=45, parallel=False, max_workers=None):
         """
         Benchmark các chiến lược rồi áp dụng 2-opt optimization
         """
-        results = self.benchmark_all_strategies(time_limit)
-
-        print("\n" + "=" * 80)
-        print("APPLYING 2-OPT POST-OPTIMIZATION")
-        print("=" * 80)
+        results = self.benchmark_all_strategies(time_limit, parallel, max_workers)
 
         for i, result in enumerate(results):
             if result['status'] == 'success':
-                print(f"\nApplying 2-opt to Strategy {i + 1}...")
-                optimized_routes, total_improvement = self.apply_2opt_to_routes(result['routes'])
+                optimized_routes, total_improvement = self.apply_2opt_to_routes(
+                    result['routes'], max_workers if parallel else None
+                )
 
                 new_total = sum(r['distance'] for r in optimized_routes)
                 old_total = result['total_distance']
                 improvement_pct = (total_improvement / old_total * 100) if old_total > 0 else 0
 
-                print(f"  Before 2-opt: {old_total:.2f}")
-                print(f"  After 2-opt: {new_total:.2f}")
-                print(f"  Total Improvement: {total_improvement:.2f} ({improvement_pct:.2f}%)")
+                logger.info("2-opt strategy %d: %.2f -> %.2f (improvement %.2f, %.2f%%)",
+                            i + 1, old_total, new_total, total_improvement, improvement_pct)
 
                 result['2opt_optimized'] = True
                 result['2opt_routes'] = optimized_routes
@@ -428,49 +890,207 @@ class MDVRPSolver:
 
     def compare_with_known_solution(self, known_best_distance):
         """
-        So sánh kết quả với giải pháp tốt nhất đã biết
+        So sánh kết quả với giải pháp tốt nhất đã biết, trả về gap (%) hoặc None nếu chưa có kết quả
         """
         if not self.benchmark_results.get('best_result'):
-            print("No benchmark results available")
-            return
+            logger.warning("No benchmark results available")
+            return None
 
         best = self.benchmark_results['best_result']
-
-        print("\n" + "=" * 80)
-        print("COMPARISON WITH BEST-KNOWN SOLUTION")
-        print("=" * 80)
-        print(f"Best-Known Distance: {known_best_distance:.2f}")
-        print(f"Our Best Distance: {best['total_distance']:.2f}")
-
         gap = ((best['total_distance'] - known_best_distance) / known_best_distance * 100)
-        print(f"Gap: {gap:.2f}%")
 
         if gap <= 0:
-            print("✓ BETTER than best-known solution!")
+            verdict = "BETTER than best-known solution"
         elif gap <= 5:
-            print("✓ EXCELLENT - within 5% of best-known")
+            verdict = "EXCELLENT - within 5% of best-known"
         elif gap <= 10:
-            print("✓ GOOD - within 10% of best-known")
+            verdict = "GOOD - within 10% of best-known"
         else:
-            print("⚠ Consider using different parameters")
+            verdict = "Consider using different parameters"
+        logger.info("Best-known distance %.2f, our best %.2f, gap %.2f%%: %s",
+                    known_best_distance, best['total_distance'], gap, verdict)
+        return gap
+
+
+# Worker process cho benchmark song song: solver được gửi sang 1 lần khi khởi tạo pool
+_worker_solver = None
+
+
+def _init_strategy_worker(solver):
+    global _worker_solver
+    _worker_solver = solver
+
+
+def _run_strategy_in_worker(method_name, time_limit):
+    # Trace của worker gửi kèm kết quả, process chính cộng dồn vào trace của request
+    with tracing() as trace:
+        result = getattr(_worker_solver, method_name)(time_limit)
+    result['instrumentation'] = trace.to_dict()
+    return result
 
 
 # Export function cho backend
 def solve_mdvrp_enhanced(depots, customers, num_vehicles_per_depot,
                          vehicle_capacities=None, demands=None,
-                         strategy='benchmark', time_limit=45):
+                         strategy='benchmark', time_limit=45, matrix_cache=None,
+                         parallel=False, max_workers=None, neighbors_k=None,
+                         candidate_mode='forbid', post_optimization=None,
+                         on_solution=None, stop_event=None, warm_start=None, plan_store=None,
+                         result_cache=None, instrument=False, output_format='full', termination=None,
+                         strategy_history=None, race=None, distance_metric='euclidean', road_network=None,
+                         coord_order='latlng'):
+    """
+    warm_start: True (dùng kế hoạch gần nhất trong plan_store) hoặc 1 kế hoạch (dict của plan_from_result);
+    có kế hoạch thì bỏ qua strategy và giải tiếp từ kế hoạch đó.
+    plan_store: nơi lưu kế hoạch tốt nhất sau mỗi lần giải thành công (mặc định không lưu).
+    result_cache: ResultCache; instance + tham số giống lần trước thì trả kết quả đã cache.
+    Không dùng cache khi warm start hoặc stream lời giải trung gian.
+    instrument: gắn thời gian từng giai đoạn / bộ đếm / quỹ đạo objective vào result['instrumentation']
+    (cộng vào trace hiện tại nếu đang có, vd. trace của request).
+    output_format: dạng route trả về - 'full' (mỗi điểm dừng {"id","lat","lng"}), 'compact'
+    (mảng chỉ số node + bảng toạ độ 'locations') hoặc 'polyline' (mảng chỉ số node + encoded polyline).
+    termination: tiêu chí dừng sớm thay vì chạy hết time_limit, vd. {"stall_time": 5, "min_improvement": 0.001}
+    (stall_time, stall_solutions, target_objective, min_improvement - xem termination.py);
+    mỗi kết quả có 'termination' cho biết lý do dừng.
+    strategy='auto': chọn 1 chiến lược theo đặc trưng instance + strategy_history (StrategyHistory, lịch sử
+    các lần benchmark) thay vì chạy cả 3; race (None / True / False) quyết định có đua 2 ứng viên đầu không.
+    Mỗi lần benchmark thành công được ghi vào strategy_history (nếu có).
+    distance_metric='road': ma trận theo đường bộ (km) từ road_network (mặc định: đồ thị MDVRP_ROAD_NETWORK)
+    thay cho Euclidean; coord_order ('latlng' / 'lnglat') là thứ tự cột của toạ độ depots / customers.
+    """
+    if output_format not in OUTPUT_FORMATS:
+        return {'status': 'error', 'message': f'Unknown output format, expected one of {", ".join(OUTPUT_FORMATS)}'}
+    if distance_metric not in DISTANCE_METRICS:
+        return {'status': 'error', 'message': f'Unknown distance metric, expected one of {", ".join(DISTANCE_METRICS)}'}
+    try:
+        termination = normalize_termination(termination)
+        if distance_metric == 'road':
+            road_network = road_network or get_default_road_network()
+    except (TypeError, ValueError) as e:
+        return {'status': 'error', 'message': str(e)}
+    if distance_metric != 'road':
+        road_network = None
+
+    with tracing(current_trace()) if instrument else nullcontext() as trace:
+        result = _solve_mdvrp(
+            depots, customers, num_vehicles_per_depot, vehicle_capacities, demands,
+            strategy, time_limit, matrix_cache, parallel, max_workers, neighbors_k,
+            candidate_mode, post_optimization, on_solution, stop_event, warm_start, plan_store,
+            result_cache, termination, strategy_history, race, road_network, coord_order
+        )
+        # Route trong solver / cache chỉ là chỉ số node, toạ độ gắn 1 lần ở đây
+        with phase('format'):
+            result = format_result(result, list(depots) + list(customers), output_format, coord_order)
+    if instrument:
+        result['instrumentation'] = trace.to_dict()
+    return result
 
-    solver = MDVRPSolver(depots, customers, num_vehicles_per_depot,
-                         vehicle_capacities, demands)
 
-    if strategy == 'strategy1':
+def _best_result(result, strategy):
+    """Kết quả tốt nhất (với benchmark là kết quả tốt nhất trong các chiến lược)"""
+    if strategy == 'benchmark':
+        return result.get('best')
+    if strategy == 'benchmark_with_2opt':
+        return result.get('best_result')
+    return result
+
+
+def _solve_mdvrp(depots, customers, num_vehicles_per_depot,
+                 vehicle_capacities=None, demands=None,
+                 strategy='benchmark', time_limit=45, matrix_cache=None,
+                 parallel=False, max_workers=None, neighbors_k=None,
+                 candidate_mode='forbid', post_optimization=None,
+                 on_solution=None, stop_event=None, warm_start=None, plan_store=None,
+                 result_cache=None, termination=None, strategy_history=None, race=None,
+                 road_network=None, coord_order='latlng'):
+    """
+    Giải và trả kết quả với route dạng chỉ số node ('nodes'), chưa định dạng cho client.
+    road_network: dùng ma trận đường bộ thay cho Euclidean (None = Euclidean)
+    """
+    if result_cache is not None and not warm_start and on_solution is None and stop_event is None:
+        # parallel / max_workers không đổi bài toán nên không thuộc khoá cache
+        params = {
+            'num_vehicles_per_depot': num_vehicles_per_depot,
+            'vehicle_capacities': vehicle_capacities,
+            'demands': demands,
+            'strategy': strategy,
+            'time_limit': time_limit,
+            'neighbors_k': neighbors_k,
+            'candidate_mode': candidate_mode,
+            'post_optimization': post_optimization,
+            'termination': termination,
+            'race': race,
+            # Kết quả cache giữ route dạng chỉ số node (trước khi định dạng theo output_format)
+            'routes': 'nodes'
+        }
+        if road_network is not None:
+            # Theo dấu vân tay đồ thị: đổi file đường thì kết quả cũ không còn dùng
+            params['distance_metric'] = road_network.metric(coord_order)
+        computed = []
+
+        def compute():
+            computed.append(True)
+            return _solve_mdvrp(
+                depots, customers, num_vehicles_per_depot, vehicle_capacities, demands,
+                strategy, time_limit, matrix_cache, parallel, max_workers, neighbors_k,
+                candidate_mode, post_optimization, plan_store=plan_store, termination=termination,
+                strategy_history=strategy_history, race=race, road_network=road_network,
+                coord_order=coord_order
+            )
+
+        result = result_cache.get_or_compute(result_key(list(depots) + list(customers), params), compute)
+        count('result_cache_misses' if computed else 'result_cache_hits')
+        # Lấy từ cache: vẫn lưu kế hoạch để warm start / /api/viewport/routes/ dùng đúng lời giải vừa trả
+        best = _best_result(result, strategy)
+        if not computed and plan_store is not None and best and best.get('status') == 'success':
+            plan_store.save(plan_from_result(list(depots) + list(customers), best, coord_order))
+        return result
+
+    # Dùng lại ma trận khoảng cách đã cache (nếu có) thay vì tính lại mỗi request
+    distance_matrix = None
+    if road_network is not None:
+        with phase('matrix_build'):
+            distance_matrix = road_network.distance_matrix(list(depots) + list(customers), coord_order, matrix_cache)
+    elif matrix_cache is not None:
+        with phase('matrix_build'):
+            distance_matrix = matrix_cache.get_or_build(list(depots) + list(customers))
+
+    solver = MDVRPSolver(depots, customers, num_vehicles_per_depot,
+                         vehicle_capacities, demands, distance_matrix,
+                         neighbors_k=neighbors_k, candidate_mode=candidate_mode)
+
+    # Lời giải trung gian chỉ báo được từ process hiện tại: benchmark chạy tuần tự khi stream
+    solver.on_solution = on_solution
+    solver.stop_event = stop_event
+    solver.termination = termination
+    if on_solution is not None or stop_event is not None:
+        parallel = False
+
+    plan = None
+    if warm_start is True:
+        plan = (plan_store or get_default_plan_store()).load()
+    elif warm_start:
+        plan = warm_start
+
+    if plan is not None:
+        # Lời giải đầu đã gần tốt: mặc định dừng khi hết cải thiện thay vì chạy hết time_limit
+        if solver.termination is None:
+            solver.termination = warm_start_termination(time_limit)
+        result = solver.strategy_warm_start(plan, time_limit, coord_order)
+    elif strategy == 'strategy1':
         result = solver.strategy_1_cheapest_arc_gls(time_limit)
     elif strategy == 'strategy2':
         result = solver.strategy_2_constrained_sa(time_limit)
     elif strategy == 'strategy3':
         result = solver.strategy_3_nearest_neighbor_tabu(time_limit)
+    elif strategy == 'strategy4':
+        result = solver.strategy_4_depot_decomposition(time_limit, max_workers)
+    elif strategy == 'strategy5':
+        result = solver.strategy_5_ruin_recreate_lns(time_limit)
+    elif strategy == 'auto':
+        result = solver.strategy_auto(time_limit, strategy_history, race, parallel, max_workers)
     elif strategy == 'benchmark':
-        results = solver.benchmark_all_strategies(time_limit)
+        results = solver.benchmark_all_strategies(time_limit, parallel, max_workers)
         result = {
             'status': 'success',
             'strategy': 'BENCHMARK_ALL_3_STRATEGIES',
@@ -479,9 +1099,25 @@ def solve_mdvrp_enhanced(depots, customers, num_vehicles_per_depot,
                         key=lambda x: x['total_distance'])
         }
     elif strategy == 'benchmark_with_2opt':
-        solver.benchmark_with_2opt(time_limit)
+        solver.benchmark_with_2opt(time_limit, parallel, max_workers)
         result = solver.benchmark_results
     else:
         result = {'status': 'error', 'message': 'Unknown strategy'}
 
+    best = _best_result(result, strategy) if plan is None else result
+
+    # Ghi lịch sử benchmark cho strategy='auto' (bỏ qua khi người dùng dừng giữa chừng)
+    if strategy_history is not None and plan is None and strategy in ('benchmark', 'benchmark_with_2opt') \
+            and not (stop_event is not None and stop_event.is_set()):
+        results = result['results'] if strategy == 'benchmark' else result['all_results']
+        strategy_history.record(solver.features(), solver.benchmark_record(results), time_limit)
+
+    # Hậu tối ưu ('2opt', 'inter_route', 'full')
+    if post_optimization and best:
+        solver.post_optimize(best, post_optimization, max_workers)
+
+    # Lưu kế hoạch để lần giải sau có thể warm start
+    if plan_store is not None and best and best.get('status') == 'success':
+        plan_store.save(plan_from_result(solver.all_locations, best, coord_order))
+
     return result
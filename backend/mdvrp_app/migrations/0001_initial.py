@@ -0,0 +1,59 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name='Depot',
+            fields=[
+                ('id', models.CharField(max_length=10, primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=200)),
+                ('address', models.CharField(blank=True, default='', max_length=300)),
+                ('latitude', models.FloatField()),
+                ('longitude', models.FloatField()),
+            ],
+            options={
+                'ordering': ['id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Customer',
+            fields=[
+                ('id', models.CharField(max_length=20, primary_key=True, serialize=False)),
+                ('number', models.PositiveIntegerField(unique=True)),
+                ('name', models.CharField(max_length=200)),
+                ('address', models.CharField(blank=True, default='', max_length=300)),
+                ('phone', models.CharField(blank=True, default='', max_length=30)),
+                ('email', models.CharField(blank=True, default='', max_length=200)),
+                ('latitude', models.FloatField(default=0)),
+                ('longitude', models.FloatField(default=0)),
+            ],
+            options={
+                'ordering': ['number'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Driver',
+            fields=[
+                ('id', models.CharField(max_length=10, primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=200)),
+                ('phone', models.CharField(blank=True, default='', max_length=30)),
+                ('depot_id', models.CharField(db_index=True, max_length=10)),
+            ],
+            options={
+                'ordering': ['id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='IdSequence',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('value', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+    ]
@@ -1,9 +1,49 @@
 from django.db import models
 
 # Create your models here.
+class Depot(models.Model):
+    id = models.CharField(max_length=10, primary_key=True)
+    name = models.CharField(max_length=200)
+    address = models.CharField(max_length=300, blank=True, default="")
+    latitude = models.FloatField()
+    longitude = models.FloatField()
+
+    class Meta:
+        app_label = 'mdvrp_app'
+        ordering = ['id']
+
+
 class Customer(models.Model):
-    name = models.CharField(max_length=100)
-    location = models.CharField(max_length=200)
+    # Mã hiển thị "C0001"; number là phần số, dùng để sắp xếp (thứ tự node trong solver)
+    id = models.CharField(max_length=20, primary_key=True)
+    number = models.PositiveIntegerField(unique=True)
+    name = models.CharField(max_length=200)
+    address = models.CharField(max_length=300, blank=True, default="")
+    phone = models.CharField(max_length=30, blank=True, default="")
+    email = models.CharField(max_length=200, blank=True, default="")
+    latitude = models.FloatField(default=0)
+    longitude = models.FloatField(default=0)
+
+    class Meta:
+        app_label = 'mdvrp_app'
+        ordering = ['number']
+
+
+class Driver(models.Model):
+    id = models.CharField(max_length=10, primary_key=True)
+    name = models.CharField(max_length=200)
+    phone = models.CharField(max_length=30, blank=True, default="")
+    depot_id = models.CharField(max_length=10, db_index=True)
+
+    class Meta:
+        app_label = 'mdvrp_app'
+        ordering = ['id']
+
+
+class IdSequence(models.Model):
+    """Bộ đếm mã tăng dần (vd. mã khách hàng), cấp phát trong transaction"""
+    name = models.CharField(max_length=50, primary_key=True)
+    value = models.PositiveIntegerField(default=0)
 
     class Meta:
-        app_label = 'mdvrp_app'
\ No newline at end of file
+        app_label = 'mdvrp_app'
@@ -1,11 +1,24 @@
 import json
+import logging
 import os
 import re
 import math
-import pandas as pd
 from datetime import datetime
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
+from .matrix_cache import get_default_cache
+from . import importer, store
+from .dataset import get_dataset
+from .geocoding import get_default_geocoder
+
+logger = logging.getLogger(__name__)
+
+# Số dòng tối đa trả về trong added_customers / errors của 1 lần upload
+MAX_REPORTED_ROWS = 1000
+# Số bản ghi tối đa mỗi trang của /api/data/<kind>/?offset=&limit=
+MAX_PAGE_SIZE = 5000
+# Số địa chỉ chưa có trong cache được geocode nền tối đa mỗi lần upload (upstream giới hạn ~1 request/giây)
+GEOCODE_LIMIT_PER_UPLOAD = int(os.environ.get("MDVRP_GEOCODE_LIMIT_PER_UPLOAD", 200))
 
 @csrf_exempt
 def switch_drivers_depot(request):
@@ -24,35 +37,6 @@ def switch_drivers_depot(request):
                     "message": "Thiếu thông tin driver ID!"
                 }, status=400)
 
-            # Đường dẫn đến file drivers.json
-            # Từ backend/mdvrp_app/ops.py lên 2 cấp là backend/, rồi lên 1 cấp nữa là root project
-            base_dir = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
-            drivers_path = os.path.join(base_dir, "data", "drivers.json")
-
-            # Đọc file drivers.json
-            with open(drivers_path, "r", encoding="utf-8") as f:
-                drivers = json.load(f)
-
-            # Tìm 2 drivers cần switch
-            driver1 = None
-            driver2 = None
-            driver1_index = -1
-            driver2_index = -1
-
-            for i, driver in enumerate(drivers):
-                if driver["id"] == driver_id_1:
-                    driver1 = driver
-                    driver1_index = i
-                elif driver["id"] == driver_id_2:
-                    driver2 = driver
-                    driver2_index = i
-
-            if driver1 is None or driver2 is None:
-                return JsonResponse({
-                    "status": "error",
-                    "message": "Không tìm thấy một hoặc cả hai drivers!"
-                }, status=404)
-
             # Kiểm tra 2 drivers khác nhau
             if driver_id_1 == driver_id_2:
                 return JsonResponse({
@@ -60,16 +44,14 @@ def switch_drivers_depot(request):
                     "message": "Vui lòng chọn 2 drivers khác nhau!"
                 }, status=400)
 
-            # Hoán đổi depot_id
-            original_depot1 = driver1["depot_id"]
-            original_depot2 = driver2["depot_id"]
-
-            drivers[driver1_index]["depot_id"] = original_depot2
-            drivers[driver2_index]["depot_id"] = original_depot1
-
-            # Ghi lại file
-            with open(drivers_path, "w", encoding="utf-8") as f:
-                json.dump(drivers, f, ensure_ascii=False, indent=2)
+            # Hoán đổi depot_id trong 1 transaction (tra cứu theo khoá chính)
+            try:
+                original_depot1, original_depot2 = store.swap_driver_depots(driver_id_1, driver_id_2)
+            except store.NotFound:
+                return JsonResponse({
+                    "status": "error",
+                    "message": "Không tìm thấy một hoặc cả hai drivers!"
+                }, status=404)
 
             return JsonResponse({
                 "status": "success",
@@ -102,17 +84,10 @@ def switch_drivers_depot(request):
 def add_customer(request):
     if request.method == "POST":
         try:
-            # Đường dẫn đến file customers.json
-            base_dir = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
-            customers_path = os.path.join(base_dir, "data", "customers.json")
-
-            with open(customers_path, "r", encoding="utf-8") as f:
-                customers = json.load(f)
-            next_id = generate_next_customer_id(customers)
             if request.content_type and 'multipart' in request.content_type:
-                return handle_excel_upload(request, customers, next_id, customers_path)
+                return handle_excel_upload(request)
             else:
-                return handle_manual_input(request, customers, next_id, customers_path)
+                return handle_manual_input(request)
         except Exception as e:
             return JsonResponse({
                 "status": "error",
@@ -122,14 +97,23 @@ def add_customer(request):
         "status": "error",
         "message": "Chỉ chấp nhận phương thức POST"
     }, status=405)
-def generate_next_customer_id(customers):
-    if not customers:
-        return "C0001"
-    last_customer = max(customers, key=lambda x: int(x["id"][1:]))
-    last_id_number = int(last_customer["id"][1:])
-    next_id_number = last_id_number + 1
-    return f"C{next_id_number:04d}"
-def handle_manual_input(request, customers, next_id, customers_path):
+def extend_matrix_cache(new_customers):
+    """
+    Nối hàng/cột của khách hàng mới vào ma trận khoảng cách đã cache
+    (cùng thứ tự toạ độ depots + customers như views.calculate_routes)
+    """
+    try:
+        dataset = get_dataset()
+        customers = dataset.locations("customers")
+        locations = dataset.locations("depots") + customers[:-len(new_customers)]
+        new_locations = [(c["latitude"], c["longitude"]) for c in new_customers]
+        get_default_cache().extend(locations, new_locations)
+    except Exception as e:
+        # Cache chỉ là tối ưu, lỗi ở đây không được làm hỏng request
+        logger.warning("Could not extend the distance matrix cache: %s", e)
+
+
+def handle_manual_input(request):
     try:
         data = json.loads(request.body.decode('utf-8'))
         required_fields = ["name", "address", "phone"]
@@ -139,21 +123,18 @@ def handle_manual_input(request, customers, next_id, customers_path):
                     "status": "error",
                     "message": f"Thiếu thông tin bắt buộc: {field}"
                 }, status=400)
-        new_customer = {
-            "id": next_id,
+        new_customer, = store.add_customers([{
             "name": data["name"],
             "address": data["address"],
             "phone": data["phone"],
             "email": data.get("email", ""),
             "latitude": data.get("latitude", 0),
             "longitude": data.get("longitude", 0)
-        }
-        customers.append(new_customer)
-        with open(customers_path, "w", encoding="utf-8") as f:
-            json.dump(customers, f, ensure_ascii=False, indent=2)
+        }])
+        extend_matrix_cache([new_customer])
         return JsonResponse({
             "status": "success",
-            "message": f"Đã thêm khách hàng {next_id} thành công!",
+            "message": f"Đã thêm khách hàng {new_customer['id']} thành công!",
             "customer": new_customer
         })
     except json.JSONDecodeError:
@@ -161,7 +142,7 @@ def handle_manual_input(request, customers, next_id, customers_path):
             "status": "error",
             "message": "Dữ liệu JSON không hợp lệ"
         }, status=400)
-def handle_excel_upload(request, customers, next_id, customers_path):
+def handle_excel_upload(request):
     try:
         if 'file' not in request.FILES:
             return JsonResponse({
@@ -169,46 +150,57 @@ def handle_excel_upload(request, customers, next_id, customers_path):
                 "message": "Không tìm thấy file Excel"
             }, status=400)
 
-        excel_file = request.FILES['file']
-        if not excel_file.name.endswith(('.xlsx', '.xls')):
+        upload = request.FILES['file']
+        if not upload.name.lower().endswith(importer.SUPPORTED_EXTENSIONS):
             return JsonResponse({
                 "status": "error",
-                "message": "Chỉ chấp nhận file Excel (.xlsx, .xls)"
+                "message": "Chỉ chấp nhận file Excel (.xlsx, .xls) hoặc CSV (.csv)"
             }, status=400)
-        df = pd.read_excel(excel_file)
-        required_columns = ["name", "address", "phone"]
-        missing_columns = [col for col in required_columns if col not in df.columns]
-        if missing_columns:
+
+        try:
+            # Trong request chỉ điền toạ độ đã có trong cache geocoding; các dòng còn thiếu được geocode nền
+            # (upstream ~1 request/giây), geocode=0 để bỏ qua
+            geocoder = get_default_geocoder()
+            result = importer.import_customers(upload, upload.name, geocoder=geocoder, geocode_limit=0)
+        except importer.ImportFormatError as e:
             return JsonResponse({
                 "status": "error",
-                "message": f"Thiếu các cột bắt buộc: {', '.join(missing_columns)}"
+                "message": str(e)
             }, status=400)
 
-        added_customers = []
-        current_id = int(next_id[1:])
-        for index, row in df.iterrows():
-            current_id += 1
-            customer_id = f"C{current_id:04d}"
-            new_customer = {
-                "id": customer_id,
-                "name": str(row["name"]),
-                "address": str(row["address"]),
-                "phone": str(row["phone"]),
-                "email": str(row.get("email", "")),
-                "latitude": float(row.get("latitude", 0)),
-                "longitude": float(row.get("longitude", 0))
-            }
-
-            customers.append(new_customer)
-            added_customers.append(new_customer)
-        with open(customers_path, "w", encoding="utf-8") as f:
-            json.dump(customers, f, ensure_ascii=False, indent=2)
+        added_customers = result["added"]
+        errors = result["errors"]
+        ungeocoded = [c["id"] for c in added_customers if c["latitude"] == 0 and c["longitude"] == 0]
+        geocoding = "off"
+        if not added_customers and errors:
+            return JsonResponse({
+                "status": "error",
+                "message": "Không có dòng hợp lệ nào trong file",
+                "errors": errors[:MAX_REPORTED_ROWS],
+                "error_count": len(errors)
+            }, status=400)
+        if added_customers:
+            extend_matrix_cache(added_customers)
+        if ungeocoded and request.POST.get("geocode", "1") != "0":
+            importer.schedule_geocoding(ungeocoded, geocoder, limit=GEOCODE_LIMIT_PER_UPLOAD)
+            geocoding = "scheduled"
 
         return JsonResponse({
             "status": "success",
-            "message": f"Đã thêm {len(added_customers)} khách hàng từ file Excel thành công!",
-            "added_customers": added_customers,
-            "next_available_id": f"C{current_id + 1:04d}"
+            "message": f"Đã thêm {len(added_customers)} khách hàng từ file thành công!",
+            "added_count": len(added_customers),
+            # File lớn: chỉ trả về một phần danh sách, đầy đủ ở data/customers.json
+            "added_customers": added_customers[:MAX_REPORTED_ROWS],
+            "errors": errors[:MAX_REPORTED_ROWS],
+            "error_count": len(errors),
+            "rows": result["rows"],
+            "geocoded": result["geocoded"],
+            "ungeocoded": result["ungeocoded"],
+            # Khách hàng chưa có toạ độ; "scheduled": đang geocode nền, toạ độ được cập nhật sau
+            "ungeocoded_customers": ungeocoded[:MAX_REPORTED_ROWS],
+            "geocoding": geocoding,
+            "rows_per_second": round(result["rows_per_second"], 1),
+            "next_available_id": store.peek_next_customer_id()
         })
 
     except Exception as e:
@@ -222,11 +214,7 @@ def handle_excel_upload(request, customers, next_id, customers_path):
 def get_next_customer_id(request):
     if request.method == "GET":
         try:
-            base_dir = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
-            customers_path = os.path.join(base_dir, "data", "customers.json")
-            with open(customers_path, "r", encoding="utf-8") as f:
-                customers = json.load(f)
-            next_id = generate_next_customer_id(customers)
+            next_id = store.peek_next_customer_id()
             return JsonResponse({
                 "status": "success",
                 "next_id": next_id
@@ -240,4 +228,48 @@ def get_next_customer_id(request):
     return JsonResponse({
         "status": "error",
         "message": "Chỉ chấp nhận phương thức GET"
-    }, status=405)
\ No newline at end of file
+    }, status=405)
+
+@csrf_exempt
+def export_data(request, kind):
+    """
+    Xuất depots / customers / drivers từ database dưới dạng JSON (cùng định dạng data/*.json).
+    ?offset=&limit=: chỉ 1 trang, trả về {"status", "total", "offset", "records"} (limit tối đa MAX_PAGE_SIZE)
+    """
+    if request.method == "GET":
+        if kind not in store.EXPORT_FIELDS:
+            return JsonResponse({
+                "status": "error",
+                "message": f"Không có dữ liệu: {kind}"
+            }, status=404)
+        page = None
+        if "limit" in request.GET:
+            try:
+                page = (max(int(request.GET.get("offset", 0)), 0),
+                        min(max(int(request.GET["limit"]), 1), MAX_PAGE_SIZE))
+            except ValueError:
+                return JsonResponse({
+                    "status": "error",
+                    "message": "offset / limit phải là số nguyên"
+                }, status=400)
+        try:
+            if page is not None:
+                total, records = store.page_records(kind, *page)
+                return JsonResponse({
+                    "status": "success",
+                    "total": total,
+                    "offset": page[0],
+                    "records": records
+                }, json_dumps_params={"ensure_ascii": False})
+            return JsonResponse(store.export_records(kind), safe=False,
+                                json_dumps_params={"ensure_ascii": False})
+        except Exception as e:
+            return JsonResponse({
+                "status": "error",
+                "message": f"Lỗi: {str(e)}"
+            }, status=500)
+
+    return JsonResponse({
+        "status": "error",
+        "message": "Chỉ chấp nhận phương thức GET"
+    }, status=405)
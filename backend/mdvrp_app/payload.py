@@ -0,0 +1,156 @@
+"""
+Định dạng và mã hoá kết quả solver trả về client
+- Bên trong solver mỗi route chỉ giữ danh sách chỉ số node ('nodes'); toạ độ được gắn ở đây, 1 lần, khi trả về
+- format_result: "full" (mặc định, như cũ: mỗi điểm dừng là {"id","lat","lng"}),
+  "compact" (route là mảng chỉ số node + 1 bảng toạ độ "locations" dùng chung),
+  "polyline" (route là mảng chỉ số node + chuỗi encoded polyline, luôn theo (lat, lng) như chuẩn của Google)
+- dumps: dùng orjson nếu có (nhanh hơn json chuẩn nhiều lần), không có thì quay về json
+- encode_body: nén gzip khi client chấp nhận và body đủ lớn
+"""
+import gzip
+import json
+
+import numpy as np
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+OUTPUT_FORMATS = ('full', 'compact', 'polyline')
+# Các khoá chứa danh sách route / kết quả con trong kết quả solver (kể cả benchmark)
+ROUTE_KEYS = ('routes', '2opt_routes')
+NESTED_LIST_KEYS = ('results', 'all_results')
+NESTED_KEYS = ('best', 'best_result')
+# Độ chính xác của encoded polyline (5 chữ số thập phân ~ 1m, như Google)
+POLYLINE_PRECISION = 5
+# Body nhỏ hơn ngưỡng này (byte) thì không nén
+GZIP_MIN_BYTES = 1024
+GZIP_LEVEL = 5
+
+
+def encode_polylines(coords, paths, precision=POLYLINE_PRECISION):
+    """
+    Encoded polyline (thuật toán của Google) cho nhiều đường đi cùng lúc, giữ nguyên thứ tự toạ độ đầu vào.
+    coords: mảng toạ độ (n, 2); paths: danh sách các dãy chỉ số vào coords. Trả về list chuỗi.
+    """
+    lengths = np.fromiter((len(path) for path in paths), dtype=np.intp, count=len(paths))
+    if not lengths.sum():
+        return [''] * len(paths)
+    points = np.asarray(coords, dtype=np.float64)[np.fromiter(
+        (node for path in paths for node in path), dtype=np.intp, count=int(lengths.sum()))]
+    scaled = np.round(points * 10 ** precision).astype(np.int64)
+    deltas = np.diff(scaled, axis=0, prepend=np.zeros((1, 2), dtype=np.int64))
+    # Mỗi đường đi bắt đầu lại từ toạ độ tuyệt đối
+    starts = np.cumsum(lengths) - lengths
+    starts = starts[lengths > 0]
+    deltas[starts] = scaled[starts]
+    values = deltas.ravel()
+    values = np.where(values < 0, ~(values << 1), values << 1)
+
+    # Mỗi giá trị tách thành các khối 5 bit (tối đa 7 khối với int 32 bit), khối nào chưa phải cuối thì bật bit 0x20
+    shifts = np.arange(7, dtype=np.int64) * 5
+    chunks = (values[:, None] >> shifts) & 0x1F
+    num_chunks = 1 + ((values[:, None] >> shifts[1:]) > 0).sum(axis=1)
+    positions = np.arange(7)
+    chunks = np.where(positions < num_chunks[:, None] - 1, chunks | 0x20, chunks) + 63
+    text = chunks[positions < num_chunks[:, None]].astype(np.uint8).tobytes().decode('ascii')
+
+    # Số ký tự của từng đường đi = tổng số khối của 2 x số điểm giá trị thuộc đường đi đó
+    value_ends = np.cumsum(lengths * 2)
+    char_ends = np.concatenate([[0], np.cumsum(num_chunks)])[value_ends].tolist()
+    char_starts = [0] + char_ends[:-1]
+    return [text[a:b] for a, b in zip(char_starts, char_ends)]
+
+
+def encode_polyline(coords, precision=POLYLINE_PRECISION):
+    """Encoded polyline cho 1 dãy toạ độ (n, 2)"""
+    coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+    return encode_polylines(coords, [range(len(coords))], precision)[0]
+
+
+def _format_routes(routes, locations, output_format, coords):
+    polylines = encode_polylines(coords, [route['nodes'] for route in routes]) if output_format == 'polyline' else None
+    formatted_routes = []
+    for i, route in enumerate(routes):
+        formatted = {}
+        for key, value in route.items():
+            if key != 'nodes':
+                formatted[key] = value
+            elif output_format == 'full':
+                formatted['route'] = [{"id": node, "lat": locations[node][0], "lng": locations[node][1]}
+                                      for node in value]
+            else:
+                formatted['nodes'] = value
+                if polylines is not None:
+                    formatted['polyline'] = polylines[i]
+        formatted_routes.append(formatted)
+    return formatted_routes
+
+
+def _format(result, locations, output_format, coords, seen):
+    # 'best' của benchmark là cùng 1 object với 1 phần tử trong 'results': chỉ định dạng 1 lần
+    if id(result) in seen:
+        return seen[id(result)]
+    formatted = dict(result)
+    for key in ROUTE_KEYS:
+        if isinstance(result.get(key), list):
+            formatted[key] = _format_routes(result[key], locations, output_format, coords)
+    for key in NESTED_LIST_KEYS:
+        if isinstance(result.get(key), list):
+            formatted[key] = [_format(item, locations, output_format, coords, seen) if isinstance(item, dict) else item
+                              for item in result[key]]
+    for key in NESTED_KEYS:
+        if isinstance(result.get(key), dict):
+            formatted[key] = _format(result[key], locations, output_format, coords, seen)
+    seen[id(result)] = formatted
+    return formatted
+
+
+def format_result(result, locations, output_format='full', coord_order='latlng'):
+    """
+    Kết quả solver (route dạng 'nodes') -> kết quả trả về client theo output_format.
+    locations: toạ độ theo chỉ số node (depot trước rồi khách hàng), thứ tự coord_order ('latlng' hoặc 'lnglat');
+    "full" / "compact" giữ nguyên thứ tự toạ độ đầu vào, "polyline" luôn mã hoá (lat, lng).
+    """
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown output format '{output_format}', expected one of {', '.join(OUTPUT_FORMATS)}")
+    locations = [tuple(location) for location in locations]
+    coords = None
+    if output_format == 'polyline':
+        coords = np.asarray(locations, dtype=np.float64).reshape(-1, 2)
+        if coord_order == 'lnglat':
+            coords = coords[:, ::-1]
+    formatted = _format(result, locations, output_format, coords, {})
+    if output_format != 'full':
+        formatted['format'] = output_format
+    if output_format == 'compact':
+        formatted['locations'] = [list(location) for location in locations]
+    return formatted
+
+
+def _json_default(value):
+    # Số kiểu numpy (np.float32, np.int64...) trong kết quả solver
+    if hasattr(value, 'item'):
+        return value.item()
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+
+def dumps(data):
+    """JSON (bytes) của data; orjson nếu có"""
+    if orjson is not None:
+        return orjson.dumps(data, default=_json_default,
+                            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, default=_json_default, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def accepts_gzip(accept_encoding):
+    return 'gzip' in (accept_encoding or '').lower()
+
+
+def encode_body(data, accept_encoding=None):
+    """(body, content_encoding): JSON của data, nén gzip nếu client chấp nhận và body >= GZIP_MIN_BYTES"""
+    body = dumps(data)
+    if accepts_gzip(accept_encoding) and len(body) >= GZIP_MIN_BYTES:
+        return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0), 'gzip'
+    return body, None
@@ -0,0 +1,239 @@
+"""
+Cache kết quả solve_mdvrp_enhanced, khoá theo dấu vân tay instance + tham số tìm kiếm
+- Tầng bộ nhớ: LRU theo số entry, mỗi entry có TTL
+- Tầng đĩa (tuỳ chọn): 1 file pickle / kết quả, dùng chung giữa các process (job worker),
+  giới hạn dung lượng, xoá theo LRU (mtime)
+- Tự xoá toàn bộ cache khi các file data/*.json thay đổi (mtime / size)
+- Single-flight: nhiều request giống nhau cùng lúc chỉ chạy 1 lần giải, các request khác chờ kết quả
+"""
+import copy
+import glob
+import hashlib
+import json
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+try:
+    from .matrix_cache import fingerprint
+except ImportError:
+    from matrix_cache import fingerprint
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "data")
+
+DEFAULT_TTL = int(os.environ.get("MDVRP_RESULT_CACHE_TTL", 900))
+DEFAULT_MAX_ENTRIES = int(os.environ.get("MDVRP_RESULT_CACHE_ENTRIES", 64))
+# Đặt MDVRP_RESULT_CACHE_DIR="" để tắt tầng đĩa
+DEFAULT_CACHE_DIR = os.environ.get(
+    "MDVRP_RESULT_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "results")
+)
+DEFAULT_MAX_BYTES = int(os.environ.get("MDVRP_RESULT_CACHE_MAX_BYTES", 256 * 1024 ** 2))
+
+
+def result_key(locations, params):
+    """Khoá cache: dấu vân tay toạ độ + tham số (sắp theo tên) của lần giải"""
+    digest = hashlib.sha256()
+    digest.update(fingerprint(locations).encode("utf-8"))
+    digest.update(json.dumps(params, sort_keys=True, default=str).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class ResultCache:
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, ttl=DEFAULT_TTL, cache_dir=DEFAULT_CACHE_DIR,
+                 max_bytes=DEFAULT_MAX_BYTES, watch=os.path.join(DATA_DIR, "*.json")):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.cache_dir = cache_dir or None
+        self.max_bytes = max_bytes
+        self.watch = watch
+        self.hits = 0
+        self.misses = 0
+        self.deduplicated = 0
+        self._memory = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._data_signature = self._signature()
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+    # ------------------------------------------------------------------
+    def _signature(self):
+        """(tên file, mtime, size) của các file dữ liệu đang theo dõi"""
+        if not self.watch:
+            return None
+        signature = []
+        for path in sorted(glob.glob(self.watch)):
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            signature.append((os.path.basename(path), stat.st_mtime_ns, stat.st_size))
+        return tuple(signature)
+
+    def _check_data(self):
+        """Dữ liệu nguồn đã đổi thì xoá toàn bộ cache (gọi khi đang giữ lock)"""
+        signature = self._signature()
+        if signature != self._data_signature:
+            self._data_signature = signature
+            self._clear_locked()
+
+    def _clear_locked(self):
+        self._memory.clear()
+        if self.cache_dir:
+            for path in glob.glob(os.path.join(self.cache_dir, "*.pkl")):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+    def clear(self):
+        with self._lock:
+            self._clear_locked()
+
+    # ------------------------------------------------------------------
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.pkl")
+
+    def _load_disk(self, key):
+        if not self.cache_dir:
+            return None
+        path = self._path(key)
+        try:
+            if time.time() - os.path.getmtime(path) > self.ttl:
+                os.remove(path)
+                return None
+            with open(path, "rb") as f:
+                stored_at, signature, result = pickle.load(f)
+        except (OSError, EOFError, ValueError, pickle.UnpicklingError):
+            return None
+        # Process khác có thể đã ghi entry từ phiên bản dữ liệu cũ
+        if signature != self._data_signature:
+            return None
+        return stored_at, result
+
+    def _store_disk(self, key, stored_at, result):
+        """Ghi file tạm rồi os.replace để process khác không đọc phải file dở dang"""
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump((stored_at, self._data_signature, result), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".pkl"):
+                try:
+                    stat = os.stat(os.path.join(self.cache_dir, name))
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, os.path.join(self.cache_dir, name)))
+        total = sum(size for _, size, _ in entries)
+        for _, size, old_path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(old_path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def _get_locked(self, key):
+        entry = self._memory.get(key)
+        if entry is not None:
+            if time.time() - entry[0] <= self.ttl:
+                self._memory.move_to_end(key)
+                return entry[1]
+            del self._memory[key]
+
+        entry = self._load_disk(key)
+        if entry is not None and time.time() - entry[0] <= self.ttl:
+            self._put_memory(key, *entry)
+            return entry[1]
+        return None
+
+    def _put_memory(self, key, stored_at, result):
+        self._memory[key] = (stored_at, result)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    # ------------------------------------------------------------------
+    def get(self, key):
+        """Kết quả đã cache (bản sao), None nếu chưa có hoặc đã hết hạn"""
+        with self._lock:
+            self._check_data()
+            result = self._get_locked(key)
+        return copy.deepcopy(result) if result is not None else None
+
+    def put(self, key, result):
+        stored_at = time.time()
+        with self._lock:
+            self._put_memory(key, stored_at, result)
+        if self.cache_dir:
+            self._store_disk(key, stored_at, result)
+
+    def get_or_compute(self, key, compute):
+        """
+        Lấy kết quả từ cache, chưa có thì gọi compute().
+        Request trùng khoá đang được giải thì chờ kết quả của lần giải đó thay vì giải lại.
+        Chỉ cache kết quả có status 'success'.
+        """
+        with self._lock:
+            self._check_data()
+            result = self._get_locked(key)
+            if result is not None:
+                self.hits += 1
+                return copy.deepcopy(result)
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+                self.misses += 1
+            else:
+                self.deduplicated += 1
+
+        if not owner:
+            return copy.deepcopy(future.result())
+
+        try:
+            result = compute()
+            if isinstance(result, dict) and result.get('status') == 'success':
+                self.put(key, result)
+            future.set_result(result)
+            return copy.deepcopy(result)
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'deduplicated': self.deduplicated,
+                'entries': len(self._memory),
+                'inflight': len(self._inflight),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                'disk': self.cache_dir is not None
+            }
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_result_cache():
+    """ResultCache dùng chung trong process (cấu hình qua biến môi trường MDVRP_RESULT_CACHE_*)"""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ResultCache()
+        return _default_cache
@@ -0,0 +1,418 @@
+"""
+Ma trận khoảng cách theo mạng đường bộ offline, thay cho Euclidean trên độ kinh / vĩ
+- RoadNetwork.load: đồ thị đường từ file cạnh CSV (cột from_lat, from_lng, to_lat, to_lng, tuỳ chọn length
+  theo mét và oneway; node là các toạ độ phân biệt - vd. cạnh của bản trích OSM đã tiền xử lý) hoặc file .npz
+  đã lưu bằng save()
+- Snap: mỗi depot / khách hàng gắn vào node gần nhất thuộc thành phần liên thông mạnh lớn nhất (GridIndex trên toạ độ
+  chiếu phẳng theo mét); đoạn từ điểm tới node được cộng vào 2 đầu
+- Đường đi ngắn nhất nhiều-nhiều bằng contraction hierarchies (ContractionHierarchy): tiền xử lý 1 lần cho mỗi
+  đồ thị (lưu trên đĩa), sau đó mỗi ma trận chỉ cần 1 tìm kiếm "đi lên" từ mỗi điểm và ghép theo bucket (NumPy)
+- Ma trận (km, có thể bất đối xứng nếu có đường 1 chiều) được cache trên đĩa qua MatrixCache
+"""
+import hashlib
+import heapq
+import logging
+import math
+import os
+import threading
+import time
+
+import numpy as np
+
+try:
+    from .distance_matrix import DistanceMatrix
+    from .spatial_index import GridIndex
+except ImportError:
+    from distance_matrix import DistanceMatrix
+    from spatial_index import GridIndex
+
+logger = logging.getLogger(__name__)
+
+# File đồ thị mặc định (CSV / .npz), rỗng = chưa cấu hình
+DEFAULT_NETWORK_PATH = os.environ.get("MDVRP_ROAD_NETWORK", "")
+# Nơi lưu hierarchy đã tiền xử lý, theo dấu vân tay đồ thị
+DEFAULT_CACHE_DIR = os.environ.get(
+    "MDVRP_ROAD_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "road_network")
+)
+
+EARTH_RADIUS = 6371008.8
+# Toạ độ node được làm tròn tới chừng này chữ số thập phân khi ghép đầu mút cạnh (~1 cm)
+NODE_DECIMALS = 7
+# Witness search khi contract dừng sau chừng này node (dừng sớm chỉ thêm shortcut thừa, không sai)
+WITNESS_SETTLE_LIMIT = 60
+# Cặp điểm không có đường nối (đường 1 chiều cụt...): dùng khoảng cách đường chim bay x hệ số này
+UNREACHABLE_DETOUR = 2.0
+
+
+def _project(latlng, lat0):
+    """(lat, lng) độ -> (x, y) mét theo phép chiếu equirectangular quanh vĩ độ lat0"""
+    latlng = np.radians(np.asarray(latlng, dtype=np.float64).reshape(-1, 2))
+    return np.column_stack([latlng[:, 1] * math.cos(math.radians(lat0)), latlng[:, 0]]) * EARTH_RADIUS
+
+
+class ContractionHierarchy:
+    """
+    Contraction hierarchies trên đồ thị có hướng: contract lần lượt các node theo độ ưu tiên
+    (edge difference + số láng giềng đã contract, cập nhật lười), thêm shortcut khi không có witness.
+    Kết quả là 2 đồ thị "đi lên" dạng CSR (cạnh tới node hạng cao hơn): xuôi và ngược
+    """
+
+    def __init__(self, up_out, up_in):
+        # (ptr, to, weight) của mỗi đồ thị đi lên
+        self.up_out = up_out
+        self.up_in = up_in
+        self._adjacency = None
+
+    @classmethod
+    def build(cls, num_nodes, edges, lengths):
+        out_adj = [{} for _ in range(num_nodes)]
+        in_adj = [{} for _ in range(num_nodes)]
+        for (u, v), w in zip(edges.tolist(), lengths.tolist()):
+            if u != v and w < out_adj[u].get(v, math.inf):
+                out_adj[u][v] = w
+                in_adj[v][u] = w
+
+        def witness(source, ignore, targets, max_cost):
+            dist = {source: 0.0}
+            heap = [(0.0, source)]
+            remaining = len(targets)
+            settled = 0
+            while heap:
+                d, x = heapq.heappop(heap)
+                if d > dist[x]:
+                    continue
+                if d > max_cost:
+                    break
+                if x in targets:
+                    remaining -= 1
+                settled += 1
+                if not remaining or settled > WITNESS_SETTLE_LIMIT:
+                    break
+                for y, w in out_adj[x].items():
+                    nd = d + w
+                    if y != ignore and nd < dist.get(y, math.inf):
+                        dist[y] = nd
+                        heapq.heappush(heap, (nd, y))
+            return dist
+
+        def shortcuts(v):
+            outs = out_adj[v]
+            found = []
+            for u, wu in in_adj[v].items():
+                targets = {w for w in outs if w != u}
+                if not targets:
+                    continue
+                dist = witness(u, v, targets, wu + max(outs[w] for w in targets))
+                for w in targets:
+                    cost = wu + outs[w]
+                    if dist.get(w, math.inf) > cost:
+                        found.append((u, w, cost))
+            return found
+
+        deleted = [0] * num_nodes
+        contracted = [False] * num_nodes
+        up_out = [None] * num_nodes
+        up_in = [None] * num_nodes
+
+        def priority(v, found):
+            return len(found) - len(in_adj[v]) - len(out_adj[v]) + deleted[v]
+
+        heap = [(priority(v, shortcuts(v)), v) for v in range(num_nodes)]
+        heapq.heapify(heap)
+        while heap:
+            _, v = heapq.heappop(heap)
+            if contracted[v]:
+                continue
+            found = shortcuts(v)
+            current = priority(v, found)
+            if heap and current > heap[0][0]:
+                heapq.heappush(heap, (current, v))
+                continue
+
+            # Láng giềng còn lại đều có hạng cao hơn v: cạnh hiện tại của v là cạnh đi lên
+            up_out[v] = list(out_adj[v].items())
+            up_in[v] = list(in_adj[v].items())
+            for u in in_adj[v]:
+                del out_adj[u][v]
+                deleted[u] += 1
+            for w in out_adj[v]:
+                del in_adj[w][v]
+                deleted[w] += 1
+            for u, w, cost in found:
+                if cost < out_adj[u].get(w, math.inf):
+                    out_adj[u][w] = cost
+                    in_adj[w][u] = cost
+            out_adj[v] = in_adj[v] = None
+            contracted[v] = True
+        return cls(cls._to_csr(up_out), cls._to_csr(up_in))
+
+    @staticmethod
+    def _to_csr(adjacency):
+        counts = np.fromiter((len(items) for items in adjacency), dtype=np.int64, count=len(adjacency))
+        ptr = np.concatenate([[0], np.cumsum(counts)])
+        to = np.fromiter((y for items in adjacency for y, _ in items), dtype=np.int64, count=int(ptr[-1]))
+        weight = np.fromiter((w for items in adjacency for _, w in items), dtype=np.float64, count=int(ptr[-1]))
+        return ptr, to, weight
+
+    def to_arrays(self):
+        return {'up_out_ptr': self.up_out[0], 'up_out_to': self.up_out[1], 'up_out_weight': self.up_out[2],
+                'up_in_ptr': self.up_in[0], 'up_in_to': self.up_in[1], 'up_in_weight': self.up_in[2]}
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        return cls((arrays['up_out_ptr'], arrays['up_out_to'], arrays['up_out_weight']),
+                   (arrays['up_in_ptr'], arrays['up_in_to'], arrays['up_in_weight']))
+
+    def _lists(self, csr):
+        ptr, to, weight = csr
+        ptr, to, weight = ptr.tolist(), to.tolist(), weight.tolist()
+        return [list(zip(to[a:b], weight[a:b])) for a, b in zip(ptr, ptr[1:])]
+
+    @staticmethod
+    def _upward(start, adjacency, reverse):
+        """
+        Dijkstra chỉ đi theo cạnh đi lên: (các node đã settle, khoảng cách tương ứng).
+        Stall-on-demand: node x tới được rẻ hơn qua 1 node hạng cao hơn (cạnh ngược trong reverse)
+        thì khoảng cách tới x không phải ngắn nhất - bỏ qua x, không mở rộng từ x
+        """
+        dist = {start: 0.0}
+        heap = [(0.0, start)]
+        nodes, dists = [], []
+        while heap:
+            d, x = heapq.heappop(heap)
+            if d > dist[x]:
+                continue
+            for y, w in reverse[x]:
+                if dist.get(y, math.inf) + w < d:
+                    break
+            else:
+                nodes.append(x)
+                dists.append(d)
+                for y, w in adjacency[x]:
+                    nd = d + w
+                    if nd < dist.get(y, math.inf):
+                        dist[y] = nd
+                        heapq.heappush(heap, (nd, y))
+        return nodes, dists
+
+    def many_to_many(self, sources, targets):
+        """Ma trận (len(sources), len(targets)) độ dài đường đi ngắn nhất, inf nếu không có đường"""
+        if self._adjacency is None:
+            self._adjacency = (self._lists(self.up_out), self._lists(self.up_in))
+        forward, backward = self._adjacency
+
+        # Bucket của mỗi node: các nguồn (tìm kiếm xuôi) / đích (tìm kiếm ngược) đi lên tới được node đó
+        buckets = {}
+        for i, source in enumerate(sources):
+            for node, d in zip(*self._upward(source, forward, backward)):
+                entry = buckets.get(node)
+                if entry is None:
+                    entry = buckets[node] = ([], [], [], [])
+                entry[0].append(i)
+                entry[1].append(d)
+        result = np.full((len(sources), len(targets)), np.inf)
+        for j, target in enumerate(targets):
+            for node, d in zip(*self._upward(target, backward, forward)):
+                entry = buckets.get(node)
+                if entry is not None:
+                    entry[2].append(j)
+                    entry[3].append(d)
+
+        # Ghép theo từng node gặp nhau: min-plus giữa các nguồn và đích của node (vectorized)
+        for rows, row_dist, cols, col_dist in buckets.values():
+            if not cols:
+                continue
+            rows, cols = np.asarray(rows), np.asarray(cols)
+            block = np.add.outer(np.asarray(row_dist), np.asarray(col_dist))
+            index = np.ix_(rows, cols)
+            result[index] = np.minimum(result[index], block)
+        return result
+
+
+class RoadNetwork:
+    def __init__(self, coords, edges, lengths, cache_dir=DEFAULT_CACHE_DIR):
+        """
+        coords: (n, 2) (lat, lng) của node; edges: (m, 2) cạnh có hướng (from, to); lengths: (m,) mét
+        """
+        self.coords = np.ascontiguousarray(np.asarray(coords, dtype=np.float64).reshape(-1, 2))
+        self.edges = np.ascontiguousarray(np.asarray(edges, dtype=np.int64).reshape(-1, 2))
+        self.lengths = np.ascontiguousarray(np.asarray(lengths, dtype=np.float64).reshape(-1))
+        self.num_nodes = len(self.coords)
+        self.cache_dir = cache_dir
+
+        digest = hashlib.sha256()
+        for array in (self.coords, self.edges, self.lengths):
+            digest.update(array.tobytes())
+        self.fingerprint = digest.hexdigest()
+
+        self.lat0 = float(self.coords[:, 0].mean()) if self.num_nodes else 0.0
+        self._hierarchy = None
+        self._index = None
+        self._component = None
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Đọc / ghi
+    # ------------------------------------------------------------------
+    @classmethod
+    def from_csv(cls, path, **kwargs):
+        """
+        File cạnh CSV có header: from_lat, from_lng, to_lat, to_lng, [length (mét)], [oneway (0/1)].
+        Thiếu length thì dùng khoảng cách đường chim bay; oneway = 0 (mặc định) tạo cạnh 2 chiều
+        """
+        table = np.genfromtxt(path, delimiter=",", names=True, dtype=np.float64, encoding="utf-8")
+        table = np.atleast_1d(table)
+        names = table.dtype.names
+        missing = {"from_lat", "from_lng", "to_lat", "to_lng"} - set(names)
+        if missing:
+            raise ValueError(f"Road network CSV is missing column(s): {', '.join(sorted(missing))}")
+
+        ends = np.concatenate([np.column_stack([table["from_lat"], table["from_lng"]]),
+                               np.column_stack([table["to_lat"], table["to_lng"]])])
+        coords, inverse = np.unique(np.round(ends, NODE_DECIMALS), axis=0, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        edges = np.column_stack([inverse[:len(table)], inverse[len(table):]])
+        if "length" in names:
+            lengths = table["length"]
+        else:
+            points = _project(coords, float(coords[:, 0].mean()))
+            lengths = np.hypot(*(points[edges[:, 0]] - points[edges[:, 1]]).T)
+
+        oneway = table["oneway"].astype(bool) if "oneway" in names else np.zeros(len(table), dtype=bool)
+        edges = np.concatenate([edges, edges[~oneway][:, ::-1]])
+        lengths = np.concatenate([lengths, lengths[~oneway]])
+        return cls(coords, edges, lengths, **kwargs)
+
+    @classmethod
+    def load(cls, path, **kwargs):
+        """Đồ thị từ .npz (save) hoặc CSV"""
+        if path.endswith(".npz"):
+            with np.load(path) as data:
+                return cls(data["coords"], data["edges"], data["lengths"], **kwargs)
+        return cls.from_csv(path, **kwargs)
+
+    def save(self, path):
+        """Lưu đồ thị dạng .npz (đọc nhanh hơn CSV)"""
+        np.savez(path, coords=self.coords, edges=self.edges, lengths=self.lengths)
+
+    # ------------------------------------------------------------------
+    # Hierarchy (tiền xử lý, cache trên đĩa)
+    # ------------------------------------------------------------------
+    def _hierarchy_path(self):
+        return os.path.join(self.cache_dir, f"ch_{self.fingerprint}.npz") if self.cache_dir else None
+
+    @property
+    def hierarchy(self):
+        with self._lock:
+            if self._hierarchy is None:
+                path = self._hierarchy_path()
+                if path and os.path.exists(path):
+                    with np.load(path) as data:
+                        self._hierarchy = ContractionHierarchy.from_arrays(dict(data))
+                else:
+                    start = time.time()
+                    self._hierarchy = ContractionHierarchy.build(self.num_nodes, self.edges, self.lengths)
+                    logger.info("Road network: contraction hierarchy for %d nodes built in %.1fs",
+                                self.num_nodes, time.time() - start)
+                    if path:
+                        os.makedirs(self.cache_dir, exist_ok=True)
+                        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp.npz"
+                        np.savez(tmp_path, **self._hierarchy.to_arrays())
+                        os.replace(tmp_path, path)
+            return self._hierarchy
+
+    # ------------------------------------------------------------------
+    # Snap
+    # ------------------------------------------------------------------
+    def _reachable(self, start, reverse=False):
+        """Mảng bool các node đi tới được từ start (reverse: các node đi tới được start), BFS theo tầng"""
+        src, dst = (self.edges[:, 1], self.edges[:, 0]) if reverse else (self.edges[:, 0], self.edges[:, 1])
+        ptr = np.concatenate([[0], np.cumsum(np.bincount(src, minlength=self.num_nodes))])
+        to = dst[np.argsort(src, kind="stable")]
+        seen = np.zeros(self.num_nodes, dtype=bool)
+        seen[start] = True
+        frontier = np.array([start])
+        while len(frontier):
+            counts = ptr[frontier + 1] - ptr[frontier]
+            index = np.repeat(ptr[frontier] - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+            frontier = np.unique(to[index])
+            frontier = frontier[~seen[frontier]]
+            seen[frontier] = True
+        return seen
+
+    def _largest_component(self, attempts=5):
+        """
+        Chỉ số các node thuộc thành phần liên thông mạnh lớn nhất (đi được 2 chiều giữa mọi cặp node):
+        giao của tập đi tới được và tập tới được từ 1 node hạt giống, thử vài hạt giống có bậc cao nhất
+        """
+        degree = np.bincount(self.edges.ravel(), minlength=self.num_nodes)
+        best = np.empty(0, dtype=np.int64)
+        for seed in np.argsort(-degree, kind="stable")[:attempts]:
+            if len(best) and best[np.searchsorted(best, seed) % len(best)] == seed:
+                continue
+            component = np.flatnonzero(self._reachable(seed) & self._reachable(seed, reverse=True))
+            if len(component) > len(best):
+                best = component
+            if len(best) * 2 > self.num_nodes:
+                break
+        return best
+
+    def snap(self, locations, order="latlng"):
+        """(node gần nhất, khoảng cách tới node theo mét) của từng toạ độ; order: 'latlng' hoặc 'lnglat'"""
+        points = np.asarray(locations, dtype=np.float64).reshape(-1, 2)
+        if order == "lnglat":
+            points = points[:, ::-1]
+        with self._lock:
+            if self._index is None:
+                self._component = self._largest_component()
+                self._index = GridIndex(_project(self.coords[self._component], self.lat0))
+        nearest, offsets = self._index.nearest(_project(points, self.lat0))
+        return self._component[nearest], offsets
+
+    # ------------------------------------------------------------------
+    # Ma trận
+    # ------------------------------------------------------------------
+    def build_matrix(self, locations, order="latlng"):
+        """DistanceMatrix (km) giữa các toạ độ theo đường bộ"""
+        nodes, offsets = self.snap(locations, order)
+        unique_nodes, inverse = np.unique(nodes, return_inverse=True)
+        between = self.hierarchy.many_to_many(unique_nodes.tolist(), unique_nodes.tolist())
+        meters = offsets[:, None] + between[np.ix_(inverse, inverse)] + offsets[None, :]
+
+        unreachable = ~np.isfinite(meters)
+        if unreachable.any():
+            points = np.asarray(locations, dtype=np.float64).reshape(-1, 2)
+            projected = _project(points[:, ::-1] if order == "lnglat" else points, self.lat0)
+            rows, cols = np.nonzero(unreachable)
+            meters[rows, cols] = UNREACHABLE_DETOUR * np.hypot(*(projected[rows] - projected[cols]).T)
+            logger.warning("Road network: %d location pairs are not connected, using straight-line x %.1f",
+                           len(rows), UNREACHABLE_DETOUR)
+        np.fill_diagonal(meters, 0)
+        return DistanceMatrix.from_array(locations, (meters / 1000).astype(np.float32))
+
+    def distance_matrix(self, locations, order="latlng", matrix_cache=None):
+        """Ma trận theo đường bộ, qua matrix_cache (khoá theo đồ thị + toạ độ) nếu có"""
+        if matrix_cache is None:
+            return self.build_matrix(locations, order)
+        return matrix_cache.get_or_build(locations, self.metric(order),
+                                         builder=lambda points: self.build_matrix(points, order))
+
+    def metric(self, order="latlng"):
+        """Tên metric cho khoá cache (ma trận / kết quả)"""
+        return f"road:{self.fingerprint[:16]}:{order}"
+
+
+_default_network = None
+_default_network_lock = threading.Lock()
+
+
+def get_default_road_network():
+    """RoadNetwork từ MDVRP_ROAD_NETWORK (nạp 1 lần mỗi process); ValueError nếu chưa cấu hình"""
+    global _default_network
+    with _default_network_lock:
+        if _default_network is None:
+            if not DEFAULT_NETWORK_PATH:
+                raise ValueError("Road network is not configured (set MDVRP_ROAD_NETWORK)")
+            _default_network = RoadNetwork.load(DEFAULT_NETWORK_PATH)
+        return _default_network
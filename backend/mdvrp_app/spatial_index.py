@@ -0,0 +1,186 @@
+"""
+Chỉ mục không gian dạng lưới đều (uniform grid) cho danh sách toạ độ
+- Truy vấn k láng giềng gần nhất (kNN) cho toàn bộ điểm theo từng ô lưới (vectorized)
+- Truy vấn theo khung bao (bbox), điểm gần nhất cho toạ độ bất kỳ (snap)
+- Danh sách ứng viên kNN dùng để thu hẹp model routing và local search
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+try:
+    from .matrix_cache import fingerprint
+except ImportError:
+    from matrix_cache import fingerprint
+
+DEFAULT_POINTS_PER_CELL = 4
+MAX_CACHED_INDEXES = 8
+
+
+class GridIndex:
+    def __init__(self, points, points_per_cell=DEFAULT_POINTS_PER_CELL):
+        self.points = np.ascontiguousarray(np.asarray(points, dtype=np.float64).reshape(-1, 2))
+        self.n = len(self.points)
+
+        if self.n:
+            self.origin = self.points.min(axis=0)
+            extent = np.maximum(self.points.max(axis=0) - self.origin, 1e-12)
+        else:
+            self.origin = np.zeros(2)
+            extent = np.ones(2)
+
+        # Số ô theo mỗi chiều sao cho trung bình ~points_per_cell điểm / ô
+        num_cells = max(1, self.n // points_per_cell)
+        self.cell_size = float(max(np.sqrt(extent[0] * extent[1] / num_cells), extent.max() / 1024))
+        self.shape = (np.floor(extent / self.cell_size).astype(np.int64) + 1)
+
+        # Sắp xếp điểm theo ô: cell_start[c]..cell_start[c+1] là các điểm của ô c
+        cells = self._cell_ids(self._cells_of(self.points))
+        self.order = np.argsort(cells, kind="stable")
+        counts = np.bincount(cells, minlength=int(self.shape[0] * self.shape[1]))
+        self.cell_start = np.concatenate([[0], np.cumsum(counts)])
+
+        self._candidates = {}
+
+    def _cells_of(self, points):
+        cells = np.floor((points - self.origin) / self.cell_size).astype(np.int64)
+        return np.clip(cells, 0, self.shape - 1)
+
+    def _cell_ids(self, cells):
+        return cells[:, 0] * self.shape[1] + cells[:, 1]
+
+    def _points_in_cells(self, rows, cols):
+        """Chỉ số các điểm thuộc hình chữ nhật ô [rows] x [cols]"""
+        rows = np.arange(max(rows[0], 0), min(rows[1], self.shape[0] - 1) + 1)
+        cols_lo, cols_hi = max(cols[0], 0), min(cols[1], self.shape[1] - 1)
+        if len(rows) == 0 or cols_lo > cols_hi:
+            return np.empty(0, dtype=np.int64)
+        # Các ô trong cùng 1 hàng nằm liên tiếp trong order
+        starts = self.cell_start[rows * self.shape[1] + cols_lo]
+        stops = self.cell_start[rows * self.shape[1] + cols_hi + 1]
+        return np.concatenate([self.order[a:b] for a, b in zip(starts, stops)])
+
+    def query_bbox(self, min_x, min_y, max_x, max_y):
+        """Chỉ số các điểm nằm trong khung bao [min_x, max_x] x [min_y, max_y]"""
+        if not self.n:
+            return np.empty(0, dtype=np.int64)
+        lo = np.floor((np.array([min_x, min_y]) - self.origin) / self.cell_size).astype(np.int64)
+        hi = np.floor((np.array([max_x, max_y]) - self.origin) / self.cell_size).astype(np.int64)
+        candidates = self._points_in_cells((lo[0], hi[0]), (lo[1], hi[1]))
+        pts = self.points[candidates]
+        inside = ((pts[:, 0] >= min_x) & (pts[:, 0] <= max_x)
+                  & (pts[:, 1] >= min_y) & (pts[:, 1] <= max_y))
+        return np.sort(candidates[inside])
+
+    def knn(self, k, exclude_self=True):
+        """
+        k láng giềng gần nhất của mọi điểm, mảng (n, k) sắp theo khoảng cách tăng dần.
+        Xử lý theo từng ô lưới: mở rộng vòng ô xung quanh cho tới khi
+        khoảng cách thứ k của mọi điểm trong ô <= bán kính đã quét.
+        """
+        k = min(k, self.n - 1 if exclude_self else self.n)
+        result = np.empty((self.n, max(k, 0)), dtype=np.int64)
+        if k <= 0:
+            return result
+
+        cells = self._cells_of(self.points)
+        cell_ids = self._cell_ids(cells)
+        for cell_id in np.unique(cell_ids):
+            members = self.order[self.cell_start[cell_id]:self.cell_start[cell_id + 1]]
+            row, col = divmod(int(cell_id), int(self.shape[1]))
+            ring = 1
+            while True:
+                candidates = self._points_in_cells((row - ring, row + ring), (col - ring, col + ring))
+                covers_all = (row - ring <= 0 and col - ring <= 0
+                              and row + ring >= self.shape[0] - 1 and col + ring >= self.shape[1] - 1)
+                if len(candidates) > k or covers_all:
+                    diff = self.points[members][:, None, :] - self.points[candidates][None, :, :]
+                    dist = np.hypot(diff[..., 0], diff[..., 1])
+                    if exclude_self:
+                        dist[members[:, None] == candidates[None, :]] = np.inf
+                    nearest = np.argpartition(dist, k - 1, axis=1)[:, :k]
+                    kth = np.take_along_axis(dist, nearest, axis=1).max(axis=1)
+                    if covers_all or kth.max() <= ring * self.cell_size:
+                        order = np.argsort(np.take_along_axis(dist, nearest, axis=1), axis=1)
+                        result[members] = candidates[np.take_along_axis(nearest, order, axis=1)]
+                        break
+                ring += 1
+        return result
+
+    def nearest(self, points):
+        """
+        (chỉ số, khoảng cách) của điểm gần nhất trong index cho từng điểm truy vấn (không cần thuộc index).
+        Giống knn: mở rộng vòng ô quanh ô của điểm truy vấn cho tới khi khoảng cách gần nhất
+        <= khoảng cách từ điểm truy vấn tới biên vùng đã quét (hoặc đã quét hết lưới)
+        """
+        query = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        indices = np.full(len(query), -1, dtype=np.int64)
+        distances = np.full(len(query), np.inf)
+        if not self.n or not len(query):
+            return indices, distances
+
+        cell_ids = self._cell_ids(self._cells_of(query))
+        order = np.argsort(cell_ids, kind="stable")
+        unique_ids, starts = np.unique(cell_ids[order], return_index=True)
+        for cell_id, members in zip(unique_ids, np.split(order, starts[1:])):
+            row, col = divmod(int(cell_id), int(self.shape[1]))
+            ring = 1
+            while True:
+                lo = np.array([row - ring, col - ring])
+                hi = np.array([row + ring, col + ring])
+                candidates = self._points_in_cells((lo[0], hi[0]), (lo[1], hi[1]))
+                covers_all = (lo <= 0).all() and (hi >= self.shape - 1).all()
+                if len(candidates) or covers_all:
+                    diff = query[members][:, None, :] - self.points[candidates][None, :, :]
+                    dist = np.hypot(diff[..., 0], diff[..., 1])
+                    best = dist.argmin(axis=1)
+                    best_dist = dist[np.arange(len(members)), best]
+                    # Phía nào còn ô chưa quét thì điểm ngoài vùng cách điểm truy vấn ít nhất tới biên phía đó
+                    lo_edge = self.origin + np.maximum(lo, 0) * self.cell_size
+                    hi_edge = self.origin + (np.minimum(hi, self.shape - 1) + 1) * self.cell_size
+                    margin = np.concatenate([
+                        np.where(lo > 0, query[members] - lo_edge, np.inf),
+                        np.where(hi < self.shape - 1, hi_edge - query[members], np.inf)], axis=1).min(axis=1)
+                    if covers_all or (best_dist <= margin).all():
+                        indices[members] = candidates[best]
+                        distances[members] = best_dist
+                        break
+                ring += 1
+        return indices, distances
+
+    def candidates(self, k):
+        """Danh sách ứng viên kNN (cache theo k), mảng (n, k)"""
+        if k not in self._candidates:
+            self._candidates[k] = self.knn(k)
+        return self._candidates[k]
+
+    def candidate_mask(self, k):
+        """Ma trận bool (n, n): cung i-j là ứng viên nếu j thuộc kNN của i hoặc ngược lại"""
+        neighbors = self.candidates(k)
+        mask = np.zeros((self.n, self.n), dtype=bool)
+        rows = np.repeat(np.arange(self.n), neighbors.shape[1])
+        mask[rows, neighbors.ravel()] = True
+        mask |= mask.T
+        return mask
+
+
+_indexes = OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+def get_spatial_index(points):
+    """GridIndex dùng chung giữa các request, khoá theo dấu vân tay toạ độ (LRU nhỏ)"""
+    key = fingerprint(points, "grid")
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is not None:
+            _indexes.move_to_end(key)
+            return index
+
+    index = GridIndex(points)
+    with _indexes_lock:
+        _indexes[key] = index
+        while len(_indexes) > MAX_CACHED_INDEXES:
+            _indexes.popitem(last=False)
+    return index
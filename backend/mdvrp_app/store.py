@@ -0,0 +1,353 @@
+"""
+Kho dữ liệu depot / khách hàng / tài xế trên SQLite (qua Django ORM, DATABASES trong settings)
+- Tra cứu theo mã dùng primary key / index thay vì quét cả file JSON
+- Mã khách hàng cấp phát từ bộ đếm IdSequence trong transaction (không trùng khi ghi đồng thời)
+- Thêm / sửa từng dòng trong transaction, không ghi lại toàn bộ dữ liệu
+- Database là nguồn dữ liệu duy nhất: Dataset của Django đọc qua StoreSource, phiên bản mỗi loại dữ liệu
+  là bộ đếm version:<kind> tăng trong cùng transaction với lần ghi (các process khác cũng thấy ngay)
+- Xuất ra data/*.json (cùng định dạng cũ) cho frontend / Flask đang đọc file tĩnh: chạy nền, gom nhiều lần ghi
+  liên tiếp thành 1 lần xuất, không nằm trên đường xử lý request
+- Lần đầu dùng (bảng trống) tự nhập dữ liệu từ data/*.json
+"""
+import atexit
+import json
+import logging
+import os
+import threading
+
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+
+from .models import Customer, Depot, Driver, IdSequence
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "data")
+
+# Xuất lại data/*.json sau khi thay đổi (frontend đọc trực tiếp các file này); "0" để tắt
+EXPORT_ON_WRITE = os.environ.get("MDVRP_JSON_EXPORT", "1") != "0"
+EXPORT_DIR = os.environ.get("MDVRP_JSON_EXPORT_DIR", DATA_DIR)
+# Xuất sau bấy nhiêu giây kể từ lần ghi đầu tiên chưa xuất (các lần ghi trong khoảng đó gom lại)
+EXPORT_DELAY = float(os.environ.get("MDVRP_JSON_EXPORT_DELAY", 2.0))
+
+CUSTOMER_SEQUENCE = "customer"
+# Tăng mỗi lần dữ liệu của kind thay đổi / mỗi lần thay đổi không chỉ là thêm dòng mới (nhập lại, sửa dòng cũ)
+VERSION_SEQUENCE = "version:{}"
+REWRITE_SEQUENCE = "rewrite:{}"
+BATCH_SIZE = 1000
+
+# Thứ tự trường khi xuất JSON (giữ đúng định dạng file cũ); email chỉ xuất khi có giá trị
+EXPORT_FIELDS = {
+    "depots": (Depot, ["id", "name", "address", "latitude", "longitude"]),
+    "customers": (Customer, ["id", "name", "address", "phone", "email", "latitude", "longitude"]),
+    "drivers": (Driver, ["id", "name", "phone", "depot_id"]),
+}
+
+
+class NotFound(Exception):
+    """Không tìm thấy bản ghi theo mã"""
+
+
+def format_customer_id(number):
+    return f"C{number:04d}"
+
+
+# ----------------------------------------------------------------------
+# Nhập dữ liệu từ JSON
+# ----------------------------------------------------------------------
+_seeded = False
+_seed_lock = threading.Lock()
+
+
+def _read_json(data_dir, name):
+    path = os.path.join(data_dir, f"{name}.json")
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def import_json(data_dir=None, replace=False):
+    """Nhập depots / customers / drivers từ data_dir (mặc định data/) vào database (1 transaction)"""
+    data_dir = data_dir or DATA_DIR
+    depots = _read_json(data_dir, "depots")
+    customers = _read_json(data_dir, "customers")
+    drivers = _read_json(data_dir, "drivers")
+
+    with transaction.atomic():
+        if replace:
+            Depot.objects.all().delete()
+            Customer.objects.all().delete()
+            Driver.objects.all().delete()
+
+        Depot.objects.bulk_create([
+            Depot(id=d["id"], name=d.get("name", ""), address=d.get("address", ""),
+                  latitude=d["latitude"], longitude=d["longitude"])
+            for d in depots
+        ], batch_size=BATCH_SIZE)
+        Customer.objects.bulk_create([
+            Customer(id=c["id"], number=int(c["id"][1:]), name=c.get("name", ""),
+                     address=c.get("address", ""), phone=c.get("phone", ""), email=c.get("email", ""),
+                     latitude=c.get("latitude", 0), longitude=c.get("longitude", 0))
+            for c in customers
+        ], batch_size=BATCH_SIZE)
+        Driver.objects.bulk_create([
+            Driver(id=d["id"], name=d.get("name", ""), phone=d.get("phone", ""), depot_id=d["depot_id"])
+            for d in drivers
+        ], batch_size=BATCH_SIZE)
+
+        last_number = max((int(c["id"][1:]) for c in customers), default=0)
+        IdSequence.objects.update_or_create(name=CUSTOMER_SEQUENCE, defaults={"value": last_number})
+        _changed(EXPORT_FIELDS, append_only=False, export=False)
+
+    return {"depots": len(depots), "customers": len(customers), "drivers": len(drivers)}
+
+
+def ensure_seeded():
+    """Database còn trống (chưa có bộ đếm mã khách hàng) thì nhập từ data/*.json"""
+    global _seeded
+    if _seeded:
+        return
+    with _seed_lock:
+        if not _seeded:
+            if not IdSequence.objects.filter(name=CUSTOMER_SEQUENCE).exists():
+                try:
+                    import_json()
+                except IntegrityError:
+                    # Process khác vừa nhập xong
+                    pass
+            _seeded = True
+
+
+# ----------------------------------------------------------------------
+# Khách hàng
+# ----------------------------------------------------------------------
+def peek_next_customer_id():
+    """Mã khách hàng sẽ được cấp tiếp theo (không giữ chỗ)"""
+    ensure_seeded()
+    value = IdSequence.objects.filter(name=CUSTOMER_SEQUENCE).values_list("value", flat=True).first() or 0
+    return format_customer_id(value + 1)
+
+
+def _reserve_customer_numbers(count):
+    """Giữ chỗ count mã liên tiếp, trả về số đầu tiên (phải gọi trong transaction)"""
+    IdSequence.objects.filter(name=CUSTOMER_SEQUENCE).update(value=F("value") + count)
+    value = IdSequence.objects.get(name=CUSTOMER_SEQUENCE).value
+    return value - count + 1
+
+
+def add_customers(records):
+    """
+    Thêm khách hàng (list dict name/address/phone/email/latitude/longitude) trong 1 transaction,
+    mã được cấp liên tiếp từ bộ đếm. Trả về các khách hàng đã thêm (dạng dict như file JSON).
+    """
+    ensure_seeded()
+    if not records:
+        return []
+    with transaction.atomic():
+        first = _reserve_customer_numbers(len(records))
+        customers = [
+            Customer(id=format_customer_id(first + i), number=first + i, **record)
+            for i, record in enumerate(records)
+        ]
+        Customer.objects.bulk_create(customers, batch_size=BATCH_SIZE)
+        _changed(["customers"])
+    return [to_dict("customers", customer) for customer in customers]
+
+
+CUSTOMER_COLUMNS = ["name", "address", "phone", "email", "latitude", "longitude"]
+
+
+def add_customer_columns(columns):
+    """
+    Như add_customers nhưng nhận dữ liệu theo cột (dict tên trường -> list cùng độ dài, CUSTOMER_COLUMNS)
+    và ghi bằng executemany trực tiếp, bỏ qua việc dựng model instance của ORM (dùng khi nhập file lớn).
+    """
+    ensure_seeded()
+    count = len(columns["name"])
+    if not count:
+        return []
+    table = connection.ops.quote_name(Customer._meta.db_table)
+    fields = ["id", "number"] + CUSTOMER_COLUMNS
+    sql = (f"INSERT INTO {table} ({', '.join(connection.ops.quote_name(f) for f in fields)}) "
+           f"VALUES ({', '.join(['%s'] * len(fields))})")
+    with transaction.atomic():
+        first = _reserve_customer_numbers(count)
+        numbers = range(first, first + count)
+        ids = [format_customer_id(number) for number in numbers]
+        rows = list(zip(ids, numbers, *(columns[field] for field in CUSTOMER_COLUMNS)))
+        with connection.cursor() as cursor:
+            cursor.executemany(sql, rows)
+        _changed(["customers"])
+    keys = ["id"] + CUSTOMER_COLUMNS
+    return [{key: value for key, value in zip(keys, (row[0],) + row[2:]) if key != "email" or value}
+            for row in rows]
+
+
+def customers_without_coordinates(customer_ids):
+    """[(mã, địa chỉ)] của các khách hàng trong customer_ids còn toạ độ (0, 0)"""
+    ensure_seeded()
+    customer_ids = list(customer_ids)
+    rows = []
+    for start in range(0, len(customer_ids), BATCH_SIZE):
+        rows.extend(Customer.objects.filter(pk__in=customer_ids[start:start + BATCH_SIZE], latitude=0, longitude=0)
+                    .values_list("id", "address"))
+    return rows
+
+
+def set_customer_coordinates(points):
+    """Cập nhật toạ độ {mã khách hàng: (lat, lng)} trong 1 transaction"""
+    ensure_seeded()
+    if not points:
+        return
+    with transaction.atomic():
+        Customer.objects.bulk_update(
+            [Customer(id=customer_id, latitude=lat, longitude=lng) for customer_id, (lat, lng) in points.items()],
+            ["latitude", "longitude"], batch_size=BATCH_SIZE
+        )
+        _changed(["customers"], append_only=False)
+
+
+def get_customer(customer_id):
+    ensure_seeded()
+    try:
+        return to_dict("customers", Customer.objects.get(pk=customer_id))
+    except Customer.DoesNotExist:
+        raise NotFound(f"Customer {customer_id} not found")
+
+
+# ----------------------------------------------------------------------
+# Tài xế
+# ----------------------------------------------------------------------
+def swap_driver_depots(driver_id_1, driver_id_2):
+    """Hoán đổi depot_id của 2 tài xế trong 1 transaction, trả về (depot cũ của 1, depot cũ của 2)"""
+    ensure_seeded()
+    with transaction.atomic():
+        drivers = Driver.objects.select_for_update().in_bulk([driver_id_1, driver_id_2])
+        if driver_id_1 not in drivers or driver_id_2 not in drivers:
+            raise NotFound("Driver not found")
+        driver1, driver2 = drivers[driver_id_1], drivers[driver_id_2]
+        original_depot1, original_depot2 = driver1.depot_id, driver2.depot_id
+        driver1.depot_id, driver2.depot_id = original_depot2, original_depot1
+        Driver.objects.bulk_update([driver1, driver2], ["depot_id"])
+        _changed(["drivers"], append_only=False)
+    return original_depot1, original_depot2
+
+
+# ----------------------------------------------------------------------
+# Đọc / xuất dữ liệu
+# ----------------------------------------------------------------------
+def to_dict(kind, obj):
+    fields = EXPORT_FIELDS[kind][1]
+    return {field: getattr(obj, field) for field in fields if field != "email" or obj.email}
+
+
+def export_records(kind, queryset=None):
+    """Toàn bộ bản ghi của kind (hoặc của queryset) dưới dạng list dict (cùng định dạng data/<kind>.json)"""
+    ensure_seeded()
+    model, fields = EXPORT_FIELDS[kind]
+    records = []
+    for row in (queryset if queryset is not None else model.objects).values(*fields):
+        if "email" in row and not row["email"]:
+            del row["email"]
+        records.append(row)
+    return records
+
+
+def page_records(kind, offset=0, limit=None):
+    """(tổng số bản ghi, các bản ghi [offset, offset + limit)) của kind theo thứ tự của data/<kind>.json"""
+    ensure_seeded()
+    model = EXPORT_FIELDS[kind][0]
+    queryset = model.objects.all()[offset:offset + limit if limit is not None else None]
+    return model.objects.count(), export_records(kind, queryset)
+
+
+class StoreSource:
+    """
+    Nguồn dữ liệu của Dataset (dataset.py) đọc từ database; phiên bản theo bộ đếm version:<kind> / rewrite:<kind>.
+    Khách hàng chỉ thêm mới (mã tăng dần) giữa 2 lần đọc thì chỉ đọc các dòng mới, nối vào danh sách đã có.
+    """
+
+    def signature(self, kind):
+        ensure_seeded()
+        names = [VERSION_SEQUENCE.format(kind), REWRITE_SEQUENCE.format(kind)]
+        values = dict(IdSequence.objects.filter(name__in=names).values_list("name", "value"))
+        return values.get(names[0], 0), values.get(names[1], 0)
+
+    def records(self, kind, previous=None):
+        """previous: (signature, records) đã đọc lần trước hoặc None"""
+        if kind == "customers" and previous is not None and previous[1]:
+            signature, records = previous
+            if signature is not None and signature[1] == self.signature(kind)[1]:
+                last_number = int(records[-1]["id"][1:])
+                return records + export_records(kind, Customer.objects.filter(number__gt=last_number))
+        return export_records(kind)
+
+
+def _changed(kinds, append_only=True, export=True):
+    """
+    Tăng phiên bản các loại dữ liệu (trong transaction của lần ghi) và hẹn xuất JSON sau khi commit.
+    append_only=False: có dòng cũ bị sửa / xoá, Dataset phải đọc lại toàn bộ.
+    """
+    names = [VERSION_SEQUENCE.format(kind) for kind in kinds]
+    if not append_only:
+        names += [REWRITE_SEQUENCE.format(kind) for kind in kinds]
+    for name in names:
+        if not IdSequence.objects.filter(name=name).update(value=F("value") + 1):
+            IdSequence.objects.create(name=name, value=1)
+    if export and EXPORT_ON_WRITE:
+        transaction.on_commit(lambda: schedule_export(kinds))
+
+
+_export_lock = threading.Lock()
+_pending_lock = threading.Lock()
+_pending_kinds = set()
+_export_timer = None
+
+
+def schedule_export(kinds):
+    """Hẹn xuất data/<kind>.json sau EXPORT_DELAY giây (chạy nền); các lần hẹn trong lúc chờ gom thành 1"""
+    global _export_timer
+    with _pending_lock:
+        _pending_kinds.update(kinds)
+        if _export_timer is None:
+            _export_timer = threading.Timer(EXPORT_DELAY, flush_exports)
+            _export_timer.daemon = True
+            _export_timer.start()
+
+
+def flush_exports():
+    """Xuất ngay các loại dữ liệu đang chờ (timer gọi, hoặc khi process kết thúc)"""
+    global _export_timer
+    with _pending_lock:
+        kinds = sorted(_pending_kinds)
+        _pending_kinds.clear()
+        _export_timer = None
+    if not kinds:
+        # Không còn gì chờ: đợi lần xuất đang chạy (nếu có) ghi xong
+        with _export_lock:
+            return
+    try:
+        export_json_files(kinds)
+    except Exception:
+        # data/*.json chỉ là bản sao cho frontend, database vẫn đúng
+        logger.exception("Could not export %s to JSON", ", ".join(kinds))
+    finally:
+        if threading.current_thread() is not threading.main_thread():
+            connection.close()
+
+
+atexit.register(flush_exports)
+
+
+def export_json_files(kinds=None, data_dir=None):
+    """Ghi data/<kind>.json (mặc định EXPORT_DIR) từ database (file tạm + os.replace, không để lộ file ghi dở)"""
+    data_dir = data_dir or EXPORT_DIR
+    for kind in kinds or EXPORT_FIELDS:
+        path = os.path.join(data_dir, f"{kind}.json")
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with _export_lock:
+            records = export_records(kind)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(records, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, path)
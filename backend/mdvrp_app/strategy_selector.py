@@ -0,0 +1,195 @@
+"""
+Chọn chiến lược theo đặc trưng instance thay vì luôn chạy benchmark cả 3 chiến lược
+- instance_features: đặc trưng rẻ (số node, xe / depot, tỉ lệ depot / khách hàng, độ phân tán,
+  mức phân cụm, độ chặt tải trọng), vài chục ms kể cả với hàng chục nghìn khách hàng
+- StrategyHistory: lịch sử các lần benchmark (JSON lines trên đĩa, dùng chung giữa các process):
+  đặc trưng + quãng đường và thời điểm tìm được lời giải tốt nhất của từng chiến lược
+- select_strategy: kNN trên đặc trưng đã chuẩn hoá -> xếp hạng chiến lược theo gap trung bình so với
+  chiến lược thắng ở các instance tương tự, độ tin cậy và thời gian giải đề xuất
+- Chưa đủ lịch sử: thứ tự mặc định với độ tin cậy thấp (solver sẽ đua ngắn 2 ứng viên đầu)
+"""
+import json
+import math
+import os
+import threading
+import time
+
+import numpy as np
+
+try:
+    from .spatial_index import GridIndex
+except ImportError:
+    from spatial_index import GridIndex
+
+DEFAULT_HISTORY_PATH = os.environ.get(
+    "MDVRP_STRATEGY_HISTORY",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "strategy_history.jsonl")
+)
+
+FEATURE_NAMES = ('log_customers', 'log_depots', 'vehicles_per_depot', 'depot_customer_ratio',
+                 'dispersion', 'clustering', 'capacity_tightness')
+CANDIDATES = ('strategy1', 'strategy2', 'strategy3')
+# Thứ tự khi chưa có lịch sử: GLS thường tốt nhất trên instance của ta, SA thường kém nhất
+DEFAULT_RANKING = ('strategy1', 'strategy3', 'strategy2')
+
+K_NEIGHBORS = 5
+# Số bản ghi tối thiểu để dùng lịch sử, số bản ghi giữ lại khi đọc
+MIN_HISTORY = 3
+MAX_HISTORY = 2000
+# Dưới ngưỡng này (tỉ lệ láng giềng có trọng số mà chiến lược đứng đầu thắng) thì nên đua 2 ứng viên
+MIN_CONFIDENCE = 0.6
+# Thời gian đề xuất = thời điểm tìm được lời giải tốt nhất (lớn nhất trong các láng giềng) x hệ số này
+BUDGET_SAFETY = 1.5
+MIN_BUDGET = 5
+# Chỉ số phân cụm tính trên mẫu ngẫu nhiên tối đa chừng này khách hàng (lấy mẫu đều giữ nguyên mức phân cụm)
+CLUSTERING_SAMPLE = 2000
+
+
+def instance_features(depots, customers, num_vehicles_per_depot, demands=None, capacities=None):
+    """Đặc trưng instance (dict theo FEATURE_NAMES); demands / capacities mặc định như MDVRPSolver"""
+    num_depots = len(depots)
+    num_customers = len(customers)
+    points = np.asarray(customers, dtype=np.float64).reshape(-1, 2)
+
+    dispersion = clustering = 0.0
+    if num_customers >= 2:
+        extent = np.maximum(points.max(axis=0) - points.min(axis=0), 1e-12)
+        area = float(extent[0] * extent[1]) or float(extent.max() ** 2)
+        # Khoảng cách trung bình tới trọng tâm, chuẩn hoá theo cạnh khung bao (~0.38 với phân bố đều)
+        dispersion = float(np.hypot(*(points - points.mean(axis=0)).T).mean() / math.sqrt(area))
+        # Chỉ số Clark-Evans: ~1 phân bố đều, < 1 phân cụm
+        sample = points
+        if num_customers > CLUSTERING_SAMPLE:
+            sample = points[np.random.default_rng(0).choice(num_customers, CLUSTERING_SAMPLE, replace=False)]
+        nearest = GridIndex(sample).knn(1)[:, 0]
+        nearest_distance = float(np.hypot(*(sample - sample[nearest]).T).mean())
+        clustering = nearest_distance / (0.5 * math.sqrt(area / len(sample)))
+
+    total_demand = sum(demands[num_depots:]) if demands else num_customers
+    total_capacity = sum(capacities) if capacities else 100 * num_vehicles_per_depot * num_depots
+    return {
+        'log_customers': math.log1p(num_customers),
+        'log_depots': math.log1p(num_depots),
+        'vehicles_per_depot': float(num_vehicles_per_depot),
+        'depot_customer_ratio': num_depots / max(num_customers, 1),
+        'dispersion': dispersion,
+        'clustering': clustering,
+        'capacity_tightness': total_demand / max(total_capacity, 1),
+    }
+
+
+class StrategyHistory:
+    """Lịch sử benchmark dạng JSON lines: mỗi dòng {"features", "results": {strategy: {...}}, "time_limit"}"""
+
+    def __init__(self, path=DEFAULT_HISTORY_PATH, max_records=MAX_HISTORY):
+        self.path = path
+        self.max_records = max_records
+        self._lock = threading.Lock()
+        self._records = None
+        self._mtime = None
+
+    def record(self, features, results, time_limit):
+        """results: {strategy id: {"distance", "best_found_at"}} của 1 lần benchmark"""
+        results = {strategy: value for strategy, value in results.items() if value.get('distance') is not None}
+        if len(results) < 2:
+            return
+        line = json.dumps({'timestamp': time.time(), 'features': features,
+                           'results': results, 'time_limit': time_limit})
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with self._lock:
+            # 1 lần write với O_APPEND: các process ghi cùng file không chen dòng của nhau
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+    def load(self):
+        """Các bản ghi gần nhất (đọc lại khi file thay đổi)"""
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            return []
+        with self._lock:
+            if self._records is None or mtime != self._mtime:
+                records = []
+                with open(self.path, "r", encoding="utf-8") as f:
+                    for line in f:
+                        try:
+                            record = json.loads(line)
+                        except ValueError:
+                            continue
+                        if all(name in record.get('features', {}) for name in FEATURE_NAMES):
+                            records.append(record)
+                self._records = records[-self.max_records:]
+                self._mtime = mtime
+            return list(self._records)
+
+    def clear(self):
+        with self._lock:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            self._records = None
+
+
+def select_strategy(features, history=None, time_limit=45, k=K_NEIGHBORS):
+    """
+    Xếp hạng chiến lược cho instance có đặc trưng features.
+    Trả về {"ranking", "confidence", "time_budget", "source", "neighbors", "expected_gap"}
+    """
+    records = history.load() if history is not None else []
+    if len(records) < MIN_HISTORY:
+        return {'ranking': list(DEFAULT_RANKING), 'confidence': 0.0, 'time_budget': time_limit,
+                'source': 'default', 'neighbors': 0, 'expected_gap': None}
+
+    # kNN trên đặc trưng chuẩn hoá (z-score theo lịch sử)
+    matrix = np.array([[record['features'][name] for name in FEATURE_NAMES] for record in records])
+    mean = matrix.mean(axis=0)
+    std = np.where(matrix.std(axis=0) > 1e-9, matrix.std(axis=0), 1.0)
+    query = (np.array([features[name] for name in FEATURE_NAMES]) - mean) / std
+    distances = np.linalg.norm((matrix - mean) / std - query, axis=1)
+    nearest = np.argsort(distances)[:k]
+    weights = 1.0 / (distances[nearest] + 1e-3)
+
+    # Gap trung bình có trọng số của từng chiến lược so với chiến lược thắng ở mỗi láng giềng
+    gaps = {strategy: 0.0 for strategy in CANDIDATES}
+    wins = {strategy: 0.0 for strategy in CANDIDATES}
+    for index, weight in zip(nearest, weights):
+        results = records[index]['results']
+        best = min(value['distance'] for value in results.values())
+        for strategy in CANDIDATES:
+            # Chiến lược không có kết quả (lỗi / không tìm được lời giải) bị phạt như kém 10%
+            distance = results.get(strategy, {}).get('distance')
+            gaps[strategy] += weight * (distance / best - 1 if distance is not None and best > 0 else 0.1)
+        winner = min(results, key=lambda strategy: results[strategy]['distance'])
+        if winner in wins:
+            wins[winner] += weight
+    total_weight = float(weights.sum())
+    ranking = sorted(CANDIDATES, key=lambda strategy: (gaps[strategy], DEFAULT_RANKING.index(strategy)))
+    chosen = ranking[0]
+
+    # Thời gian đề xuất: đủ để các láng giềng tìm được lời giải tốt nhất của chiến lược được chọn
+    found_at = [records[index]['results'].get(chosen, {}).get('best_found_at') for index in nearest]
+    found_at = [value for value in found_at if value is not None]
+    time_budget = time_limit
+    if found_at:
+        time_budget = int(min(time_limit, max(MIN_BUDGET, math.ceil(max(found_at) * BUDGET_SAFETY))))
+
+    return {
+        'ranking': ranking,
+        'confidence': round(float(wins[chosen] / total_weight), 3) if total_weight else 0.0,
+        'time_budget': time_budget,
+        'source': 'history',
+        'neighbors': len(nearest),
+        'expected_gap': round(float(gaps[chosen] / total_weight * 100), 3) if total_weight else None,
+    }
+
+
+_default_history = None
+_default_history_lock = threading.Lock()
+
+
+def get_default_strategy_history():
+    """StrategyHistory dùng chung (file mặc định hoặc MDVRP_STRATEGY_HISTORY)"""
+    global _default_history
+    with _default_history_lock:
+        if _default_history is None:
+            _default_history = StrategyHistory()
+        return _default_history
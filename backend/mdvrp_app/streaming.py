@@ -0,0 +1,136 @@
+"""
+Stream lời giải trung gian của solver tới client bằng Server-Sent Events (SSE)
+- Solver chạy trong 1 thread, mỗi lời giải cải thiện được đưa vào hàng đợi của stream
+- events() sinh các sự kiện SSE: start, solution (mỗi lời giải tốt hơn), result, error
+- stop() (hoặc client ngắt kết nối) dừng tìm kiếm, solver trả về lời giải tốt nhất hiện có
+- Tối đa max_streams solver chạy cùng lúc trong process web; vượt quá thì báo bận (StreamLimitReached)
+"""
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+
+try:
+    from .payload import dumps
+except ImportError:
+    from payload import dumps
+
+logger = logging.getLogger(__name__)
+
+# Số stream (mỗi stream 1 thread solver trong process web) chạy cùng lúc tối đa
+DEFAULT_MAX_STREAMS = int(os.environ.get("MDVRP_MAX_STREAMS", 2))
+# Gửi comment giữ kết nối khi không có sự kiện nào trong khoảng này (giây)
+KEEPALIVE_INTERVAL = 15
+
+_DONE = object()
+
+
+class StreamLimitReached(Exception):
+    """Đã đủ số stream chạy cùng lúc, client nên thử lại sau"""
+
+
+def format_event(event, data):
+    """Định dạng 1 sự kiện SSE"""
+    return f"event: {event}\ndata: {dumps(data).decode('utf-8')}\n\n"
+
+
+class SolveStream:
+    def __init__(self, solver_kwargs):
+        self.id = uuid.uuid4().hex
+        self.solver_kwargs = solver_kwargs
+        self.stop_event = threading.Event()
+        self._queue = queue.Queue()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name=f"mdvrp-stream-{self.id[:8]}", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.stop_event.set()
+
+    def _run(self):
+        try:
+            try:
+                from .mdvrp_solver import solve_mdvrp_enhanced
+                from .matrix_cache import get_default_cache
+                from .warm_start import get_default_plan_store
+                from .strategy_selector import get_default_strategy_history
+            except ImportError:
+                from mdvrp_solver import solve_mdvrp_enhanced
+                from matrix_cache import get_default_cache
+                from warm_start import get_default_plan_store
+                from strategy_selector import get_default_strategy_history
+
+            result = solve_mdvrp_enhanced(
+                on_solution=lambda update: self._queue.put(('solution', update)),
+                stop_event=self.stop_event,
+                matrix_cache=get_default_cache(),
+                plan_store=get_default_plan_store(),
+                strategy_history=get_default_strategy_history(),
+                **self.solver_kwargs
+            )
+            result['stopped_early'] = self.stop_event.is_set()
+            self._queue.put(('result', result))
+        except Exception as e:
+            logger.exception("Stream %s failed", self.id)
+            self._queue.put(('error', {'status': 'error', 'message': str(e)}))
+        finally:
+            # Giải phóng chỗ ngay khi solver xong (kể cả khi client chưa đọc hết / không đọc stream)
+            _unregister(self.id)
+            self._queue.put((_DONE, None))
+
+    def events(self):
+        """Generator các sự kiện SSE; client ngắt kết nối (generator bị đóng) thì dừng solver"""
+        try:
+            depots = self.solver_kwargs['depots']
+            yield format_event('start', {
+                'stream_id': self.id,
+                'num_depots': len(depots),
+                # Bảng toạ độ gửi 1 lần, các route sau đó chỉ là danh sách chỉ số node
+                'locations': [list(location) for location in list(depots) + list(self.solver_kwargs['customers'])],
+                'started_at': time.time()
+            })
+            while True:
+                try:
+                    event, data = self._queue.get(timeout=KEEPALIVE_INTERVAL)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+                    continue
+                if event is _DONE:
+                    break
+                yield format_event(event, data)
+        finally:
+            self.stop()
+            _unregister(self.id)
+
+
+_streams = {}
+_streams_lock = threading.Lock()
+
+
+def open_stream(solver_kwargs, max_streams=None):
+    """
+    Tạo và chạy 1 stream, đăng ký theo id để có thể dừng từ request khác.
+    raise StreamLimitReached nếu đã có max_streams (mặc định DEFAULT_MAX_STREAMS) stream đang chạy.
+    """
+    max_streams = DEFAULT_MAX_STREAMS if max_streams is None else max_streams
+    stream = SolveStream(solver_kwargs)
+    with _streams_lock:
+        if len(_streams) >= max_streams:
+            raise StreamLimitReached(f"Too many solves streaming ({max_streams} running), retry later")
+        _streams[stream.id] = stream
+    return stream.start()
+
+
+def get_stream(stream_id):
+    with _streams_lock:
+        return _streams.get(stream_id)
+
+
+def _unregister(stream_id):
+    with _streams_lock:
+        _streams.pop(stream_id, None)
@@ -0,0 +1,107 @@
+"""
+Dừng tìm kiếm sớm (thay vì luôn chạy hết time_limit)
+- stall_time: không có cải thiện đáng kể trong N giây
+- stall_solutions: N lời giải liên tiếp không cải thiện đáng kể
+- target_objective: đã đạt objective mục tiêu (đơn vị khoảng cách)
+- min_improvement: cải thiện tương đối tối thiểu (vd. 0.001 = 0.1%) để được tính là "cải thiện đáng kể";
+  các cải thiện nhỏ hơn vẫn được giữ nhưng không làm mới bộ đếm stall
+Kiểm tra trong callback lời giải của OR-Tools (callback được gọi cả với lời giải không cải thiện,
+khoảng vài chục lần / giây), dừng bằng FinishCurrentSearch và ghi lại lý do dừng.
+"""
+import time
+
+TERMINATION_KEYS = ('stall_time', 'stall_solutions', 'target_objective', 'min_improvement')
+
+# Lý do dừng khi không có tiêu chí nào kích hoạt
+REASON_TIME_LIMIT = 'time_limit'
+REASON_COMPLETED = 'completed'
+REASON_STOPPED = 'stopped'
+# Hết thời gian nếu đã chạy >= tỉ lệ này của time_limit
+TIME_LIMIT_SLACK = 0.98
+
+
+def normalize_termination(termination):
+    """dict tiêu chí dừng hợp lệ (chỉ giữ giá trị khác None) hoặc None; ValueError nếu sai"""
+    if not termination:
+        return None
+    if not isinstance(termination, dict):
+        raise ValueError("termination must be an object")
+    unknown = set(termination) - set(TERMINATION_KEYS)
+    if unknown:
+        raise ValueError(f"Unknown termination option(s): {', '.join(sorted(unknown))}")
+    options = {}
+    for key in TERMINATION_KEYS:
+        value = termination.get(key)
+        if value is None:
+            continue
+        value = int(value) if key == 'stall_solutions' else float(value)
+        if value < 0:
+            raise ValueError(f"termination.{key} must be >= 0")
+        options[key] = value
+    return options or None
+
+
+class SearchTermination:
+    """Theo dõi lời giải trong 1 lần tìm kiếm và quyết định dừng sớm"""
+
+    def __init__(self, termination=None, scale=1, start_time=None):
+        options = normalize_termination(termination) or {}
+        self.stall_time = options.get('stall_time')
+        self.stall_solutions = options.get('stall_solutions')
+        self.min_improvement = options.get('min_improvement', 0.0)
+        # Objective của OR-Tools là khoảng cách đã nhân scale
+        target = options.get('target_objective')
+        self.target = target * scale if target is not None else None
+        self.scale = scale
+        self.start_time = start_time if start_time is not None else time.time()
+
+        self.best = None
+        self.best_at = None
+        self.solutions = 0
+        self.reason = None
+        # Mốc cải thiện đáng kể gần nhất (objective, thời điểm, số lời giải)
+        self._progress = None
+        self._progress_at = self.start_time
+        self._progress_solution = 0
+
+    @property
+    def enabled(self):
+        return any(value is not None for value in (self.stall_time, self.stall_solutions, self.target))
+
+    def observe(self, objective, now=None):
+        """Ghi nhận 1 lời giải; trả về lý do dừng (chuỗi) hoặc None nếu tiếp tục"""
+        now = now if now is not None else time.time()
+        self.solutions += 1
+        if self.best is None or objective < self.best:
+            self.best = objective
+            self.best_at = now
+        if self._progress is None or objective < self._progress * (1 - self.min_improvement):
+            self._progress = objective
+            self._progress_at = now
+            self._progress_solution = self.solutions
+
+        if self.target is not None and self.best <= self.target:
+            self.reason = 'target_objective'
+        elif self.stall_time is not None and now - self._progress_at >= self.stall_time:
+            self.reason = 'stall_time'
+        elif self.stall_solutions is not None and self.solutions - self._progress_solution >= self.stall_solutions:
+            self.reason = 'stall_solutions'
+        return self.reason
+
+    def stop(self, reason=REASON_STOPPED):
+        self.reason = reason
+
+    def summary(self, time_limit=None, now=None):
+        """Lý do dừng + thời điểm tìm được lời giải tốt nhất, để gắn vào kết quả"""
+        now = now if now is not None else time.time()
+        elapsed = now - self.start_time
+        reason = self.reason
+        if reason is None:
+            reason = REASON_TIME_LIMIT if time_limit and elapsed >= time_limit * TIME_LIMIT_SLACK \
+                else REASON_COMPLETED
+        return {
+            'reason': reason,
+            'elapsed_time': elapsed,
+            'best_found_at': self.best_at - self.start_time if self.best_at is not None else None,
+            'solutions': self.solutions,
+        }
@@ -1,3 +1,593 @@
-from django.test import TestCase
+import gzip
+import io
+import json
+import multiprocessing as mp
+import os
+import tempfile
+import threading
+import time
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+import pandas as pd
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase
+
+from . import importer, jobs, lns, ops, payload, store, streaming
+from .dataset import Dataset
+from .distance_matrix import DistanceMatrix
+from .geocoding import GeocodeCache, Geocoder, normalize_address
+from .mdvrp_solver import POST_OPTIMIZATIONS, MDVRPSolver, solve_mdvrp_enhanced
+from .models import Customer, Depot, Driver, IdSequence
+from .result_cache import ResultCache, result_key
+from .warm_start import PlanStore
+
+
+def random_instance(seed, num_depots=3, num_customers=120, vehicles_per_depot=4, capacity=85):
+    """Bài toán ngẫu nhiên có tải sát tổng capacity (~90%) để ràng buộc capacity thực sự chặt"""
+    rng = np.random.default_rng(seed)
+    depots = [tuple(p) for p in rng.uniform(0, 100, (num_depots, 2)).tolist()]
+    customers = [tuple(p) for p in rng.uniform(0, 100, (num_customers, 2)).tolist()]
+    demands = [0] * num_depots + rng.integers(1, 15, num_customers).tolist()
+    return MDVRPSolver(depots, customers, vehicles_per_depot,
+                       vehicle_capacities=[capacity] * (num_depots * vehicles_per_depot), demands=demands)
+
+
+class RuinRecreateLNSTests(SimpleTestCase):
+    SEEDS = (0, 1, 3)
+
+    def assert_feasible(self, solver, result):
+        self.assertEqual(result['status'], 'success', result.get('message'))
+        visits = sorted(n for route in result['routes'] for n in route['nodes'][1:-1])
+        self.assertEqual(visits, list(range(solver.num_depots, len(solver.all_locations))))
+        for route in result['routes']:
+            load = sum(solver.demands[n] for n in route['nodes'][1:-1])
+            self.assertLessEqual(load, solver.vehicle_capacities[route['vehicle_id']], route)
+
+    def test_strategy5_visits_each_customer_once_within_capacity(self):
+        for seed in self.SEEDS:
+            with self.subTest(seed=seed):
+                solver = random_instance(seed)
+                self.assert_feasible(solver, solver.strategy_5_ruin_recreate_lns(time_limit=1, seed=seed))
+
+    def test_regret_recreate_within_capacity(self):
+        # Chỉ dùng regret-2: phương án chèn cache theo route phải tính lại sau mỗi lần route đổi
+        with mock.patch.object(lns, 'RECREATE_OPERATORS', ('regret',)):
+            for seed in self.SEEDS:
+                with self.subTest(seed=seed):
+                    solver = random_instance(seed)
+                    self.assert_feasible(solver, solver.strategy_5_ruin_recreate_lns(time_limit=1, seed=seed))
+
+
+class AsymmetricPostOptimizationTests(SimpleTestCase):
+    def assert_route_distances(self, solver, result):
+        for route in result['routes']:
+            self.assertAlmostEqual(route['distance'], solver.distance_matrix.route_distance(route['nodes']), places=3)
+
+    def test_post_optimize_never_worsens_asymmetric_routes(self):
+        # Ma trận đường bộ có đường một chiều: d[i][j] != d[j][i]
+        rng = np.random.default_rng(0)
+        solver = random_instance(0)
+        dense = solver.distance_matrix.to_dense() * (1 + rng.uniform(0, 1.5, (len(solver.all_locations),) * 2))
+        np.fill_diagonal(dense, 0)
+        solver.distance_matrix = DistanceMatrix.from_array(solver.all_locations, dense.astype(np.float32))
+        for mode in POST_OPTIMIZATIONS:
+            with self.subTest(mode=mode):
+                result = solver.strategy_5_ruin_recreate_lns(time_limit=1)
+                before = result['total_distance']
+                solver.post_optimize(result, mode)
+                self.assert_route_distances(solver, result)
+                self.assertLessEqual(result['total_distance'], before + 1e-6)
+
+
+class StoreTestCase(TestCase):
+    """Database trống (đã có bộ đếm mã khách hàng nên store không tự nhập data/*.json)"""
+
+    def setUp(self):
+        IdSequence.objects.create(name=store.CUSTOMER_SEQUENCE, value=0)
+
+
+def offline_geocoder():
+    """Geocoder chỉ có cache trong bộ nhớ, không gọi upstream"""
+    return Geocoder(cache=GeocodeCache(path=""), session=mock.Mock())
+
+
+class CustomerUploadTests(StoreTestCase):
+    def upload(self, content, **fields):
+        upload = SimpleUploadedFile("customers.csv", content.encode("utf-8"), content_type="text/csv")
+        with mock.patch.object(ops, "extend_matrix_cache"), \
+                mock.patch.object(ops, "get_default_geocoder", return_value=offline_geocoder()), \
+                mock.patch.object(ops.importer, "schedule_geocoding") as schedule:
+            response = self.client.post("/api/add-customer/", {"file": upload, **fields})
+        return response, schedule
+
+    def test_partial_upload_keeps_valid_rows(self):
+        response, schedule = self.upload(
+            "name,address,phone,latitude,longitude\n"
+            "A,1 Street,0901,10.1,106.1\n"
+            "B,2 Street,0902,10.2,106.2\n"
+            "C,,0903,10.3,106.3\n",
+            geocode="0",
+        )
+        self.assertEqual(response.status_code, 200, response.json())
+        body = response.json()
+        self.assertEqual(body["added_count"], 2)
+        self.assertEqual(body["errors"], [{"row": 4, "message": "missing address"}])
+        self.assertEqual(body["geocoding"], "off")
+        self.assertEqual(Customer.objects.count(), 2)
+        schedule.assert_not_called()
+
+    def test_upload_without_valid_rows_is_rejected(self):
+        response, _ = self.upload("name,address,phone\nA,,0901\n")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["error_count"], 1)
+        self.assertEqual(Customer.objects.count(), 0)
+
+    def test_rows_without_coordinates_are_geocoded_in_background(self):
+        response, schedule = self.upload("name,address,phone\nA,1 Street,0901\nB,,0902\n")
+        self.assertEqual(response.status_code, 200, response.json())
+        self.assertEqual(response.json()["geocoding"], "scheduled")
+        self.assertEqual(schedule.call_args[0][0], ["C0001"])
+
+
+class CustomerImportTests(StoreTestCase):
+    HEADER = "name,address,phone,latitude,longitude\n"
+
+    def import_csv(self, rows, **kwargs):
+        content = self.HEADER + "".join(f"{row}\n" for row in rows)
+        return importer.import_customers(io.StringIO(content), "customers.csv", **kwargs)
+
+    def test_rows_across_chunks_keep_file_numbering(self):
+        rows = [f"Customer {i},{i} Street,090{i},10.{i},106.{i}" for i in range(1, 6)]
+        rows[2] = "Customer 3,3 Street,0903,abc,106.3"
+        result = self.import_csv(rows, chunk_size=2)
+        self.assertEqual(result["rows"], 5)
+        # Dòng dữ liệu đầu tiên là dòng 2 của file, dòng thứ 3 nằm ở khối thứ 2
+        self.assertEqual(result["errors"], [{"row": 4, "message": "invalid latitude"}])
+        self.assertEqual([c["id"] for c in result["added"]], ["C0001", "C0002", "C0003", "C0004"])
+        self.assertEqual([c["name"] for c in result["added"]],
+                         ["Customer 1", "Customer 2", "Customer 4", "Customer 5"])
+        self.assertEqual(list(Customer.objects.values_list("id", "latitude")),
+                         [("C0001", 10.1), ("C0002", 10.2), ("C0003", 10.4), ("C0004", 10.5)])
+
+    def test_invalid_coordinates_are_reported(self):
+        result = self.import_csv([
+            "A,1 Street,0901,91,106",
+            "B,2 Street,0902,10,-181",
+            "C,3 Street,0903,x,y",
+            "D,4 Street,0904,,",
+            ",,0905,10,106",
+        ])
+        self.assertEqual(result["errors"], [
+            {"row": 2, "message": "latitude out of range"},
+            {"row": 3, "message": "longitude out of range"},
+            {"row": 4, "message": "invalid latitude; invalid longitude"},
+            {"row": 6, "message": "missing name; missing address"},
+        ])
+        # Toạ độ trống là (0, 0): chưa có toạ độ, không phải lỗi
+        [customer] = result["added"]
+        self.assertEqual((customer["name"], customer["latitude"], customer["longitude"]), ("D", 0.0, 0.0))
+
+    def test_float_phones_from_excel(self):
+        # Cột số có ô trống được pandas đọc thành float: 901234567 -> 901234567.0
+        chunk = pd.DataFrame({"Name": ["A", "B"], "Address": ["1 Street", "2 Street"],
+                              "Phone": [901234567.0, np.nan]})
+        columns, errors = importer.validate_chunk(chunk, importer.FIRST_DATA_ROW)
+        self.assertEqual(columns["phone"], ["901234567"])
+        self.assertEqual(errors, [{"row": 3, "message": "missing phone"}])
+
+    def test_xlsx_upload(self):
+        buffer = io.BytesIO()
+        pd.DataFrame({"name": ["A", "B", "C"], "address": ["1 Street", "2 Street", "3 Street"],
+                      "phone": [901234567, None, 903], "latitude": [10.1, 10.2, 10.3],
+                      "longitude": [106.1, 106.2, 106.3]}).to_excel(buffer, index=False)
+        buffer.seek(0)
+        result = importer.import_customers(buffer, "customers.xlsx", chunk_size=2)
+        self.assertEqual([c["phone"] for c in result["added"]], ["901234567", "903"])
+        self.assertEqual(result["errors"], [{"row": 3, "message": "missing phone"}])
+
+    def test_missing_required_column(self):
+        with self.assertRaises(importer.ImportFormatError):
+            importer.import_customers(io.StringIO("name,address\nA,1 Street\n"), "customers.csv")
+
+    def test_cached_addresses_are_geocoded_in_request(self):
+        geocoder = offline_geocoder()
+        geocoder.cache.put_many({normalize_address("1 Street"): (10.5, 106.5)})
+        result = self.import_csv(["A,1 Street,0901,,", "B,2 Street,0902,,"], geocoder=geocoder, geocode_limit=0)
+        self.assertEqual((result["geocoded"], result["ungeocoded"]), (1, 1))
+        self.assertEqual([(c["latitude"], c["longitude"]) for c in result["added"]], [(10.5, 106.5), (0.0, 0.0)])
+        geocoder.session.get.assert_not_called()
+
+
+class StoreTests(StoreTestCase):
+    def customer(self, name, lat=10.0, lng=106.0):
+        return {"name": name, "address": f"{name} Street", "phone": "0900", "email": "",
+                "latitude": lat, "longitude": lng}
+
+    def test_customer_ids_are_allocated_consecutively(self):
+        self.assertEqual(store.peek_next_customer_id(), "C0001")
+        first = store.add_customers([self.customer("A"), self.customer("B")])
+        second = store.add_customer_columns({field: [self.customer("C")[field]] for field in store.CUSTOMER_COLUMNS})
+        self.assertEqual([c["id"] for c in first + second], ["C0001", "C0002", "C0003"])
+        self.assertEqual(store.peek_next_customer_id(), "C0004")
+        self.assertEqual(store.get_customer("C0003")["name"], "C")
+        # email trống không xuất ra, giống data/customers.json
+        self.assertNotIn("email", store.get_customer("C0001"))
+        with self.assertRaises(store.NotFound):
+            store.get_customer("C0004")
+
+    def test_versions(self):
+        source = store.StoreSource()
+        self.assertEqual(source.signature("customers"), (0, 0))
+        store.add_customers([self.customer("A")])
+        self.assertEqual(source.signature("customers"), (1, 0))
+        store.set_customer_coordinates({"C0001": (10.5, 106.5)})
+        self.assertEqual(source.signature("customers"), (2, 1))
+        self.assertEqual(source.signature("drivers"), (0, 0))
+
+    def test_incremental_reads(self):
+        source = store.StoreSource()
+        store.add_customers([self.customer("A"), self.customer("B")])
+        previous = (source.signature("customers"), source.records("customers"))
+        store.add_customers([self.customer("C")])
+        with self.assertNumQueries(2):
+            records = source.records("customers", previous)
+        self.assertEqual([c["id"] for c in records], ["C0001", "C0002", "C0003"])
+
+        # Sửa dòng cũ: đọc lại toàn bộ
+        previous = (source.signature("customers"), records)
+        store.set_customer_coordinates({"C0001": (10.5, 106.5)})
+        records = source.records("customers", previous)
+        self.assertEqual((records[0]["latitude"], records[0]["longitude"]), (10.5, 106.5))
+
+    def test_dataset_follows_store(self):
+        dataset = Dataset(source=store.StoreSource())
+        store.add_customers([self.customer("A", 10.1, 106.1)])
+        self.assertEqual(dataset.locations("customers"), [(10.1, 106.1)])
+        store.add_customers([self.customer("B", 10.2, 106.2)])
+        store.set_customer_coordinates({"C0001": (10.3, 106.3)})
+        self.assertEqual(dataset.locations("customers"), [(10.3, 106.3), (10.2, 106.2)])
+
+    def test_paged_export(self):
+        store.add_customers([self.customer(name) for name in "ABCDE"])
+        total, records = store.page_records("customers", 1, 2)
+        self.assertEqual((total, [c["id"] for c in records]), (5, ["C0002", "C0003"]))
+
+        page = self.client.get("/api/data/customers/", {"offset": "3", "limit": "10"}).json()
+        self.assertEqual((page["total"], page["offset"]), (5, 3))
+        self.assertEqual([c["id"] for c in page["records"]], ["C0004", "C0005"])
+        self.assertEqual(len(self.client.get("/api/data/customers/").json()), 5)
+        self.assertEqual(self.client.get("/api/data/customers/", {"limit": "x"}).status_code, 400)
+
+    def test_swap_driver_depots(self):
+        Driver.objects.bulk_create([Driver(id="T1", name="A", depot_id="D1"), Driver(id="T2", name="B", depot_id="D2")])
+        self.assertEqual(store.swap_driver_depots("T1", "T2"), ("D1", "D2"))
+        self.assertEqual(dict(Driver.objects.values_list("id", "depot_id")), {"T1": "D2", "T2": "D1"})
+        self.assertEqual(store.StoreSource().signature("drivers"), (1, 1))
+        with self.assertRaises(store.NotFound):
+            store.swap_driver_depots("T1", "T3")
+
+    def test_export_is_scheduled_after_commit(self):
+        with mock.patch.object(store, "EXPORT_ON_WRITE", True), \
+                mock.patch.object(store, "schedule_export") as schedule, \
+                self.captureOnCommitCallbacks(execute=True):
+            store.add_customers([self.customer("A")])
+            schedule.assert_not_called()
+        schedule.assert_called_once_with(["customers"])
+
+    def test_debounced_export(self):
+        export_dir = self.enterContext(tempfile.TemporaryDirectory())
+        Depot.objects.create(id="D1", name="Depot", latitude=10, longitude=106)
+        store.add_customers([self.customer("A")])
+        with mock.patch.object(store, "EXPORT_DIR", export_dir), mock.patch.object(store, "EXPORT_DELAY", 60):
+            store.schedule_export(["customers"])
+            timer = store._export_timer
+            store.schedule_export(["depots"])
+            # Lần hẹn thứ 2 gom vào cùng timer
+            self.assertIs(store._export_timer, timer)
+            timer.cancel()
+            store.flush_exports()
+        self.assertIsNone(store._export_timer)
+        self.assertEqual(sorted(os.listdir(export_dir)), ["customers.json", "depots.json"])
+        with open(os.path.join(export_dir, "customers.json"), encoding="utf-8") as f:
+            self.assertEqual(json.load(f), store.export_records("customers"))
+
+    def test_import_json(self):
+        data_dir = self.enterContext(tempfile.TemporaryDirectory())
+        for kind, records in (
+            ("depots", [{"id": "D1", "name": "Depot", "address": "", "latitude": 10, "longitude": 106}]),
+            ("customers", [{"id": "C0007", "name": "A", "address": "1 Street", "phone": "0900",
+                            "latitude": 10.1, "longitude": 106.1}]),
+            ("drivers", [{"id": "T1", "name": "Driver", "phone": "0901", "depot_id": "D1"}]),
+        ):
+            with open(os.path.join(data_dir, f"{kind}.json"), "w", encoding="utf-8") as f:
+                json.dump(records, f)
+        self.assertEqual(store.import_json(data_dir, replace=True), {"depots": 1, "customers": 1, "drivers": 1})
+        self.assertEqual(store.export_records("customers")[0]["id"], "C0007")
+        # Bộ đếm mã tiếp tục sau mã lớn nhất đã nhập
+        self.assertEqual(store.peek_next_customer_id(), "C0008")
+
+
+def small_problem(**kwargs):
+    rng = np.random.default_rng(0)
+    return dict({"depots": [(10.0, 106.0), (10.1, 106.1)],
+                 "customers": [tuple(p) for p in (rng.uniform(0, 0.1, (12, 2)) + (10.0, 106.0)).tolist()],
+                 "num_vehicles_per_depot": 2, "strategy": "strategy5", "time_limit": 1}, **kwargs)
+
+
+class JobManagerTests(SimpleTestCase):
+    def setUp(self):
+        # Process con đọc đường dẫn cache / kế hoạch từ biến môi trường: ghi vào thư mục tạm
+        cache_dir = self.enterContext(tempfile.TemporaryDirectory())
+        self.enterContext(mock.patch.dict(os.environ, {
+            "MDVRP_PLAN_PATH": os.path.join(cache_dir, "plan.json"),
+            "MDVRP_RESULT_CACHE_DIR": "",
+            "MDVRP_STRATEGY_HISTORY": os.path.join(cache_dir, "history.jsonl"),
+        }))
+
+    def wait(self, manager, job, timeout=60):
+        deadline = time.time() + timeout
+        while job.status in ("queued", "running") and time.time() < deadline:
+            time.sleep(jobs.POLL_INTERVAL)
+        return manager.get(job.id).to_dict()
+
+    def test_job_runs_in_worker_process(self):
+        manager = jobs.JobManager(max_workers=1, use_matrix_cache=False)
+        job = manager.submit(small_problem())
+        self.assertEqual(job.to_dict()["status"], "queued")
+        data = self.wait(manager, job)
+        self.assertEqual(data["status"], "done", data.get("message"))
+        self.assertEqual(data["result"]["status"], "success")
+        # Tham số (toạ độ) được giải phóng khi job xong, chỉ giữ strategy / time_limit
+        self.assertEqual(set(job.solver_kwargs), {"strategy", "time_limit"})
+
+    def test_failed_job_reports_error(self):
+        manager = jobs.JobManager(max_workers=1, use_matrix_cache=False)
+        job = manager.submit(small_problem(num_vehicles_per_depot=None, unknown_option=1))
+        data = self.wait(manager, job)
+        self.assertEqual(data["status"], "failed")
+        self.assertIn("TypeError", data["message"])
+
+    def test_worker_logs_exceptions(self):
+        parent_conn, child_conn = mp.Pipe(duplex=False)
+        with self.assertLogs("mdvrp_app.jobs", level="ERROR") as logs, \
+                mock.patch("mdvrp_app.warm_start.get_default_plan_store"), \
+                mock.patch("mdvrp_app.result_cache.get_default_result_cache"), \
+                mock.patch("mdvrp_app.strategy_selector.get_default_strategy_history"):
+            jobs._run_job(child_conn, {"depots": []}, use_matrix_cache=False)
+        self.assertEqual(parent_conn.recv()[0], "error")
+        self.assertIn("Job failed", logs.output[0])
+
+    def test_queue_limit_and_cancel(self):
+        # max_workers=0: job không bao giờ được chạy, chỉ kiểm tra hàng đợi
+        manager = jobs.JobManager(max_workers=0, max_queue=2, use_matrix_cache=False)
+        first = manager.submit(small_problem())
+        manager.submit(small_problem())
+        with self.assertRaises(jobs.JobQueueFull):
+            manager.submit(small_problem())
+        self.assertEqual(manager.cancel(first.id).status, "cancelled")
+        self.assertEqual(manager.stats()["queued"], 1)
+        manager.submit(small_problem())
+
+    def test_timeout(self):
+        self.assertEqual(jobs.job_timeout({"strategy": "benchmark", "time_limit": 10}), 30 + jobs.TIMEOUT_GRACE)
+        self.assertEqual(jobs.job_timeout({"strategy": "benchmark", "time_limit": 10, "parallel": True}),
+                         10 + jobs.TIMEOUT_GRACE)
+        manager = jobs.JobManager(max_workers=1, use_matrix_cache=False)
+        job = manager.submit(small_problem(time_limit=30), timeout=0.5)
+        self.assertEqual(self.wait(manager, job)["status"], "timeout")
+
+
+class ResultCacheTests(SimpleTestCase):
+    LOCATIONS = [(10.0, 106.0), (10.1, 106.1)]
+
+    def setUp(self):
+        self.data_dir = self.enterContext(tempfile.TemporaryDirectory())
+        self.cache_dir = self.enterContext(tempfile.TemporaryDirectory())
+
+    def cache(self, **kwargs):
+        return ResultCache(watch=os.path.join(self.data_dir, "*.json"), **kwargs)
+
+    def test_key(self):
+        key = result_key(self.LOCATIONS, {"strategy": "strategy1", "time_limit": 5})
+        self.assertEqual(key, result_key(self.LOCATIONS, {"time_limit": 5, "strategy": "strategy1"}))
+        self.assertNotEqual(key, result_key(self.LOCATIONS, {"strategy": "strategy1", "time_limit": 6}))
+        self.assertNotEqual(key, result_key(self.LOCATIONS[::-1], {"strategy": "strategy1", "time_limit": 5}))
+
+    def test_memory_tier(self):
+        cache = self.cache(cache_dir="", max_entries=2)
+        calls = []
+
+        def compute(value):
+            calls.append(value)
+            return {"status": "success", "value": value}
+
+        self.assertEqual(cache.get_or_compute("a", lambda: compute(1))["value"], 1)
+        result = cache.get_or_compute("a", lambda: compute(2))
+        self.assertEqual(result["value"], 1)
+        # Kết quả trả về là bản sao, sửa không làm hỏng cache
+        result["value"] = 3
+        self.assertEqual(cache.get("a")["value"], 1)
+        cache.get_or_compute("b", lambda: compute(2))
+        cache.get_or_compute("c", lambda: compute(3))
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(calls, [1, 2, 3])
+        self.assertEqual(cache.stats()["hits"], 1)
+
+    def test_failures_and_expired_entries_are_not_reused(self):
+        cache = self.cache(cache_dir="")
+        cache.get_or_compute("a", lambda: {"status": "failed"})
+        self.assertIsNone(cache.get("a"))
+        expired = self.cache(cache_dir="", ttl=-1)
+        expired.put("a", {"status": "success"})
+        self.assertIsNone(expired.get("a"))
+
+    def test_disk_tier_is_shared_and_cleared_when_data_changes(self):
+        first = self.cache(cache_dir=self.cache_dir)
+        first.put("a", {"status": "success", "value": 1})
+        # Process khác (instance khác) đọc được từ đĩa
+        self.assertEqual(self.cache(cache_dir=self.cache_dir).get("a")["value"], 1)
+        with open(os.path.join(self.data_dir, "customers.json"), "w") as f:
+            f.write("[]")
+        self.assertIsNone(first.get("a"))
+        self.assertEqual(os.listdir(self.cache_dir), [])
+
+    def test_single_flight(self):
+        cache = self.cache(cache_dir="")
+        started, release = threading.Event(), threading.Event()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return {"status": "success"}
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute("a", compute)))
+                   for _ in range(3)]
+        threads[0].start()
+        started.wait(5)
+        for thread in threads[1:]:
+            thread.start()
+        while cache.stats()["deduplicated"] < 2:
+            time.sleep(0.01)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{"status": "success"}] * 3)
+
+    def test_solver_uses_cache(self):
+        cache = self.cache(cache_dir="")
+        first = solve_mdvrp_enhanced(result_cache=cache, instrument=True, **small_problem())
+        second = solve_mdvrp_enhanced(result_cache=cache, instrument=True, **small_problem())
+        self.assertEqual(first["routes"], second["routes"])
+        self.assertEqual(second["instrumentation"]["counters"].get("result_cache_hits"), 1)
+
+    def test_cache_hit_saves_plan(self):
+        # /api/viewport/routes/ vẽ kế hoạch đã lưu: kết quả lấy từ cache cũng phải được lưu
+        cache = self.cache(cache_dir="")
+        plans = PlanStore(os.path.join(self.cache_dir, "plan.json"))
+        first = solve_mdvrp_enhanced(result_cache=cache, plan_store=plans, **small_problem())
+        solve_mdvrp_enhanced(result_cache=cache, plan_store=plans, **small_problem(customers=small_problem()["customers"][:6]))
+        solve_mdvrp_enhanced(result_cache=cache, plan_store=plans, **small_problem())
+        self.assertEqual(sum(len(route["stops"]) for route in plans.load()["routes"]), 12)
+        self.assertEqual(plans.load()["total_distance"], first["total_distance"])
+
+
+def decode_polyline(text, precision=payload.POLYLINE_PRECISION):
+    """Giải mã encoded polyline theo thuật toán chuẩn (để kiểm tra encode_polylines)"""
+    values, value, shift = [], 0, 0
+    for char in text:
+        chunk = ord(char) - 63
+        value |= (chunk & 0x1F) << shift
+        shift += 5
+        if chunk < 0x20:
+            values.append(~(value >> 1) if value & 1 else value >> 1)
+            value, shift = 0, 0
+    points = np.cumsum(np.array(values).reshape(-1, 2), axis=0) / 10 ** precision
+    return [tuple(point) for point in points.tolist()]
+
+
+class PayloadTests(SimpleTestCase):
+    LOCATIONS = [(10.0, 106.0), (10.5, 106.25), (10.75, 106.5)]
+
+    def result(self):
+        route = {"vehicle_id": 0, "depot": 0, "nodes": [0, 1, 2, 0], "distance": 1.5}
+        best = {"status": "success", "routes": [route]}
+        return {"status": "success", "results": [best], "best": best}
+
+    def test_encode_polyline(self):
+        # Ví dụ trong tài liệu của Google
+        self.assertEqual(payload.encode_polyline([(38.5, -120.2), (40.7, -120.95), (43.252, -126.453)]),
+                         "_p~iF~ps|U_ulLnnqC_mqNvxq`@")
+        self.assertEqual(payload.encode_polylines(self.LOCATIONS, [[0, 1], [], [2, 0]]),
+                         [payload.encode_polyline(self.LOCATIONS[:2]), "",
+                          payload.encode_polyline([self.LOCATIONS[2], self.LOCATIONS[0]])])
+
+    def test_formats(self):
+        full = payload.format_result(self.result(), self.LOCATIONS)
+        self.assertEqual(full["best"]["routes"][0]["route"][1], {"id": 1, "lat": 10.5, "lng": 106.25})
+        # 'best' là cùng 1 object với phần tử trong 'results'
+        self.assertIs(full["best"], full["results"][0])
+
+        compact = payload.format_result(self.result(), self.LOCATIONS, "compact")
+        self.assertEqual(compact["best"]["routes"][0]["nodes"], [0, 1, 2, 0])
+        self.assertEqual(compact["locations"], [list(location) for location in self.LOCATIONS])
+
+        with self.assertRaises(ValueError):
+            payload.format_result(self.result(), self.LOCATIONS, "geojson")
+
+    def test_polyline_is_latlng_for_both_coordinate_orders(self):
+        expected = [self.LOCATIONS[node] for node in (0, 1, 2, 0)]
+        for coord_order, locations in (("latlng", self.LOCATIONS),
+                                       ("lnglat", [location[::-1] for location in self.LOCATIONS])):
+            with self.subTest(coord_order=coord_order):
+                formatted = payload.format_result(self.result(), locations, "polyline", coord_order)
+                self.assertEqual(decode_polyline(formatted["best"]["routes"][0]["polyline"]), expected)
+
+    def test_solver_polyline_with_lnglat_input(self):
+        # Flask (app.py) truyền toạ độ theo (lng, lat)
+        problem = small_problem()
+        swapped = {key: [location[::-1] for location in problem[key]] for key in ("depots", "customers")}
+        result = solve_mdvrp_enhanced(**dict(problem, **swapped), output_format="polyline", coord_order="lnglat")
+        locations = problem["depots"] + problem["customers"]
+        for route in result["routes"]:
+            expected = [tuple(round(value, 5) for value in locations[node]) for node in route["nodes"]]
+            self.assertEqual(decode_polyline(route["polyline"]), expected)
+
+    def test_encode_body(self):
+        data = {"value": np.float32(1.5), "items": list(range(1000))}
+        body, encoding = payload.encode_body(data, "gzip, deflate")
+        self.assertEqual(encoding, "gzip")
+        self.assertEqual(json.loads(gzip.decompress(body)), {"value": 1.5, "items": list(range(1000))})
+        self.assertEqual(payload.encode_body({"value": 1}, "gzip"), (b'{"value":1}', None))
+        self.assertEqual(payload.encode_body(data)[1], None)
+
+
+class StreamingTests(SimpleTestCase):
+    def setUp(self):
+        # Stream chạy trong process test: không ghi kế hoạch / lịch sử / cache ma trận thật
+        for target in ("mdvrp_app.warm_start.get_default_plan_store",
+                       "mdvrp_app.strategy_selector.get_default_strategy_history",
+                       "mdvrp_app.matrix_cache.get_default_cache"):
+            self.enterContext(mock.patch(target, return_value=None))
+        self.enterContext(mock.patch("mdvrp_app.views._solver_kwargs",
+                                     side_effect=lambda data: small_problem(**data)))
+
+    def events(self, response):
+        return [chunk.decode("utf-8").split("\n")[0] for chunk in response.streaming_content
+                if not chunk.startswith(b":")]
+
+    def test_stream_limit(self):
+        with mock.patch.object(streaming, "DEFAULT_MAX_STREAMS", 1):
+            first = self.client.get("/api/calculate/stream/", {"time_limit": "30"})
+            self.assertEqual(first.status_code, 200)
+            busy = self.client.get("/api/calculate/stream/", {"time_limit": "1"})
+            self.assertEqual(busy.status_code, 503)
+            self.assertEqual(busy["Retry-After"], "10")
+            self.assertEqual(busy.json()["status"], "busy")
+
+            content = first.streaming_content
+            start = next(content).decode("utf-8")
+            stream_id = json.loads(start.split("data: ")[1])["stream_id"]
+            self.assertEqual(self.client.post(f"/api/calculate/stream/{stream_id}/stop/").status_code, 200)
+            events = [chunk.decode("utf-8").split("\n")[0] for chunk in content if not chunk.startswith(b":")]
+            self.assertEqual(events[-1], "event: result")
+            # Solver đã xong: có chỗ cho stream mới
+            self.assertEqual(self.events(self.client.get("/api/calculate/stream/", {"time_limit": "1"}))[-1],
+                             "event: result")
+
+    def test_slot_is_released_when_stream_is_not_read(self):
+        stream = streaming.open_stream(small_problem(), max_streams=1)
+        stream._thread.join(30)
+        self.assertIsNone(streaming.get_stream(stream.id))
+        streaming.open_stream(small_problem(), max_streams=1).stop()
+
+    def test_solver_error_is_logged(self):
+        with self.assertLogs("mdvrp_app.streaming", level="ERROR") as logs:
+            response = self.client.get("/api/calculate/stream/", {"strategy": "strategy5", "unknown_option": "1"})
+            events = self.events(response)
+        self.assertEqual(events, ["event: start", "event: error"])
+        self.assertIn("failed", logs.output[0])
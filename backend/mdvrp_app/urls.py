@@ -1,10 +1,19 @@
 from django.urls import path
-from .views import calculate_routes
-from .ops import switch_drivers_depot, add_customer, get_next_customer_id
+from .views import (calculate_routes, submit_job, job_status, calculate_stream, stop_stream, metrics,
+                    viewport_points, viewport_routes)
+from .ops import switch_drivers_depot, add_customer, get_next_customer_id, export_data
 
 urlpatterns = [
     path('calculate/', calculate_routes, name='calculate_routes'),
+    path('calculate/stream/', calculate_stream, name='calculate_stream'),
+    path('calculate/stream/<str:stream_id>/stop/', stop_stream, name='stop_stream'),
+    path('jobs/', submit_job, name='submit_job'),
+    path('jobs/<str:job_id>/', job_status, name='job_status'),
     path('switch-drivers/', switch_drivers_depot, name='switch_drivers_depot'),
     path('add-customer/', add_customer, name='add_customer'),
     path('next-customer-id/', get_next_customer_id, name='get_next_customer_id'),
+    path('data/<str:kind>/', export_data, name='export_data'),
+    path('metrics/', metrics, name='metrics'),
+    path('viewport/routes/', viewport_routes, name='viewport_routes'),
+    path('viewport/<str:kind>/', viewport_points, name='viewport_points'),
 ]
@@ -1,15 +1,9 @@
-import requests
+try:
+    from .geocoding import get_default_geocoder
+except ImportError:
+    from geocoding import get_default_geocoder
+
 
 def get_coordinates(location_name):
-    url = f"https://nominatim.openstreetmap.org/search"
-    params = {
-        'q': location_name,
-        'format': 'json',
-        'limit': 1
-    }
-    headers = {'User-Agent': 'RoutePlannerBot'}
-    response = requests.get(url, params=params, headers=headers)
-    data = response.json()
-    if data:
-        return float(data[0]['lat']), float(data[0]['lon'])
-    return None
+    """(lat, lng) của địa chỉ qua geocoder dùng chung (có cache, pool kết nối, giới hạn tốc độ)"""
+    return get_default_geocoder().geocode(location_name)
@@ -0,0 +1,268 @@
+"""
+Truy vấn theo khung nhìn bản đồ (viewport): chỉ trả về phần đang hiển thị thay vì toàn bộ dữ liệu
+- bbox theo định dạng Leaflet toBBoxString(): "min_lng,min_lat,max_lng,max_lat"
+- Depot / khách hàng: GridIndex trên toạ độ (lat, lng) của dataset, dựng lại khi dataset nạp lại;
+  zoom thấp gom điểm theo lưới cố định (theo pixel ở zoom đó) thành cluster, zoom cao trả về từng marker
+- Route: lấy từ kế hoạch đã chấp nhận gần nhất (PlanStore), lọc theo khung bao của từng route,
+  đơn giản hoá đường đi (Douglas-Peucker) với sai số ~1 pixel ở zoom đó
+"""
+import os
+import threading
+
+import numpy as np
+
+try:
+    from .dataset import get_dataset
+    from .payload import encode_polylines
+    from .spatial_index import GridIndex
+    from .warm_start import get_default_plan_store, plan_routes
+except ImportError:
+    from dataset import get_dataset
+    from payload import encode_polylines
+    from spatial_index import GridIndex
+    from warm_start import get_default_plan_store, plan_routes
+
+VIEWPORT_KINDS = ("depots", "customers")
+ROUTE_FORMATS = ("polyline", "coords")
+# Từ zoom này trở lên không gom cluster nữa
+CLUSTER_MAX_ZOOM = 16
+# Bán kính gom cluster (pixel trên màn hình)
+CLUSTER_CELL_PX = 60
+# Sai số cho phép khi đơn giản hoá route (pixel)
+SIMPLIFY_TOLERANCE_PX = 1.0
+TILE_SIZE = 256
+MIN_ZOOM, MAX_ZOOM = 0, 22
+
+
+def parse_bbox(text):
+    """(min_lng, min_lat, max_lng, max_lat) từ chuỗi "min_lng,min_lat,max_lng,max_lat"; None nếu không có"""
+    if text is None or text == "":
+        return None
+    values = [float(value) for value in str(text).split(",")]
+    if len(values) != 4 or values[0] > values[2] or values[1] > values[3]:
+        raise ValueError("bbox must be min_lng,min_lat,max_lng,max_lat")
+    return tuple(values)
+
+
+def parse_zoom(value):
+    return int(min(max(int(float(value)), MIN_ZOOM), MAX_ZOOM))
+
+
+def degrees_per_pixel(zoom):
+    """Số độ kinh độ ứng với 1 pixel ở mức zoom (Web Mercator, tile 256px)"""
+    return 360.0 / (TILE_SIZE * 2 ** zoom)
+
+
+def cluster_points(coords, zoom):
+    """
+    Gom các điểm (lat, lng) theo ô lưới cố định CLUSTER_CELL_PX pixel ở mức zoom
+    (neo tại toạ độ 0 nên cluster không nhảy khi kéo bản đồ).
+    Trả về (labels, centers, counts, bounds): labels[i] là cluster của điểm i,
+    bounds là (min_lat, min_lng, max_lat, max_lng) của từng cluster.
+    """
+    cell = CLUSTER_CELL_PX * degrees_per_pixel(zoom)
+    cells = np.floor(coords / cell).astype(np.int64)
+    cells -= cells.min(axis=0)
+    keys = cells[:, 0] * (int(cells[:, 1].max()) + 1) + cells[:, 1]
+    order = np.argsort(keys, kind="stable")
+    starts = np.flatnonzero(np.diff(keys[order], prepend=-1))
+    counts = np.diff(np.append(starts, len(keys)))
+    labels = np.empty(len(keys), dtype=np.int64)
+    labels[order] = np.repeat(np.arange(len(starts)), counts)
+    ordered = coords[order]
+    centers = np.add.reduceat(ordered, starts) / counts[:, None]
+    bounds = np.hstack([np.minimum.reduceat(ordered, starts), np.maximum.reduceat(ordered, starts)])
+    return labels, centers, counts, bounds
+
+
+def simplify(points, tolerance):
+    """
+    Chỉ số các điểm giữ lại (luôn giữ điểm đầu / cuối): bỏ các điểm liên tiếp cùng ô lưới cỡ tolerance
+    (vectorized, giảm mạnh số điểm ở zoom thấp) rồi Douglas-Peucker trên phần còn lại
+    """
+    n = len(points)
+    if n <= 2 or tolerance <= 0:
+        return np.arange(n)
+    cells = np.floor(points / tolerance)
+    candidates = np.flatnonzero(np.any(np.diff(cells, axis=0, prepend=np.nan), axis=1))
+    if candidates[-1] != n - 1:
+        candidates = np.append(candidates, n - 1)
+    points = points[candidates]
+    n = len(points)
+    if n <= 2:
+        return candidates
+    keep = np.zeros(n, dtype=bool)
+    keep[[0, -1]] = True
+    stack = [(0, n - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        start, end = points[first], points[last]
+        segment = end - start
+        inner = points[first + 1:last] - start
+        length = np.hypot(segment[0], segment[1])
+        if length > 0:
+            dist = np.abs(segment[0] * inner[:, 1] - segment[1] * inner[:, 0]) / length
+        else:
+            dist = np.hypot(inner[:, 0], inner[:, 1])
+        farthest = int(dist.argmax())
+        if dist[farthest] > tolerance:
+            middle = first + 1 + farthest
+            keep[middle] = True
+            stack.append((first, middle))
+            stack.append((middle, last))
+    return candidates[keep]
+
+
+class ViewportIndex:
+    """Chỉ mục không gian của depot / khách hàng và route đã giải, dùng chung giữa các request"""
+
+    def __init__(self, dataset=None, plan_store=None):
+        self.dataset = dataset or get_dataset()
+        self.plan_store = plan_store or get_default_plan_store()
+        self._indexes = {}
+        self._routes = None
+        self._simplified = {}
+        self._lock = threading.Lock()
+
+    def _index(self, kind):
+        """GridIndex của kind; dựng lại khi dataset trả về mảng toạ độ mới (file đã nạp lại)"""
+        coords = self.dataset.coords(kind)
+        with self._lock:
+            cached = self._indexes.get(kind)
+            if cached is not None and cached[0] is coords:
+                return coords, cached[1]
+        index = GridIndex(coords)
+        with self._lock:
+            self._indexes[kind] = (coords, index)
+        return coords, index
+
+    def points(self, kind, bbox=None, zoom=MAX_ZOOM):
+        """
+        Marker / cluster của kind trong bbox.
+        zoom < CLUSTER_MAX_ZOOM: ô có 1 điểm trả về marker (bản ghi gốc), ô nhiều điểm trả về cluster
+        {"lat","lng","count","bbox"} để client phóng to vào bbox của cluster.
+        """
+        if kind not in VIEWPORT_KINDS:
+            raise ValueError(f"Unknown dataset: {kind}")
+        coords, index = self._index(kind)
+        records = self.dataset.records(kind)
+        if bbox is None:
+            visible = np.arange(len(coords))
+        else:
+            min_lng, min_lat, max_lng, max_lat = bbox
+            visible = index.query_bbox(min_lat, min_lng, max_lat, max_lng)
+
+        markers, clusters = [], []
+        if zoom >= CLUSTER_MAX_ZOOM or len(visible) < 2:
+            markers = [records[i] for i in visible.tolist()]
+        else:
+            labels, centers, counts, bounds = cluster_points(coords[visible], zoom)
+            singles = counts[labels] == 1
+            markers = [records[i] for i in visible[singles].tolist()]
+            for c in np.flatnonzero(counts > 1).tolist():
+                clusters.append({
+                    "lat": round(float(centers[c, 0]), 6),
+                    "lng": round(float(centers[c, 1]), 6),
+                    "count": int(counts[c]),
+                    "bbox": [float(bounds[c, 1]), float(bounds[c, 0]), float(bounds[c, 3]), float(bounds[c, 2])],
+                })
+        return {
+            "status": "success",
+            "kind": kind,
+            "zoom": zoom,
+            "total": len(coords),
+            "visible": len(visible),
+            "markers": markers,
+            "clusters": clusters,
+        }
+
+    def _route_index(self):
+        """(plan, đường đi (lat, lng) của từng route, khung bao (n, 4)); dựng lại khi kế hoạch mới được lưu"""
+        try:
+            stat = os.stat(self.plan_store.path)
+            signature = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            signature = None
+        with self._lock:
+            if self._routes is not None and self._routes[0] == signature:
+                return self._routes[1:]
+        plan = self.plan_store.load() if signature is not None else None
+        paths = []
+        for route in (plan_routes(plan, "latlng") if plan else []):
+            if route["stops"]:
+                paths.append(np.array([route["depot"]] + route["stops"] + [route["depot"]], dtype=np.float64))
+            else:
+                paths.append(np.empty((0, 2)))
+        # Route rỗng có khung bao (inf, -inf) nên không bao giờ giao với viewport
+        bounds = np.array([np.concatenate([path.min(axis=0), path.max(axis=0)]) if len(path)
+                           else [np.inf, np.inf, -np.inf, -np.inf] for path in paths]).reshape(-1, 4)
+        with self._lock:
+            self._routes = (signature, plan, paths, bounds)
+            self._simplified = {}
+        return plan, paths, bounds
+
+    def _simplify(self, paths, r, zoom):
+        """Đường đi route r đã đơn giản hoá ở mức zoom (cache theo kế hoạch hiện tại)"""
+        key = (r, zoom)
+        path = self._simplified.get(key)
+        if path is None:
+            path = paths[r][simplify(paths[r], SIMPLIFY_TOLERANCE_PX * degrees_per_pixel(zoom))]
+            with self._lock:
+                if self._routes is not None and self._routes[2] is paths:
+                    self._simplified[key] = path
+        return path
+
+    def routes(self, bbox=None, zoom=MAX_ZOOM, output_format="polyline"):
+        """
+        Route của kế hoạch gần nhất có giao với bbox, đường đi đã đơn giản hoá theo zoom.
+        output_format "polyline": chuỗi encoded polyline (lat, lng); "coords": mảng [[lat, lng], ...]
+        """
+        if output_format not in ROUTE_FORMATS:
+            raise ValueError(f"Unknown route format, expected one of {', '.join(ROUTE_FORMATS)}")
+        plan, paths, bounds = self._route_index()
+        visible = np.flatnonzero(np.isfinite(bounds[:, 0]))
+        if bbox is not None and len(visible):
+            min_lng, min_lat, max_lng, max_lat = bbox
+            b = bounds[visible]
+            visible = visible[(b[:, 0] <= max_lat) & (b[:, 2] >= min_lat) & (b[:, 1] <= max_lng) & (b[:, 3] >= min_lng)]
+
+        simplified = [self._simplify(paths, r, zoom) for r in visible.tolist()]
+        if output_format == "polyline":
+            offsets = np.cumsum([0] + [len(path) for path in simplified])
+            coords = np.concatenate(simplified) if simplified else np.empty((0, 2))
+            shapes = encode_polylines(coords, [range(a, b) for a, b in zip(offsets[:-1], offsets[1:])])
+        else:
+            shapes = [np.round(path, 6).tolist() for path in simplified]
+
+        routes = []
+        for r, path, shape in zip(visible.tolist(), simplified, shapes):
+            routes.append({
+                "route": r,
+                "num_stops": len(paths[r]) - 2,
+                "points": len(path),
+                "bbox": [float(bounds[r, 1]), float(bounds[r, 0]), float(bounds[r, 3]), float(bounds[r, 2])],
+                output_format: shape,
+            })
+        return {
+            "status": "success",
+            "zoom": zoom,
+            "timestamp": plan.get("timestamp") if plan else None,
+            "total": len(paths),
+            "visible": len(routes),
+            "routes": routes,
+        }
+
+
+_default_viewport = None
+_default_viewport_lock = threading.Lock()
+
+
+def get_viewport_index():
+    """ViewportIndex dùng chung trong process (dataset và PlanStore mặc định)"""
+    global _default_viewport
+    with _default_viewport_lock:
+        if _default_viewport is None:
+            _default_viewport = ViewportIndex()
+        return _default_viewport
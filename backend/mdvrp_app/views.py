@@ -1,38 +1,233 @@
 from django.shortcuts import render
 
 # Create your views here.
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from .mdvrp_solver import solve_mdvrp_enhanced
+from .matrix_cache import get_default_cache
+from .jobs import get_job_manager, JobQueueFull
+from .warm_start import get_default_plan_store
+from .result_cache import get_default_result_cache
+from .strategy_selector import get_default_strategy_history
+from .streaming import open_stream, get_stream, StreamLimitReached
+from .dataset import get_dataset
 from .utils import get_coordinates
+from .instrumentation import Trace, tracing, phase, get_metrics
+from .payload import encode_body
+from .viewport import get_viewport_index, parse_bbox, parse_zoom, MAX_ZOOM
 import json
-import os
+
+# Client nên đợi bao lâu (giây) trước khi gửi lại khi hàng đợi job / số stream đã đầy
+BUSY_RETRY_AFTER = 10
+
+
+def _solver_kwargs(data):
+    """Toạ độ depot / khách hàng từ dataset dùng chung và tham số solver từ body request"""
+    dataset = get_dataset()
+    kwargs = {
+        "depots": dataset.locations("depots"),
+        "customers": dataset.locations("customers"),
+        "num_vehicles_per_depot": data.get("num_vehicles_per_depot", 2),
+        "parallel": data.get("parallel", True),
+        "max_workers": data.get("max_workers"),
+        "neighbors_k": data.get("neighbors_k"),
+        "post_optimization": data.get("post_optimization"),
+        # true: giải tiếp từ kế hoạch đã chấp nhận lần trước (khi dữ liệu chỉ thay đổi ít)
+        "warm_start": bool(data.get("warm_start", False)),
+        # true: kèm thời gian từng giai đoạn / bộ đếm solver trong result['instrumentation']
+        "instrument": bool(data.get("instrument", False)),
+        # "full" (mặc định), "compact" (mảng chỉ số node + bảng toạ độ) hoặc "polyline"
+        "output_format": data.get("format", "full"),
+        # Dừng sớm thay vì chạy hết time_limit, vd. {"stall_time": 5, "min_improvement": 0.001}
+        "termination": data.get("termination"),
+        # strategy "auto": true/false ép đua / không đua 2 chiến lược đầu, mặc định chỉ đua khi chưa chắc
+        "race": data.get("race"),
+        # "euclidean" (mặc định) hoặc "road": khoảng cách theo đồ thị đường MDVRP_ROAD_NETWORK (km)
+        "distance_metric": data.get("distance_metric", "euclidean"),
+    }
+    for key in ("strategy", "time_limit"):
+        if key in data:
+            kwargs[key] = data[key]
+    return kwargs
+
+
+def _json_response(request, data, status=200):
+    """JSON (orjson nếu có) của kết quả lớn, nén gzip khi client gửi Accept-Encoding: gzip"""
+    body, encoding = encode_body(data, request.headers.get("Accept-Encoding"))
+    response = HttpResponse(body, content_type="application/json", status=status)
+    if encoding:
+        response["Content-Encoding"] = encoding
+    response["Vary"] = "Accept-Encoding"
+    return response
+
+
+def _busy_response(message):
+    response = JsonResponse({"status": "busy", "message": message}, status=503)
+    response["Retry-After"] = str(BUSY_RETRY_AFTER)
+    return response
+
+
+def _submit_job(kwargs, timeout=None):
+    """Đưa việc giải vào hàng đợi, trả về 202 + job_id hoặc 503 khi hàng đợi đầy"""
+    try:
+        job = get_job_manager().submit(kwargs, timeout=timeout)
+    except JobQueueFull as e:
+        return _busy_response(str(e))
+
+    response = JsonResponse({
+        "status": job.status,
+        "job_id": job.id,
+        "poll_url": f"/api/jobs/{job.id}/",
+    }, status=202)
+    response["Location"] = f"/api/jobs/{job.id}/"
+    return response
+
 
 def calculate_routes(request):
     if request.method == "POST":
+        # Mọi request đều được đo (gom vào /api/metrics/); chỉ kèm vào kết quả khi "instrument": true
+        trace = Trace()
+        status = "ok"
         try:
-            data = json.loads(request.body.decode('utf-8'))
-
-            # Giả sử lấy sẵn dữ liệu từ file JSON
-            base_dir = os.path.dirname(__file__)
-            depots_path = os.path.join(base_dir, "../../data/depots.json")
-            customers_path = os.path.join(base_dir, "../../data/customers.json")
+            with tracing(trace):
+                with phase("parse"):
+                    data = json.loads(request.body.decode('utf-8'))
+                with phase("data_load"):
+                    kwargs = _solver_kwargs(data)
 
-            with open(depots_path, "r", encoding="utf-8") as f:
-                depots = [(d["latitude"], d["longitude"]) for d in json.load(f)]
+                # "async": true -> trả job_id ngay, client hỏi kết quả qua /api/jobs/<job_id>/
+                if data.get("async"):
+                    status = "queued"
+                    return _submit_job(kwargs, timeout=data.get("job_timeout"))
 
-            with open(customers_path, "r", encoding="utf-8") as f:
-                customers = [(c["latitude"], c["longitude"]) for c in json.load(f)]
+                # Gọi solver
+                result = solve_mdvrp_enhanced(matrix_cache=get_default_cache(),
+                                              plan_store=get_default_plan_store(),
+                                              result_cache=get_default_result_cache(),
+                                              strategy_history=get_default_strategy_history(), **kwargs)
 
-            # Gọi solver
-            result = solve_mdvrp_enhanced(
-                depots=depots,
-                customers=customers,
-                num_vehicles_per_depot=data.get("num_vehicles_per_depot", 2)
-            )
-
-            return JsonResponse(result, safe=False)
+                # result['instrumentation'] chưa gồm thời gian serialize (đo sau khi đã gắn vào kết quả)
+                with phase("serialize"):
+                    return _json_response(request, result)
 
         except Exception as e:
+            status = "error"
             return JsonResponse({"status": "error", "message": str(e)}, status=500)
+        finally:
+            get_metrics().observe("calculate", trace, status)
 
     return JsonResponse({"status": "failed", "message": "Only POST allowed"}, status=405)
+
+
+def metrics(request):
+    """GET: thống kê thời gian từng giai đoạn (p50 / p90 / p99) và bộ đếm theo endpoint; DELETE: xoá thống kê"""
+    if request.method == "DELETE":
+        get_metrics().reset()
+    elif request.method != "GET":
+        return JsonResponse({"status": "failed", "message": "Only GET or DELETE allowed"}, status=405)
+    return JsonResponse(get_metrics().snapshot())
+
+
+def submit_job(request):
+    """POST: tạo job giải bất đồng bộ (cùng body với /api/calculate/)"""
+    if request.method != "POST":
+        return JsonResponse({"status": "failed", "message": "Only POST allowed"}, status=405)
+    try:
+        data = json.loads(request.body.decode('utf-8'))
+        return _submit_job(_solver_kwargs(data), timeout=data.get("job_timeout"))
+    except Exception as e:
+        return JsonResponse({"status": "error", "message": str(e)}, status=500)
+
+
+def job_status(request, job_id):
+    """GET: trạng thái / kết quả của job; DELETE: huỷ job"""
+    manager = get_job_manager()
+    if request.method == "GET":
+        job = manager.get(job_id)
+    elif request.method == "DELETE":
+        job = manager.cancel(job_id)
+    else:
+        return JsonResponse({"status": "failed", "message": "Only GET or DELETE allowed"}, status=405)
+
+    if job is None:
+        return JsonResponse({"status": "failed", "message": f"Job {job_id} not found"}, status=404)
+    return _json_response(request, job.to_dict())
+
+
+def _query_params(request):
+    """Tham số từ query string (EventSource chỉ gửi được GET): giá trị đọc như JSON nếu được"""
+    data = {}
+    for key, value in request.GET.items():
+        try:
+            data[key] = json.loads(value)
+        except ValueError:
+            data[key] = value
+    return data
+
+
+def calculate_stream(request):
+    """
+    Giải và stream lời giải trung gian bằng Server-Sent Events.
+    GET (tham số trên query string, dùng với EventSource) hoặc POST (body như /api/calculate/).
+    Sự kiện: start (stream_id, bảng toạ độ), solution (objective, elapsed_time, routes dạng chỉ số node),
+    result (kết quả cuối cùng), error.
+    """
+    if request.method not in ("GET", "POST"):
+        return JsonResponse({"status": "failed", "message": "Only GET or POST allowed"}, status=405)
+    try:
+        data = json.loads(request.body.decode('utf-8')) if request.method == "POST" else _query_params(request)
+        stream = open_stream(_solver_kwargs(data))
+    except StreamLimitReached as e:
+        return _busy_response(str(e))
+    except Exception as e:
+        return JsonResponse({"status": "error", "message": str(e)}, status=500)
+
+    response = StreamingHttpResponse(stream.events(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+def stop_stream(request, stream_id):
+    """POST: dừng solve đang stream, kết quả tốt nhất hiện có được gửi qua sự kiện result"""
+    if request.method != "POST":
+        return JsonResponse({"status": "failed", "message": "Only POST allowed"}, status=405)
+    stream = get_stream(stream_id)
+    if stream is None:
+        return JsonResponse({"status": "failed", "message": f"Stream {stream_id} not found"}, status=404)
+    stream.stop()
+    return JsonResponse({"status": "success", "message": "Stop requested"})
+
+
+def viewport_points(request, kind):
+    """
+    GET: depot / khách hàng trong khung nhìn, ?bbox=min_lng,min_lat,max_lng,max_lat&zoom=12
+    (zoom thấp trả về cluster thay cho từng marker)
+    """
+    if request.method != "GET":
+        return JsonResponse({"status": "failed", "message": "Only GET allowed"}, status=405)
+    try:
+        bbox = parse_bbox(request.GET.get("bbox"))
+        zoom = parse_zoom(request.GET.get("zoom", MAX_ZOOM))
+        return _json_response(request, get_viewport_index().points(kind, bbox, zoom))
+    except ValueError as e:
+        return JsonResponse({"status": "failed", "message": str(e)}, status=400)
+    except Exception as e:
+        return JsonResponse({"status": "error", "message": str(e)}, status=500)
+
+
+def viewport_routes(request):
+    """
+    GET: route của kế hoạch gần nhất trong khung nhìn, đường đi đã đơn giản hoá theo zoom,
+    ?bbox=...&zoom=...&format=polyline|coords
+    """
+    if request.method != "GET":
+        return JsonResponse({"status": "failed", "message": "Only GET allowed"}, status=405)
+    try:
+        bbox = parse_bbox(request.GET.get("bbox"))
+        zoom = parse_zoom(request.GET.get("zoom", MAX_ZOOM))
+        result = get_viewport_index().routes(bbox, zoom, request.GET.get("format", "polyline"))
+        return _json_response(request, result)
+    except ValueError as e:
+        return JsonResponse({"status": "failed", "message": str(e)}, status=400)
+    except Exception as e:
+        return JsonResponse({"status": "error", "message": str(e)}, status=500)
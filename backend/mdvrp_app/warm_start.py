@@ -0,0 +1,184 @@
+"""
+Warm start: giải lại từ kế hoạch đã chấp nhận lần trước khi dữ liệu chỉ thay đổi ít
+- Kế hoạch lưu theo toạ độ (không theo chỉ số) nên vẫn dùng được khi danh sách khách hàng đổi
+- map_plan: bỏ khách hàng đã bị xoá, chèn khách hàng mới vào vị trí rẻ nhất (có kiểm tra tải trọng)
+- PlanStore: lưu kế hoạch gần nhất ra đĩa (dùng chung giữa web process và job worker)
+- Kế hoạch luôn lưu toạ độ theo (lat, lng) và ghi 'coord_order'; Flask (lng, lat) và Django (lat, lng)
+  dùng chung được 1 file, plan_routes đổi về thứ tự của nơi đọc
+"""
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+DEFAULT_PLAN_PATH = os.environ.get(
+    "MDVRP_PLAN_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "plans", "last_plan.json")
+)
+
+# Toạ độ trong file kế hoạch luôn theo (lat, lng)
+PLAN_COORD_ORDER = 'latlng'
+# Khi người dùng không đặt termination: dừng nếu không cải thiện >= 0.1% trong 20% time_limit (ít nhất 1 giây)
+WARM_START_STALL_FRACTION = 0.2
+WARM_START_MIN_IMPROVEMENT = 0.001
+
+
+def _point(location, coord_order):
+    return list(location) if coord_order == PLAN_COORD_ORDER else list(location)[::-1]
+
+
+def plan_from_result(locations, result, coord_order='latlng'):
+    """
+    Chuyển kết quả solver (route dạng danh sách chỉ số node) thành kế hoạch theo toạ độ (lat, lng).
+    locations: toạ độ theo chỉ số node (solver.all_locations); coord_order: thứ tự cột toạ độ ('latlng' / 'lnglat')
+    """
+    routes = []
+    for route_info in result.get('routes', []):
+        nodes = route_info['nodes']
+        routes.append({
+            'depot': _point(locations[nodes[0]], coord_order),
+            'stops': [_point(locations[node], coord_order) for node in nodes[1:-1]]
+        })
+    return {
+        'timestamp': time.time(),
+        'strategy': result.get('strategy'),
+        'total_distance': result.get('total_distance'),
+        'coord_order': PLAN_COORD_ORDER,
+        'routes': routes
+    }
+
+
+def warm_start_termination(time_limit):
+    """Tiêu chí dừng mặc định khi giải tiếp từ kế hoạch cũ (lời giải đầu đã gần tốt)"""
+    return {
+        'stall_time': max(1.0, WARM_START_STALL_FRACTION * time_limit),
+        'min_improvement': WARM_START_MIN_IMPROVEMENT
+    }
+
+
+def plan_routes(plan, coord_order='latlng'):
+    """Route của kế hoạch với toạ độ theo coord_order (kế hoạch không ghi coord_order coi là (lat, lng))"""
+    if plan.get('coord_order', PLAN_COORD_ORDER) == coord_order:
+        return plan['routes']
+    return [{'depot': list(route['depot'])[::-1], 'stops': [list(stop)[::-1] for stop in route['stops']]}
+            for route in plan['routes']]
+
+
+def _insert_cheapest(customer, routes, loads, dense, demands, capacities, vehicle_depots):
+    """Chèn 1 khách hàng vào cạnh rẻ nhất trong tất cả route còn đủ tải trọng, False nếu không chèn được"""
+    demand = demands[customer]
+    best = None
+    for v, route in enumerate(routes):
+        if loads[v] + demand > capacities[v]:
+            continue
+        nodes = np.asarray([vehicle_depots[v]] + route + [vehicle_depots[v]], dtype=np.intp)
+        prev, nxt = nodes[:-1], nodes[1:]
+        costs = dense[prev, customer] + dense[customer, nxt] - dense[prev, nxt]
+        position = int(np.argmin(costs))
+        if best is None or costs[position] < best[0]:
+            best = (costs[position], v, position)
+    if best is None:
+        return False
+    _, v, position = best
+    routes[v].insert(position, customer)
+    loads[v] += demand
+    return True
+
+
+def map_plan(plan, solver, coord_order='latlng'):
+    """
+    Ánh xạ kế hoạch cũ lên instance của solver (toạ độ theo coord_order).
+    Trả về (routes, stats): routes[v] là danh sách node khách hàng của xe v (không gồm depot),
+    stats gồm số khách hàng giữ nguyên / bị bỏ / chèn mới.
+    """
+    num_depots = solver.num_depots
+    customer_index = {}
+    for node in range(num_depots, len(solver.all_locations)):
+        customer_index.setdefault(tuple(solver.all_locations[node]), []).append(node)
+    free_vehicles = {}
+    for v, depot in enumerate(solver.starts):
+        free_vehicles.setdefault(tuple(solver.all_locations[depot]), []).append(v)
+
+    routes = [[] for _ in range(solver.num_vehicles)]
+    loads = [0] * solver.num_vehicles
+    assigned = set()
+    dropped = 0
+    for old_route in plan_routes(plan, coord_order):
+        vehicles = free_vehicles.get(tuple(old_route['depot']))
+        for location in old_route['stops']:
+            nodes = customer_index.get(tuple(location))
+            if not nodes:
+                # Khách hàng đã bị xoá khỏi dữ liệu
+                dropped += 1
+                continue
+            if not vehicles:
+                # Depot không còn: khách hàng được chèn lại bên dưới
+                continue
+            node = nodes.pop()
+            v = vehicles[0]
+            if loads[v] + solver.demands[node] > solver.vehicle_capacities[v]:
+                continue
+            routes[v].append(node)
+            loads[v] += solver.demands[node]
+            assigned.add(node)
+        if vehicles:
+            vehicles.pop(0)
+
+    dense = solver.distance_matrix.to_dense()
+    unassigned = [node for node in range(num_depots, len(solver.all_locations)) if node not in assigned]
+    inserted = 0
+    for node in unassigned:
+        inserted += _insert_cheapest(node, routes, loads, dense, solver.demands,
+                                     solver.vehicle_capacities, solver.starts)
+
+    stats = {
+        'kept': len(assigned),
+        'dropped': dropped,
+        'inserted': inserted,
+        'unplaced': len(unassigned) - inserted
+    }
+    return routes, stats
+
+
+class PlanStore:
+    """Lưu kế hoạch đã chấp nhận gần nhất (file JSON, ghi nguyên tử)"""
+
+    def __init__(self, path=DEFAULT_PLAN_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def save(self, plan):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with self._lock:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(plan, f)
+            os.replace(tmp_path, self.path)
+
+    def load(self):
+        """Kế hoạch gần nhất, None nếu chưa có"""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def clear(self):
+        with self._lock:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def get_default_plan_store():
+    """PlanStore dùng chung (file mặc định hoặc MDVRP_PLAN_PATH)"""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = PlanStore()
+        return _default_store
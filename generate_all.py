@@ -1,153 +1,288 @@
-# import json
-# import random
-# import os
-# import math
-# from shapely.geometry import shape, Point
-#
-# # --- CÁC THAM SỐ CẤU HÌNH ---
-# NUM_DEPOTS = 250
-# NUM_CUSTOMERS = 800
-# NUM_DRIVERS = 500
-# OUTPUT_DIR = "data"
-# BOUNDARY_FILE = os.path.join(OUTPUT_DIR, "mr7_boundary.geojson")
-#
-# # --- DỮ LIỆU ĐỂ TẠO ĐỊA CHỈ ĐA DẠNG ---
-# # (Giữ nguyên các danh sách phường và đường)
-# WARDS_IN_DISTRICT_7 = [
-#     "Tân Thuận Đông", "Tân Thuận Tây", "Tân Kiểng", "Tân Hưng",
-#     "Bình Thuận", "Tân Quy", "Phú Thuận", "Tân Phú", "Tân Phong", "Phú Mỹ"
-# ]
-# STREET_NAMES = [
-#     "Nguyễn Thị Thập", "Huỳnh Tấn Phát", "Lê Văn Lương", "Nguyễn Hữu Thọ",
-#     "Trần Xuân Soạn", "Lâm Văn Bền", "Phạm Hữu Lầu", "Nguyễn Lương Bằng"
-# ]
-#
-#
-# # --- HÀM MỚI ĐỂ TẠO TỌA ĐỘ AN TOÀN ---
-#
-# def load_boundary_polygon(filepath):
-#     """Tải ranh giới từ file GeoJSON và trả về một đối tượng Polygon."""
-#     try:
-#         with open(filepath, 'r', encoding='utf-8') as f:
-#             geojson_data = json.load(f)
-#         # Giả sử file geojson chỉ có 1 feature là Polygon
-#         return shape(geojson_data['features'][0]['geometry'])
-#     except Exception as e:
-#         print(f"Lỗi: Không thể tải file ranh giới '{filepath}'. Lỗi: {e}")
-#         return None
-#
-#
-# def generate_random_point_in_polygon(polygon):
-#     """Tạo một điểm ngẫu nhiên chắc chắn nằm trong Polygon cho trước."""
-#     min_lon, min_lat, max_lon, max_lat = polygon.bounds
-#     while True:
-#         # Tạo điểm ngẫu nhiên trong bounding box
-#         random_point = Point(random.uniform(min_lon, max_lon), random.uniform(min_lat, max_lat))
-#         # Kiểm tra xem điểm có nằm trong ranh giới không
-#         if polygon.contains(random_point):
-#             return round(random_point.y, 6), round(random_point.x, 6)  # Trả về (latitude, longitude)
-#
-#
-# # --- CÁC HÀM GENERATE ĐƯỢC CẬP NHẬT ---
-#
-# def generate_random_address():
-#     # ... (Hàm này giữ nguyên)
-#     street = random.choice(STREET_NAMES)
-#     ward = random.choice(WARDS_IN_DISTRICT_7)
-#     house_number = random.randint(1, 1500)
-#     if random.random() < 0.3:
-#         return f"{house_number}/{random.randint(1, 50)} {street}, P. {ward}, Quận 7, TP. HCM"
-#     return f"{house_number} {street}, P. {ward}, Quận 7, TP. HCM"
-#
-#
-# def generate_depots_data(num_depots, polygon):
-#     """Tạo dữ liệu kho với tọa độ an toàn."""
-#     depots_list = []
-#     print(f"Đang tạo {num_depots} depots...")
-#     for i in range(num_depots):
-#         depot_id = i + 1
-#         lat, lon = generate_random_point_in_polygon(polygon)  # SỬ DỤNG HÀM MỚI
-#         depot = {
-#             "id": f"{depot_id:02d}",
-#             "name": f"Kho Quân khu 7 - {depot_id:02d}",
-#             "address": generate_random_address(),
-#             "latitude": lat,
-#             "longitude": lon
-#         }
-#         depots_list.append(depot)
-#     print("-> Tạo depots thành công!")
-#     return depots_list
-#
-#
-# def generate_customers_data(num_customers, polygon):
-#     """Tạo dữ liệu khách hàng với tọa độ an toàn."""
-#     customers_list = []
-#     print(f"Đang tạo {num_customers} customers...")
-#     # ... (danh sách tên giữ nguyên)
-#     for i in range(num_customers):
-#         customer_id = i + 1
-#         lat, lon = generate_random_point_in_polygon(polygon)  # SỬ DỤNG HÀM MỚI
-#         customer = {
-#             "id": customer_id,
-#             "name": f"Khách hàng {customer_id}",  # Sửa lại tên cho đơn giản
-#             "phone": f"09{random.randint(10000000, 99999999)}",
-#             "email": f"customer.{customer_id}@example.com",
-#             "address": generate_random_address(),
-#             "latitude": lat,
-#             "longitude": lon
-#         }
-#         customers_list.append(customer)
-#     print("-> Tạo customers thành công!")
-#     return customers_list
-#
-#
-# def generate_drivers_data(num_drivers):
-#     # ... (Hàm này giữ nguyên, vì không chứa tọa độ)
-#     drivers_list = []
-#     print(f"Đang tạo {num_drivers} drivers...")
-#     for i in range(num_drivers):
-#         driver_id = i + 1
-#         depot_id = math.floor(i / 2) + 1
-#         driver = {
-#             "id": f"{driver_id:03d}",
-#             "name": f"Tài xế {driver_id}",
-#             "phone": f"09{random.randint(10000000, 99999999)}",
-#             "depot_id": f"{depot_id:02d}"
-#         }
-#         drivers_list.append(driver)
-#     print("-> Tạo drivers thành công!")
-#     return drivers_list
-#
-#
-# def save_to_json(data, filename):
-#     # ... (Hàm này giữ nguyên)
-#     if not os.path.exists(OUTPUT_DIR):
-#         os.makedirs(OUTPUT_DIR)
-#     filepath = os.path.join(OUTPUT_DIR, filename)
-#     with open(filepath, 'w', encoding='utf-8') as f:
-#         json.dump(data, f, ensure_ascii=False, indent=2)
-#     print(f"Đã lưu thành công dữ liệu vào file: {filepath}\n")
-#
-#
-# # --- CHƯƠNG TRÌNH CHÍNH ---
-# if __name__ == "__main__":
-#     # 1. Tải ranh giới Quân khu 7
-#     mr7_polygon = load_boundary_polygon(BOUNDARY_FILE)
-#
-#     if mr7_polygon:
-#         print("Tải ranh giới địa lý thành công!")
-#
-#         # 2. Tạo dữ liệu drivers (không cần ranh giới)
-#         drivers_data = generate_drivers_data(NUM_DRIVERS)
-#         save_to_json(drivers_data, "drivers.json")
-#
-#         # 3. Tạo depots và customers với tọa độ được đảm bảo
-#         depots_data = generate_depots_data(NUM_DEPOTS, mr7_polygon)
-#         save_to_json(depots_data, "depots.json")
-#
-#         customers_data = generate_customers_data(NUM_CUSTOMERS, mr7_polygon)
-#         save_to_json(customers_data, "customers.json")
-#
-#         print("Hoàn tất! Đã tạo 3 file JSON với tọa độ chính xác.")
-#     else:
-#         print("Không thể tạo dữ liệu do không tải được file ranh giới.")
\ No newline at end of file
+"""
+Sinh dữ liệu depots / customers / drivers giả lập bên trong ranh giới data/mr7_boundary.geojson
+- Lấy mẫu theo lô bằng numpy: kiểm tra điểm-trong-đa-giác (ray casting) vectorized trên cả lô,
+  không cần shapely, không kiểm tra từng điểm
+- Khách hàng phân bố đều (uniform), theo cụm (clustered) hoặc trộn (mixed)
+- Nhu cầu (demand) theo phân phối unit / uniform / poisson / lognormal
+- Cùng seed cho cùng dữ liệu
+- 100k khách hàng trong vài giây:
+    python generate_all.py --customers 100000 --output /tmp/mdvrp_100k
+Sau khi sinh vào data/, nạp lại database bằng:
+    cd backend && python manage.py sync_json_data import --replace
+"""
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+OUTPUT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+BOUNDARY_FILE = os.path.join(OUTPUT_DIR, "mr7_boundary.geojson")
+
+NUM_DEPOTS = 250
+NUM_CUSTOMERS = 800
+NUM_DRIVERS = 500
+
+# Dữ liệu để tạo tên / địa chỉ (giống dữ liệu mẫu trong data/)
+FAMILY_NAMES = ["Nguyễn", "Trần", "Lê", "Phạm", "Hoàng", "Huỳnh", "Võ", "Đặng", "Bùi", "Đỗ"]
+MIDDLE_NAMES = ["Văn", "Thị", "Minh", "Bảo", "Thuỳ"]
+GIVEN_NAMES = ["An", "Bình", "Cường", "Dung", "Hải", "Linh", "Minh", "Nga", "Phương", "Quân"]
+STREET_NAMES = [
+    "Lê Lợi", "Nguyễn Huệ", "Trần Hưng Đạo", "Hùng Vương", "Quang Trung", "Lý Thường Kiệt",
+    "Phan Bội Châu", "Cách Mạng Tháng Tám", "Điện Biên Phủ", "30/4"
+]
+AREAS = [
+    "TP. Bà Rịa, Bà Rịa - Vũng Tàu", "TP. Vũng Tàu, Bà Rịa - Vũng Tàu", "Thị xã Phú Mỹ, Bà Rịa - Vũng Tàu",
+    "Huyện Châu Đức, Bà Rịa - Vũng Tàu", "Huyện Xuyên Mộc, Bà Rịa - Vũng Tàu",
+    "TP. Biên Hòa, Đồng Nai", "TP. Long Khánh, Đồng Nai", "Huyện Long Thành, Đồng Nai",
+    "Huyện Nhơn Trạch, Đồng Nai", "Huyện Trảng Bom, Đồng Nai",
+    "TP. Thủ Dầu Một, Bình Dương", "TP. Dĩ An, Bình Dương", "TP. Thuận An, Bình Dương",
+    "Thị xã Bến Cát, Bình Dương", "Huyện Dầu Tiếng, Bình Dương",
+    "TP. Tây Ninh, Tây Ninh", "Thị xã Hòa Thành, Tây Ninh", "Thị xã Trảng Bàng, Tây Ninh",
+    "Huyện Gò Dầu, Tây Ninh", "Huyện Dương Minh Châu, Tây Ninh",
+    "TP. Đồng Xoài, Bình Phước", "Thị xã Bình Long, Bình Phước", "Thị xã Phước Long, Bình Phước",
+    "Huyện Chơn Thành, Bình Phước", "Huyện Bù Đăng, Bình Phước",
+    "TP. Phan Thiết, Bình Thuận", "Thị xã La Gi, Bình Thuận", "Huyện Bắc Bình, Bình Thuận",
+    "Huyện Hàm Thuận Bắc, Bình Thuận", "Huyện Tuy Phong, Bình Thuận",
+    "TP. Đà Lạt, Lâm Đồng", "TP. Bảo Lộc, Lâm Đồng", "Huyện Di Linh, Lâm Đồng",
+    "Huyện Đức Trọng, Lâm Đồng", "Huyện Lâm Hà, Lâm Đồng",
+    "TP. Tân An, Long An", "Thị xã Kiến Tường, Long An", "Huyện Bến Lức, Long An",
+    "Huyện Cần Giuộc, Long An", "Huyện Đức Hòa, Long An",
+    "TP. Thủ Đức, TP. Hồ Chí Minh", "Quận 1, TP. Hồ Chí Minh", "Quận 3, TP. Hồ Chí Minh",
+    "Quận Gò Vấp, TP. Hồ Chí Minh", "Huyện Củ Chi, TP. Hồ Chí Minh", "Huyện Bình Chánh, TP. Hồ Chí Minh"
+]
+
+LAYOUTS = ("uniform", "clustered", "mixed")
+DEMANDS = ("unit", "uniform", "poisson", "lognormal")
+# 1 độ vĩ ~ 111 km
+KM_PER_DEGREE = 111.0
+
+
+# ----------------------------------------------------------------------
+# Ranh giới và lấy mẫu điểm
+# ----------------------------------------------------------------------
+def load_boundary_rings(filepath):
+    """Các vòng (mảng (m, 2) lng/lat) của Polygon / MultiPolygon đầu tiên trong file GeoJSON"""
+    with open(filepath, "r", encoding="utf-8") as f:
+        geojson_data = json.load(f)
+    geometry = geojson_data["features"][0]["geometry"] if "features" in geojson_data else geojson_data
+    polygons = geometry["coordinates"] if geometry["type"] == "MultiPolygon" else [geometry["coordinates"]]
+    return [np.asarray(ring, dtype=np.float64) for polygon in polygons for ring in polygon]
+
+
+class Boundary:
+    """Đa giác đã chuẩn bị sẵn các cạnh để kiểm tra điểm-trong-đa-giác cho cả mảng điểm"""
+
+    def __init__(self, rings):
+        starts, ends = [], []
+        for ring in rings:
+            starts.append(ring)
+            ends.append(np.roll(ring, -1, axis=0))
+        self.starts = np.concatenate(starts)
+        self.ends = np.concatenate(ends)
+        points = np.concatenate(rings)
+        self.min_lng, self.min_lat = points.min(axis=0)
+        self.max_lng, self.max_lat = points.max(axis=0)
+
+    @classmethod
+    def from_file(cls, filepath):
+        return cls(load_boundary_rings(filepath))
+
+    def contains(self, lng, lat):
+        """Mảng bool: điểm (lng[i], lat[i]) nằm trong đa giác (quy tắc chẵn-lẻ, lỗ cũng được xử lý)"""
+        inside = np.zeros(len(lng), dtype=bool)
+        for (x1, y1), (x2, y2) in zip(self.starts, self.ends):
+            if y1 == y2:
+                continue
+            crosses = (y1 > lat) != (y2 > lat)
+            x_cross = x1 + (lat - y1) * (x2 - x1) / (y2 - y1)
+            inside ^= crosses & (lng < x_cross)
+        return inside
+
+    def sample_uniform(self, rng, count):
+        """count điểm phân bố đều trong đa giác: (lat, lng)"""
+        return self._rejection_sample(rng, count, lambda n: (
+            rng.uniform(self.min_lng, self.max_lng, n), rng.uniform(self.min_lat, self.max_lat, n)
+        ))
+
+    def sample_clustered(self, rng, count, num_clusters, cluster_std_km):
+        """count điểm theo phân phối chuẩn quanh num_clusters tâm (tâm nằm trong đa giác, trọng số ngẫu nhiên)"""
+        centers_lat, centers_lng = self.sample_uniform(rng, num_clusters)
+        weights = rng.dirichlet(np.full(num_clusters, 2.0))
+        std_lat = cluster_std_km / KM_PER_DEGREE
+        std_lng = std_lat / np.cos(np.radians(centers_lat))
+
+        def candidates(n):
+            cluster = rng.choice(num_clusters, size=n, p=weights)
+            return (rng.normal(centers_lng[cluster], std_lng[cluster]),
+                    rng.normal(centers_lat[cluster], std_lat))
+        return self._rejection_sample(rng, count, candidates)
+
+    def _rejection_sample(self, rng, count, candidates):
+        """Sinh ứng viên theo lô, giữ các điểm trong đa giác tới khi đủ count"""
+        lats, lngs = [], []
+        found = 0
+        # Tỉ lệ chấp nhận ước lượng lại sau mỗi lô để lô sau vừa đủ
+        acceptance = 0.5
+        while found < count:
+            batch = int((count - found) / max(acceptance, 0.01) * 1.1) + 16
+            lng, lat = candidates(batch)
+            mask = self.contains(lng, lat)
+            acceptance = max(mask.mean(), 0.01)
+            lats.append(lat[mask])
+            lngs.append(lng[mask])
+            found += int(mask.sum())
+        return np.concatenate(lats)[:count], np.concatenate(lngs)[:count]
+
+
+# ----------------------------------------------------------------------
+# Sinh bản ghi
+# ----------------------------------------------------------------------
+def random_names(rng, count):
+    family = rng.integers(len(FAMILY_NAMES), size=count)
+    middle = rng.integers(len(MIDDLE_NAMES), size=count)
+    given = rng.integers(len(GIVEN_NAMES), size=count)
+    return [f"{FAMILY_NAMES[f]} {MIDDLE_NAMES[m]} {GIVEN_NAMES[g]}" for f, m, g in zip(family, middle, given)]
+
+
+def random_addresses(rng, count):
+    house = rng.integers(1, 1501, size=count)
+    alley = np.where(rng.random(count) < 0.1, rng.integers(1, 51, size=count), 0)
+    street = rng.integers(len(STREET_NAMES), size=count)
+    area = rng.integers(len(AREAS), size=count)
+    return [f"{h}/{a} {STREET_NAMES[s]}, {AREAS[r]}" if a else f"{h} {STREET_NAMES[s]}, {AREAS[r]}"
+            for h, a, s, r in zip(house.tolist(), alley.tolist(), street.tolist(), area.tolist())]
+
+
+def random_phones(rng, count):
+    return [f"09{number:08d}" for number in rng.integers(10_000_000, 100_000_000, size=count).tolist()]
+
+
+def random_demands(rng, count, distribution="unit", mean=3.0, max_demand=20):
+    """Nhu cầu nguyên trong [1, max_demand] theo phân phối cho trước"""
+    if distribution == "unit":
+        return np.ones(count, dtype=np.int64)
+    if distribution == "uniform":
+        values = rng.integers(1, int(2 * mean), size=count, endpoint=True)
+    elif distribution == "poisson":
+        values = rng.poisson(mean - 1, size=count) + 1
+    elif distribution == "lognormal":
+        sigma = 0.75
+        values = np.rint(rng.lognormal(np.log(mean) - sigma ** 2 / 2, sigma, size=count))
+    else:
+        raise ValueError(f"Unknown demand distribution: {distribution}")
+    return np.clip(values, 1, max_demand).astype(np.int64)
+
+
+def generate_depots(rng, boundary, num_depots):
+    lat, lng = boundary.sample_uniform(rng, num_depots)
+    width = max(3, len(str(num_depots)))
+    return [{
+        "id": f"{i + 1:0{width}d}",
+        "name": f"Kho Trung tâm - {i + 1:0{width}d}",
+        "address": address,
+        "latitude": y,
+        "longitude": x
+    } for i, (address, y, x) in enumerate(zip(random_addresses(rng, num_depots),
+                                              np.round(lat, 6).tolist(), np.round(lng, 6).tolist()))]
+
+
+def generate_customers(rng, boundary, num_customers, layout="uniform", num_clusters=20, cluster_std_km=5.0,
+                       clustered_fraction=0.7, demand="unit", demand_mean=3.0, max_demand=20):
+    """Khách hàng theo layout; trường demand chỉ ghi khi demand khác 'unit'"""
+    if layout == "uniform":
+        lat, lng = boundary.sample_uniform(rng, num_customers)
+    elif layout == "clustered":
+        lat, lng = boundary.sample_clustered(rng, num_customers, num_clusters, cluster_std_km)
+    elif layout == "mixed":
+        num_clustered = int(round(num_customers * clustered_fraction))
+        c_lat, c_lng = boundary.sample_clustered(rng, num_clustered, num_clusters, cluster_std_km)
+        u_lat, u_lng = boundary.sample_uniform(rng, num_customers - num_clustered)
+        order = rng.permutation(num_customers)
+        lat, lng = np.concatenate([c_lat, u_lat])[order], np.concatenate([c_lng, u_lng])[order]
+    else:
+        raise ValueError(f"Unknown layout: {layout}")
+
+    names = random_names(rng, num_customers)
+    addresses = random_addresses(rng, num_customers)
+    phones = random_phones(rng, num_customers)
+    demands = random_demands(rng, num_customers, demand, demand_mean, max_demand).tolist()
+    customers = [{
+        "id": f"C{i + 1:04d}",
+        "name": name,
+        "address": address,
+        "phone": phone,
+        "latitude": y,
+        "longitude": x
+    } for i, (name, address, phone, y, x) in enumerate(zip(names, addresses, phones,
+                                                           np.round(lat, 6).tolist(), np.round(lng, 6).tolist()))]
+    if demand != "unit":
+        for customer, value in zip(customers, demands):
+            customer["demand"] = value
+    return customers
+
+
+def generate_drivers(rng, depots, num_drivers):
+    """Tài xế chia đều cho các depot theo thứ tự (như dữ liệu mẫu: 2 tài xế / depot)"""
+    width = max(4, len(str(num_drivers)))
+    per_depot = max(1, -(-num_drivers // len(depots)))
+    return [{
+        "id": f"{i + 1:0{width}d}",
+        "name": name,
+        "phone": phone,
+        "depot_id": depots[min(i // per_depot, len(depots) - 1)]["id"]
+    } for i, (name, phone) in enumerate(zip(random_names(rng, num_drivers), random_phones(rng, num_drivers)))]
+
+
+def generate(num_depots=NUM_DEPOTS, num_customers=NUM_CUSTOMERS, num_drivers=NUM_DRIVERS, seed=0,
+             boundary_file=BOUNDARY_FILE, **customer_options):
+    """Sinh cả bộ dữ liệu: dict depots / customers / drivers (cùng seed cho cùng kết quả)"""
+    rng = np.random.default_rng(seed)
+    boundary = Boundary.from_file(boundary_file)
+    depots = generate_depots(rng, boundary, num_depots)
+    customers = generate_customers(rng, boundary, num_customers, **customer_options)
+    drivers = generate_drivers(rng, depots, num_drivers)
+    return {"depots": depots, "customers": customers, "drivers": drivers}
+
+
+def save_to_json(data, output_dir, filename, indent=2):
+    os.makedirs(output_dir, exist_ok=True)
+    filepath = os.path.join(output_dir, filename)
+    with open(filepath, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=indent)
+    return filepath
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sinh dữ liệu depots / customers / drivers giả lập")
+    parser.add_argument("--depots", type=int, default=NUM_DEPOTS)
+    parser.add_argument("--customers", type=int, default=NUM_CUSTOMERS)
+    parser.add_argument("--drivers", type=int, default=NUM_DRIVERS)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--layout", choices=LAYOUTS, default="uniform")
+    parser.add_argument("--clusters", type=int, default=20)
+    parser.add_argument("--cluster-std-km", type=float, default=5.0)
+    parser.add_argument("--clustered-fraction", type=float, default=0.7, help="tỉ lệ khách theo cụm (layout mixed)")
+    parser.add_argument("--demand", choices=DEMANDS, default="unit")
+    parser.add_argument("--demand-mean", type=float, default=3.0)
+    parser.add_argument("--max-demand", type=int, default=20)
+    parser.add_argument("--boundary", default=BOUNDARY_FILE)
+    parser.add_argument("--output", default=OUTPUT_DIR)
+    parser.add_argument("--compact", action="store_true", help="ghi JSON không thụt lề (file nhỏ, ghi nhanh)")
+    args = parser.parse_args()
+
+    start_time = time.time()
+    data = generate(args.depots, args.customers, args.drivers, seed=args.seed, boundary_file=args.boundary,
+                    layout=args.layout, num_clusters=args.clusters, cluster_std_km=args.cluster_std_km,
+                    clustered_fraction=args.clustered_fraction, demand=args.demand,
+                    demand_mean=args.demand_mean, max_demand=args.max_demand)
+    generated_time = time.time() - start_time
+    for name in ("drivers", "depots", "customers"):
+        path = save_to_json(data[name], args.output, f"{name}.json", indent=None if args.compact else 2)
+        print(f"Đã lưu {len(data[name])} {name} vào file: {path}")
+    print(f"Sinh dữ liệu: {generated_time:.2f}s, tổng cộng (cả ghi file): {time.time() - start_time:.2f}s")
+
+
+if __name__ == "__main__":
+    main()